@@ -130,6 +130,8 @@ class ApplicationConfig:
 
     config_file: str = "config.json"
     config_path: str = "config/"
+    # Files received from peers' clipboards
+    received_files_path: str = "received/"
 
     server_key: str = "server"
     client_key: str = "client"
@@ -139,6 +141,35 @@ class ApplicationConfig:
     max_chunk_size: int = 1024  # 1 KB
     max_delay_tolerance: float = 0.1
     auto_chunk: bool = True
+    # Send-side batching: frames already queued are coalesced into one
+    # transport write up to this many bytes, waiting at most
+    # ``max_batch_latency`` seconds for more. 0 bytes disables batching.
+    max_batch_bytes: int = 16384
+    max_batch_latency: float = 0.0
+    # Stream chunk size (data bytes per frame) offered per stream type
+    # (StreamType values) to peers that support stream chunk frames; the
+    # smaller of both sides' offers is used. Bulk streams get large chunks,
+    # interactive streams keep small frames. (stream_type, size) pairs.
+    stream_chunk_sizes: tuple[tuple[int, int], ...] = (
+        (0, 16384),  # COMMAND
+        (1, 1024),  # MOUSE
+        (4, 1024),  # KEYBOARD
+        (12, 65536),  # CLIPBOARD
+        (16, 1048576),  # FILE
+    )
+    # Stream types (StreamType values) that use the BufferedProtocol
+    # receive path (model.connection.ProtocolStreamWrapper). Opt-in.
+    buffered_protocol_streams: tuple[int, ...] = ()
+    # Stream types (StreamType values) that offer payload compression.
+    # Messages whose body reaches ``compression_threshold`` bytes are
+    # compressed; from ``compression_offload_size`` on, (de)compression
+    # runs in a worker thread instead of on the event loop.
+    compressed_streams: tuple[int, ...] = (12, 16)  # CLIPBOARD, FILE
+    compression_threshold: int = 4096
+    compression_offload_size: int = 256 * 1024
+    # Largest clipboard image (encoded PNG) read locally or accepted from a
+    # peer, in bytes.
+    max_clipboard_image_size: int = 32 * 1024 * 1024
 
     DEFAULT_HOST: str = "0.0.0.0"
     DEFAULT_PORT: int = 55655
@@ -181,6 +212,9 @@ class ApplicationConfig:
     def get_certificate_path(self) -> str:
         return os.path.join(self.get_config_dir(), self.ssl_path)
 
+    def get_received_files_dir(self) -> str:
+        return os.path.join(self.get_save_path(), self.received_files_path)
+
     @classmethod
     def _linux_xdg_dirs(cls) -> Tuple[str, str, Optional[str]]:
         """Return the XDG ``(config, state, runtime)`` directories for the app.
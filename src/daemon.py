@@ -38,6 +38,10 @@ from service.client import Client
 from service.server import Server, ServerStartError
 from utils import BackgroundTasks
 from utils.logging import Logger, get_logger
+from utils.metrics import EXPORT_WINDOWS
+from utils.metrics.loop import LoopMonitor
+from utils.metrics.profiler import SamplingProfiler
+from utils.metrics.trace import TRACER
 from utils.cli import DaemonArguments
 from utils.permissions import PermissionChecker
 from utils.permissions._base import PermissionResult, PermissionStatus, PermissionType
@@ -147,6 +151,14 @@ class DaemonCommand(StrEnum):
     GET_PERMISSIONS = "get_permissions"
     REQUEST_PERMISSIONS = "request_permissions"
 
+    # Diagnostics
+    SET_LATENCY_TRACE = "set_latency_trace"
+    GET_LATENCY_TRACE = "get_latency_trace"
+    SET_LOOP_MONITOR = "set_loop_monitor"
+    GET_LOOP_STATS = "get_loop_stats"
+    START_PROFILER = "start_profiler"
+    STOP_PROFILER = "stop_profiler"
+
     def __init__(self, params: Optional[Dict[str, Any]] = None):
         self._params = params if params is not None else {}
 
@@ -298,6 +310,10 @@ class Daemon:
         self._shutdown_event = asyncio.Event()
         self._socket_server: Optional[asyncio.AbstractServer] = None
         self._permission_watchdog_task: Optional[asyncio.Task] = None
+        # Held while SET_LOOP_MONITOR has the loop monitor on
+        self._loop_monitor: Optional[LoopMonitor] = None
+        # Created by the first START_PROFILER
+        self._profiler: Optional[SamplingProfiler] = None
         # Service deferred at startup because required OS permissions were
         # missing. The permission gate poller starts it once granted.
         self._pending_service: Optional[str] = None
@@ -884,6 +900,13 @@ class Daemon:
             self._permission_watchdog_task.cancel()
             self._permission_watchdog_task = None
 
+        if self._loop_monitor is not None:
+            self._loop_monitor.release()
+            self._loop_monitor = None
+
+        if self._profiler is not None and self._profiler.running:
+            await asyncio.to_thread(self._profiler.stop)
+
         async with self._client_connection_lock:
             if self._connected_client_writer is not None:
                 try:
@@ -1505,6 +1528,7 @@ class Daemon:
                 "start_time": self._state["server"].get_timestamp(),
                 "monitors": server_monitors,
                 "pending_approvals": pending_approvals,
+                "peer_clocks": self._server.get_peer_clocks(),
             }  # ty:ignore[invalid-assignment]
 
         if self._client_config and self._client:
@@ -1517,6 +1541,7 @@ class Daemon:
                 "otp_needed": await self._client.otp_needed(),
                 "service_choice_needed": await self._client.server_choice_needed(),
                 "security_info": client_security_info,
+                "peer_clock": self._client.get_peer_clock(),
             }  # ty:ignore[invalid-assignment]
             status["client_info"]["server_info"]["security_info"] = (  # ty:ignore[index]
                 client_security_info
@@ -1531,6 +1556,61 @@ class Daemon:
             command, "Status retrieved", result_data=status
         )
 
+    @CommandHandler.register(DaemonCommand.START_PROFILER)
+    async def _handle_start_profiler(self, params: Dict[str, Any]) -> None:
+        """Start the sampling profiler for a bounded time.
+
+        Params:
+          - ``duration`` (float, optional): seconds to sample, default 30,
+            at most ``SamplingProfiler.MAX_DURATION``.
+          - ``interval_ms`` (float, optional): sampling period, default 10.
+
+        The collapsed stacks land in the state directory when the duration
+        elapses or on STOP_PROFILER, which also returns the file path.
+        """
+        command = DaemonCommand.START_PROFILER.value
+        try:
+            if self._profiler is not None and self._profiler.running:
+                raise RuntimeError("Profiler already running")
+            interval_ms = float(
+                params.get("interval_ms", SamplingProfiler.DEFAULT_INTERVAL * 1000)
+            )
+            if interval_ms <= 0:
+                raise ValueError("'interval_ms' must be positive")
+            duration = float(params.get("duration", SamplingProfiler.DEFAULT_DURATION))
+            self._profiler = SamplingProfiler(
+                ApplicationConfig.get_state_path(),
+                interval=interval_ms / 1000,
+                labels={threading.get_ident(): "event-loop"},
+            )
+            self._profiler.start(duration)
+            await self._notification_manager.notify_command_success(
+                command,
+                "Profiler started",
+                result_data={"duration": duration, "interval_ms": interval_ms},
+            )
+        except Exception as e:
+            await self._notification_manager.notify_command_error(command, f"{str(e)}")
+
+    @CommandHandler.register(DaemonCommand.STOP_PROFILER)
+    async def _handle_stop_profiler(self, params: Dict[str, Any]) -> None:
+        """Stop the profiler (if still running) and report its last run."""
+        command = DaemonCommand.STOP_PROFILER.value
+        try:
+            if self._profiler is None:
+                raise RuntimeError("Profiler was never started")
+            # Joins the sampler thread, which writes the file
+            result = await asyncio.to_thread(self._profiler.stop)
+            if result is None:
+                raise RuntimeError("Profiler did not finish in time")
+            if result["error"]:
+                raise OSError(f"Could not write profile: {result['error']}")
+            await self._notification_manager.notify_command_success(
+                command, f"Profile written to {result['path']}", result_data=result
+            )
+        except Exception as e:
+            await self._notification_manager.notify_command_error(command, f"{str(e)}")
+
     @CommandHandler.register(DaemonCommand.GET_SERVER_CONFIG)
     async def _handle_get_server_config(self, params: Dict[str, Any]) -> None:
         """Get server configuration."""
@@ -1894,6 +1974,126 @@ class Daemon:
         except Exception as e:
             await self._notification_manager.notify_command_error(command, f"{str(e)}")
 
+    @CommandHandler.register(DaemonCommand.SET_LATENCY_TRACE)
+    async def _handle_set_latency_trace(self, params: Dict[str, Any]) -> None:
+        """Turn sampled input-latency tracing on or off.
+
+        Params:
+          - ``enabled`` (bool, required).
+          - ``sample_every`` (int, optional): trace one input event in N.
+          - ``reset`` (bool, optional): drop the hop histograms collected so far.
+
+        Tracing must be on in both the server and the client daemon: each
+        side times its own hops.
+        """
+        command = DaemonCommand.SET_LATENCY_TRACE.value
+        try:
+            if "enabled" not in params:
+                raise ValueError("'enabled' is required")
+            if params.get("reset"):
+                TRACER.reset()
+            if params["enabled"]:
+                TRACER.enable(
+                    int(params.get("sample_every", TRACER.DEFAULT_SAMPLE_EVERY))
+                )
+            else:
+                TRACER.disable()
+            await self._notification_manager.notify_command_success(
+                command,
+                f"Latency tracing {'enabled' if TRACER.enabled else 'disabled'}",
+                result_data={
+                    "enabled": TRACER.enabled,
+                    "sample_every": TRACER.sample_every,
+                },
+            )
+        except Exception as e:
+            await self._notification_manager.notify_command_error(command, f"{str(e)}")
+
+    @CommandHandler.register(DaemonCommand.GET_LATENCY_TRACE)
+    async def _handle_get_latency_trace(self, params: Dict[str, Any]) -> None:
+        """Per-hop input latency breakdown collected by this daemon.
+
+        Params:
+          - ``window`` (float, optional): trailing window in seconds;
+            everything retained when absent.
+        """
+        command = DaemonCommand.GET_LATENCY_TRACE.value
+        try:
+            window = params.get("window")
+            await self._notification_manager.notify_command_success(
+                command,
+                "Latency trace retrieved",
+                result_data=TRACER.snapshot(
+                    float(window) if window is not None else None
+                ),
+            )
+        except Exception as e:
+            await self._notification_manager.notify_command_error(command, f"{str(e)}")
+
+    @CommandHandler.register(DaemonCommand.SET_LOOP_MONITOR)
+    async def _handle_set_loop_monitor(self, params: Dict[str, Any]) -> None:
+        """Turn the event-loop lag / slow-callback monitor on or off.
+
+        Params:
+          - ``enabled`` (bool, required).
+          - ``slow_threshold_ms`` (float, optional): lag above which the
+            stalling callback's stack is captured.
+          - ``clear`` (bool, optional): drop the lag histogram and captured
+            stalls.
+
+        A running metrics collection keeps the monitor on after disabling.
+        """
+        command = DaemonCommand.SET_LOOP_MONITOR.value
+        try:
+            if "enabled" not in params:
+                raise ValueError("'enabled' is required")
+            if params["enabled"]:
+                if self._loop_monitor is None:
+                    self._loop_monitor = LoopMonitor.acquire()
+            elif self._loop_monitor is not None:
+                self._loop_monitor.release()
+                self._loop_monitor = None
+
+            monitor = LoopMonitor.current()
+            if monitor is not None:
+                threshold = params.get("slow_threshold_ms")
+                if threshold is not None:
+                    if float(threshold) <= 0:
+                        raise ValueError("'slow_threshold_ms' must be positive")
+                    monitor.slow_threshold = float(threshold) / 1000
+                if params.get("clear"):
+                    monitor.clear()
+            await self._notification_manager.notify_command_success(
+                command,
+                f"Loop monitor {'running' if monitor is not None else 'stopped'}",
+                result_data={
+                    "running": monitor is not None,
+                    "slow_threshold_ms": (
+                        monitor.slow_threshold * 1000 if monitor is not None else None
+                    ),
+                },
+            )
+        except Exception as e:
+            await self._notification_manager.notify_command_error(command, f"{str(e)}")
+
+    @CommandHandler.register(DaemonCommand.GET_LOOP_STATS)
+    async def _handle_get_loop_stats(self, params: Dict[str, Any]) -> None:
+        """Event-loop lag percentiles and the most recent slow callbacks."""
+        command = DaemonCommand.GET_LOOP_STATS.value
+        try:
+            monitor = LoopMonitor.current()
+            await self._notification_manager.notify_command_success(
+                command,
+                "Loop stats retrieved",
+                result_data=(
+                    monitor.to_dict(EXPORT_WINDOWS)
+                    if monitor is not None
+                    else {"running": False}
+                ),
+            )
+        except Exception as e:
+            await self._notification_manager.notify_command_error(command, f"{str(e)}")
+
     @CommandHandler.register(DaemonCommand.ENABLE_STREAM)
     async def _handle_enable_stream(self, params: Dict[str, Any]) -> None:
         """Enable a stream on the running service."""
@@ -280,6 +280,10 @@ class Event(ABC):
 
     __slots__ = ()
 
+    # Opt-in for latency sampling by utils.metrics.trace; subclasses that
+    # set it must carry a ``timestamp`` and a ``trace`` slot.
+    TRACEABLE = False
+
     def to_dict(self):
         raise NotImplementedError
 
@@ -291,7 +295,19 @@ class MouseEvent(Event):
     mouse move on a fast pointer = thousands per second).
     """
 
-    __slots__ = ("x", "y", "dx", "dy", "button", "action", "is_pressed", "timestamp")
+    __slots__ = (
+        "x",
+        "y",
+        "dx",
+        "dy",
+        "button",
+        "action",
+        "is_pressed",
+        "timestamp",
+        "trace",
+    )
+
+    TRACEABLE = True
 
     MOVE_ACTION = "move"
     POSITION_ACTION = "position"
@@ -317,6 +333,8 @@ class MouseEvent(Event):
         self.action = action
         self.is_pressed = is_pressed
         self.timestamp = time()
+        # TraceContext while sampled by utils.metrics.trace
+        self.trace = None
 
     def to_dict(self) -> dict:
         return {
@@ -333,7 +351,9 @@ class MouseEvent(Event):
 class KeyboardEvent(Event):
     """Keyboard event data structure. Slot-based; allocated on every key event."""
 
-    __slots__ = ("key", "action", "timestamp")
+    __slots__ = ("key", "action", "timestamp", "trace")
+
+    TRACEABLE = True
 
     PRESS_ACTION = "press"
     RELEASE_ACTION = "release"
@@ -342,6 +362,8 @@ class KeyboardEvent(Event):
         self.key = key
         self.action = action
         self.timestamp = time()
+        # TraceContext while sampled by utils.metrics.trace
+        self.trace = None
 
     def to_dict(self) -> dict:
         return {"key": self.key, "event": self.action}
@@ -602,15 +624,43 @@ class ScreenEvent(Event):
 
 
 class ClipboardEvent(Event):
-    """Clipboard event data structure."""
+    """Clipboard event data structure.
+
+    Content is synced in two phases: the owner announces a digest (OFFER),
+    each receiver answers HAVE or NEED, and only peers that NEED it get the
+    BODY. Events without a phase carry the content directly (legacy).
+    """
 
-    def __init__(self, content: str | None, content_type: str = "text"):
+    OFFER = "offer"
+    HAVE = "have"
+    NEED = "need"
+    BODY = "body"
+
+    def __init__(
+        self,
+        content: str | None,
+        content_type: str = "text",
+        digest: Optional[str] = None,
+        size: int = 0,
+        phase: Optional[str] = None,
+        target: Optional[str] = None,
+    ):
         self.content = content
         self.content_type = content_type
+        self.digest = digest
+        self.size = size
+        self.phase = phase
+        # Only when replying to a multicast peer
+        self.target = target
         self.timestamp = time()
 
     def to_dict(self) -> dict:
-        return {"content": self.content, "content_type": self.content_type}
+        data = {"content": self.content, "content_type": self.content_type}
+        if self.phase is not None:
+            data.update(digest=self.digest, size=self.size, phase=self.phase)
+        if self.target:
+            data["target"] = self.target
+        return data
 
 
 class EventMapper:
@@ -647,6 +697,9 @@ class EventMapper:
             return ClipboardEvent(
                 content=message_payload.get("content", None),
                 content_type=message_payload.get("content_type", "text"),
+                digest=message_payload.get("digest"),
+                size=message_payload.get("size", 0),
+                phase=message_payload.get("phase"),
             )
         else:
             return None
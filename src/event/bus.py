@@ -15,9 +15,11 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+
 from abc import ABC
 import asyncio
-from typing import Callable, Dict, List, Optional, Any, Tuple, TypeVar
+from functools import partial
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple, TypeVar
 import inspect
 
 from utils import BackgroundTasks
@@ -27,9 +29,44 @@ from . import BusEvent, BusEventType
 
 T = TypeVar("T", bound=BusEvent)
 
-# Stored entry: (callback, is_coroutine_function). Pre-resolving the
+# Stored entry: (callback, is_coroutine_function, blocking). Pre-resolving the
 # coroutine check at subscribe time keeps the per-event hot path branch-free.
-_Subscriber = Tuple[Callable, bool]
+_Subscriber = Tuple[Callable, bool, bool]
+
+# Membership test instead of constructing BusEventType(...) on every dispatch.
+_KNOWN_EVENT_TYPES = frozenset(BusEventType)
+
+
+class _DispatchPlan:
+    """
+    Listeners of one event type, pre-sorted by how they must be invoked.
+    Rebuilt on every subscribe/unsubscribe and never mutated afterwards, so a
+    dispatch in flight keeps the snapshot it started with.
+
+    - ``inline``: sync callbacks subscribed with ``blocking=False``; called
+      directly on the loop.
+    - ``single``: set when the only other listener is a coroutine function;
+      awaited directly, no wrapper coroutine or gather.
+    - ``awaitables``: every async or blocking-sync listener, gathered when
+      there is more than one.
+    """
+
+    __slots__ = ("inline", "single", "awaitables")
+
+    def __init__(self, subscribers: List[_Subscriber]):
+        self.inline: Tuple[Callable, ...] = tuple(
+            cb
+            for cb, is_async, blocking in subscribers
+            if not is_async and not blocking
+        )
+        self.awaitables: Tuple[Tuple[Callable, bool], ...] = tuple(
+            (cb, is_async)
+            for cb, is_async, blocking in subscribers
+            if is_async or blocking
+        )
+        self.single: Optional[Callable] = None
+        if len(self.awaitables) == 1 and self.awaitables[0][1]:
+            self.single = self.awaitables[0][0]
 
 
 class EventBus(ABC):
@@ -42,6 +79,7 @@ class EventBus(ABC):
         event_type: int,
         callback: Callable[[Optional[T]], Any],
         priority: bool = False,
+        blocking: bool = True,
     ):
         """
         Subscribe a callback function to a specific event type.
@@ -77,6 +115,8 @@ class AsyncEventBus(EventBus):
         super().__init__()
         # Use dict for O(1) lookup, list for subscribers
         self._subscribers: Dict[int, List[_Subscriber]] = {}
+        # Compiled from _subscribers; only event types with listeners have an entry.
+        self._plans: Dict[int, _DispatchPlan] = {}
         # (event_type, id(callback)) -> consecutive failure count
         self._failure_counts: Dict[Tuple[int, int], int] = {}
 
@@ -89,17 +129,32 @@ class AsyncEventBus(EventBus):
         except RuntimeError:
             self._loop = None
         self._bg = BackgroundTasks()
+        # Strong refs for single-listener dispatch_nowait tasks. Kept apart
+        # from _bg so a failing callback is accounted (and logged) once,
+        # by _on_task_done, instead of also as a failed background task.
+        self._inflight: Set[asyncio.Task] = set()
 
     def subscribe(
         self,
         event_type: int,
         callback: Callable[[Optional[T]], Any],
         priority: bool = False,
+        blocking: bool = True,
     ):
         """
         Subscribe a callback function to a specific event type.
         Duplicate subscriptions are ignored (idempotent).
         Thread-safe, but prefer calling from async context.
+
+        Sync callbacks run in the default executor unless ``blocking`` is
+        False, in which case they are called inline on the loop ahead of the
+        async listeners. Only pass ``blocking=False`` for callbacks that
+        return in microseconds (flag flips, queue puts): anything slower
+        stalls every other coroutine. Ignored for coroutine functions.
+
+        ``priority`` puts the callback first within its group only: inline
+        callbacks always run before the async and executor listeners, even
+        one subscribed with ``priority=True``.
         """
         subs = self._subscribers.get(event_type)
         if subs is None:
@@ -108,14 +163,19 @@ class AsyncEventBus(EventBus):
         else:
             # Skip duplicates: a second subscribe would otherwise double-fire
             # the callback on every event (e.g. on stream restart).
-            for cb, _ in subs:
+            for cb, _, _ in subs:
                 if cb is callback or cb == callback:
                     return
-        entry: _Subscriber = (callback, inspect.iscoroutinefunction(callback))
+        entry: _Subscriber = (
+            callback,
+            inspect.iscoroutinefunction(callback),
+            blocking,
+        )
         if priority:
             subs.insert(0, entry)
         else:
             subs.append(entry)
+        self._compile(event_type)
 
     def unsubscribe(self, event_type: int, callback: Callable[[Optional[T]], Any]):
         """
@@ -124,10 +184,11 @@ class AsyncEventBus(EventBus):
         subs = self._subscribers.get(event_type)
         if not subs:
             return
-        for i, (cb, _) in enumerate(subs):
+        for i, (cb, _, _) in enumerate(subs):
             if cb is callback or cb == callback:
                 del subs[i]
                 self._failure_counts.pop((event_type, id(cb)), None)
+                self._compile(event_type)
                 return
 
     def clear_listeners(self) -> None:
@@ -139,42 +200,70 @@ class AsyncEventBus(EventBus):
         a dead bus.
         """
         self._subscribers.clear()
+        self._plans.clear()
         self._failure_counts.clear()
 
-    async def dispatch(self, event_type: int, data: Optional[T] = None, **kwargs):
+    def _compile(self, event_type: int) -> None:
         """
-        Async dispatch of an event to all registered listeners.
-        Executes all callbacks concurrently for maximum performance.
-        Supports both sync and async callbacks.
+        Rebuild the dispatch plan of ``event_type``. Unknown event types never
+        get a plan, so dispatching them still hits the warning path.
         """
-        # Warn on dispatch of an unknown event_type. Without this the
-        # missing-subscriber path is indistinguishable from a typo / stale
-        # int constant.
-        try:
-            BusEventType(event_type)
-        except ValueError:
+        subs = self._subscribers.get(event_type)
+        if subs and event_type in _KNOWN_EVENT_TYPES:
+            self._plans[event_type] = _DispatchPlan(subs)
+        else:
+            self._plans.pop(event_type, None)
+
+    def _warn_if_unknown(self, event_type: int) -> None:
+        # Without this the missing-subscriber path is indistinguishable
+        # from a typo / stale int constant.
+        if event_type not in _KNOWN_EVENT_TYPES:
             self._logger.warning(
                 f"dispatch() called with unknown event_type={event_type!r}; "
                 "no listeners will be invoked"
             )
+
+    async def dispatch(self, event_type: int, data: Optional[T] = None, **kwargs):
+        """
+        Async dispatch of an event to all registered listeners.
+        Executes all callbacks concurrently for maximum performance.
+        Supports both sync and async callbacks.
+        """
+        plan = self._plans.get(event_type)
+        if plan is None:
+            self._warn_if_unknown(event_type)
             return
 
-        # Fast path: get listeners without lock (dict access is atomic in CPython)
-        listeners = tuple(self._subscribers.get(event_type, ()))
+        for cb in plan.inline:
+            self._call_inline(event_type, cb, data, kwargs)
 
-        if not listeners:
+        single = plan.single
+        if single is not None:
+            try:
+                await single(data, **kwargs)
+            except Exception as e:
+                self._on_callback_error(event_type, single, e)
+                return
+            if self._failure_counts:
+                self._failure_counts.pop((event_type, id(single)), None)
             return
 
-        # Create tasks for all callbacks
-        tasks = [
-            self._execute_callback(event_type, cb, is_async, data, **kwargs)
-            for cb, is_async in listeners
-        ]
+        awaitables = plan.awaitables
+        if not awaitables:
+            return
+        if len(awaitables) == 1:
+            cb, is_async = awaitables[0]
+            await self._execute_callback(event_type, cb, is_async, data, **kwargs)
+            return
 
-        # Execute all callbacks concurrently
-        if tasks:
-            # gather with return_exceptions to prevent one failure from stopping others
-            await asyncio.gather(*tasks, return_exceptions=True)
+        # gather with return_exceptions to prevent one failure from stopping others
+        await asyncio.gather(
+            *[
+                self._execute_callback(event_type, cb, is_async, data, **kwargs)
+                for cb, is_async in awaitables
+            ],
+            return_exceptions=True,
+        )
 
     def dispatch_nowait(self, event_type: int, *args, **kwargs):
         """
@@ -182,32 +271,92 @@ class AsyncEventBus(EventBus):
         Safe to call from non-loop threads (native input callbacks).
         Drops the event with a warning if no loop is running.
         """
-        coro = self.dispatch(event_type, *args, **kwargs)
         loop = self._loop
         if loop is None:
             try:
                 loop = asyncio.get_running_loop()
                 self._loop = loop
             except RuntimeError:
-                coro.close()
                 self._logger.warning(
                     f"dispatch_nowait dropped: no running loop (event_type={event_type})"
                 )
                 return
         if loop.is_closed():
-            coro.close()
             self._logger.warning(
                 f"dispatch_nowait dropped: loop is closed (event_type={event_type})"
             )
             return
         try:
-            loop.call_soon_threadsafe(self._bg.spawn, coro)
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        try:
+            # On the loop thread call_soon skips the self-pipe wakeup that
+            # call_soon_threadsafe pays for; ordering is the same FIFO.
+            if running is loop:
+                loop.call_soon(self._dispatch_soon, event_type, args, kwargs)
+            else:
+                loop.call_soon_threadsafe(self._dispatch_soon, event_type, args, kwargs)
         except RuntimeError as e:
-            coro.close()
             self._logger.warning(
                 f"dispatch_nowait dropped (event_type={event_type}): {e}"
             )
 
+    def _dispatch_soon(self, event_type: int, args: tuple, kwargs: dict) -> None:
+        """
+        Loop-side half of dispatch_nowait. Inline listeners run right here;
+        a single async listener gets exactly one task running the callback
+        itself. Only multi-listener or executor plans fall back to a
+        dispatch() task.
+        """
+        plan = self._plans.get(event_type)
+        if plan is None:
+            self._warn_if_unknown(event_type)
+            return
+        if len(args) > 1 or (plan.awaitables and plan.single is None):
+            self._bg.spawn(self.dispatch(event_type, *args, **kwargs))
+            return
+
+        data = args[0] if args else None
+        for cb in plan.inline:
+            self._call_inline(event_type, cb, data, kwargs)
+
+        single = plan.single
+        if single is None:
+            return
+        try:
+            coro = single(data, **kwargs)
+        except Exception as e:
+            self._on_callback_error(event_type, single, e)
+            return
+        task = asyncio.get_running_loop().create_task(coro)
+        self._inflight.add(task)
+        task.add_done_callback(partial(self._on_task_done, event_type, single))
+
+    def _on_task_done(
+        self, event_type: int, callback: Callable, task: asyncio.Task
+    ) -> None:
+        self._inflight.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            if isinstance(exc, Exception):
+                self._on_callback_error(event_type, callback, exc)
+        elif self._failure_counts:
+            self._failure_counts.pop((event_type, id(callback)), None)
+
+    def _call_inline(
+        self, event_type: int, callback: Callable, data, kwargs: dict
+    ) -> None:
+        try:
+            callback(data, **kwargs)
+        except Exception as e:
+            self._on_callback_error(event_type, callback, e)
+            return
+        if self._failure_counts:
+            self._failure_counts.pop((event_type, id(callback)), None)
+
     async def _execute_callback(
         self,
         event_type: int,
@@ -222,7 +371,6 @@ class AsyncEventBus(EventBus):
         A callback that keeps raising on consecutive events gets auto-unsubscribed
         after MAX_CONSECUTIVE_FAILURES to keep the bus healthy.
         """
-        key = (event_type, id(callback))
         try:
             if is_async:
                 await callback(data, **kwargs)
@@ -231,22 +379,28 @@ class AsyncEventBus(EventBus):
                 loop = asyncio.get_running_loop()
                 await loop.run_in_executor(None, lambda: callback(data, **kwargs))  # type: ignore
         except Exception as e:
-            count = self._failure_counts.get(key, 0) + 1
-            self._failure_counts[key] = count
-            self._logger.error(
-                f"Exception in event {event_type} callback "
-                f"{getattr(callback, '__qualname__', repr(callback))} "
-                f"({count}/{self.MAX_CONSECUTIVE_FAILURES}): {e}"
-            )
-            if count >= self.MAX_CONSECUTIVE_FAILURES:
-                self._logger.warning(
-                    f"Disabling callback "
-                    f"{getattr(callback, '__qualname__', repr(callback))} "
-                    f"for event {event_type}: too many consecutive failures"
-                )
-                self.unsubscribe(event_type, callback)
+            self._on_callback_error(event_type, callback, e)
             return
         # Success: clear any prior failure streak so transient errors don't
         # accumulate toward the auto-disable threshold.
-        if key in self._failure_counts:
-            del self._failure_counts[key]
+        if self._failure_counts:
+            self._failure_counts.pop((event_type, id(callback)), None)
+
+    def _on_callback_error(
+        self, event_type: int, callback: Callable, e: Exception
+    ) -> None:
+        key = (event_type, id(callback))
+        count = self._failure_counts.get(key, 0) + 1
+        self._failure_counts[key] = count
+        self._logger.error(
+            f"Exception in event {event_type} callback "
+            f"{getattr(callback, '__qualname__', repr(callback))} "
+            f"({count}/{self.MAX_CONSECUTIVE_FAILURES}): {e}"
+        )
+        if count >= self.MAX_CONSECUTIVE_FAILURES:
+            self._logger.warning(
+                f"Disabling callback "
+                f"{getattr(callback, '__qualname__', repr(callback))} "
+                f"for event {event_type}: too many consecutive failures"
+            )
+            self.unsubscribe(event_type, callback)
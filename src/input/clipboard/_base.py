@@ -17,10 +17,13 @@
 
 import asyncio
 import enum
+import os
+from collections import OrderedDict
 from typing import Optional, Callable, Any
 from copykitten import copy, paste, paste_file_list, CopykittenError
 import hashlib
 
+from config import ApplicationConfig
 from event import (
     ClipboardEvent,
     BusEventType,
@@ -30,6 +33,7 @@ from event import (
     ClientActiveEvent,
 )
 from event.bus import EventBus
+from network.data.transfer import FileTransferManager
 from network.stream.handler import StreamHandler
 
 from utils.logging import get_logger
@@ -48,21 +52,192 @@ class ClipboardType(enum.Enum):
     ERROR = "error"
 
 
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def new_content_hasher():
+    """
+    Hasher used for clipboard digests.
+    Using blake2b for speed (not security; used for change detection and as
+    the content address in the clipboard sync).
+    """
+    return hashlib.blake2b(digest_size=16)
+
+
+class ClipboardImage:
+    """
+    Encoded clipboard image (PNG) and its digest.
+
+    OS backends hash the data incrementally while reading it, so the digest
+    never needs a second pass over the image.
+    """
+
+    __slots__ = ("data", "digest", "mime")
+
+    def __init__(self, data: bytes, digest: str, mime: str = "image/png"):
+        self.data = data
+        self.digest = digest
+        self.mime = mime
+
+    @classmethod
+    def from_bytes(cls, data: bytes, mime: str = "image/png") -> "ClipboardImage":
+        """
+        Hash ``data`` in one go. Blocking, run it in a worker thread for
+        large images.
+        """
+        hasher = new_content_hasher()
+        hasher.update(data)
+        return cls(data, hasher.hexdigest(), mime)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def content_digest(content: str | bytes | ClipboardImage) -> tuple[str, int]:
+    """
+    Digest and encoded size of a clipboard content.
+    """
+    if isinstance(content, ClipboardImage):
+        return content.digest, len(content.data)
+    if not content:
+        return "", 0
+    # Ensure we're encoding to bytes properly
+    if isinstance(content, str):
+        content = content.encode("utf-8", errors="ignore")
+    hasher = new_content_hasher()
+    hasher.update(content)
+    return hasher.hexdigest(), len(content)
+
+
+class ClipboardCache:
+    """
+    Bounded LRU of recent clipboard contents addressed by their digest.
+
+    Both the contents we copied and the ones received from peers are kept,
+    so re-announcing any of them costs a digest instead of a full transfer.
+    """
+
+    def __init__(self, max_entries: int = 16, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[str | ClipboardImage, str, int]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+
+    def get(
+        self, digest: Optional[str]
+    ) -> Optional[tuple[str | ClipboardImage, str, int]]:
+        """
+        Returns:
+            ``(content, content_type, size)`` or None if not cached
+        """
+        if not digest:
+            return None
+        entry = self._entries.get(digest)
+        if entry is not None:
+            self._entries.move_to_end(digest)
+        return entry
+
+    def put(
+        self,
+        digest: str,
+        content: str | ClipboardImage,
+        content_type: str,
+        size: int,
+    ):
+        if not digest:
+            return
+        previous = self._entries.pop(digest, None)
+        if previous is not None:
+            self._bytes -= previous[2]
+        self._entries[digest] = (content, content_type, size)
+        self._bytes += size
+        # Evict least recently used, always keeping the newest entry
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ClipboardWatcher:
+    """
+    Push-based clipboard change notifier.
+
+    Backends call :meth:`_notify` whenever the selection owner changes, bursts
+    of notifications between two reads collapse into a single wake-up.
+    :meth:`wait` returns False once the backend is gone, so that the caller
+    can fall back to polling.
+    """
+
+    def __init__(self):
+        self._changed = asyncio.Event()
+        self._closed = False
+
+        self._logger = get_logger(self.__class__.__name__)
+
+    async def start(self) -> bool:
+        """
+        Subscribe to clipboard changes.
+
+        Returns:
+            True if the backend is available and subscribed, False otherwise
+        """
+        return False
+
+    async def stop(self):
+        """
+        Release the backend resources and wake up any waiter.
+        """
+        self._close()
+
+    async def wait(self) -> bool:
+        """
+        Wait for the next clipboard ownership change.
+
+        Returns:
+            True on change, False if the watcher has been closed
+        """
+        await self._changed.wait()
+        self._changed.clear()
+        return not self._closed
+
+    def _notify(self):
+        self._changed.set()
+
+    def _close(self):
+        self._closed = True
+        self._changed.set()
+
+
 class Clipboard:
     """
-    Efficient async polling mechanism to monitor clipboard changes.
-    Since system APIs (especially on macOS) don't provide event-based
-    clipboard monitoring, we use asyncio-based polling with content hashing
-    to detect changes efficiently.
+    Efficient async mechanism to monitor clipboard changes.
+    When the OS-specific class provides a :class:`ClipboardWatcher`, content is
+    read only when the selection owner changes. Otherwise (and whenever the
+    watcher dies) we fall back to asyncio-based polling, using content hashing
+    to detect changes efficiently. Images are read again only after the
+    selection may have changed (see :meth:`_selection_changed`).
 
     Extensible to support multiple content types. (On MacOS to access files needs further logic)
     """
 
+    # Whether _set_clipboard_image can write images on this platform
+    SUPPORTS_IMAGES = False
+
     def __init__(
         self,
         on_change: Optional[Callable[[str, ClipboardType], Any]] = None,
         poll_interval: float = 0.5,
         content_types: Optional[list[ClipboardType]] = None,
+        max_image_size: int = ApplicationConfig.max_clipboard_image_size,
     ):
         """
         Initialize the clipboard listener.
@@ -70,31 +245,34 @@ class Clipboard:
         Args:
             on_change: Async callback called when clipboard content changes.
                        Signature: async def callback(content: str, content_type: ClipboardType)
+                       (content is a ClipboardImage for ClipboardType.IMAGE)
             poll_interval: Polling interval in seconds (default: 0.5)
             content_types: List of content types to monitor (default: [ClipboardType.TEXT])
+            max_image_size: Largest image, in bytes, read from or written to the clipboard
         """
         self.on_change = on_change
         self.poll_interval = poll_interval
         self.content_types = content_types or [ClipboardType.TEXT]
+        self.max_image_size = max_image_size
 
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self._last_hash: Optional[str] = None
         self._last_content: Optional[str] = None
+        # Last image read and whether it must be read again
+        self._image: Optional[ClipboardImage] = None
+        self._image_stale = True
+        # Contents recently copied or received, shared with the controller
+        self.content_cache = ClipboardCache()
 
         self._logger = get_logger(self.__class__.__name__)
 
     @staticmethod
-    def _hash_content(content: str) -> str:
+    def _hash_content(content: str | ClipboardImage) -> str:
         """
         Create a fast hash of the clipboard content for change detection.
-        Using blake2b for speed (not security; only used for change detection).
         """
-        if not content:
-            return ""
-        # Ensure we're encoding to bytes properly
-        content_bytes = content.encode("utf-8", errors="ignore")
-        return hashlib.blake2b(content_bytes, digest_size=16).hexdigest()
+        return content_digest(content)[0]
 
     @staticmethod
     def _is_file(content: str) -> bool:
@@ -113,7 +291,45 @@ class Clipboard:
         except Exception:
             return []
 
-    async def _get_clipboard_content(self) -> tuple[Optional[str], ClipboardType]:
+    async def _get_clipboard_image(self) -> Optional[ClipboardImage]:
+        """
+        Os-specific hook reading an image from the clipboard, if it holds one
+        not larger than ``max_image_size``.
+        """
+        return None
+
+    async def _set_clipboard_image(self, image: ClipboardImage) -> bool:
+        """
+        Os-specific hook writing an image to the clipboard.
+        """
+        return False
+
+    async def _set_clipboard_files(self, paths: list[str]) -> bool:
+        """
+        Os-specific hook putting local files on the clipboard as a file list.
+        """
+        return False
+
+    async def _selection_changed(self) -> bool:
+        """
+        Os-specific hook telling the polling loop whether the clipboard may
+        hold new data since the last check, without reading it. Returning
+        True (unknown) re-reads the image on every poll.
+        """
+        return True
+
+    async def _current_image(self) -> Optional[ClipboardImage]:
+        """
+        The clipboard image, read again only once marked stale.
+        """
+        if self._image_stale:
+            self._image = await self._get_clipboard_image()
+            self._image_stale = False
+        return self._image
+
+    async def _get_clipboard_content(
+        self,
+    ) -> tuple[Optional[str | ClipboardImage], ClipboardType]:
         """
         Get current clipboard content asynchronously.
 
@@ -121,6 +337,11 @@ class Clipboard:
             Tuple of (content, content_type)
         """
         try:
+            if ClipboardType.IMAGE in self.content_types:
+                image = await self._current_image()
+                if image is not None:
+                    return image, ClipboardType.IMAGE
+
             # Run blocking clipboard operation in executor to avoid blocking event loop
             loop = asyncio.get_running_loop()
             try:
@@ -156,7 +377,7 @@ class Clipboard:
             self._logger.error("Error reading clipboard", error=str(e))
             return None, ClipboardType.ERROR
 
-    async def _set_clipboard_content(self, content: str) -> bool:
+    async def _set_clipboard_content(self, content: str | ClipboardImage) -> bool:
         """
         Set clipboard content asynchronously.
 
@@ -167,8 +388,14 @@ class Clipboard:
             True if successful, False otherwise
         """
         try:
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, copy, content)
+            if isinstance(content, ClipboardImage):
+                if not await self._set_clipboard_image(content):
+                    return False
+                self._image = content
+            else:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, copy, content)
+                self._image = None
 
             # Update our tracking
             self._last_content = content
@@ -179,9 +406,65 @@ class Clipboard:
             self._logger.error("Error writing to clipboard", error=str(e))
             return False
 
+    def _create_watcher(self) -> Optional[ClipboardWatcher]:
+        """
+        Os-specific hook returning a push-based change watcher.
+        Returning None keeps the polling loop.
+        """
+        return None
+
+    async def _start_watcher(self) -> Optional[ClipboardWatcher]:
+        watcher = self._create_watcher()
+        if watcher is None:
+            return None
+        try:
+            if await watcher.start():
+                self._logger.debug(
+                    "Clipboard watcher started", watcher=watcher.__class__.__name__
+                )
+                return watcher
+        except Exception as e:
+            self._logger.debug("Clipboard watcher unavailable", error=str(e))
+        await watcher.stop()
+        return None
+
+    async def _check_for_change(self):
+        """
+        Read the clipboard and invoke the callback if its content changed.
+        """
+        # Get current clipboard content
+        content, content_type = await self._get_clipboard_content()
+        if content is None:
+            return
+
+        # Calculate hash for efficient comparison
+        current_hash = self._hash_content(content)
+
+        # Check if content has changed
+        if current_hash == self._last_hash:
+            return
+
+        self._last_hash = current_hash
+        self._last_content = content
+
+        # Invoke callback if registered
+        if self.on_change:
+            try:
+                if asyncio.iscoroutinefunction(self.on_change):
+                    await self.on_change(content, content_type)
+                else:
+                    # Support sync callbacks too
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(
+                        None, self.on_change, content, content_type
+                    )
+            except Exception as e:
+                self._logger.error("Error in clipboard callback", error=str(e))
+
     async def _poll_loop(self):
         """
-        Main polling loop that checks for clipboard changes.
+        Main loop that checks for clipboard changes, either on watcher
+        notifications or every poll interval.
         """
         self._logger.debug("Polling started")
 
@@ -191,46 +474,40 @@ class Clipboard:
             self._last_hash = self._hash_content(initial_content)
             self._last_content = initial_content
 
-        while self._running:
-            try:
-                # Get current clipboard content
-                content, content_type = await self._get_clipboard_content()
-                if content is not None:
-                    # Calculate hash for efficient comparison
-                    current_hash = self._hash_content(content)
-
-                    # Check if content has changed
-                    if current_hash != self._last_hash:
-                        self._last_hash = current_hash
-                        self._last_content = content
-
-                        # Invoke callback if registered
-                        if self.on_change:
-                            try:
-                                if asyncio.iscoroutinefunction(self.on_change):
-                                    await self.on_change(content, content_type)
-                                else:
-                                    # Support sync callbacks too
-                                    loop = asyncio.get_running_loop()
-                                    await loop.run_in_executor(
-                                        None, self.on_change, content, content_type
-                                    )
-                            except Exception as e:
-                                self._logger.error(
-                                    "Error in clipboard callback", error=str(e)
-                                )
-
-                # Sleep until next poll
-                await asyncio.sleep(self.poll_interval)
-
-            except asyncio.CancelledError:
-                self._logger.debug("Clipboard polling cancelled")
-                self._running = False
-                break
-            except Exception as e:
-                self._logger.debug("Error in poll loop", error=str(e))
-                # Continue polling even on error
-                await asyncio.sleep(self.poll_interval)
+        watcher = await self._start_watcher()
+        try:
+            while self._running:
+                try:
+                    if watcher is not None:
+                        if await watcher.wait():
+                            self._image_stale = True
+                            await self._check_for_change()
+                            continue
+                        # Backend is gone, we keep going by polling
+                        self._logger.warning(
+                            "Clipboard watcher stopped, falling back to polling"
+                        )
+                        await watcher.stop()
+                        watcher = None
+
+                    if await self._selection_changed():
+                        self._image_stale = True
+                    await self._check_for_change()
+
+                    # Sleep until next poll
+                    await asyncio.sleep(self.poll_interval)
+
+                except asyncio.CancelledError:
+                    self._logger.debug("Clipboard polling cancelled")
+                    self._running = False
+                    break
+                except Exception as e:
+                    self._logger.debug("Error in poll loop", error=str(e))
+                    # Continue polling even on error
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            if watcher is not None:
+                await watcher.stop()
 
         self._logger.debug("Polling stopped")
 
@@ -276,6 +553,17 @@ class Clipboard:
         """
         return self._running
 
+    async def get_content(
+        self,
+    ) -> tuple[Optional[str | ClipboardImage], ClipboardType]:
+        """
+        Read the current clipboard content now.
+
+        Returns:
+            Tuple of (content, content_type)
+        """
+        return await self._get_clipboard_content()
+
     def get_last_content(self) -> Optional[str]:
         """
         Get the last known clipboard content without polling.
@@ -297,7 +585,7 @@ class Clipboard:
             "Clipboard poll interval updated", poll_interval=self.poll_interval
         )
 
-    async def set_clipboard(self, content: str) -> bool:
+    async def set_clipboard(self, content: str | ClipboardImage) -> bool:
         """
         Set clipboard content and update internal state.
 
@@ -309,6 +597,25 @@ class Clipboard:
         """
         return await self._set_clipboard_content(content)
 
+    async def set_clipboard_files(self, paths: list[str]) -> bool:
+        """
+        Put local files on the clipboard and update internal state, so the
+        file list is not reported back as a local change.
+
+        Args:
+            paths: Absolute paths of the files
+
+        Returns:
+            True if successful
+        """
+        if not await self._set_clipboard_files(paths):
+            return False
+        content = "\n".join(paths)
+        self._image = None
+        self._last_content = content
+        self._last_hash = self._hash_content(content)
+        return True
+
     async def _debug_set_clipboard(self, content: str) -> bool:
         """
         Set clipboard content WITHOUT updating internal state.
@@ -345,6 +652,8 @@ class ClipboardListener:
         stream_handler: StreamHandler,
         command_stream: StreamHandler,
         clipboard=Clipboard,
+        max_image_size: int = ApplicationConfig.max_clipboard_image_size,
+        file_transfer: Optional[FileTransferManager] = None,
     ):
         """
         Initialize the clipboard listener.
@@ -353,12 +662,17 @@ class ClipboardListener:
             stream_handler: Stream handler to send clipboard events
             command_stream: Command stream handler
             clipboard: Clipboard monitoring class (default to Os-specific Clipboard)
+            max_image_size: Largest clipboard image synced, in bytes
+            file_transfer: FILE stream transfers; when set, copied files are
+                sent to the peers that can receive them
         """
         self.event_bus = event_bus
         self.stream_handler = (
             stream_handler  # Can be a broadcast stream handler or unidirectional
         )
         self.command_stream = command_stream
+        self.file_transfer = file_transfer
+        self._file_send: Optional[asyncio.Task] = None
 
         self._active_clients: dict[str, bool] = {}
         # Internal flag to track if we should be listening (When at least one client is active or connected)
@@ -369,7 +683,13 @@ class ClipboardListener:
 
         self.clipboard = clipboard(
             on_change=self._on_clipboard_change,
-            content_types=[ClipboardType.TEXT, ClipboardType.URL, ClipboardType.FILE],
+            content_types=[
+                ClipboardType.TEXT,
+                ClipboardType.URL,
+                ClipboardType.FILE,
+                ClipboardType.IMAGE,
+            ],
+            max_image_size=max_image_size,
         )
 
         self.event_bus.subscribe(
@@ -404,6 +724,9 @@ class ClipboardListener:
         """
         if self.clipboard.is_listening():
             await self.clipboard.stop()
+        if self._file_send is not None:
+            self._file_send.cancel()
+            self._file_send = None
 
         self._logger.debug("Stopped")
         await asyncio.sleep(0)
@@ -473,14 +796,80 @@ class ClipboardListener:
 
         await asyncio.sleep(0)
 
-    async def _on_clipboard_change(self, content: str, content_type: ClipboardType):
+    def _split_peers(self) -> tuple[list[Optional[str]], list[Optional[str]]]:
+        """
+        Split the connected peers into those that negotiated clipboard
+        offers and legacy ones. Without known peers the stream's default
+        transport is checked.
+        """
+        offer: list[Optional[str]] = []
+        legacy: list[Optional[str]] = []
+        for peer in list(self._active_clients) or [None]:
+            caps = self.stream_handler.peer_capabilities(peer)
+            (offer if caps.clipboard_offers else legacy).append(peer)
+        return offer, legacy
+
+    async def _on_clipboard_change(
+        self, content: str | ClipboardImage, content_type: ClipboardType
+    ):
         if self._listening:
-            event = ClipboardEvent(content=content, content_type=content_type.value)
-            # Send clipboard event to all connected clients -> Sync server clipboard with clients (if server)
-            await self.stream_handler.send(event)
+            digest, size = content_digest(content)
+            # Keep the body around for the peers that will ask for it
+            self.clipboard.content_cache.put(digest, content, content_type.value, size)
+            offer_peers, legacy_peers = self._split_peers()
+            # Broadcast when all peers agree, otherwise address each one
+            mixed = bool(offer_peers and legacy_peers)
+            if offer_peers:
+                # Announce the digest -> Sync server clipboard with clients (if server)
+                for target in offer_peers if mixed else [None]:
+                    await self.stream_handler.send(
+                        ClipboardEvent(
+                            content=None,
+                            content_type=content_type.value,
+                            digest=digest,
+                            size=size,
+                            phase=ClipboardEvent.OFFER,
+                            target=target,
+                        )
+                    )
+            if legacy_peers and content_type != ClipboardType.IMAGE:
+                # Legacy peers get the full content in a single event; they
+                # can only paste text, so images are not sent to them
+                for target in legacy_peers if mixed else [None]:
+                    await self.stream_handler.send(
+                        ClipboardEvent(
+                            content=content,
+                            content_type=content_type.value,
+                            target=target,
+                        )
+                    )
+            if content_type == ClipboardType.FILE and self.file_transfer is not None:
+                # A newer copy supersedes the files still being sent
+                if self._file_send is not None:
+                    self._file_send.cancel()
+                self._file_send = asyncio.create_task(
+                    self._send_files(content.split("\n"))
+                )
 
         await asyncio.sleep(0)
 
+    async def _send_files(self, paths: list[str]):
+        """
+        Send the copied regular files over the FILE stream, peer by peer.
+        Directories are not transferred.
+        """
+        files = [path for path in paths if os.path.isfile(path)]
+        for peer in list(self._active_clients) or [None]:
+            if not self.file_transfer.can_send(peer):
+                continue
+            for path in files:
+                try:
+                    await self.file_transfer.send_file(path, tr_id=peer)
+                except Exception as e:
+                    self._logger.warning(
+                        "Clipboard file not sent", path=path, error=str(e)
+                    )
+
     def get_clipboard_context(self) -> Clipboard:
         """
         Get the clipboard context.
@@ -501,6 +890,7 @@ class ClipboardController:
         event_bus: EventBus,
         stream_handler: StreamHandler,
         clipboard: Optional[Clipboard] = None,
+        file_transfer: Optional[FileTransferManager] = None,
     ):
         """
         Initialize the clipboard controller.
@@ -508,6 +898,8 @@ class ClipboardController:
             event_bus: Event bus for event handling
             stream_handler: Stream handler to receive clipboard events
             clipboard: Clipboard monitoring instance (default to Os-specific Clipboard)
+            file_transfer: FILE stream transfers; when set, files copied on a
+                peer are received and put on the clipboard
         """
         self.event_bus = event_bus
         self.stream_handler = stream_handler
@@ -518,10 +910,22 @@ class ClipboardController:
             )
 
         self.clipboard = clipboard
+        self.file_transfer = file_transfer
+        # Files received for the peer's latest file copy
+        self._received_files: list[str] = []
+        if file_transfer is not None:
+            file_transfer.on_file_received = self._on_file_received
+
+        # Content-addressed sync counters
+        self.bodies_sent = 0
+        self.bytes_sent = 0
+        self.bytes_saved = 0
+
+        self._logger = get_logger(self.__class__.__name__)
 
         # self.event_bus.subscribe(event_type=EventType.CLIPBOARD_EVENT, callback=self._on_clipboard_event)
         self.stream_handler.register_receive_callback(
-            self._on_clipboard_event, "clipboard"
+            self._on_clipboard_event, "clipboard", with_origin=True
         )
 
     async def start(self) -> bool:
@@ -536,19 +940,140 @@ class ClipboardController:
         """
         return True
 
-    async def _on_clipboard_event(self, message):
+    async def _on_clipboard_event(self, message, origin: Optional[str] = None):
         """
         Async event handler for incoming clipboard events from clients.
+
+        Args:
+            message: Received clipboard message
+            origin: Transport id of the sending peer on multicast streams,
+                used to answer that peer only
         """
         event = EventMapper.get_event(message)
         if not isinstance(event, ClipboardEvent):
             await asyncio.sleep(0)
             return
 
-        content = event.content
+        if (
+            event.content_type == ClipboardType.FILE.value
+            and event.phase not in (ClipboardEvent.NEED, ClipboardEvent.HAVE)
+            and self.file_transfer is not None
+            and self.file_transfer.can_send(origin)
+        ):
+            # The peer's paths mean nothing here, its files follow on the
+            # FILE stream
+            self._received_files = []
+            await asyncio.sleep(0)
+            return
 
-        if content is not None:
+        if event.phase == ClipboardEvent.OFFER:
+            await self._on_offer(event, origin)
+        elif event.phase == ClipboardEvent.NEED:
+            await self._on_need(event, origin)
+        elif event.phase == ClipboardEvent.HAVE:
+            entry = self.clipboard.content_cache.get(event.digest)
+            if entry is not None:
+                self.bytes_saved += entry[2]
+            await asyncio.sleep(0)
+        elif event.content is not None:
+            # BODY or legacy event carrying the content
+            content = event.content
+            if event.content_type == ClipboardType.IMAGE.value:
+                content = await self._load_image(event)
+                if content is None:
+                    return
+            if event.digest:
+                self.clipboard.content_cache.put(
+                    event.digest, content, event.content_type, event.size
+                )
             await self.clipboard.set_clipboard(content)
-            return
+        else:
+            await asyncio.sleep(0)
 
-        await asyncio.sleep(0)
+    async def _on_file_received(self, path: str):
+        """
+        Put the files received so far for the peer's copy on the clipboard.
+        """
+        self._received_files.append(path)
+        if not await self.clipboard.set_clipboard_files(list(self._received_files)):
+            self._logger.debug("Received file kept in download directory", path=path)
+
+    async def _load_image(self, event: ClipboardEvent) -> Optional[ClipboardImage]:
+        """
+        Check a received image against the size cap and its announced digest.
+        Hashing runs in a worker thread, images easily weigh tens of MB.
+        """
+        data = event.content
+        if not isinstance(data, bytes) or not data.startswith(PNG_SIGNATURE):
+            self._logger.warning("Dropping malformed clipboard image")
+            return None
+        if len(data) > self.clipboard.max_image_size:
+            self._logger.warning("Dropping oversized clipboard image", size=len(data))
+            return None
+        image = await asyncio.to_thread(ClipboardImage.from_bytes, data)
+        if event.digest and image.digest != event.digest:
+            self._logger.warning(
+                "Dropping clipboard image with mismatching digest", digest=event.digest
+            )
+            return None
+        return image
+
+    async def _on_offer(self, event: ClipboardEvent, origin: Optional[str]):
+        if event.content_type == ClipboardType.IMAGE.value:
+            if not self.clipboard.SUPPORTS_IMAGES:
+                # Don't pull an image this platform cannot paste
+                self._logger.debug("Ignoring clipboard image", size=event.size)
+                await asyncio.sleep(0)
+                return
+            if event.size > self.clipboard.max_image_size:
+                self._logger.debug(
+                    "Ignoring oversized clipboard image", size=event.size
+                )
+                await asyncio.sleep(0)
+                return
+
+        entry = self.clipboard.content_cache.get(event.digest)
+        if entry is not None:
+            await self.clipboard.set_clipboard(entry[0])
+        await self.stream_handler.send(
+            ClipboardEvent(
+                content=None,
+                content_type=event.content_type,
+                digest=event.digest,
+                size=event.size,
+                phase=ClipboardEvent.NEED if entry is None else ClipboardEvent.HAVE,
+                target=origin,
+            )
+        )
+
+    async def _on_need(self, event: ClipboardEvent, origin: Optional[str]):
+        digest = event.digest
+        entry = self.clipboard.content_cache.get(digest)
+        if entry is None:
+            # Evicted meanwhile: answer with what the clipboard holds now
+            current, current_type = await self.clipboard.get_content()
+            if current is None:
+                self._logger.warning(
+                    "Requested clipboard content not available", digest=digest
+                )
+                return
+            digest, size = content_digest(current)
+            entry = (current, current_type.value, size)
+            self.clipboard.content_cache.put(digest, *entry)
+
+        content, content_type, size = entry
+        if isinstance(content, ClipboardImage):
+            # Raw bytes, msgpack carries them as binary
+            content = content.data
+        self.bodies_sent += 1
+        self.bytes_sent += size
+        await self.stream_handler.send(
+            ClipboardEvent(
+                content=content,
+                content_type=content_type,
+                digest=digest,
+                size=size,
+                phase=ClipboardEvent.BODY,
+                target=origin,
+            )
+        )
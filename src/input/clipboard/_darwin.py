@@ -20,7 +20,9 @@ from typing import Optional, Callable, Any
 
 from AppKit import NSPasteboard, NSFilenamesPboardType
 
+from config import ApplicationConfig
 from event.bus import EventBus
+from network.data.transfer import FileTransferManager
 from network.stream.handler import StreamHandler
 from utils.logging import get_logger
 from . import _base
@@ -35,8 +37,9 @@ class Clipboard(_base.Clipboard):
         on_change: Optional[Callable[[str, ClipboardType], Any]] = None,
         poll_interval: float = 0.5,
         content_types: Optional[list[ClipboardType]] = None,
+        max_image_size: int = ApplicationConfig.max_clipboard_image_size,
     ):
-        super().__init__(on_change, poll_interval, content_types)
+        super().__init__(on_change, poll_interval, content_types, max_image_size)
 
     @staticmethod
     def __try_get_clip_file(file: str) -> str:
@@ -93,14 +96,25 @@ class ClipboardListener(_base.ClipboardListener):
         event_bus: EventBus,
         stream_handler: StreamHandler,
         command_stream: StreamHandler,
+        max_image_size: int = ApplicationConfig.max_clipboard_image_size,
+        file_transfer: Optional[FileTransferManager] = None,
     ):
         super().__init__(
-            event_bus, stream_handler, command_stream, Clipboard
+            event_bus,
+            stream_handler,
+            command_stream,
+            Clipboard,
+            max_image_size,
+            file_transfer,
         )  # We impose the clipboard core class here
 
 
 class ClipboardController(_base.ClipboardController):
     def __init__(
-        self, event_bus: EventBus, stream_handler: StreamHandler, clipboard: Clipboard
+        self,
+        event_bus: EventBus,
+        stream_handler: StreamHandler,
+        clipboard: Clipboard,
+        file_transfer: Optional[FileTransferManager] = None,
     ):
-        super().__init__(event_bus, stream_handler, clipboard)
+        super().__init__(event_bus, stream_handler, clipboard, file_transfer)
@@ -15,28 +15,415 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import asyncio
 import os
+import shutil
 import subprocess
-from urllib.parse import urlparse, unquote
+from urllib.parse import urlparse, unquote, quote
 from typing import Optional, Callable, Any
 
+from Xlib import X, display as xdisplay
+from Xlib.ext import xfixes
+
+from config import ApplicationConfig
 from event.bus import EventBus
+from input._platform import is_wayland
+from network.data.transfer import FileTransferManager
 from network.stream.handler import StreamHandler
 from utils.logging import get_logger
 from . import _base
-from ._base import ClipboardType
+from ._base import (
+    ClipboardType,
+    ClipboardImage,
+    new_content_hasher,
+)
+
+IMAGE_MIME = "image/png"
+URI_LIST_MIME = "text/uri-list"
+# Targets of a clipboard holding text, preferred over an image offered along
+TEXT_TARGETS = frozenset(("text/plain", "text/plain;charset=utf-8", "UTF8_STRING"))
+# Pipe read size while streaming an image out of xclip/wl-paste
+IMAGE_READ_CHUNK = 256 * 1024
+# Upper bound for any clipboard helper process round trip (seconds)
+CLIPBOARD_TOOL_TIMEOUT = 5.0
+SELECTION_TIMESTAMP_TIMEOUT = 0.1
+
+
+class X11ClipboardWatcher(_base.ClipboardWatcher):
+    """
+    Watches the X11 CLIPBOARD selection through XFixes ``SelectionNotify``
+    events. The display socket is registered as an event loop reader, so there
+    are no wake-ups while the selection owner stays the same.
+    """
+
+    def __init__(self, selection: str = "CLIPBOARD"):
+        super().__init__()
+        self._selection = selection
+        self._display: Optional[xdisplay.Display] = None
+        self._window = None
+        self._fd: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> bool:
+        if not os.environ.get("DISPLAY"):
+            return False
+
+        self._display = xdisplay.Display()
+        if not self._display.has_extension("XFIXES"):
+            self._logger.debug("XFixes extension not available")
+            return False
+
+        self._display.xfixes_query_version()
+        selection = self._display.intern_atom(self._selection)
+        # Events are delivered to a client-owned window, we never map it
+        self._window = self._display.screen().root.create_window(
+            0, 0, 1, 1, 0, X.CopyFromParent
+        )
+        self._display.xfixes_select_selection_input(
+            self._window, selection, xfixes.XFixesSetSelectionOwnerNotifyMask
+        )
+        self._display.flush()
+
+        self._loop = asyncio.get_running_loop()
+        self._fd = self._display.fileno()
+        self._loop.add_reader(self._fd, self._on_readable)
+        return True
+
+    def _on_readable(self):
+        changed = False
+        try:
+            while self._display.pending_events():
+                event = self._display.next_event()
+                if isinstance(event, xfixes.SetSelectionOwnerNotify):
+                    changed = True
+        except Exception as e:
+            # Connection to the X server lost
+            self._logger.warning("X11 clipboard watcher failed", error=str(e))
+            self._remove_reader()
+            self._close()
+            return
+
+        if changed:
+            self._notify()
+
+    def _remove_reader(self):
+        if self._loop is not None and self._fd is not None:
+            self._loop.remove_reader(self._fd)
+        self._fd = None
+
+    async def stop(self):
+        self._remove_reader()
+        if self._display is not None:
+            try:
+                if self._window is not None:
+                    self._window.destroy()
+                self._display.close()
+            except Exception:
+                pass
+            self._display = None
+            self._window = None
+        await super().stop()
+
+
+class WaylandClipboardWatcher(_base.ClipboardWatcher):
+    """
+    Watches the Wayland clipboard through a long-lived ``wl-paste --watch``
+    process, which prints a line every time the selection changes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self) -> bool:
+        if shutil.which("wl-paste") is None:
+            return False
+
+        self._process = await asyncio.create_subprocess_exec(
+            "wl-paste",
+            "--watch",
+            "echo",
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._reader = asyncio.create_task(self._read_loop())
+        return True
+
+    async def _read_loop(self):
+        try:
+            while await self._process.stdout.readline():
+                self._notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._logger.warning("Wayland clipboard watcher failed", error=str(e))
+        # EOF, wl-paste exited
+        self._close()
+
+    async def stop(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._process is not None:
+            if self._process.returncode is None:
+                try:
+                    self._process.terminate()
+                    await self._process.wait()
+                except ProcessLookupError:
+                    pass
+            self._process = None
+        await super().stop()
 
 
 class Clipboard(_base.Clipboard):
     __logger = get_logger(__name__)
 
+    SUPPORTS_IMAGES = True
+
     def __init__(
         self,
         on_change: Optional[Callable[[str, ClipboardType], Any]] = None,
         poll_interval: float = 0.5,
         content_types: Optional[list[ClipboardType]] = None,
+        max_image_size: int = ApplicationConfig.max_clipboard_image_size,
     ):
-        super().__init__(on_change, poll_interval, content_types)
+        super().__init__(on_change, poll_interval, content_types, max_image_size)
+        # X11 connection used by polling to compare selection owners
+        self._x_display: Optional[xdisplay.Display] = None
+        self._x_window = None
+        self._x_selection = None
+        self._x_timestamp = None
+        self._x_property = None
+        # (owner window, time it took the selection) at the last poll
+        self._x_owner: Optional[tuple[int, Optional[int]]] = None
+
+    def _create_watcher(self) -> Optional[_base.ClipboardWatcher]:
+        if is_wayland():
+            return WaylandClipboardWatcher()
+        return X11ClipboardWatcher()
+
+    async def _selection_changed(self) -> bool:
+        """
+        Compare the X11 CLIPBOARD owner window, and the time it took the
+        selection, with the previous poll: a couple of round trips on the
+        display socket instead of forking xclip. A new copy within the same
+        owner window takes the selection again, with a new timestamp.
+        """
+        if is_wayland() or not os.environ.get("DISPLAY"):
+            return True
+        try:
+            if self._x_display is None:
+                self._open_display()
+            owner = self._x_display.get_selection_owner(self._x_selection)
+            owner_id = owner.id if owner else X.NONE
+            timestamp = None
+            if owner_id != X.NONE:
+                timestamp = await self._selection_timestamp()
+                if timestamp is None:
+                    # The owner doesn't tell, assume a new copy
+                    self._x_owner = None
+                    return True
+        except Exception as e:
+            self._logger.debug("Cannot query clipboard owner", error=str(e))
+            self._close_display()
+            return True
+        changed = (owner_id, timestamp) != self._x_owner
+        self._x_owner = (owner_id, timestamp)
+        return changed
+
+    def _open_display(self):
+        self._x_display = xdisplay.Display()
+        self._x_selection = self._x_display.intern_atom("CLIPBOARD")
+        self._x_timestamp = self._x_display.intern_atom("TIMESTAMP")
+        self._x_property = self._x_display.intern_atom("PERPETUA_SELECTION_TIME")
+        # Requestor of the TIMESTAMP conversion, never mapped
+        self._x_window = self._x_display.screen().root.create_window(
+            0, 0, 1, 1, 0, X.CopyFromParent
+        )
+
+    async def _selection_timestamp(self) -> Optional[int]:
+        """
+        Ask the owner for the ICCCM ``TIMESTAMP`` target: the server time it
+        acquired the selection at. None if it doesn't answer in time.
+        """
+        display = self._x_display
+        self._x_window.convert_selection(
+            self._x_selection, self._x_timestamp, self._x_property, X.CurrentTime
+        )
+        display.flush()
+        deadline = asyncio.get_running_loop().time() + SELECTION_TIMESTAMP_TIMEOUT
+        while True:
+            while display.pending_events():
+                event = display.next_event()
+                if event.type != X.SelectionNotify:
+                    continue
+                if event.property == X.NONE:
+                    return None
+                reply = self._x_window.get_full_property(
+                    self._x_property, X.AnyPropertyType
+                )
+                self._x_window.delete_property(self._x_property)
+                if reply is None or not len(reply.value):
+                    return None
+                return int(reply.value[0])
+            if asyncio.get_running_loop().time() >= deadline:
+                return None
+            await asyncio.sleep(0.005)
+
+    def _close_display(self):
+        if self._x_display is not None:
+            try:
+                self._x_display.close()
+            except Exception:
+                pass
+        self._x_display = None
+        self._x_window = None
+        self._x_owner = None
+
+    async def stop(self):
+        await super().stop()
+        self._close_display()
+
+    async def _get_clipboard_image(self) -> Optional[ClipboardImage]:
+        """
+        Read an ``image/png`` target, if offered without text, streaming it
+        out of xclip/wl-paste and hashing it chunk by chunk.
+        """
+        if is_wayland():
+            list_cmd = ["wl-paste", "--list-types"]
+            read_cmd = ["wl-paste", "--no-newline", "--type", IMAGE_MIME]
+        else:
+            list_cmd = ["xclip", "-o", "-selection", "clipboard", "-t", "TARGETS"]
+            read_cmd = ["xclip", "-o", "-selection", "clipboard", "-t", IMAGE_MIME]
+
+        output = await self._read_tool_output(list_cmd, limit=64 * 1024)
+        targets = set(output.decode(errors="ignore").split()) if output else set()
+        # Apps offering text along (spreadsheet cells, browsers) sync the text
+        if IMAGE_MIME not in targets or targets & TEXT_TARGETS:
+            return None
+        return await self._read_image(read_cmd)
+
+    async def _read_image(self, cmd: list[str]) -> Optional[ClipboardImage]:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+        hasher = new_content_hasher()
+        data = bytearray()
+        try:
+            async with asyncio.timeout(CLIPBOARD_TOOL_TIMEOUT):
+                while chunk := await process.stdout.read(IMAGE_READ_CHUNK):
+                    if len(data) + len(chunk) > self.max_image_size:
+                        self._logger.warning(
+                            "Clipboard image exceeds size limit",
+                            max_size=self.max_image_size,
+                        )
+                        return None
+                    hasher.update(chunk)
+                    data += chunk
+                if await process.wait() != 0:
+                    return None
+        except TimeoutError:
+            self._logger.warning("Timed out reading clipboard image")
+            return None
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+        if not data:
+            return None
+        return ClipboardImage(bytes(data), hasher.hexdigest(), IMAGE_MIME)
+
+    async def _set_clipboard_image(self, image: ClipboardImage) -> bool:
+        if len(image.data) > self.max_image_size:
+            return False
+        if is_wayland():
+            cmd = ["wl-copy", "--type", image.mime]
+        else:
+            cmd = ["xclip", "-i", "-selection", "clipboard", "-t", image.mime]
+        return await self._write_tool_input(cmd, image.data)
+
+    async def _set_clipboard_files(self, paths: list[str]) -> bool:
+        """
+        Offer the files as a ``text/uri-list`` target, the format file
+        managers paste from.
+        """
+        uri_list = "".join(f"file://{quote(path)}\r\n" for path in paths)
+        if is_wayland():
+            cmd = ["wl-copy", "--type", URI_LIST_MIME]
+        else:
+            cmd = ["xclip", "-i", "-selection", "clipboard", "-t", URI_LIST_MIME]
+        return await self._write_tool_input(cmd, uri_list.encode())
+
+    async def _write_tool_input(self, cmd: list[str], data: bytes) -> bool:
+        """
+        Feed ``data`` to a clipboard helper that takes ownership of the
+        selection.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError as e:
+            self._logger.error("Cannot write to clipboard", error=str(e))
+            return False
+
+        try:
+            async with asyncio.timeout(CLIPBOARD_TOOL_TIMEOUT):
+                process.stdin.write(data)
+                await process.stdin.drain()
+                process.stdin.close()
+                # Both tools fork a background owner and exit once fed
+                return await process.wait() == 0
+        except (TimeoutError, BrokenPipeError, ConnectionResetError) as e:
+            self._logger.error("Error writing to clipboard", error=str(e))
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            return False
+
+    @staticmethod
+    async def _read_tool_output(cmd: list[str], limit: int) -> Optional[bytes]:
+        """
+        Run a clipboard helper and return its (bounded) output, None on failure.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+        try:
+            async with asyncio.timeout(CLIPBOARD_TOOL_TIMEOUT):
+                output = await process.stdout.read(limit)
+                if await process.wait() != 0:
+                    return None
+                return output
+        except TimeoutError:
+            return None
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
 
     @staticmethod
     def __try_get_clip_file(file: str) -> str:
@@ -135,14 +522,25 @@ class ClipboardListener(_base.ClipboardListener):
         event_bus: EventBus,
         stream_handler: StreamHandler,
         command_stream: StreamHandler,
+        max_image_size: int = ApplicationConfig.max_clipboard_image_size,
+        file_transfer: Optional[FileTransferManager] = None,
     ):
         super().__init__(
-            event_bus, stream_handler, command_stream, Clipboard
+            event_bus,
+            stream_handler,
+            command_stream,
+            Clipboard,
+            max_image_size,
+            file_transfer,
         )  # We impose the clipboard core class here
 
 
 class ClipboardController(_base.ClipboardController):
     def __init__(
-        self, event_bus: EventBus, stream_handler: StreamHandler, clipboard: Clipboard
+        self,
+        event_bus: EventBus,
+        stream_handler: StreamHandler,
+        clipboard: Clipboard,
+        file_transfer: Optional[FileTransferManager] = None,
     ):
-        super().__init__(event_bus, stream_handler, clipboard)
+        super().__init__(event_bus, stream_handler, clipboard, file_transfer)
@@ -34,6 +34,7 @@ from Xlib.xobject import cursor as xcursor
 
 from event.bus import EventBus
 from input._platform import is_wayland, is_gnome, is_kde
+from input.cursor._ring import DeltaRing
 from input.cursor._worker import CursorHandlerWorker as _WorkerBase
 from network.stream.handler import StreamHandler
 from utils.logging import get_logger, Logger
@@ -52,10 +53,12 @@ class _XlibCursorHandler:
         mouse_conn: Connection,
         debug: bool = False,
         log_level: int = Logger.INFO,
+        delta_ring: Optional[DeltaRing] = None,
     ):
         self._command_conn = command_conn
         self._result_conn = result_conn
         self._mouse_conn = mouse_conn
+        self._delta_ring = delta_ring
         self._debug = debug
         self._running = True
         self._captured = False
@@ -179,6 +182,10 @@ class _XlibCursorHandler:
             if cmd_fd in readable:
                 self._process_commands()
 
+            # Publish motion carried over while the delta ring was full
+            if self._delta_ring is not None:
+                self._delta_ring.flush()
+
         self._cleanup()
         try:
             self._result_conn.send({"type": "process_ended"})
@@ -205,7 +212,10 @@ class _XlibCursorHandler:
 
         if dx != 0 or dy != 0:
             try:
-                self._mouse_conn.send((dx, dy))
+                if self._delta_ring is not None:
+                    self._delta_ring.push(dx, dy)
+                else:
+                    self._mouse_conn.send((dx, dy))
             except Exception:
                 pass
 
@@ -384,6 +394,7 @@ def _run_xlib_process(
     mouse_conn: Connection,
     debug: bool = False,
     log_level: int = Logger.INFO,
+    delta_ring: Optional[DeltaRing] = None,
 ):
     """Process entry point for the Xlib cursor handler."""
     logger = get_logger("_XlibCursorProcess", level=log_level, is_root=True)
@@ -392,7 +403,7 @@ def _run_xlib_process(
     handler = None
     try:
         handler = _XlibCursorHandler(
-            command_conn, result_conn, mouse_conn, debug, log_level
+            command_conn, result_conn, mouse_conn, debug, log_level, delta_ring
         )
         handler.run()
     except Exception as e:
@@ -415,6 +426,9 @@ def _run_xlib_process(
         except Exception:
             pass
 
+        if delta_ring is not None:
+            delta_ring.close()
+
         logger.debug("Process exiting")
 
 
@@ -443,6 +457,7 @@ class CursorHandlerWorker(_WorkerBase):
             return
 
         super().__init__(event_bus, stream, debug, window_class=None)
+        self._delta_ring = self._create_delta_ring()
 
     async def start(self, wait_ready=True, timeout=None) -> bool:
         if self._use_wayland:
@@ -473,4 +488,5 @@ class CursorHandlerWorker(_WorkerBase):
             self.mouse_conn_send,
             self._debug,
             self._logger.level,
+            self._delta_ring,
         )
@@ -0,0 +1,235 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import struct
+import time
+
+from multiprocessing import Pipe
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+
+class DeltaRing:
+    """
+    Single-producer/single-consumer ring of mouse deltas in shared memory.
+
+    Replaces one pickled ``Pipe.send((dx, dy))`` per motion event between
+    the cursor capture process (producer) and the daemon (consumer).
+
+    Layout: a 64-byte header (consumer read index, consumer "parked" flag)
+    followed by ``capacity`` slots of ``(seq, dx, dy, t)``. Each slot's
+    ``seq`` is written *after* its payload and is the publication point, so
+    the consumer never needs the producer's write index: a slot is ready when
+    its ``seq`` equals the next expected one. No locks are taken; each field
+    has exactly one writer except the parked flag (see below).
+
+    Doorbell: the producer only writes to the doorbell pipe when the consumer
+    has parked (set the flag after finding the ring empty), so a busy stream
+    costs no syscalls per delta. The flag handshake is a store/load pair on
+    both sides, which plain Python cannot fence; the consumer therefore also
+    re-checks the ring on a short idle timeout to bound a lost wakeup.
+
+    When the ring is full the producer folds the delta into a local carry
+    that rides along with the next published slot (or the next ``flush``) -
+    motion is summed, never dropped.
+    """
+
+    DEFAULT_CAPACITY = 1024
+
+    _HEADER_SIZE = 64
+    _READ_OFFSET = 0
+    _PARKED_OFFSET = 8
+
+    _u64 = struct.Struct("<Q")
+    _payload = struct.Struct("<iid")  # dx, dy, t
+    _SLOT_SIZE = 24  # u64 seq + payload
+
+    def __init__(
+        self,
+        shm: SharedMemory,
+        capacity: int,
+        doorbell_recv,
+        doorbell_send,
+        owner_pid: int,
+    ):
+        self._shm = shm
+        self._buf = shm.buf
+        self._capacity = capacity
+        self._doorbell_recv = doorbell_recv
+        self._doorbell_send = doorbell_send
+        self._owner_pid = owner_pid
+
+        # Producer-local state
+        self._next_seq = 1
+        self._carry_dx = 0
+        self._carry_dy = 0
+
+        # Consumer-local mirror of the shared read index
+        self._read = 0
+
+    @classmethod
+    def create(cls, capacity: int = DEFAULT_CAPACITY) -> "DeltaRing":
+        """Allocate a new ring. The creating process owns (and unlinks) it."""
+        size = cls._HEADER_SIZE + capacity * cls._SLOT_SIZE
+        shm = SharedMemory(create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        doorbell_recv, doorbell_send = Pipe(duplex=False)
+        os.set_blocking(doorbell_recv.fileno(), False)
+        return cls(shm, capacity, doorbell_recv, doorbell_send, os.getpid())
+
+    def __reduce__(self):
+        # Spawn/forkserver start methods pickle Process args: re-attach by
+        # name in the child. (With fork the object is inherited as-is.)
+        return (
+            _attach,
+            (
+                self._shm.name,
+                self._capacity,
+                self._doorbell_recv,
+                self._doorbell_send,
+                self._owner_pid,
+            ),
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def _slot_offset(self, index: int) -> int:
+        return self._HEADER_SIZE + (index % self._capacity) * self._SLOT_SIZE
+
+    # -- producer -----------------------------------------------------
+
+    def push(self, dx: int, dy: int, t: Optional[float] = None) -> bool:
+        """
+        Publish one delta. Returns False when the ring was full and the
+        delta was carried over into the next publish instead.
+        """
+        dx += self._carry_dx
+        dy += self._carry_dy
+        seq = self._next_seq
+        buf = self._buf
+        read = self._u64.unpack_from(buf, self._READ_OFFSET)[0]
+        if seq - 1 - read >= self._capacity:
+            self._carry_dx = dx
+            self._carry_dy = dy
+            return False
+
+        offset = self._slot_offset(seq - 1)
+        self._payload.pack_into(
+            buf, offset + 8, dx, dy, time.monotonic() if t is None else t
+        )
+        # Publication point: the payload above is complete before seq lands.
+        self._u64.pack_into(buf, offset, seq)
+        self._next_seq = seq + 1
+        self._carry_dx = 0
+        self._carry_dy = 0
+
+        if self._u64.unpack_from(buf, self._PARKED_OFFSET)[0]:
+            self._u64.pack_into(buf, self._PARKED_OFFSET, 0)
+            try:
+                self._doorbell_send.send_bytes(b"\x01")
+            except (OSError, ValueError):
+                pass
+        return True
+
+    def flush(self) -> bool:
+        """
+        Publish any carried-over delta. Returns True when nothing is pending.
+        """
+        if not (self._carry_dx or self._carry_dy):
+            return True
+        return self.push(0, 0)
+
+    # -- consumer -----------------------------------------------------
+
+    def drain(self) -> tuple[int, int, int]:
+        """
+        Consume every published delta and return ``(sum_dx, sum_dy, count)``.
+        """
+        buf = self._buf
+        read = self._read
+        expected = read + 1
+        sum_dx = 0
+        sum_dy = 0
+        count = 0
+        while True:
+            offset = self._slot_offset(read)
+            if self._u64.unpack_from(buf, offset)[0] != expected:
+                break
+            dx, dy, _t = self._payload.unpack_from(buf, offset + 8)
+            sum_dx += dx
+            sum_dy += dy
+            count += 1
+            read = expected
+            expected += 1
+        if count:
+            self._read = read
+            self._u64.pack_into(buf, self._READ_OFFSET, read)
+        return sum_dx, sum_dy, count
+
+    def park(self) -> bool:
+        """
+        Ask the producer to ring the doorbell on its next publish.
+
+        Returns True when the ring is still empty after parking (safe to
+        sleep), False when a delta raced in and the caller should drain.
+        """
+        buf = self._buf
+        self._u64.pack_into(buf, self._PARKED_OFFSET, 1)
+        seq = self._u64.unpack_from(buf, self._slot_offset(self._read))[0]
+        return seq != self._read + 1
+
+    def doorbell_fileno(self) -> int:
+        """Readable fd the consumer can register with ``loop.add_reader``."""
+        return self._doorbell_recv.fileno()
+
+    def clear_doorbell(self) -> None:
+        """Swallow pending doorbell bytes (non-blocking)."""
+        fd = self._doorbell_recv.fileno()
+        try:
+            while os.read(fd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    # -- lifecycle ----------------------------------------------------
+
+    def close(self) -> None:
+        """Release this process' mapping; the creator also unlinks it."""
+        self._buf = None
+        try:
+            self._shm.close()
+        except (BufferError, OSError):
+            pass
+        if os.getpid() == self._owner_pid:
+            try:
+                self._shm.unlink()
+            except (FileNotFoundError, OSError):
+                pass
+            for conn in (self._doorbell_recv, self._doorbell_send):
+                try:
+                    conn.close()
+                except OSError:
+                    pass
+
+
+def _attach(name, capacity, doorbell_recv, doorbell_send, owner_pid) -> DeltaRing:
+    return DeltaRing(
+        SharedMemory(name=name), capacity, doorbell_recv, doorbell_send, owner_pid
+    )
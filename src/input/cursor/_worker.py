@@ -37,6 +37,7 @@ from event import (
 )
 from event.bus import EventBus
 
+from input.cursor._ring import DeltaRing
 from network.stream.handler import StreamHandler
 
 from utils.logging import get_logger
@@ -51,6 +52,10 @@ class CursorHandlerWorker(object):
 
     RESULT_POLL_TIMEOUT = 0.1  # seconds
     DATA_POLL_TIMEOUT = 0.0001  # seconds
+    # Re-check the delta ring this often while parked during capture,
+    # bounding a lost doorbell (see DeltaRing) without polling on every
+    # delta. Outside capture the listener blocks on the doorbell alone.
+    RING_IDLE_RECHECK = 0.02  # seconds
 
     def __init__(
         self,
@@ -79,6 +84,10 @@ class CursorHandlerWorker(object):
 
         # Unidirectional pipe for mouse movement
         self.mouse_conn_rec, self.mouse_conn_send = Pipe(duplex=False)
+        # Shared-memory delta ring; preferred over mouse_conn by capture
+        # processes that support it. None when shared memory is unavailable.
+        self._delta_ring: Optional[DeltaRing] = None
+        self._ring_ready: Optional[asyncio.Event] = None
         self.process = None
         self._is_running = False
         self._mouse_data_task = None  # Async forwarder task
@@ -151,6 +160,9 @@ class CursorHandlerWorker(object):
             except Exception as e:
                 self._logger.error("Error enabling cursor capture", error=str(e))
             self._active_client = active_screen
+            # Re-arm the ring listener with the short capture recheck.
+            if self._ring_ready is not None:
+                self._ring_ready.set()
         else:
             try:
                 await self.disable_capture(x=data.x, y=data.y)
@@ -214,7 +226,12 @@ class CursorHandlerWorker(object):
         if self.stream is not None:
             # Start async task for mouse data listener
             try:
-                self._mouse_data_task = asyncio.create_task(self._mouse_data_listener())
+                listener = (
+                    self._mouse_ring_listener()
+                    if self._delta_ring is not None
+                    else self._mouse_data_listener()
+                )
+                self._mouse_data_task = asyncio.create_task(listener)
             except RuntimeError:
                 self._logger.error("Error creating task for mouse data listener")
                 self._mouse_data_task = None
@@ -336,6 +353,10 @@ class CursorHandlerWorker(object):
         except Exception as e:
             self._logger.warning("Error closing connections", error=str(e))
 
+        if self._delta_ring is not None:
+            self._delta_ring.close()
+            self._delta_ring = None
+
         self._logger.debug("Stopped")
 
     @staticmethod
@@ -443,6 +464,75 @@ class CursorHandlerWorker(object):
                 except Exception:
                     pass
 
+    def _create_delta_ring(self) -> Optional[DeltaRing]:
+        """Allocate the shared-memory delta ring, or None to fall back to the pipe."""
+        try:
+            return DeltaRing.create()
+        except (OSError, ValueError) as e:
+            self._logger.warning(
+                "Shared-memory delta ring unavailable, using pipe", error=str(e)
+            )
+            return None
+
+    def _on_ring_doorbell(self) -> None:
+        """``add_reader`` callback: the producer saw us parked and rang."""
+        ring = self._delta_ring
+        if ring is not None:
+            ring.clear_doorbell()
+        if self._ring_ready is not None:
+            self._ring_ready.set()
+
+    async def _mouse_ring_listener(self):
+        """
+        Forwards mouse deltas from the shared-memory ring onto the stream.
+
+        Each drain sums every pending delta into a single MOVE event, so
+        while ``stream.send`` applies backpressure the capture process keeps
+        publishing and the next drain coalesces the backlog. Wakeups come
+        from the ring doorbell via ``loop.add_reader`` - no reader thread and
+        no per-delta ``call_soon_threadsafe``. The bounded recheck only runs
+        while capturing; otherwise the task sleeps until the doorbell rings
+        or capture is enabled.
+        """
+        ring = self._delta_ring
+        if ring is None:
+            return
+        loop = asyncio.get_running_loop()
+        self._ring_ready = ready = asyncio.Event()
+        fd = ring.doorbell_fileno()
+        loop.add_reader(fd, self._on_ring_doorbell)
+
+        try:
+            while self._is_running and self.stream is not None:
+                dx, dy, count = ring.drain()
+                if not count:
+                    ready.clear()
+                    if not ring.park():
+                        continue
+                    if self._active_client is None:
+                        await ready.wait()
+                        continue
+                    try:
+                        await asyncio.wait_for(ready.wait(), self.RING_IDLE_RECHECK)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if dx == 0 and dy == 0:
+                    continue
+                try:
+                    await self.stream.send(
+                        MouseEvent(action=MouseEvent.MOVE_ACTION, dx=dx, dy=dy)
+                    )
+                except Exception as e:
+                    self._logger.exception("Error sending mouse delta", error=str(e))
+                    await asyncio.sleep(0.01)
+        finally:
+            try:
+                loop.remove_reader(fd)
+            except (OSError, ValueError):
+                pass
+            self._ring_ready = None
+
     async def send_command(self, command):
         """Sends a command to the window asynchronously"""
         if not self._is_running:
@@ -40,10 +40,12 @@ from network.stream.handler import StreamHandler
 from network.protocol.message import MessageType
 
 from utils.logging import get_logger
+from utils.metrics.trace import TRACER
 from utils.screen import Screen
 
 from input.utils import KeyUtilities, ScreenEdge
 from .backend import KeyboardListener, Key, KeyCode, HotKey, KeyboardController, BACKEND
+from ._injector import KeyInjector
 
 
 class ServerKeyboardListener(object):
@@ -520,8 +522,8 @@ class ClientKeyboardController(object):
             backend=BACKEND.get("keyboard_controller", "unknown"),
         )
 
-        self._queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
-        self._worker_task: Optional[asyncio.Task] = None
+        # Injection runs on its own thread, not the shared default executor
+        self._injector: Optional[KeyInjector] = None
         self._running = False
 
         self.stream.register_receive_callback(
@@ -538,16 +540,11 @@ class ClientKeyboardController(object):
     async def start(self):
         if not self._running:
             self._running = True
-            while not self._queue.empty():
-                try:
-                    self._queue.get_nowait()
-                except asyncio.QueueEmpty:
-                    break
-                finally:
-                    await asyncio.sleep(0)
-
-            self._worker_task = asyncio.create_task(self._run_worker())
-            self._logger.debug("Async worker started.")
+            self._injector = KeyInjector(
+                self._key_event_action, metrics=self.stream.get_metrics
+            )
+            self._injector.start()
+            self._logger.debug("Key injector started.")
             await asyncio.sleep(0)
 
     async def stop(self):
@@ -556,45 +553,18 @@ class ClientKeyboardController(object):
 
             await self._clear_pressed_keys()
 
-            if self._worker_task:
-                self._worker_task.cancel()
-                try:
-                    await self._worker_task
-                except asyncio.CancelledError:
-                    pass
-                self._worker_task = None
+            injector, self._injector = self._injector, None
+            if injector is not None:
+                # Pending keys are applied (then released) before it exits
+                await asyncio.to_thread(injector.stop)
 
-            self._logger.debug("Async worker stopped.")
+            self._logger.debug("Key injector stopped.")
 
     def is_alive(self) -> bool:
         return (
-            self._running
-            and self._worker_task is not None
-            and not self._worker_task.done()
+            self._running and self._injector is not None and self._injector.is_alive()
         )
 
-    async def _run_worker(self):
-        loop = asyncio.get_running_loop()
-
-        while self._running:
-            try:
-                message = await self._queue.get()
-
-                event = EventMapper.get_event(message)
-                if not isinstance(event, KeyboardEvent):
-                    continue
-
-                await loop.run_in_executor(None, self._key_event_action, event)
-                await asyncio.sleep(0)
-            except asyncio.TimeoutError:
-                await asyncio.sleep(0)
-                continue
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self._logger.error("Error in worker", error=str(e))
-                await asyncio.sleep(0.01)
-
     async def _on_client_active(self, data: Optional[ClientActiveEvent]):
         self._is_active = True
         self._cross_screen_event.clear()
@@ -613,25 +583,39 @@ class ClientKeyboardController(object):
             if not self._running:
                 await self.start()
 
-            await self._queue.put(message)
+            event = EventMapper.get_event(message)
+            if not isinstance(event, KeyboardEvent):
+                return
+
+            if TRACER.enabled:
+                event.trace = TRACER.context(message)
+                if event.trace is not None:
+                    event.trace.mark("receive")
+            self._injector.submit(event)
         except Exception as e:
-            self._logger.error("Failed to process mouse event", error=str(e))
+            self._logger.error("Failed to process keyboard event", error=str(e))
             await asyncio.sleep(0)
 
     async def _clear_pressed_keys(self):
+        # Behind any key still queued, so a late press can't stay stuck down
+        if self._injector is not None and self._injector.is_alive():
+            self._injector.call(self._release_pressed_keys)
+        else:
+            self._release_pressed_keys()
+        await asyncio.sleep(0)
+
+    def _release_pressed_keys(self):
         for key in list(self.pressed_keys):
             try:
                 self._controller.release(key)
             except Exception:
                 pass
-            await asyncio.sleep(0)
 
         for key in list(self._pressed_general_keys):
             try:
                 self._controller.release(key)
             except Exception:
                 pass
-            await asyncio.sleep(0)
         self.pressed_keys.clear()
         self._pressed_general_keys.clear()
 
@@ -0,0 +1,118 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from utils.logging import get_logger
+from utils.metrics import ConnectionMetrics
+from utils.metrics.trace import TRACER
+
+
+class KeyInjector(threading.Thread):
+    """
+    Single thread applying client key events in arrival order.
+
+    The event loop appends to a deque (``append``/``popleft`` are atomic, so
+    no lock is taken and no future is created per key) and only signals the
+    wake event when the thread may be parked. Every wake drains whatever is
+    pending, so a burst from fast typing or key repeat is injected in one go
+    instead of one executor round trip per key.
+
+    Callables queued with :meth:`call` run on this thread between events,
+    keeping e.g. "release everything held" ordered after the presses that
+    were already queued.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[Any], None],
+        metrics: Optional[Callable[[], Optional[ConnectionMetrics]]] = None,
+        name: str = "KeyInjector",
+    ):
+        super().__init__(name=name, daemon=True)
+        self._apply = apply
+        self._metrics = metrics
+        # (enqueued_at, event) for key events, (None, fn) for calls
+        self._pending: deque = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+
+        self._logger = get_logger(self.__class__.__name__)
+
+    def submit(self, event: Any) -> None:
+        """Queue ``event`` for injection. Safe to call from the event loop."""
+        self._pending.append((perf_counter(), event))
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def call(self, fn: Callable[[], None]) -> None:
+        """Run ``fn`` on the injector thread after the events already queued."""
+        self._pending.append((None, fn))
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        """Apply what is already queued, then let the thread exit."""
+        self._stopping = True
+        self._wake.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def pending(self) -> int:
+        """Number of events and calls not yet applied."""
+        return len(self._pending)
+
+    def run(self):
+        while True:
+            self._wake.wait()
+            # Clear before draining: a submit racing with the drain either
+            # lands in this pass or sets the event again for the next one.
+            self._wake.clear()
+            self._drain()
+            if self._stopping:
+                break
+
+    def _drain(self):
+        pending = self._pending
+        metrics = self._metrics() if self._metrics is not None else None
+        apply = self._apply_traced if TRACER.enabled else self._apply
+        while pending:
+            enqueued_at, item = pending.popleft()
+            try:
+                if enqueued_at is None:
+                    item()
+                    continue
+                apply(item)
+            except Exception as e:
+                self._logger.error("Error injecting key event", error=str(e))
+                continue
+            if metrics is not None:
+                metrics.record_injection(perf_counter() - enqueued_at)
+
+    def _apply_traced(self, event: Any):
+        """``_apply`` closing the queue and inject hops of a sampled event."""
+        trace = getattr(event, "trace", None)
+        if trace is None:
+            self._apply(event)
+            return
+        trace.mark("client_queue")
+        self._apply(event)
+        trace.mark("inject")
+        TRACER.finish(trace)
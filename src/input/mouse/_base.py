@@ -16,8 +16,8 @@
 #
 
 import asyncio
-from collections import deque
-from typing import Optional
+from bisect import bisect_right
+from typing import NamedTuple, Optional
 from time import time
 from threading import Lock
 
@@ -43,12 +43,114 @@ from network.stream import StreamType
 from network.stream.handler import StreamHandler
 
 from utils.logging import get_logger
+from utils.metrics.trace import TRACER
 from utils.screen import Screen
-from input.utils import ScreenEdge, EdgeDetector, ButtonMapping
+from input.utils import (
+    ScreenEdge,
+    EdgeDetector,
+    ButtonMapping,
+    CursorTracker,
+    MovementHistory,
+    _check_direction,
+)
 
 from .backend import MouseListener, MouseController, Button, BACKEND
 
 
+class _RouteEntry(NamedTuple):
+    """One edge binding compiled for the crossing hot path."""
+
+    client_uid: str
+    binding: dict
+    client_monitor_id: Optional[int]
+    server_axis_start: float
+    client_axis_start: float
+    # d(client axis) / d(server axis) over the binding's span
+    axis_scale: float
+
+    def map_axis(self, server_axis_norm: float) -> float:
+        return (
+            self.client_axis_start
+            + (server_axis_norm - self.server_axis_start) * self.axis_scale
+        )
+
+
+class _EdgeRoutes:
+    """Bindings of one ``(server monitor, edge)`` cut into sorted segments.
+
+    The breakpoints are every binding's start/end, so each segment
+    ``[points[i], points[i + 1])`` is covered by a fixed set of bindings
+    and maps to precomputed ``(first match, matching client UIDs)``. A
+    crossing then costs one bisect however many clients are bound.
+    """
+
+    __slots__ = ("points", "segments")
+
+    def __init__(self, entries: list[_RouteEntry], ends: list[float]):
+        points = sorted({e.server_axis_start for e in entries}.union(ends))
+        segments: list[Optional[tuple[_RouteEntry, tuple[str, ...]]]] = []
+        for lo in points[:-1]:
+            first: Optional[_RouteEntry] = None
+            uids: list[str] = []
+            for entry, end in zip(entries, ends):
+                # One match per client: its first binding covering lo.
+                if entry.client_uid in uids:
+                    continue
+                if entry.server_axis_start <= lo < end:
+                    uids.append(entry.client_uid)
+                    if first is None:
+                        first = entry
+            segments.append((first, tuple(uids)) if first is not None else None)
+        self.points = tuple(points)
+        self.segments = tuple(segments)
+
+    def lookup(self, axis_norm: float) -> Optional[tuple[_RouteEntry, tuple[str, ...]]]:
+        i = bisect_right(self.points, axis_norm) - 1
+        if i < 0 or i >= len(self.segments):
+            return None
+        return self.segments[i]
+
+
+def _compile_edge_routes(
+    edge_snapshot: tuple[tuple[str, tuple[dict, ...]], ...],
+    active_clients: tuple[str, ...],
+) -> dict[tuple, _EdgeRoutes]:
+    """Compile per-client binding dicts into ``(monitor_id, edge)`` routes.
+
+    The result is built once per topology change and never mutated, so
+    the pynput thread reads it without locking (same rule as the
+    snapshots). Client order is preserved: on overlapping bindings the
+    first connected client wins, as before.
+    """
+    grouped: dict[tuple, tuple[list[_RouteEntry], list[float]]] = {}
+    for client_uid, bindings in edge_snapshot:
+        # Skip clients that disconnected between snapshot rebuilds: the
+        # cursor would otherwise warp to a dead peer.
+        if client_uid not in active_clients:
+            continue
+        for b in bindings:
+            s_start = b.get("server_axis_start", 0.0)
+            s_end = b.get("server_axis_end", 0.0)
+            if not s_start < s_end:
+                continue  # empty span, can never match
+            c_start = b.get("client_axis_start", 0.0)
+            c_end = b.get("client_axis_end", 0.0)
+            monitor_id = b.get("client_monitor_id")
+            entry = _RouteEntry(
+                client_uid=client_uid,
+                binding=b,
+                client_monitor_id=int(monitor_id) if monitor_id is not None else None,
+                server_axis_start=s_start,
+                client_axis_start=c_start,
+                axis_scale=(c_end - c_start) / (s_end - s_start),
+            )
+            key = (b.get("server_monitor_id"), b.get("server_edge"))
+            entries, ends = grouped.setdefault(key, ([], []))
+            entries.append(entry)
+            ends.append(s_end)
+    return {key: _EdgeRoutes(*value) for key, value in grouped.items()}
+
+
 class ServerMouseListener(object):
     """Base class for server-side mouse listeners."""
 
@@ -85,6 +187,9 @@ class ServerMouseListener(object):
         self._edge_bindings_snapshot: tuple[tuple[str, tuple[dict, ...]], ...] = ()
         self._intra_bindings_snapshot: tuple[tuple[str, tuple[dict, ...]], ...] = ()
         self._active_clients_snapshot: tuple[str, ...] = ()
+        # Edge bindings compiled for crossing resolution, keyed by
+        # ``(server_monitor_id, server_edge)``. Swapped like the snapshots.
+        self._edge_routes: dict[tuple, _EdgeRoutes] = {}
         # One-shot warning per overlapping pair so an ambiguous layout
         # logs once, not every cursor sample.
         self._warned_overlap_keys: set[tuple[str, ...]] = set()
@@ -128,7 +233,7 @@ class ServerMouseListener(object):
 
         self._listener = None
 
-        self._movement_history = deque(maxlen=self.MOVEMENT_HISTORY_LEN)
+        self._movement_history = MovementHistory(self.MOVEMENT_HISTORY_LEN)
         self._is_dragging = False
 
         self._logger = get_logger(self.__class__.__name__)
@@ -288,6 +393,9 @@ class ServerMouseListener(object):
             (uid, tuple(b)) for uid, b in self._intra_bindings_by_client.items()
         )
         self._active_clients_snapshot = tuple(self._active_clients.keys())
+        self._edge_routes = _compile_edge_routes(
+            self._edge_bindings_snapshot, self._active_clients_snapshot
+        )
 
     async def _on_client_connected(self, data: Optional[ClientConnectedEvent]):
         if data is None:
@@ -521,16 +629,14 @@ class ServerMouseListener(object):
         edge: ScreenEdge,
         cursor_x: float,
         cursor_y: float,
-    ) -> Optional[tuple[str, dict, float]]:
-        """Match an edge crossing against a cached EdgeBinding.
+    ) -> Optional[tuple[str, _RouteEntry, float]]:
+        """Match an edge crossing against the compiled edge routes.
 
-        Reads the COW snapshot, no lock - the tuple is immutable and the
+        Reads the COW route table, no lock - it is never mutated and the
         attribute swap done by writers is atomic under the GIL.
         """
-        # Single atomic ref reads.
-        edge_snapshot = self._edge_bindings_snapshot
-        active_snapshot = self._active_clients_snapshot
-        if not edge_snapshot:
+        routes = self._edge_routes
+        if not routes:
             return None
         edge_str = self._EDGE_TO_STRING.get(edge)
         if not edge_str:
@@ -539,6 +645,9 @@ class ServerMouseListener(object):
         monitor = self._monitor_layout.nearest_monitor(cursor_x, cursor_y)
         if monitor is None:
             return None
+        edge_routes = routes.get((monitor.monitor_id, edge_str))
+        if edge_routes is None:
+            return None
 
         m_w = max(1, monitor.max_x - monitor.min_x)
         m_h = max(1, monitor.max_y - monitor.min_y)
@@ -548,25 +657,10 @@ class ServerMouseListener(object):
             axis_norm = (cursor_x - monitor.min_x) / m_w
         axis_norm = max(0.0, min(1.0, axis_norm))
 
-        first_match: Optional[tuple[str, dict, float]] = None
-        matches: list[str] = []
-        for client_uid, bindings in edge_snapshot:
-            # Skip clients that disconnected between snapshot rebuilds:
-            # the cursor would otherwise warp to a dead peer.
-            if client_uid not in active_snapshot:
-                continue
-            for b in bindings:
-                if b.get("server_monitor_id") != monitor.monitor_id:
-                    continue
-                if b.get("server_edge") != edge_str:
-                    continue
-                s_start = b.get("server_axis_start", 0.0)
-                s_end = b.get("server_axis_end", 0.0)
-                if s_start <= axis_norm < s_end:
-                    matches.append(client_uid)
-                    if first_match is None:
-                        first_match = (client_uid, b, axis_norm)
-                    break  # one match per client for this edge
+        match = edge_routes.lookup(axis_norm)
+        if match is None:
+            return None
+        entry, matches = match
 
         if len(matches) > 1:
             key = tuple(sorted(matches))
@@ -578,7 +672,7 @@ class ServerMouseListener(object):
                     edge=edge_str,
                     candidates=list(matches),
                 )
-        return first_match
+        return entry.client_uid, entry, axis_norm
 
     def resolve_neighbour(
         self,
@@ -646,28 +740,11 @@ class ServerMouseListener(object):
                 )
                 if resolved is None:
                     return True
-                target_screen, binding, server_axis_norm = resolved
-                target_monitor_id = binding.get("client_monitor_id")
-                if target_monitor_id is not None:
-                    target_monitor_id = int(target_monitor_id)
-
+                target_screen, route, server_axis_norm = resolved
+                target_monitor_id = route.client_monitor_id
                 # Linear map from server-edge axis_norm to client-edge
-                # axis_norm. Inlined here to keep the pynput thread off
-                # the EdgeBinding import path.
-                c_start = binding.get("client_axis_start", 0.0)
-                c_end = binding.get("client_axis_end", 0.0)
-                s_start = binding.get("server_axis_start", 0.0)
-                s_end = binding.get("server_axis_end", 0.0)
-                span = s_end - s_start
-                if span > 0:
-                    local = (server_axis_norm - s_start) / span
-                    if local < 0.0:
-                        local = 0.0
-                    elif local > 1.0:
-                        local = 1.0
-                    client_axis_norm = c_start + local * (c_end - c_start)
-                else:
-                    client_axis_norm = c_start
+                # axis_norm, coefficients precompiled with the route.
+                client_axis_norm = route.map_axis(server_axis_norm)
 
                 # ``(x, y)`` is normalised over the destination
                 # client monitor's bbox, not the full client virtual
@@ -1003,9 +1080,14 @@ class ClientMouseController(object):
         # O(N) monitor scan.
         self._active_target_bbox: tuple[int, int, int, int] = self._screen_bbox
 
-        self._movement_history = deque(maxlen=self.MOVEMENT_HISTORY_LEN)
+        self._movement_history = MovementHistory(self.MOVEMENT_HISTORY_LEN)
 
         self._controller = MouseController()
+        # Dead-reckoned from the injected deltas so edge checks don't need
+        # a display server round trip on every move.
+        self._cursor = CursorTracker(
+            lambda: self._controller.position, self._monitor_layout
+        )
         self._pressed = False
         self._previous_button: int | None = None
         self._last_press_time: float = -99
@@ -1099,6 +1181,7 @@ class ClientMouseController(object):
         self._monitor_layout = monitor_layout
         self._screen_bbox = screen_bbox
         self._cached_monitor = None
+        self._cursor.set_layout(monitor_layout)
         if self._active_monitor_id is not None and self._active_monitor_id in known_ids:
             for m in monitor_layout.monitors:
                 if m.monitor_id == self._active_monitor_id:
@@ -1171,36 +1254,16 @@ class ClientMouseController(object):
         )
 
     async def _run_worker(self):
+        queue = self._queue
         while self._running:
             try:
-                message = await self._queue.get()
-
-                event = EventMapper.get_event(message)
-                if not isinstance(event, MouseEvent):
-                    continue
-
-                if event.action == MouseEvent.MOVE_ACTION:
-                    self._refresh_pointer_lock()
-                    self._move_cursor(event.x, event.y, event.dx, event.dy)
-                    # While a game holds the pointer lock the cursor is
-                    # pinned/centered by the game; running edge detection
-                    # would read that as drift and clamp/warp against it.
-                    if not self._pointer_locked:
-                        await self._check_edge()
-                elif event.action == MouseEvent.POSITION_ACTION:
-                    # Position multiple times so absolute placement
-                    # converges across platforms. A read-back check can't
-                    # replace this: some OSes report the target position
-                    # before the cursor actually moves (see the matching
-                    # note in ServerMouseController._on_active_screen_changed).
-                    for _ in range(10):
-                        await self._position_cursor(event.x, event.y)
-                    await self._check_edge()
-                elif event.action == MouseEvent.CLICK_ACTION:
-                    self._click(event.button, event.is_pressed)
-                elif event.action == MouseEvent.SCROLL_ACTION:
-                    self._scroll(event.dx, event.dy)
+                # Take everything the network delivered since the last
+                # wake, so a burst is applied as one batch.
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
 
+                await self._apply_batch(batch)
                 await asyncio.sleep(0)
             except asyncio.TimeoutError:
                 continue
@@ -1210,6 +1273,99 @@ class ClientMouseController(object):
                 self._logger.error("worker error", error=str(e))
                 await asyncio.sleep(0.01)
 
+    async def _apply_batch(self, batch: list) -> None:
+        """Apply a drained batch of mouse messages in order.
+
+        Consecutive relative moves are summed into one injection, and the
+        edge check (an OS position read under ``_edge_check_lock``) runs
+        once per run of moves instead of once per move. Clicks, scrolls
+        and positions flush the pending motion first, so they land where
+        the server saw them.
+        """
+        pending_dx = pending_dy = 0
+        relative = False
+        moved = False
+        traced = self._trace_batch(batch) if TRACER.enabled else None
+
+        for message in batch:
+            # Compact MOVE frames arrive already decoded as MouseEvent.
+            if isinstance(message, MouseEvent):
+                event = message
+            else:
+                event = EventMapper.get_event(message)
+                if not isinstance(event, MouseEvent):
+                    continue
+
+            is_move = event.action == MouseEvent.MOVE_ACTION
+            if is_move and event.x == -1 and event.y == -1:
+                pending_dx += event.dx
+                pending_dy += event.dy
+                relative = True
+                continue
+
+            if relative:
+                self._refresh_pointer_lock()
+                self._move_cursor(-1, -1, pending_dx, pending_dy)
+                pending_dx = pending_dy = 0
+                relative = False
+                moved = True
+
+            if is_move:
+                self._refresh_pointer_lock()
+                self._move_cursor(event.x, event.y, event.dx, event.dy)
+                moved = True
+                continue
+
+            if moved:
+                await self._check_moved_edge()
+                moved = False
+
+            if event.action == MouseEvent.POSITION_ACTION:
+                # Position multiple times so absolute placement
+                # converges across platforms. A read-back check can't
+                # replace this: some OSes report the target position
+                # before the cursor actually moves (see the matching
+                # note in ServerMouseController._on_active_screen_changed).
+                for _ in range(10):
+                    await self._position_cursor(event.x, event.y)
+                await self._check_edge()
+            elif event.action == MouseEvent.CLICK_ACTION:
+                self._click(event.button, event.is_pressed)
+            elif event.action == MouseEvent.SCROLL_ACTION:
+                self._scroll(event.dx, event.dy)
+
+        if relative:
+            self._refresh_pointer_lock()
+            self._move_cursor(-1, -1, pending_dx, pending_dy)
+            moved = True
+        if traced:
+            for ctx in traced:
+                ctx.mark("inject")
+                TRACER.finish(ctx)
+        if moved:
+            await self._check_moved_edge()
+
+    @staticmethod
+    def _trace_batch(batch: list) -> list:
+        """Close the client-queue hop of the sampled messages in ``batch``."""
+        traced = []
+        for message in batch:
+            ctx = TRACER.context(message)
+            if ctx is not None:
+                ctx.mark("client_queue")
+                traced.append(ctx)
+        return traced
+
+    async def _check_moved_edge(self):
+        # While a game holds the pointer lock the cursor is pinned/centered
+        # by the game; running edge detection would read that as drift and
+        # clamp/warp against it.
+        if not self._pointer_locked:
+            await self._check_edge()
+        else:
+            # The game recentres the cursor behind our deltas.
+            self._cursor.invalidate()
+
     async def _on_client_active(self, data: Optional[ClientActiveEvent]):
         if data is not None:
             self._current_screen = data.client_uid
@@ -1228,6 +1384,7 @@ class ClientMouseController(object):
         self._last_move_delta = (0, 0)
         self._pointer_locked = False
         self._pointer_lock_ts = 0.0
+        self._cursor.invalidate()
 
         self._is_active = True
         self._cross_screen_event.clear()
@@ -1388,29 +1545,14 @@ class ClientMouseController(object):
         if x_edge is None and y_edge is None:
             return None
 
-        pairs = size - 1
-        min_agreements = int(pairs * direction_ratio)
-
-        if x_edge is not None:
-            agreements = 0
-            for i in range(pairs):
-                if (
-                    movement_history[i + 1][0] - movement_history[i][0]
-                ) * x_axis_sign > 0:
-                    agreements += 1
-            if agreements >= min_agreements:
-                return x_edge
-
-        if y_edge is not None:
-            agreements = 0
-            for i in range(pairs):
-                if (
-                    movement_history[i + 1][1] - movement_history[i][1]
-                ) * y_axis_sign > 0:
-                    agreements += 1
-            if agreements >= min_agreements:
-                return y_edge
-
+        if x_edge is not None and _check_direction(
+            movement_history, 0, x_axis_sign, direction_ratio
+        ):
+            return x_edge
+        if y_edge is not None and _check_direction(
+            movement_history, 1, y_axis_sign, direction_ratio
+        ):
+            return y_edge
         return None
 
     def _resolve_intra_client_warp(
@@ -1614,7 +1756,7 @@ class ClientMouseController(object):
         if monitor is None:
             return
         try:
-            pos = self._controller.position
+            pos = self._cursor.position()
             if not pos or len(pos) != 2:
                 return
             cx, cy = pos
@@ -1622,6 +1764,7 @@ class ClientMouseController(object):
             new_y = max(monitor.min_y + 1, min(monitor.max_y - 2, cy))
             if (new_x, new_y) != (cx, cy):
                 self._controller.position = (new_x, new_y)
+                self._cursor.invalidate()
         except Exception as e:
             self._logger.error("failed to clamp cursor to monitor", error=str(e))
 
@@ -1645,6 +1788,10 @@ class ClientMouseController(object):
             if self._cross_screen_event.is_set() or not self._is_active:
                 return await asyncio.sleep(0)
 
+            if TRACER.enabled:
+                ctx = TRACER.context(message)
+                if ctx is not None:
+                    ctx.mark("receive")
             await self._queue.put(message)
             return None
         except Exception as e:
@@ -1667,7 +1814,7 @@ class ClientMouseController(object):
 
                 self._checking_edge = True
 
-                pos = self._controller.position
+                pos = self._cursor.position()
                 if pos is None or len(pos) != 2:
                     return None
                 x, y = pos
@@ -1790,7 +1937,7 @@ class ClientMouseController(object):
                 return True
 
         self._clamp_cursor_to_monitor(previous)
-        pos = self._controller.position
+        pos = self._cursor.position()
         if pos and len(pos) == 2:
             nx, ny = pos
             self._movement_history.clear()
@@ -1826,6 +1973,8 @@ class ClientMouseController(object):
         except Exception as e:
             self._logger.error("failed to warp cursor intra-client", error=str(e))
             return True
+        finally:
+            self._cursor.invalidate()
         # Update last-known to the warp destination so the next tick
         # doesn't flag this as drift.
         self._last_known_monitor_id = dst_monitor_id
@@ -1857,6 +2006,7 @@ class ClientMouseController(object):
 
         try:
             self._controller.position = (x, y)
+            self._cursor.invalidate()
             await asyncio.sleep(0)
         except Exception as e:
             self._logger.error("failed to position cursor", error=str(e))
@@ -1878,6 +2028,7 @@ class ClientMouseController(object):
             # when OS clamping has stalled the position history.
             self._last_move_delta = (dx, dy)
             self._inject_relative(dx, dy)
+            self._cursor.move(dx, dy)
         else:
             try:
                 min_x, min_y, max_x, max_y = self._active_target_bbox
@@ -1894,6 +2045,7 @@ class ClientMouseController(object):
                 self._controller.position = (x, y)
             except Exception as e:
                 self._logger.error("failed to position cursor", error=str(e))
+            self._cursor.invalidate()
 
     def _cursor_is_hidden(self) -> bool:
         """Return True if the OS cursor is currently hidden.
@@ -25,7 +25,8 @@ from evdev import UInput, ecodes
 import Xlib.display
 from Xlib import display
 
-from input.utils import _wrap
+from input.utils import CursorTracker, _wrap
+from utils.screen import Screen
 
 
 def _check_and_initialize():
@@ -159,6 +160,9 @@ class MouseListener(threading.Thread):
         self._devices = find_mice(devices) if devices else find_mice()
         self._ui = make_uinput(self._devices) if not suppress else None
         self._display = None
+        # Integrates the forwarded REL_X/REL_Y instead of a QueryPointer
+        # round trip per event; resyncs with X when it can't be trusted.
+        self._cursor = CursorTracker(self._query_pointer)
         self._injected_flag = False
         self._injected_rel_count = 0
         self._injected_key_count = 0
@@ -171,23 +175,28 @@ class MouseListener(threading.Thread):
     @suppress.setter
     def suppress(self, value):
         self._suppress = value
+        # Suppressed deltas never reach the cursor: don't trust what was
+        # tracked across the switch.
+        self._cursor.invalidate()
+
+    def _query_pointer(self):
+        with display_manager(self._display) as d:
+            root = d.screen().root
+            pointer = root.query_pointer()
+            return (pointer.root_x, pointer.root_y)
 
     def _get_position(self):
         if not self._display:
             return (0, 0)
-        try:
-            with display_manager(self._display) as d:
-                root = d.screen().root
-                pointer = root.query_pointer()
-                return (pointer.root_x, pointer.root_y)
-        except Exception:
-            return X11Error("Failed to get pointer position from X11")
+        pos = self._cursor.position()
+        return pos if pos is not None else (0, 0)
 
     def run(self):
         import select
 
         self._running.set()
         self._display = display.Display()
+        self._cursor.set_layout(Screen.get_monitor_layout())
         try:
             for dev in self._devices:
                 dev.grab()
@@ -241,6 +250,11 @@ class MouseListener(threading.Thread):
                     self._injected_flag = False
 
         if event.type == ecodes.EV_REL and event.code in (ecodes.REL_X, ecodes.REL_Y):
+            if not self._suppress and self._ui:
+                if event.code == ecodes.REL_X:
+                    self._cursor.move(event.value, 0)
+                else:
+                    self._cursor.move(0, event.value)
             if self.on_move:
                 pos = self._get_position()
                 if self.on_move(pos[0], pos[1], injected) is False:
@@ -20,6 +20,7 @@ from typing import Optional
 from pynput.keyboard import Key, KeyCode
 import enum
 from collections import deque
+from time import monotonic
 from typing import Callable
 
 
@@ -51,6 +52,76 @@ def _as_bbox(screen_size: tuple) -> tuple[int, int, int, int]:
     return 0, 0, int(screen_size[0]), int(screen_size[1])
 
 
+class MovementHistory:
+    """Fixed-size ring of recent cursor positions with running direction counts.
+
+    Behaves like the ``deque(maxlen=...)`` it replaces (``append``,
+    ``clear``, ``len``, indexing, iteration) but also keeps, per axis,
+    how many consecutive sample pairs moved in the positive and in the
+    negative direction. The counts are updated on append/evict, so the
+    direction-consensus check in :class:`EdgeDetector` is O(1) instead
+    of a walk over the whole history on every sample.
+
+    Not thread-safe: writers must serialise ``append``/``clear`` the
+    way they did for the deque.
+    """
+
+    __slots__ = ("_points", "_maxlen", "_x_pos", "_x_neg", "_y_pos", "_y_neg")
+
+    def __init__(self, maxlen: int):
+        self._points: deque = deque(maxlen=maxlen)
+        self._maxlen = maxlen
+        self._x_pos = self._x_neg = self._y_pos = self._y_neg = 0
+
+    @property
+    def maxlen(self) -> int:
+        return self._maxlen
+
+    def _count(self, dx, dy, step: int) -> None:
+        if dx > 0:
+            self._x_pos += step
+        elif dx < 0:
+            self._x_neg += step
+        if dy > 0:
+            self._y_pos += step
+        elif dy < 0:
+            self._y_neg += step
+
+    def append(self, point) -> None:
+        points = self._points
+        # A single-slot ring never holds a pair to count.
+        if points and self._maxlen > 1:
+            last = points[-1]
+            self._count(point[0] - last[0], point[1] - last[1], 1)
+            if len(points) == self._maxlen:
+                # The oldest pair falls out with the oldest sample.
+                first, second = points[0], points[1]
+                self._count(second[0] - first[0], second[1] - first[1], -1)
+        points.append(point)
+
+    def clear(self) -> None:
+        self._points.clear()
+        self._x_pos = self._x_neg = self._y_pos = self._y_neg = 0
+
+    def agreements(self, axis: int, sign: int) -> int:
+        """Number of sample pairs that moved along ``axis`` in ``sign``."""
+        if axis == 0:
+            return self._x_pos if sign > 0 else self._x_neg
+        return self._y_pos if sign > 0 else self._y_neg
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __getitem__(self, index):
+        return self._points[index]
+
+    def __iter__(self):
+        return iter(self._points)
+
+    def __repr__(self) -> str:
+        return f"MovementHistory({list(self._points)!r}, maxlen={self._maxlen})"
+
+
 def _check_direction(
     movement_history,
     axis: int,
@@ -62,6 +133,8 @@ def _check_direction(
     if pairs < 1:
         return False
     min_agreements = int(pairs * direction_ratio)
+    if isinstance(movement_history, MovementHistory):
+        return movement_history.agreements(axis, sign) >= min_agreements
     agreements = 0
     for i in range(pairs):
         if (movement_history[i + 1][axis] - movement_history[i][axis]) * sign > 0:
@@ -89,7 +162,7 @@ class EdgeDetector:
 
     @staticmethod
     def is_at_edge(
-        movement_history: deque | list,
+        movement_history: MovementHistory | deque | list,
         x: float | int,
         y: float | int,
         screen_size,
@@ -142,29 +215,16 @@ class EdgeDetector:
         if x_edge is None and y_edge is None:
             return None
 
-        # Direction check with jitter tolerance
-        pairs = size - 1
-        min_agreements = int(pairs * direction_ratio)
-        hist = movement_history
-
-        # Check x-axis edge first (LEFT/RIGHT)
-        if x_edge is not None:
-            agreements = 0
-            for i in range(pairs):
-                if (hist[i + 1][0] - hist[i][0]) * x_axis_sign > 0:
-                    agreements += 1
-            if agreements >= min_agreements:
-                return x_edge
-
-        # Check y-axis edge (TOP/BOTTOM)
-        if y_edge is not None:
-            agreements = 0
-            for i in range(pairs):
-                if (hist[i + 1][1] - hist[i][1]) * y_axis_sign > 0:
-                    agreements += 1
-            if agreements >= min_agreements:
-                return y_edge
-
+        # Direction check with jitter tolerance, x-axis edge (LEFT/RIGHT)
+        # first, then y-axis edge (TOP/BOTTOM).
+        if x_edge is not None and _check_direction(
+            movement_history, 0, x_axis_sign, direction_ratio
+        ):
+            return x_edge
+        if y_edge is not None and _check_direction(
+            movement_history, 1, y_axis_sign, direction_ratio
+        ):
+            return y_edge
         return None
 
     @staticmethod
@@ -178,18 +238,7 @@ class EdgeDetector:
         """Per-monitor variant of :meth:`is_at_edge` for MonitorLayout."""
         # Cursor may sit in a dead zone (L-shaped layout) or just shy of
         # a monitor edge — snap to the closest monitor.
-        monitor = layout.find_monitor_at(x, y)
-        if monitor is None:
-            best = None
-            best_dist = None
-            for m in layout.monitors:
-                cx = max(m.min_x, min(x, m.max_x - 1))
-                cy = max(m.min_y, min(y, m.max_y - 1))
-                dist = (cx - x) ** 2 + (cy - y) ** 2
-                if best_dist is None or dist < best_dist:
-                    best = m
-                    best_dist = dist
-            monitor = best
+        monitor = layout.nearest_monitor(x, y)
         if monitor is None:
             return None
 
@@ -228,7 +277,7 @@ class EdgeDetector:
 
     def detect_edge(
         self,
-        movement_history: deque | list,
+        movement_history: MovementHistory | deque | list,
         x: float | int,
         y: float | int,
         screen_size: tuple,
@@ -241,6 +290,125 @@ class EdgeDetector:
             callbacks[edge]()
 
 
+class CursorTracker:
+    """Dead-reckoned cursor position, resynced with the OS only when needed.
+
+    Reading the cursor from the display server is a round trip (X11
+    ``QueryPointer`` through pynput or Xlib). The tracker instead applies
+    the deltas the caller injected or forwarded, clamped against the
+    cached :class:`utils.screen.MonitorLayout` the way the OS clamps the
+    real cursor, and only calls ``query`` when:
+
+    - there is no position yet, or :meth:`invalidate` was called (warps,
+      monitor changes, anything the deltas don't describe);
+    - ``resync_interval`` has passed, bounding drift from other input
+      sources;
+    - the tracked point is closer to its monitor's edge than
+      ``edge_margin`` plus the distance travelled since the last sync.
+      Pointer acceleration scales the real motion up to twice the
+      injected deltas before this under-reports, so edge and drift
+      checks always see the true position.
+    """
+
+    RESYNC_INTERVAL = 0.5  # seconds
+    EDGE_MARGIN = 8  # pixels
+
+    def __init__(
+        self,
+        query: Callable[[], Optional[tuple]],
+        layout=None,
+        resync_interval: float = RESYNC_INTERVAL,
+        edge_margin: int = EDGE_MARGIN,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self._query = query
+        self._layout = layout
+        self._resync_interval = resync_interval
+        self._edge_margin = edge_margin
+        self._clock = clock
+
+        self._x: Optional[int] = None
+        self._y: Optional[int] = None
+        self._monitor = None
+        self._travel = 0
+        self._synced_at = 0.0
+        self.reads = 0
+
+    def set_layout(self, layout) -> None:
+        """Swap the monitor layout (after a hotplug) and resync on next read."""
+        self._layout = layout
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Forget the tracked position; the next read queries the OS."""
+        self._x = self._y = None
+        self._monitor = None
+
+    def move(self, dx: int, dy: int) -> None:
+        """Apply a relative motion the cursor just received."""
+        x, y = self._x, self._y
+        if x is None or y is None:
+            return
+        x += dx
+        y += dy
+        self._travel += abs(dx) + abs(dy)
+
+        monitor = self._monitor
+        if monitor is None or not monitor.contains(x, y):
+            monitor = (
+                self._layout.nearest_monitor(x, y) if self._layout is not None else None
+            )
+            if monitor is None:
+                self.invalidate()
+                return
+            # The OS keeps the cursor on a monitor: clamp like it does.
+            x = max(monitor.min_x, min(monitor.max_x - 1, x))
+            y = max(monitor.min_y, min(monitor.max_y - 1, y))
+            self._monitor = monitor
+        self._x = x
+        self._y = y
+
+    def position(self) -> Optional[tuple[int, int]]:
+        """Tracked ``(x, y)``, refreshed from the OS if it can't be trusted."""
+        # Locals: invalidate() may run on another thread meanwhile.
+        x, y, monitor = self._x, self._y, self._monitor
+        if x is None or y is None or monitor is None:
+            return self.resync()
+        if self._needs_resync(x, y, monitor):
+            return self.resync()
+        return x, y
+
+    def resync(self) -> Optional[tuple[int, int]]:
+        """Read the real position from the OS and restart dead reckoning."""
+        self.reads += 1
+        try:
+            pos = self._query()
+            x, y = int(pos[0]), int(pos[1])
+        except Exception:
+            self.invalidate()
+            return None
+
+        self._x = x
+        self._y = y
+        self._monitor = (
+            self._layout.find_monitor_at(x, y) if self._layout is not None else None
+        )
+        self._travel = 0
+        self._synced_at = self._clock()
+        return x, y
+
+    def _needs_resync(self, x: int, y: int, monitor) -> bool:
+        if self._clock() - self._synced_at >= self._resync_interval:
+            return True
+        to_edge = min(
+            x - monitor.min_x,
+            monitor.max_x - 1 - x,
+            y - monitor.min_y,
+            monitor.max_y - 1 - y,
+        )
+        return to_edge < self._edge_margin + self._travel
+
+
 class KeyUtilities:
     """Cross-platform keyboard key conversions."""
 
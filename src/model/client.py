@@ -25,6 +25,7 @@ from typing import Optional
 
 from model.connection import ClientConnection
 from model.monitor import MonitorInfo
+from utils.metrics.clock import PeerClock
 
 # Compiled once: hostname validation runs on every client (dis)connect.
 _HOSTNAME_LABEL_RE = re.compile(r"(?!-)[A-Z\d-]{1,63}(?<!-)$", re.IGNORECASE)
@@ -141,6 +142,13 @@ class ClientObj:
         self.additional_params = (
             additional_params if additional_params is not None else {}
         )
+        # Per-stream wire capabilities agreed in the last handshake
+        # (stream type -> network.protocol.capabilities.StreamCapabilities).
+        # Runtime only: not persisted, empty means a legacy peer.
+        self.capabilities: dict = {}
+        # RTT / clock-offset estimate towards this peer, fed by heartbeats.
+        # Runtime only: not persisted.
+        self.clock = PeerClock()
 
     @property
     def ip_address(self) -> Optional[str]:
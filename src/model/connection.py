@@ -16,8 +16,76 @@
 #
 
 import asyncio
+import os
+import struct
+from collections import deque
 from typing import Tuple, Dict, Optional
 
+# Frame prefix used by the wire protocol (``ProtocolMessage._prefix_format``
+# = ``!Icc``: body length, b"P", marker). Mirrored here so the transport
+# layer can find frame boundaries without importing the network package.
+_FRAME_LENGTH = struct.Struct("!I")
+_FRAME_PREFIX_SIZE = 6
+_FRAME_MAGIC = ord("P")
+
+
+async def _wait_writable(loop: asyncio.AbstractEventLoop, fd: int) -> None:
+    waiter = loop.create_future()
+    loop.add_writer(fd, waiter.set_result, None)
+    try:
+        await waiter
+    finally:
+        loop.remove_writer(fd)
+
+
+async def _socket_sendfile(
+    transport: Optional[asyncio.BaseTransport], file, offset: int, count: int
+) -> int:
+    """
+    ``os.sendfile`` straight onto the socket under ``transport``.
+
+    Event loops differ in ``loop.sendfile`` support (uvloop and winloop
+    inherit the ``NotImplementedError`` stub), so the socket is driven
+    directly. Raises ``SendfileNotAvailableError`` before writing anything
+    on TLS transports and platforms without ``os.sendfile``; the caller
+    then writes the range itself. Other writes to the transport must be
+    held off until this returns (``MessageExchange`` holds its write lock).
+    """
+    if transport is None or transport.is_closing():
+        raise ConnectionResetError("Transport is closed")
+    sock = transport.get_extra_info("socket")
+    if (
+        not hasattr(os, "sendfile")
+        or sock is None
+        or transport.get_extra_info("sslcontext") is not None
+    ):
+        raise asyncio.SendfileNotAvailableError("No zero-copy path on this transport")
+
+    loop = asyncio.get_running_loop()
+    # A duplicate descriptor can be polled without touching the transport's
+    # own registration; it shares the socket and its non-blocking mode.
+    fd = os.dup(sock.fileno())
+    try:
+        # Bytes still queued in the transport (the frame header) go first.
+        while transport.get_write_buffer_size():
+            await _wait_writable(loop, fd)
+            await asyncio.sleep(0)
+        sent = 0
+        while sent < count:
+            if transport.is_closing():
+                raise ConnectionResetError("Transport is closed")
+            try:
+                n = os.sendfile(fd, file.fileno(), offset + sent, count - sent)
+            except BlockingIOError:
+                await _wait_writable(loop, fd)
+                continue
+            if n == 0:
+                break
+            sent += n
+        return sent
+    finally:
+        os.close(fd)
+
 
 class StreamWrapper:
     """
@@ -53,6 +121,15 @@ class StreamWrapper:
             self._writer.write(data)
             await self._writer.drain()
 
+        async def sendfile(self, file, offset: int, count: int) -> int:
+            """
+            Write ``count`` bytes of ``file`` from ``offset`` with
+            ``os.sendfile``. TLS transports and platforms without it raise
+            ``asyncio.SendfileNotAvailableError`` before writing anything.
+            """
+            await self._writer.drain()
+            return await _socket_sendfile(self._writer.transport, file, offset, count)
+
         async def close(self):
             try:
                 self._writer.close()
@@ -114,6 +191,16 @@ class StreamWrapper:
         """
         return self.writer.send
 
+    def get_sendfile_call(self):
+        """
+        Gets the writer's ``sendfile`` method, for
+        ``MessageExchange.set_transport(sendfile_callback=...)``.
+
+        Returns:
+            Callable: The `sendfile` method of the writer object.
+        """
+        return self.writer.sendfile
+
     async def close(self):
         """
         Close both the reader and writer streams.
@@ -139,6 +226,357 @@ class StreamWrapper:
         return info if info else ("", 0)
 
 
+class BufferedStreamProtocol(asyncio.BufferedProtocol):
+    """
+    Receive-side ``BufferedProtocol`` for high-rate streams.
+
+    The event loop reads straight into a preallocated buffer (``get_buffer``)
+    and ``buffer_updated`` finds frame boundaries in place, publishing only
+    complete frames to ``recv``. This skips the ``StreamReader`` buffer and
+    its extra copy and wakeup per read.
+
+    ``recv`` hands out a memoryview of the buffer itself, valid until the
+    next ``recv`` call. While published data is pinned that way, new reads
+    append behind it; once nothing is pinned, the trailing partial frame is
+    compacted to the front. Only when pinned data fills the buffer does a
+    fresh one replace it, left to the outstanding views.
+
+    Framing here only decides what to publish: if the stream is out of sync
+    (bad magic) or a frame is larger than the buffer, the raw bytes are
+    handed over and ``MessageExchange`` resynchronizes as usual.
+    """
+
+    DEFAULT_CAPACITY = 256 * 1024
+    # Pause the socket once this many published bytes wait for ``recv``.
+    READY_HIGH_WATER = 4 * DEFAULT_CAPACITY
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._capacity = capacity
+        self._read_pos = 0
+        self._write_pos = 0
+
+        # Published, not yet received views. The last one is extended in
+        # place while new frames land right behind it in the same buffer.
+        self._ready: deque[memoryview] = deque()
+        self._ready_bytes = 0
+        self._ready_start: Optional[int] = None
+        # The view last returned by recv stays valid until the next recv.
+        self._handed_out = False
+
+        self.transport: Optional[asyncio.Transport] = None
+        self._loop = asyncio.get_running_loop()
+        self._read_waiter: Optional[asyncio.Future] = None
+        self._drain_waiters: deque[asyncio.Future] = deque()
+        self._closed: asyncio.Future = self._loop.create_future()
+        self._reading_paused = False
+        self._writing_paused = False
+        self._eof = False
+        self._exc: Optional[BaseException] = None
+
+    # -- asyncio.BaseProtocol -------------------------------------------
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self._eof = True
+        self._exc = exc
+        self._wake_reader()
+        while self._drain_waiters:
+            waiter = self._drain_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def pause_writing(self):
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+        while self._drain_waiters:
+            waiter = self._drain_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    # -- asyncio.BufferedProtocol ---------------------------------------
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self._view[self._write_pos :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._write_pos += nbytes
+
+        end = self._scan_frames()
+        if end == self._read_pos == 0 and self._write_pos == self._capacity:
+            # Oversized frame: no room to complete it in place.
+            end = self._write_pos
+        if end > self._read_pos:
+            self._publish(end)
+            self._wake_reader()
+
+        self._make_room()
+
+        if (
+            not self._reading_paused
+            and self._ready_bytes > self.READY_HIGH_WATER
+            and self.transport is not None
+        ):
+            self._reading_paused = True
+            self.transport.pause_reading()
+
+    def eof_received(self):
+        self._eof = True
+        self._wake_reader()
+        return None
+
+    # -- framing ------------------------------------------------------
+
+    def _scan_frames(self) -> int:
+        """Return the end offset of the last complete frame in the buffer."""
+        buf = self._buf
+        pos = self._read_pos
+        end = self._write_pos
+        while end - pos >= _FRAME_PREFIX_SIZE:
+            if buf[pos + 4] != _FRAME_MAGIC:
+                # Out of sync: publish everything, the exchange resyncs.
+                return end
+            total = _FRAME_PREFIX_SIZE + _FRAME_LENGTH.unpack_from(buf, pos)[0]
+            if pos + total > end:
+                break
+            pos += total
+        return pos
+
+    def _publish(self, end: int) -> None:
+        """Hand ``[_read_pos, end)`` to the ready queue without copying."""
+        if self._ready_start is None:
+            self._ready_start = self._read_pos
+            self._ready.append(self._view[self._read_pos : end])
+        else:
+            self._ready[-1] = self._view[self._ready_start : end]
+        self._ready_bytes += end - self._read_pos
+        self._read_pos = end
+
+    def _make_room(self) -> None:
+        """Compact when nothing is pinned, else swap buffers once full."""
+        if not self._ready and not self._handed_out:
+            self._compact()
+        elif self._write_pos == self._capacity:
+            pending = self._write_pos - self._read_pos
+            buf = bytearray(self._capacity)
+            buf[:pending] = self._view[self._read_pos : self._write_pos]
+            self._buf = buf
+            self._view = memoryview(buf)
+            self._read_pos = 0
+            self._write_pos = pending
+            self._ready_start = None
+
+    def _compact(self) -> None:
+        """Move the pending partial frame to the front of the buffer."""
+        if self._read_pos == self._write_pos:
+            self._read_pos = self._write_pos = 0
+        elif self._read_pos > 0:
+            pending = self._write_pos - self._read_pos
+            self._buf[:pending] = self._buf[self._read_pos : self._write_pos]
+            self._read_pos = 0
+            self._write_pos = pending
+
+    def feed(self, data: bytes) -> None:
+        """Push bytes already read off the socket (e.g. by a StreamReader)."""
+        view = memoryview(data)
+        while view:
+            target = self.get_buffer(len(view))
+            n = min(len(target), len(view))
+            target[:n] = view[:n]
+            self.buffer_updated(n)
+            view = view[n:]
+
+    def _wake_reader(self) -> None:
+        waiter = self._read_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    # -- stream API ---------------------------------------------------
+
+    async def recv(self, size: int) -> memoryview | bytes:
+        """
+        Return every complete frame received so far, waiting for at least
+        one. ``size`` is accepted for ``StreamReader.read`` compatibility;
+        frames are never split, so the result may exceed it. Returns
+        ``b""`` at EOF.
+
+        The result is a view into the receive buffer: consume or copy it
+        before calling ``recv`` again.
+        """
+        if self._handed_out:
+            self._handed_out = False
+            if not self._ready:
+                self._compact()
+        while not self._ready:
+            if self._eof:
+                return b""
+            self._read_waiter = self._loop.create_future()
+            try:
+                await self._read_waiter
+            finally:
+                self._read_waiter = None
+
+        if len(self._ready) == 1:
+            data = self._ready.popleft()
+        else:
+            # Views on a replaced buffer plus the current one.
+            data = b"".join(self._ready)
+            self._ready.clear()
+        self._ready_bytes = 0
+        self._ready_start = None
+        self._handed_out = True
+
+        if self._reading_paused and self.transport is not None:
+            self._reading_paused = False
+            self.transport.resume_reading()
+        return data
+
+    async def send(self, data: bytes) -> None:
+        """Write ``data`` and wait while the transport is over its high-water mark."""
+        transport = self.transport
+        if transport is None or transport.is_closing():
+            raise ConnectionResetError("Connection lost")
+        transport.write(data)
+        if self._writing_paused:
+            waiter = self._loop.create_future()
+            self._drain_waiters.append(waiter)
+            await waiter
+            if self._exc is not None or transport.is_closing():
+                raise ConnectionResetError("Connection lost")
+
+    def feed_eof(self) -> None:
+        self._eof = True
+        self._wake_reader()
+
+    def at_eof(self) -> bool:
+        return self._eof and not self._ready
+
+    async def wait_closed(self) -> None:
+        await self._closed
+
+
+class ProtocolStreamWrapper(StreamWrapper):
+    """
+    ``StreamWrapper`` backed by a ``BufferedStreamProtocol`` instead of a
+    StreamReader/StreamWriter pair. Exposes the same reader/writer/call
+    accessors, so ``MessageExchange.set_transport`` and the stream handlers
+    work unchanged.
+    """
+
+    class StreamReader:
+        """
+        Reader side of a ``BufferedStreamProtocol``.
+        """
+
+        def __init__(self, protocol: BufferedStreamProtocol):
+            self._protocol = protocol
+
+        async def recv(self, size: int) -> bytes:
+            return await self._protocol.recv(size)
+
+        def close(self):
+            self._protocol.feed_eof()
+
+        def is_closed(self) -> bool:
+            return self._protocol.at_eof()
+
+    class StreamWriter:
+        """
+        Writer side of a ``BufferedStreamProtocol``.
+        """
+
+        def __init__(self, protocol: BufferedStreamProtocol):
+            self._protocol = protocol
+
+        async def send(self, data: bytes):
+            await self._protocol.send(data)
+
+        async def sendfile(self, file, offset: int, count: int) -> int:
+            """Same as ``StreamWrapper.StreamWriter.sendfile``."""
+            return await _socket_sendfile(self._protocol.transport, file, offset, count)
+
+        async def close(self):
+            transport = self._protocol.transport
+            if transport is None:
+                return
+            try:
+                transport.close()
+                await self._protocol.wait_closed()
+            except (
+                BrokenPipeError,
+                ConnectionResetError,
+                ConnectionAbortedError,
+                OSError,
+            ):
+                pass
+
+        async def is_closed(self) -> bool:
+            transport = self._protocol.transport
+            return transport is None or transport.is_closing()
+
+        def get_sockname(self) -> Tuple[str, int]:
+            transport = self._protocol.transport
+            return (
+                transport.get_extra_info("sockname", default=None)
+                if transport is not None
+                else None
+            )  # ty:ignore[invalid-return-type]
+
+    def __init__(
+        self,
+        protocol: BufferedStreamProtocol,
+        streams: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None,
+    ):
+        self.protocol = protocol
+        self.reader = self.StreamReader(protocol)  # ty:ignore[invalid-assignment]
+        self.writer = self.StreamWriter(protocol)  # ty:ignore[invalid-assignment]
+        # The replaced stream pair must outlive the connection:
+        # StreamWriter.__del__ closes the transport the protocol now owns.
+        self._streams = streams
+
+    @classmethod
+    async def from_streams(
+        cls,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        capacity: int = BufferedStreamProtocol.DEFAULT_CAPACITY,
+    ) -> "ProtocolStreamWrapper":
+        """
+        Take over the transport of an already connected stream pair.
+
+        Streams are opened with ``asyncio.open_connection`` / ``start_server``
+        (TLS included); this swaps the transport's protocol in place. Bytes
+        the StreamReader already buffered are moved into the new protocol
+        first so nothing is lost across the swap.
+        """
+        transport = writer.transport
+        protocol = BufferedStreamProtocol(capacity)
+        protocol.connection_made(transport)
+
+        # Reading exactly what is buffered completes without yielding to
+        # the loop, so no bytes can reach the old protocol before the swap.
+        pending = len(reader._buffer)
+        if pending:
+            protocol.feed(await reader.read(pending))
+        if reader.at_eof():
+            protocol.feed_eof()
+
+        transport.set_protocol(protocol)
+        # The StreamReader may have paused reading on its own limit.
+        try:
+            transport.resume_reading()
+        except (AttributeError, RuntimeError):
+            pass
+        return cls(protocol, (reader, writer))
+
+
 class ClientConnection:
     """
     Represents a client connection managing multiple streams.
@@ -178,7 +616,8 @@ class ClientConnection:
             stream_type (int): The type of the stream
             reader (Optional[asyncio.StreamReader]): The StreamReader for the stream
             writer (Optional[asyncio.StreamWriter]): The StreamWriter for the stream
-            stream (Optional[StreamWrapper]): The StreamWrapper for the stream
+            stream (Optional[StreamWrapper]): The StreamWrapper for the stream,
+                e.g. a ``ProtocolStreamWrapper`` from ``from_streams``
 
         Raises:
             ValueError: If neither stream nor both reader and writer are provided
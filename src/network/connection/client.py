@@ -25,14 +25,26 @@ import asyncio
 import ssl
 from typing import Optional, Callable, Any
 
+from config import ApplicationConfig
 from model.client import ClientsManager, ClientObj
-from model.connection import StreamWrapper, ClientConnection
+from model.connection import StreamWrapper, ClientConnection, ProtocolStreamWrapper
 
 from network.data.exchange import MessageExchange, MessageExchangeConfig
-from network.protocol.message import MessageType, ProtocolMessage
+from network.protocol.capabilities import (
+    CAPABILITIES_KEY,
+    decode_capabilities,
+    encode_capabilities,
+    local_capabilities,
+    negotiate_capabilities,
+)
+from network.protocol.message import (
+    MessageType,
+    ProtocolMessage,
+)
 from network.stream import StreamType
 
 from utils.logging import Logger, get_logger
+from utils.metrics.clock import HEARTBEAT_CLOCK_KEY
 from utils import ExponentialBackoff
 from utils.net import set_socket_nodelay
 
@@ -628,6 +640,9 @@ class ConnectionHandler(BaseConnectionHandler):
                 screen_resolution=self._client_obj.screen_resolution,
                 ssl=self.use_ssl,
                 monitors=monitors_payload,
+                additional_params={
+                    CAPABILITIES_KEY: encode_capabilities(local_capabilities())
+                },
             )
 
             self._logger.debug(
@@ -657,6 +672,14 @@ class ConnectionHandler(BaseConnectionHandler):
                 handshake_ack.payload.get("screen_position", "unknown")
             )
 
+            # Same negotiation as the server: both sides derive the same
+            # agreed set from the two advertised tables.
+            server_params = handshake_ack.payload.get("additional_params") or {}
+            self._client_obj.capabilities = negotiate_capabilities(
+                local_capabilities(),
+                decode_capabilities(server_params.get(CAPABILITIES_KEY)),
+            )
+
             # Server now advertises its UID in the ack so the client can
             # persist a stable identifier (used as the cert-mapping key)
             # without depending on mDNS discovery. Fire the callback once
@@ -772,9 +795,17 @@ class ConnectionHandler(BaseConnectionHandler):
                     )
                 conn = self._client_obj.get_connection()
                 if conn is not None:
-                    conn.add_stream(
-                        stream_type=stream_type, reader=reader, writer=writer
-                    )
+                    if stream_type in ApplicationConfig.buffered_protocol_streams:
+                        conn.add_stream(
+                            stream_type=stream_type,
+                            stream=await ProtocolStreamWrapper.from_streams(
+                                reader, writer
+                            ),
+                        )
+                    else:
+                        conn.add_stream(
+                            stream_type=stream_type, reader=reader, writer=writer
+                        )
                 self._client_obj.set_connection(connection=conn)
                 self.clients.update_client(self._client_obj)
 
@@ -886,7 +917,9 @@ class ConnectionHandler(BaseConnectionHandler):
                             hb_msg = ProtocolMessage(
                                 message_type=MessageType.HEARTBEAT,
                                 source="server",
-                                payload={},
+                                payload={
+                                    HEARTBEAT_CLOCK_KEY: self._client_obj.clock.stamp()
+                                },
                                 timestamp=time.time(),
                                 sequence_id=0,
                             )
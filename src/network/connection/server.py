@@ -26,14 +26,23 @@ from asyncio.futures import Future
 import ssl
 from typing import Optional, Callable, Any, Awaitable
 
+from config import ApplicationConfig
 from model.client import ClientsManager, ClientObj
-from model.connection import StreamWrapper, ClientConnection
+from model.connection import StreamWrapper, ClientConnection, ProtocolStreamWrapper
 from model.monitor import MonitorInfo
 
 from network.data.exchange import MessageExchange, MessageExchangeConfig
+from network.protocol.capabilities import (
+    CAPABILITIES_KEY,
+    decode_capabilities,
+    encode_capabilities,
+    local_capabilities,
+    negotiate_capabilities,
+)
 from network.protocol.message import MessageType, ProtocolMessage
 from network.stream import StreamType
 from utils.logging import Logger, get_logger
+from utils.metrics.clock import HEARTBEAT_CLOCK_KEY
 from utils.net import set_socket_nodelay
 
 from .handler import (
@@ -839,6 +848,15 @@ class ConnectionHandler(BaseConnectionHandler):
                     "screen_resolution", "0x0"
                 )
                 client.additional_params = response.payload.get("additional_params", {})
+                # Agree per-stream wire features; the client runs the same
+                # negotiation on our advertised table from the ack.
+                local_caps = local_capabilities()
+                client.capabilities = negotiate_capabilities(
+                    local_caps,
+                    decode_capabilities(
+                        (client.additional_params or {}).get(CAPABILITIES_KEY)
+                    ),
+                )
                 # TLS state is the server's policy, not the client's assertion.
                 client.ssl = self.ssl_enabled
                 # Parse monitor list once at ingress; malformed entries are
@@ -879,6 +897,9 @@ class ConnectionHandler(BaseConnectionHandler):
                     screen_position=client.screen_position,
                     target=client.screen_position,
                     server_uid=self.server_uid or "",
+                    additional_params={
+                        CAPABILITIES_KEY: encode_capabilities(local_caps)
+                    },
                 )
 
                 conn = ClientConnection(client_addr)
@@ -1020,11 +1041,19 @@ class ConnectionHandler(BaseConnectionHandler):
                 if conn is None:
                     raise ConnectionError("Client connection lost during handshake")
 
-                conn.add_stream(
-                    stream_type=stream_type,
-                    reader=stream_reader,
-                    writer=stream_writer,
-                )
+                if stream_type in ApplicationConfig.buffered_protocol_streams:
+                    conn.add_stream(
+                        stream_type=stream_type,
+                        stream=await ProtocolStreamWrapper.from_streams(
+                            stream_reader, stream_writer
+                        ),
+                    )
+                else:
+                    conn.add_stream(
+                        stream_type=stream_type,
+                        reader=stream_reader,
+                        writer=stream_writer,
+                    )
                 client.set_connection(connection=conn)
                 client.open_streams[stream_type] = stream_addr[1]
 
@@ -1178,7 +1207,9 @@ class ConnectionHandler(BaseConnectionHandler):
                                     hb_msg = ProtocolMessage(
                                         message_type=MessageType.HEARTBEAT,
                                         source="server",
-                                        payload={},
+                                        payload={
+                                            HEARTBEAT_CLOCK_KEY: client.clock.stamp()
+                                        },
                                         timestamp=time.time(),
                                         sequence_id=0,
                                     )
@@ -20,3 +20,9 @@ class MissingTransportError(Exception):
     """Exception raised when a required transport mechanism is missing."""
 
     pass
+
+
+class FileTransferError(Exception):
+    """Exception raised when a file transfer is rejected or fails verification."""
+
+    pass
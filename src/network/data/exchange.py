@@ -23,21 +23,70 @@ Layer responsible for handling message exchanges between network nodes, using pr
 from asyncio.queues import Queue
 
 import asyncio
+import os
 from dataclasses import dataclass
 from time import monotonic, time
-from typing import Callable, Dict, Optional, Any, List, Coroutine
+from typing import Callable, Dict, Optional, Any, List, Coroutine, Union
 
 from config import ApplicationConfig
+from event import MouseEvent
 from network.data import MissingTransportError
-from network.protocol.message import ProtocolMessage, MessageBuilder
+from network.protocol.capabilities import LEGACY_CAPABILITIES, StreamCapabilities
+from network.protocol.compression import (
+    choose_codec,
+    compress_body,
+    decode_body,
+    is_compressed_body,
+    uncompressed_size,
+)
+from network.protocol.message import (
+    COMPACT_MOUSE_FRAME,
+    COMPRESSED_FRAME,
+    FILE_DATA_FRAME,
+    MAX_STREAM_CHUNK_SIZE,
+    STREAM_CHUNK_FRAME,
+    ChunkReassembler,
+    CompactMouseFrame,
+    FileDataFrame,
+    MSGPACK_FRAME,
+    MessageBuilder,
+    MessageType,
+    ProtocolMessage,
+    StreamChunkFrame,
+)
 from network.stream import StreamType
 from utils.logging import Logger, get_logger
-from utils.metrics import ConnectionMetrics, MetricsCollector
+from utils.metrics import ConnectionMetrics, MetricsCollector, PeerClock
+from utils.metrics.trace import TRACER
 
 # Drop partial chunk-reassembly buffers after this many seconds without progress.
 CHUNK_REASSEMBLY_TTL: float = 60.0
 # How often to walk _chunk_buffer looking for stale entries (seconds).
 CHUNK_GC_INTERVAL: float = 5.0
+# Largest message a peer may announce in stream chunk frames on bulk
+# (clipboard/file) streams: the biggest clipboard image plus envelope.
+MAX_REASSEMBLY_SIZE: int = ApplicationConfig.max_clipboard_image_size + 1024 * 1024
+# Same limit for interactive and command streams.
+MAX_CONTROL_REASSEMBLY_SIZE: int = 1024 * 1024
+# Stream-chunked messages reassembled concurrently per transport.
+MAX_PENDING_REASSEMBLIES: int = 4
+
+
+def _read_file_range(file, offset: int, count: int) -> bytes:
+    """Read ``count`` bytes of ``file`` from ``offset``."""
+    if hasattr(os, "pread"):
+        return os.pread(file.fileno(), count, offset)
+    # Windows has no pread; the sender's hashing goes through an mmap, so
+    # moving the file position here races with nothing.
+    file.seek(offset)
+    return file.read(count)
+
+
+def reassembly_limit(stream_type: int) -> int:
+    """Largest chunked message accepted on a stream of ``stream_type``."""
+    if stream_type in (StreamType.CLIPBOARD, StreamType.FILE):
+        return MAX_REASSEMBLY_SIZE
+    return MAX_CONTROL_REASSEMBLY_SIZE
 
 
 @dataclass
@@ -64,6 +113,25 @@ class MessageExchangeConfig:
             handling incoming messages asynchronously.
         multicast (bool): Indicates whether multicast transport is enabled for
             message exchange.
+        max_batch_bytes (int): Upper bound on the bytes coalesced into a single
+            transport write while a batch is open (see ``begin_batch``).
+            0 disables batching.
+        max_batch_latency (float): How long, in seconds, a sender may hold an
+            open batch waiting for more frames before flushing it.
+        compact_mouse (bool): Send relative mouse MOVE deltas as fixed-layout
+            ``CompactMouseFrame``s instead of msgpack. Only enable it once the
+            peer advertised the capability; receiving is always supported.
+            Usually set through ``apply_capabilities``.
+        compression_threshold (int): Smallest encoded body, in bytes, that is
+            compressed towards peers that negotiated a compression codec.
+        compression_offload_size (int): Bodies of at least this many
+            (uncompressed) bytes are compressed and decompressed in a worker
+            thread rather than on the event loop.
+        max_reassembly_size (int): Largest message, in bytes, a peer may
+            announce in stream chunk frames or as a compressed body (see
+            ``reassembly_limit``).
+        max_pending_reassemblies (int): Stream-chunked messages reassembled
+            concurrently per transport before the stalest is evicted.
     """
 
     max_delay_tolerance: float = ApplicationConfig.max_delay_tolerance
@@ -78,6 +146,13 @@ class MessageExchangeConfig:
     message_queue_maxsize: int = 4096
     # Log a warning at most once per N puts when the queue stays above this fill ratio.
     queue_high_watermark: float = 0.8
+    max_batch_bytes: int = ApplicationConfig.max_batch_bytes
+    max_batch_latency: float = ApplicationConfig.max_batch_latency
+    compact_mouse: bool = False
+    compression_threshold: int = ApplicationConfig.compression_threshold
+    compression_offload_size: int = ApplicationConfig.compression_offload_size
+    max_reassembly_size: int = MAX_REASSEMBLY_SIZE
+    max_pending_reassemblies: int = MAX_PENDING_REASSEMBLIES
 
 
 class MessageExchange:
@@ -110,6 +185,8 @@ class MessageExchange:
         self._handlers: Dict[
             str, Callable[[ProtocolMessage], Coroutine[Any, Any, None]]
         ] = {}
+        # Message types whose handler also receives the originating tr_id
+        self._origin_handlers: set[str] = set()
 
         # Chunk reassembly buffer: message_id -> (chunks, monotonic_created_at)
         # Stale entries are dropped after CHUNK_REASSEMBLY_TTL to avoid leaks when
@@ -118,19 +195,49 @@ class MessageExchange:
             str, tuple[list[Optional[ProtocolMessage]], float]
         ] = {}
         self._last_chunk_gc: float = 0.0
+        # Stream chunk reassembly, one per reader: chunk message ids are
+        # only unique per sending peer.
+        self._reassemblers: Dict[str, ChunkReassembler] = {}
+        # Negotiated stream chunk size per transport. Transports missing
+        # here get the legacy ProtocolMessage chunking at max_chunk_size.
+        self._stream_chunk_sizes: Dict[str, int] = {}
+        # Capabilities agreed with each transport's peer in the handshake,
+        # and the transports whose peer opted out of batched writes.
+        self._peer_capabilities: Dict[str, StreamCapabilities] = {}
+        self._unbatched: set[str] = set()
+        # Compression codec used towards each transport, when negotiated.
+        self._compression_codecs: Dict[str, str] = {}
+        # Clock estimate of each transport's peer: fed by its heartbeats,
+        # used to correct receive latency for wall-clock skew.
+        self._peer_clocks: Dict[str, PeerClock] = {}
 
         # Transport layer callbacks
         # We support multiple transports for multicast scenarios
         self._send_callbacks: Dict[str, Optional[Callable[[bytes], Any]]] = {}
         self._receive_callbacks: Dict[str, Optional[Callable[[int], Any]]] = {}
         self._send_async: Dict[str, bool] = {}
+        # Zero-copy file writers, and the locks that keep other frames from
+        # landing between a FileDataFrame header and its sendfile payload.
+        self._sendfile_callbacks: Dict[str, Optional[Callable]] = {}
+        self._write_locks: Dict[str, asyncio.Lock] = {}
+        # Receiver of FILE messages and FileDataFrames (see set_file_sink).
+        self._file_sink: Optional[Any] = None
+
+        # Open send batch: (tr_id, send_callback, is_async) -> frames. While
+        # set, _transmit appends instead of writing; flush_batch issues one
+        # write per transport. Keyed by the callback too so a transport
+        # swapped mid-batch never receives frames meant for the old peer.
+        self._batch: Optional[Dict[tuple[str, Callable, bool], List[bytes]]] = None
+        self._batch_bytes = 0
 
         # Metrics
         self._metrics: Optional[ConnectionMetrics] = None
         self._metrics_collector: Optional[MetricsCollector] = metrics_collector
 
         # Asyncio components
-        self._receive_task: Optional[asyncio.Task] = None
+        # One reader task per transport: each blocks on its own receive
+        # callback, so an idle peer never delays a busy one.
+        self._reader_tasks: Dict[str, asyncio.Task] = {}
         self._message_queue: Optional[asyncio.Queue] = None
         self._running = False
 
@@ -158,7 +265,8 @@ class MessageExchange:
             self.config.message_queue_maxsize * self.config.queue_high_watermark
         )
         self._last_high_water_warn: float = 0.0
-        self._receive_task = asyncio.create_task(self._receive_loop())
+        for tr_id in list(self._receive_callbacks):
+            self._start_reader(tr_id)
 
         self._logger.debug("Started")
 
@@ -213,63 +321,143 @@ class MessageExchange:
         """Cleanup and shutdown the message exchange layer."""
         self._running = False
 
-        if self._receive_task:
-            self._receive_task.cancel()
-            try:
-                await self._receive_task
-            except asyncio.CancelledError:
-                pass
+        tasks = list(self._reader_tasks.values())
+        self._reader_tasks.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
 
         self._chunk_buffer.clear()
+        self._reassemblers.clear()
+        self.discard_batch()
         self._logger.debug("Stopped")
 
-    async def _receive_logic(
-        self,
-        receive_callback: Optional[Callable[[int], Any]],
-        persistent_buffer: bytearray,
-        prefix_len: int,
-        max_msg_size: int,
-    ) -> None:
-        # Round-robin
-        if receive_callback is None:
-            await asyncio.sleep(0)
+    def _start_reader(self, tr_id: str) -> None:
+        """
+        (Re)start the reader task for ``tr_id`` with its current callback.
+
+        The previous task, if any, is cancelled but not awaited: this can
+        run from inside a handler dispatched by that very task.
+        """
+        old = self._reader_tasks.pop(tr_id, None)
+        if old is not None and old is not asyncio.current_task():
+            old.cancel()
+
+        receive_callback = self._receive_callbacks.get(tr_id)
+        if not self._running or receive_callback is None:
             return
+        self._reader_tasks[tr_id] = asyncio.create_task(
+            self._reader_loop(tr_id, receive_callback)
+        )
 
-        try:
-            # Receive new data in a non-blocking way
-            # async with self._lock:
-            try:
-                new_data = await asyncio.wait_for(
-                    receive_callback(self.config.receive_buffer_size),
-                    timeout=0.1,
-                )
-            except asyncio.TimeoutError:
-                # await asyncio.sleep(0)
-                return
+    async def _reader_loop(
+        self, tr_id: str, receive_callback: Callable[[int], Any]
+    ) -> None:
+        """
+        Read from one transport and feed the shared framing/dispatch stage.
 
-            if not new_data:
-                # await asyncio.sleep(0)
-                return
+        The receive callback is awaited directly - no polling timeout - so
+        the task sleeps until that transport has data. Network-level
+        disconnects and EOF end only this transport's task; the connection
+        layer is responsible for teardown and ``set_transport`` starts a
+        new reader when the transport is swapped in again.
+        """
+        buffer = bytearray()
+        prefix_len = ProtocolMessage.prefix_lenght
+        max_msg_size = max(
+            self.config.max_chunk_size * 100,
+            MAX_STREAM_CHUNK_SIZE + StreamChunkFrame.header_size,
+        )
+        read_size = self.config.receive_buffer_size
+        reassembler = ChunkReassembler(
+            self.config.max_reassembly_size, self.config.max_pending_reassemblies
+        )
+        self._reassemblers[tr_id] = reassembler
 
-            if self._metrics:
-                self._metrics.record_received(len(new_data))
+        try:
+            while self._running:
+                new_data = await receive_callback(read_size)
+                if not new_data:
+                    # EOF: this transport is done. set_transport starts a
+                    # fresh reader when the connection layer swaps it.
+                    self._logger.log(
+                        f"Reader {self._id}/{tr_id} reached EOF", Logger.DEBUG
+                    )
+                    break
 
-            persistent_buffer.extend(new_data)
-            buffer_len = len(persistent_buffer)
-            offset = 0
+                if self._metrics:
+                    self._metrics.record_received(len(new_data))
 
-            # Wrap the buffer once in a memoryview so prefix/body slicing
-            # below stays zero-copy. msgspec and struct.unpack* accept
-            # memoryview directly, avoiding a `bytes()` alloc per message
-            # (hot on mouse-stream at high event rates).
-            buffer_view = memoryview(persistent_buffer)
+                buffer.extend(new_data)
+                try:
+                    await self._process_buffer(
+                        buffer, prefix_len, max_msg_size, reassembler, tr_id
+                    )
+                except Exception as e:
+                    if isinstance(e, (ConnectionError, RuntimeError)):
+                        raise
+                    self._logger.error(
+                        "Error in receive loop", exchange_id=self._id, error=str(e)
+                    )
+        except asyncio.CancelledError:
+            raise
+        except (ConnectionError, OSError) as e:
+            self._logger.log(
+                f"Reader {self._id}/{tr_id} ended on disconnect "
+                f"(exc_type={type(e).__name__}, exc={e!r})",
+                Logger.DEBUG,
+            )
+        except AttributeError:
+            # Transport layer disconnected
+            self._logger.log(
+                f"Transport layer {tr_id} disconnected, stopping reader.",
+                Logger.WARNING,
+            )
+        except RuntimeError as e:
+            self._logger.critical(
+                "Error in receive loop", exchange_id=self._id, error=str(e)
+            )
+        except Exception as e:
+            # Broken receive callback: stop this reader rather than spin.
+            self._logger.error(
+                "Error in receive loop", exchange_id=self._id, error=str(e)
+            )
+        finally:
+            if self._reader_tasks.get(tr_id) is asyncio.current_task():
+                del self._reader_tasks[tr_id]
+            if self._reassemblers.get(tr_id) is reassembler:
+                del self._reassemblers[tr_id]
 
+    async def _process_buffer(
+        self,
+        persistent_buffer: bytearray,
+        prefix_len: int,
+        max_msg_size: int,
+        reassembler: Optional[ChunkReassembler] = None,
+        tr_id: Optional[str] = None,
+    ) -> None:
+        """
+        Parse and dispatch every complete frame in ``persistent_buffer``,
+        then drop the consumed bytes. A trailing partial frame is kept for
+        the next read. Stream chunk frames go to ``reassembler``; ``tr_id``
+        is the transport the bytes came from.
+        """
+        buffer_len = len(persistent_buffer)
+        offset = 0
+
+        # Wrap the buffer once in a memoryview so prefix/body slicing
+        # below stays zero-copy. msgspec and struct.unpack* accept
+        # memoryview directly, avoiding a `bytes()` alloc per message
+        # (hot on mouse-stream at high event rates).
+        buffer_view = memoryview(persistent_buffer)
+        try:
             # Process all complete messages in the buffer
             while offset + prefix_len <= buffer_len:
                 try:
                     # If prefix is invalid, this will raise ValueError and we will skip 1 byte
-                    msg_length = ProtocolMessage.read_lenght_prefix(
-                        buffer_view[offset : offset + prefix_len], False
+                    msg_length, marker = ProtocolMessage.read_frame_prefix(
+                        buffer_view[offset : offset + prefix_len]
                     )
 
                     if msg_length > max_msg_size:
@@ -279,7 +467,6 @@ class MessageExchange:
                             )
                         # Message too large, seek next marker
                         offset += 1
-                        # await asyncio.sleep(0)
                         continue
 
                     total_length = prefix_len + msg_length
@@ -287,27 +474,69 @@ class MessageExchange:
                     # Check if we have the complete message
                     if offset + total_length > buffer_len:
                         # Incomplete message, keep from offset onwards
-                        # await asyncio.sleep(0)
                         if self._logger.is_enabled_for(Logger.DEBUG):
                             self._logger.debug(
                                 f"Incomplete message received. Expected length: {total_length}, current buffer length: {buffer_len - offset}. Waiting for more data."
                             )
                         break
 
+                    if marker == COMPACT_MOUSE_FRAME:
+                        await self._handle_compact_mouse(
+                            buffer_view[offset + prefix_len : offset + total_length],
+                            tr_id,
+                        )
+                        offset += total_length
+                        await asyncio.sleep(0)
+                        continue
+
+                    if marker == STREAM_CHUNK_FRAME:
+                        message = await self._handle_stream_chunk(
+                            reassembler,
+                            buffer_view[offset + prefix_len : offset + total_length],
+                            tr_id,
+                        )
+                        offset += total_length
+                        if message is not None:
+                            await self._deliver(message, tr_id)
+                        continue
+
+                    if marker == COMPRESSED_FRAME:
+                        message = await self._decode_compressed(
+                            buffer_view[offset + prefix_len : offset + total_length]
+                        )
+                        offset += total_length
+                        if message is not None:
+                            if message.timestamp and self._metrics:
+                                self._record_latency(message.timestamp, tr_id)
+                            await self._deliver(message, tr_id)
+                        continue
+
+                    if marker == FILE_DATA_FRAME:
+                        await self._handle_file_data(
+                            tr_id,
+                            buffer_view[offset + prefix_len : offset + total_length],
+                        )
+                        offset += total_length
+                        continue
+
                     # Extract and process the complete message (zero-copy slice).
                     message = ProtocolMessage.from_bytes(
                         buffer_view[offset : offset + total_length],
                         validate=False,
                         length=msg_length,
                     )
-                    # message.timestamp = time()
-                    if message.timestamp:
-                        receive_latency = time() - message.timestamp
-                        if self._metrics:
-                            self._metrics.record_latency(receive_latency)
+                    if message.is_heartbeat():
+                        # Not dispatched; only its clock block is consumed
+                        # (before the latency sample, so that one is
+                        # already corrected).
+                        clock = self._peer_clocks.get(tr_id) if tr_id else None
+                        if clock is not None:
+                            clock.on_heartbeat(message.payload)
+
+                    if message.timestamp and self._metrics:
+                        self._record_latency(message.timestamp, tr_id)
 
                     if message.is_heartbeat():
-                        # Ignore heartbeat messages
                         offset += total_length
                         continue
 
@@ -315,131 +544,270 @@ class MessageExchange:
                     if message.is_chunk:
                         reconstructed = await self._handle_chunk(message)
                         if reconstructed:
-                            if self.config.auto_dispatch:
-                                await self.dispatch_message(reconstructed)
-                            elif self._message_queue:
-                                await self._enqueue_message(reconstructed)
+                            await self._deliver(reconstructed, tr_id)
                     else:
-                        if self.config.auto_dispatch:
-                            await self.dispatch_message(message)
-                        elif self._message_queue:
-                            await self._enqueue_message(message)
+                        await self._deliver(message, tr_id)
 
                     offset += total_length
-                    # print(f"Received message of type {message.message_type}, length {msg_length} bytes")
-                    # print(f"Current buffer length: {len(persistent_buffer) - offset} bytes")
-                    # print(f"Next offset: {offset}")
                     await asyncio.sleep(0)
-                    # return
 
                 except ValueError:
                     # Invalid prefix, advance by 1 byte
                     offset += 1
                     if self._metrics:
                         self._metrics.connection_errors += 1
-                    await asyncio.sleep(0)
                     continue
-
-            # Release the memoryview
+        finally:
+            # Release the memoryview before resizing the bytearray
             buffer_view.release()
-
             # Remove processed data from buffer
             if offset > 0:
                 del persistent_buffer[:offset]
 
-            await asyncio.sleep(0)
-
-        except asyncio.CancelledError:
-            pass
-        except AttributeError:
-            # Transport layer disconnected
-            self._logger.log(
-                "Transport layer disconnected, stopping receive loop.",
-                Logger.WARNING,
+    async def _deliver(
+        self, message: ProtocolMessage, tr_id: Optional[str] = None
+    ) -> None:
+        """Dispatch a complete message, or queue it for the consumer."""
+        if TRACER.enabled:
+            TRACER.receive(message.payload, self._peer_clocks.get(tr_id))
+        sink = self._file_sink
+        if sink is not None and message.message_type == MessageType.FILE:
+            try:
+                await sink.on_file_control(tr_id, message)
+            except Exception as e:
+                self._logger.error("Error in file transfer handler", error=str(e))
+            return
+        if self.config.auto_dispatch:
+            await self.dispatch_message(
+                message, origin=tr_id if self.config.multicast else None
             )
-            self._running = False
-            raise
-        except RuntimeError as e:
-            self._logger.critical(
-                "Error in receive loop", exchange_id=self._id, error=str(e)
+        elif self._message_queue:
+            await self._enqueue_message(message)
+
+    async def _handle_stream_chunk(
+        self,
+        reassembler: Optional[ChunkReassembler],
+        body: memoryview,
+        tr_id: Optional[str] = None,
+    ) -> Optional[ProtocolMessage]:
+        """
+        Copy one stream chunk into its preallocated message buffer.
+
+        Returns:
+            The reassembled message once its last chunk arrived, else None.
+        """
+        if reassembler is None:
+            return None
+        self._gc_stale_chunks(monotonic())
+        try:
+            buffer = reassembler.feed_body(body)
+            if buffer is None:
+                return None
+            if is_compressed_body(buffer):
+                message = await self._decode_compressed(buffer)
+            else:
+                message = decode_body(buffer, self.config.max_reassembly_size)
+        except ValueError as e:
+            self._logger.warning("Dropping stream chunk", error=str(e))
+            if self._metrics:
+                self._metrics.connection_errors += 1
+            return None
+        if message is not None and message.timestamp and self._metrics:
+            self._record_latency(message.timestamp, tr_id)
+        return message
+
+    def _record_latency(self, timestamp: float, tr_id: Optional[str]) -> None:
+        """
+        Record the receive latency of a message stamped with the sender's
+        wall clock, corrected by the peer's clock offset once known.
+        """
+        metrics = self._metrics
+        if metrics is None:
+            return
+        latency = time() - timestamp
+        clock = self._peer_clocks.get(tr_id) if tr_id else None
+        if clock is not None:
+            latency += clock.offset
+        metrics.record_latency(latency)
+
+    async def _decode_compressed(
+        self, body: Union[memoryview, bytearray]
+    ) -> Optional[ProtocolMessage]:
+        """
+        Decompress and decode a compressed body; large ones in a worker
+        thread so the loop keeps serving the other streams.
+        """
+        try:
+            if uncompressed_size(body) < self.config.compression_offload_size:
+                return decode_body(body, self.config.max_reassembly_size)
+            # The receive buffer is left alone while we await, but the
+            # executor may keep its arguments a little longer: pass a view
+            # released right after.
+            view = memoryview(body)
+            try:
+                return await asyncio.to_thread(
+                    decode_body, view, self.config.max_reassembly_size
+                )
+            finally:
+                view.release()
+        except ValueError as e:
+            self._logger.warning("Dropping compressed message", error=str(e))
+            if self._metrics:
+                self._metrics.connection_errors += 1
+            return None
+
+    async def _encode_stream_frames(
+        self, message: ProtocolMessage, tr_id: str, chunk_size: int
+    ) -> List[bytes]:
+        """
+        Stream chunk framing, compressing the body first when the peer
+        negotiated a codec and the body reaches the threshold.
+        """
+        codec = self._compression_codecs.get(tr_id)
+        if codec is None:
+            return self.builder.create_stream_chunks(message, chunk_size)
+
+        body = message.encode_body()
+        marker = MSGPACK_FRAME
+        if len(body) >= self.config.compression_threshold:
+            if len(body) >= self.config.compression_offload_size:
+                packed = await asyncio.to_thread(compress_body, body, codec)
+            else:
+                packed = compress_body(body, codec)
+            if len(packed) < len(body):
+                body, marker = packed, COMPRESSED_FRAME
+        return self.builder.frame_stream_body(body, chunk_size, marker)
+
+    async def _handle_file_data(self, tr_id: Optional[str], body: memoryview) -> None:
+        """Hand a FileDataFrame's range to the file sink (dropped without one)."""
+        sink = self._file_sink
+        if sink is None:
+            return
+        transfer_id, offset = FileDataFrame.decode_header(body)
+        try:
+            await sink.on_file_data(
+                tr_id, transfer_id, offset, body[FileDataFrame.header_size :]
             )
-            self._running = False
-            raise e
         except Exception as e:
-            # Catch broken pipe or connection reset errors
-            if isinstance(
-                e,
-                (
-                    ConnectionResetError,
-                    BrokenPipeError,
-                    ConnectionError,
-                    ConnectionAbortedError,
-                ),
-            ):
-                self._logger.error("Connection error in receive loop", error=str(e))
-                self._running = False
-                raise e
-            # Avoid infinite loop if no receive callback is set
-            if receive_callback is None:
-                self._logger.debug("Receive callback is None, stopping receive loop.")
-                self._running = False
-                raise e
+            self._logger.error("Error in file transfer handler", error=str(e))
 
-            self._logger.error(
-                "Error in receive loop", exchange_id=self._id, error=str(e)
+    def set_file_sink(self, sink: Optional[Any]) -> None:
+        """
+        Route file transfer traffic to ``sink`` instead of the handlers.
+
+        The sink must provide ``async on_file_control(tr_id, message)`` for
+        FILE messages and ``async on_file_data(tr_id, transfer_id, offset,
+        data)`` for FileDataFrames; ``data`` is a memoryview into the receive
+        buffer, only valid during the call. See
+        ``network.data.transfer.FileTransferManager``.
+        """
+        self._file_sink = sink
+
+    def apply_capabilities(
+        self, capabilities: Optional[StreamCapabilities], tr_id: Optional[str] = None
+    ):
+        """
+        Configure sending towards a peer from its negotiated capabilities.
+
+        Selects stream chunk frames and their size, compact mouse frames
+        (single-transport exchanges only), the compression codec and
+        whether the transport joins send batches. ``None`` means a legacy
+        peer.
+
+        Args:
+            capabilities: Agreed capabilities for this exchange's stream.
+            tr_id: Transport ID (ignored for single-transport exchanges).
+        """
+        effective_id = tr_id if self.config.multicast else self.DEFAULT_TRANSPORT_ID
+        if effective_id is None:
+            raise ValueError(
+                "Transport ID must be provided for multicast configuration."
             )
-            await asyncio.sleep(0)
-            return
+        caps = capabilities if capabilities is not None else LEGACY_CAPABILITIES
+        self._peer_capabilities[effective_id] = caps
+        self.set_stream_chunk_size(
+            caps.max_chunk_size if caps.stream_chunks else None, tr_id=effective_id
+        )
+        if not self.config.multicast:
+            self.config.compact_mouse = caps.compact_mouse
+        if caps.batching:
+            self._unbatched.discard(effective_id)
+        else:
+            self._unbatched.add(effective_id)
+        codec = choose_codec(caps.compression)
+        if codec is None:
+            self._compression_codecs.pop(effective_id, None)
+        else:
+            self._compression_codecs[effective_id] = codec
 
-    async def _receive_loop(self):
+    def set_peer_clock(
+        self,
+        clock: Optional[PeerClock],
+        peer_id: Optional[str] = None,
+        tr_id: Optional[str] = None,
+    ):
         """
-        Core loop for receiving and processing incoming messages.
-        Handles chunk reassembly and dispatching to registered handlers.
+        Feed the heartbeats read from a transport into its peer's clock
+        estimate and correct that transport's latency samples with it.
+        When ``peer_id`` is given the estimate is also exported through
+        the metrics collector; passing None with ``peer_id`` withdraws it.
 
-        Network-level disconnect exceptions are swallowed at the loop
-        boundary so the task does not surface "Task exception was never
-        retrieved" - the connection layer is responsible for handling
-        teardown; this loop just stops cleanly.
+        Args:
+            clock: The peer's clock estimate (``ClientObj.clock``), or None.
+            peer_id: Id to export the estimate under.
+            tr_id: Transport ID (ignored for single-transport exchanges).
         """
-        buffers: Dict[str, bytearray] = {}
-        prefix_len = ProtocolMessage.prefix_lenght
-        max_msg_size = self.config.max_chunk_size * 100
+        effective_id = tr_id if self.config.multicast else self.DEFAULT_TRANSPORT_ID
+        if effective_id is None:
+            raise ValueError(
+                "Transport ID must be provided for multicast configuration."
+            )
+        if clock is None:
+            self._peer_clocks.pop(effective_id, None)
+            if peer_id and self._metrics_collector is not None:
+                self._metrics_collector.untrack_peer_clock(peer_id)
+            return
+        self._peer_clocks[effective_id] = clock
+        if peer_id and self._metrics_collector is not None:
+            self._metrics_collector.track_peer_clock(peer_id, clock)
 
-        try:
-            while self._running:
-                await asyncio.sleep(0)
-                callbacks_snapshot = list(self._receive_callbacks.items())
-                for tr_id, receive_callback in callbacks_snapshot:
-                    if tr_id not in buffers:
-                        buffers[tr_id] = bytearray()
-                    await self._receive_logic(
-                        receive_callback,
-                        buffers[tr_id],
-                        prefix_len,
-                        max_msg_size,
-                    )
-                    await asyncio.sleep(0)
-        except asyncio.CancelledError:
-            raise
-        except (
-            ConnectionResetError,
-            ConnectionAbortedError,
-            BrokenPipeError,
-            ConnectionError,
-            OSError,
-        ) as e:
-            self._logger.log(
-                f"Receive loop {self._id} ended on disconnect "
-                f"(exc_type={type(e).__name__}, exc={e!r})",
-                Logger.DEBUG,
+    def peer_capabilities(self, tr_id: Optional[str] = None) -> StreamCapabilities:
+        """Capabilities applied for a transport (legacy when never set)."""
+        effective_id = tr_id if self.config.multicast else self.DEFAULT_TRANSPORT_ID
+        return self._peer_capabilities.get(effective_id, LEGACY_CAPABILITIES)
+
+    def set_stream_chunk_size(
+        self, chunk_size: Optional[int], tr_id: Optional[str] = None
+    ):
+        """
+        Use stream chunk frames of ``chunk_size`` data bytes towards a peer.
+
+        Only call this for peers that negotiated ``CODEC_BINARY_FRAMES``;
+        ``None`` reverts the transport to legacy ProtocolMessage chunking.
+        Sizes are capped at ``MAX_STREAM_CHUNK_SIZE``.
+
+        Args:
+            chunk_size: Negotiated chunk size, or None.
+            tr_id: Transport ID (ignored for single-transport exchanges).
+        """
+        effective_id = tr_id if self.config.multicast else self.DEFAULT_TRANSPORT_ID
+        if effective_id is None:
+            raise ValueError(
+                "Transport ID must be provided for multicast configuration."
+            )
+        if chunk_size is None or chunk_size <= 0:
+            self._stream_chunk_sizes.pop(effective_id, None)
+        else:
+            self._stream_chunk_sizes[effective_id] = min(
+                chunk_size, MAX_STREAM_CHUNK_SIZE
             )
-            self._running = False
 
     async def set_transport(
         self,
         send_callback: Optional[Callable] = None,
         receive_callback: Optional[Callable] = None,
         tr_id: Optional[str] = None,
+        sendfile_callback: Optional[Callable] = None,
     ):
         """
         Sets the transport callbacks for sending and receiving messages. If the
@@ -454,6 +822,11 @@ class MessageExchange:
             tr_id: Optional[str]
                 The transport ID associated with the callbacks, required in multicast
                 configurations.
+            sendfile_callback: Optional[Callable]
+                ``async (file, offset, count)`` writing a file range straight
+                to the same transport (see ``StreamWrapper.get_sendfile_call``).
+                Used by ``send_file_range``; without it ranges are read and
+                sent through ``send_callback``.
         """
         # Single transport if not multicast, otherwise use provided transport ID
         effective_id = tr_id if self.config.multicast else self.DEFAULT_TRANSPORT_ID
@@ -463,23 +836,41 @@ class MessageExchange:
             )
 
         self._send_callbacks[effective_id] = send_callback
+        previous = self._receive_callbacks.get(effective_id)
         self._receive_callbacks[effective_id] = receive_callback
         self._send_async[effective_id] = asyncio.iscoroutinefunction(send_callback)
+        self._sendfile_callbacks[effective_id] = sendfile_callback
+        # Only (re)spawn the reader when the callback actually changed or
+        # the previous reader ended (e.g. on disconnect).
+        if previous != receive_callback or effective_id not in self._reader_tasks:
+            self._start_reader(effective_id)
         await asyncio.sleep(0)
 
     def register_handler(
         self,
         message_type: str,
-        handler: Callable[[ProtocolMessage], Coroutine[Any, Any, None]],
+        handler: Callable[..., Coroutine[Any, Any, None]],
+        with_origin: bool = False,
     ):
         """
         Register a handler for a specific message type.
 
+        Compact mouse frames are handed to the ``"mouse"`` handler as a
+        ready-made ``MouseEvent`` rather than a ``ProtocolMessage``.
+
         Args:
             message_type: Type of message to handle (mouse, keyboard, etc.)
             handler: Async callback coroutine to process the message
+            with_origin: If True, the handler is called as
+                ``handler(message, origin)`` where ``origin`` is the tr_id
+                the message was read from in multicast mode (None otherwise),
+                so that replies can be routed back to that peer only.
         """
         self._handlers[message_type] = handler
+        if with_origin:
+            self._origin_handlers.add(message_type)
+        else:
+            self._origin_handlers.discard(message_type)
 
     async def send_mouse_data(
         self,
@@ -493,7 +884,26 @@ class MessageExchange:
         target: Optional[str] = None,
         **kwargs,
     ):
-        """Send a mouse event message."""
+        """Send a mouse event message.
+
+        Relative MOVE deltas go out as a ``CompactMouseFrame`` when
+        ``config.compact_mouse`` is set; everything else uses msgpack.
+        """
+        if (
+            self.config.compact_mouse
+            and event == MouseEvent.MOVE_ACTION
+            and x == -1
+            and y == -1
+            and not is_pressed
+            and kwargs.keys() <= {"button"}
+            and CompactMouseFrame.can_encode(dx, dy, kwargs.get("button"))
+        ):
+            await self._send_frame(
+                self.builder.create_compact_mouse_frame(dx, dy, kwargs.get("button")),
+                target,
+            )
+            return
+
         message = self.builder.create_mouse_message(
             x, y, dx, dy, event, is_pressed, source=source, target=target, **kwargs
         )
@@ -505,23 +915,25 @@ class MessageExchange:
         event: str,
         source: Optional[str] = None,
         target: Optional[str] = None,
+        **kwargs,
     ):
         """Send a keyboard event message."""
         message = self.builder.create_keyboard_message(
-            key, event, source=source, target=target
+            key, event, source=source, target=target, **kwargs
         )
         await self._send_message(message)
 
     async def send_clipboard_data(
         self,
-        content: str,
+        content: Optional[str],
         content_type: str = "text",
         source: Optional[str] = None,
         target: Optional[str] = None,
+        **kwargs,
     ):
-        """Send clipboard data message."""
+        """Send clipboard data message (``kwargs`` carry the sync fields)."""
         message = self.builder.create_clipboard_message(
-            content, content_type, source=source, target=target
+            content, content_type, source=source, target=target, **kwargs
         )
         await self._send_message(message)
 
@@ -677,6 +1089,16 @@ class MessageExchange:
 
             # Set target if not already set
             message.target = message.target if message.target else tr_id
+
+            chunk_size = self._stream_chunk_sizes.get(tr_id)
+            if chunk_size is not None and self.config.auto_chunk:
+                frames = await self._encode_stream_frames(message, tr_id, chunk_size)
+                for frame in frames:
+                    await self._transmit(tr_id, send_callback, frame)
+                if message.target == tr_id:
+                    message.target = None
+                continue
+
             data = message.to_bytes()
 
             # Check if chunking is needed
@@ -685,27 +1107,195 @@ class MessageExchange:
                     message, self.config.max_chunk_size
                 )
                 for ch in chs:
-                    data = ch.to_bytes()
-                    if self._metrics:
-                        self._metrics.record_sent(len(data))
-
-                    if self._send_async[tr_id]:
-                        await send_callback(data)
-                    else:
-                        send_callback(data)
+                    await self._transmit(tr_id, send_callback, ch.to_bytes())
             else:
-                data = message.to_bytes()
-                if self._metrics:
-                    self._metrics.record_sent(len(data))
-
-                if self._send_async[tr_id]:
-                    await send_callback(data)
-                else:
-                    send_callback(data)
+                await self._transmit(tr_id, send_callback, data)
 
             if message.target == tr_id:
                 message.target = None  # Clear target for next transport if multicast
 
+    def batching_enabled(self) -> bool:
+        """True when senders should group queued frames via ``begin_batch``."""
+        return self.config.max_batch_bytes > 0
+
+    def begin_batch(self) -> None:
+        """
+        Start collecting outgoing frames instead of writing them.
+
+        Every send until ``flush_batch`` (or ``discard_batch``) is encoded
+        as usual but buffered, so a burst costs one write+drain per
+        transport instead of one per frame.
+        """
+        if self._batch is None:
+            self._batch = {}
+            self._batch_bytes = 0
+
+    def batch_full(self) -> bool:
+        """True once the open batch reached ``config.max_batch_bytes``."""
+        return self._batch_bytes >= self.config.max_batch_bytes
+
+    def discard_batch(self) -> None:
+        """Drop the open batch without sending it."""
+        self._batch = None
+        self._batch_bytes = 0
+
+    async def flush_batch(self) -> None:
+        """Write the open batch, one coalesced buffer per transport."""
+        batch = self._batch
+        self._batch = None
+        self._batch_bytes = 0
+        if not batch:
+            return
+
+        for (tr_id, send_callback, is_async), frames in batch.items():
+            data = frames[0] if len(frames) == 1 else b"".join(frames)
+            await self._write(tr_id, send_callback, is_async, data)
+            if self._metrics:
+                self._metrics.record_write(len(frames))
+
+    async def _transmit(self, tr_id: str, send_callback: Callable, data: bytes):
+        """Write one encoded frame, or append it to the open batch."""
+        if self._metrics:
+            self._metrics.record_sent(len(data))
+
+        is_async = self._send_async[tr_id]
+        batch = self._batch
+        if batch is not None and tr_id not in self._unbatched:
+            key = (tr_id, send_callback, is_async)
+            frames = batch.get(key)
+            if frames is None:
+                batch[key] = [data]
+            else:
+                frames.append(data)
+            self._batch_bytes += len(data)
+            return
+
+        await self._write(tr_id, send_callback, is_async, data)
+        if self._metrics:
+            self._metrics.record_write(1)
+
+    async def _write(
+        self, tr_id: str, send_callback: Callable, is_async: bool, data: bytes
+    ) -> None:
+        """Issue one transport write, waiting out an in-flight file range."""
+        lock = self._write_locks.get(tr_id)
+        if lock is None:
+            if is_async:
+                await send_callback(data)
+            else:
+                send_callback(data)
+            return
+        async with lock:
+            if is_async:
+                await send_callback(data)
+            else:
+                send_callback(data)
+
+    async def send_file_range(
+        self,
+        transfer_id: int,
+        file,
+        offset: int,
+        count: int,
+        tr_id: Optional[str] = None,
+    ) -> None:
+        """
+        Send ``count`` bytes of ``file`` from ``offset`` as one FileDataFrame.
+
+        The header goes through the send callback and the range through the
+        transport's sendfile callback, so file content is not copied into
+        Python. Both writes hold the transport's write lock, so no other
+        frame can split them; the range never joins a send batch.
+
+        Args:
+            transfer_id: Transfer the range belongs to.
+            file: Regular file opened in binary mode.
+            offset: First byte of the range.
+            count: Range length, at most ``MAX_STREAM_CHUNK_SIZE``.
+            tr_id: Transport ID (ignored for single-transport exchanges).
+        """
+        effective_id = tr_id if self.config.multicast else self.DEFAULT_TRANSPORT_ID
+        send_callback = self._send_callbacks.get(effective_id)
+        if send_callback is None:
+            raise MissingTransportError(
+                "Transport layer not configured. Call set_transport() first."
+            )
+        if count > MAX_STREAM_CHUNK_SIZE:
+            raise ValueError(f"File range of {count} bytes exceeds frame limit")
+
+        is_async = self._send_async[effective_id]
+        sendfile = self._sendfile_callbacks.get(effective_id)
+        header = FileDataFrame.encode_header(transfer_id, offset, count)
+        lock = self._write_locks.setdefault(effective_id, asyncio.Lock())
+        async with lock:
+            if sendfile is None:
+                # No zero-copy path on this transport: one regular write.
+                data = _read_file_range(file, offset, count)
+                if len(data) != count:
+                    raise EOFError(f"File shrank while sending ({offset}+{count})")
+                header += data
+            if is_async:
+                await send_callback(header)
+            else:
+                send_callback(header)
+            if sendfile is not None:
+                try:
+                    sent = await sendfile(file, offset, count)
+                except (NotImplementedError, asyncio.SendfileNotAvailableError):
+                    # TLS, or no os.sendfile on this platform; raised before
+                    # writing anything: complete the frame with a regular
+                    # write and stop offering this transport zero-copy.
+                    self._sendfile_callbacks[effective_id] = None
+                    sent = await self._send_range(
+                        send_callback, is_async, file, offset, count
+                    )
+                if sent != count:
+                    raise EOFError(f"File shrank while sending ({offset}+{count})")
+        if self._metrics:
+            self._metrics.record_sent(len(header) + (count if sendfile else 0))
+            self._metrics.record_write(1)
+
+    @staticmethod
+    async def _send_range(
+        send_callback: Callable, is_async: bool, file, offset: int, count: int
+    ) -> int:
+        """Read a file range and write it through ``send_callback``."""
+        data = _read_file_range(file, offset, count)
+        if is_async:
+            await send_callback(data)
+        else:
+            send_callback(data)
+        return len(data)
+
+    async def _send_frame(self, data: bytes, target: Optional[str] = None):
+        """
+        Send an already-framed payload (e.g. a compact mouse frame) as-is.
+
+        Applies the same multicast routing as ``_send_message`` but skips
+        serialization and chunking: callers only pass small fixed frames.
+        """
+        callback_snapshot = list(self._send_callbacks.items())
+        if not callback_snapshot:
+            raise MissingTransportError(
+                "Transport layer not configured (no send callbacks). "
+                "Call set_transport() first."
+            )
+        if self.config.multicast and target:
+            matched = [(tr, cb) for tr, cb in callback_snapshot if tr == target]
+            if matched:
+                callback_snapshot = matched
+        for tr_id, send_callback in callback_snapshot:
+            if not send_callback:
+                raise MissingTransportError(
+                    "Transport layer not configured. Call set_transport() first."
+                )
+            await self._transmit(tr_id, send_callback, data)
+
+    @property
+    def metrics(self) -> Optional[ConnectionMetrics]:
+        """Live metrics for this exchange, or None without a collector."""
+        return self._metrics
+
     async def get_metrics(self) -> Optional[Dict]:
         """
         Obtain current connection metrics as a dictionary.
@@ -740,12 +1330,15 @@ class MessageExchange:
             for mid, (_chunks, created) in self._chunk_buffer.items()
             if now - created > CHUNK_REASSEMBLY_TTL
         ]
-        if not stale:
-            return
         for mid in stale:
             del self._chunk_buffer[mid]
+        stale_count = len(stale)
+        for reassembler in self._reassemblers.values():
+            stale_count += reassembler.drop_stale(CHUNK_REASSEMBLY_TTL, now)
+        if not stale_count:
+            return
         self._logger.warning(
-            f"Dropped {len(stale)} stale chunk-reassembly buffer(s) "
+            f"Dropped {stale_count} stale chunk-reassembly buffer(s) "
             f"older than {CHUNK_REASSEMBLY_TTL}s"
         )
 
@@ -781,12 +1374,54 @@ class MessageExchange:
 
         return None
 
-    async def dispatch_message(self, message: ProtocolMessage):
+    async def _handle_compact_mouse(
+        self, body: memoryview, tr_id: Optional[str] = None
+    ) -> None:
+        """
+        Decode a compact mouse frame body straight into a ``MouseEvent``.
+
+        With auto-dispatch the event goes to the ``"mouse"`` handler without
+        building a ``ProtocolMessage``; queue consumers get the legacy
+        message shape so ``get_received_message`` stays homogeneous.
+        """
+        button, dx, dy, sequence_id, stamp = CompactMouseFrame.decode(body)
+        event = MouseEvent(dx=dx, dy=dy, button=button, action=MouseEvent.MOVE_ACTION)
+        sent = CompactMouseFrame.unwrap_timestamp(stamp, event.timestamp)
+        if self._metrics:
+            self._record_latency(sent, tr_id)
+
+        if self.config.auto_dispatch:
+            handler = self._handlers.get(MessageType.MOUSE)
+            if handler is None:
+                return
+            try:
+                await handler(event)  # ty:ignore[invalid-argument-type]
+            except Exception as e:
+                self._logger.log(
+                    f"Error in message handler for {MessageType.MOUSE} ({e})",
+                    Logger.ERROR,
+                )
+        elif self._message_queue:
+            await self._enqueue_message(
+                ProtocolMessage(
+                    message_type=MessageType.MOUSE,
+                    timestamp=sent,
+                    sequence_id=sequence_id,
+                    payload=event.to_dict(),
+                )
+            )
+
+    async def dispatch_message(
+        self, message: ProtocolMessage, origin: Optional[str] = None
+    ):
         """Dispatch message to the registered handler using asyncio."""
         handler = self._handlers.get(message.message_type)
         if handler:
             try:
-                await handler(message)
+                if message.message_type in self._origin_handlers:
+                    await handler(message, origin)
+                else:
+                    await handler(message)
             except Exception as e:
                 self._logger.log(
                     f"Error in message handler for {message.message_type} ({e})",
@@ -0,0 +1,169 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+Per-stream wire capabilities exchanged in the handshake.
+
+Both peers put their local table in the handshake ``additional_params``
+under ``CAPABILITIES_KEY``; each side then negotiates the same agreed set
+(see ``negotiate_capabilities``), stores it on the ``ClientObj`` and the
+stream handlers apply it to their ``MessageExchange``. A peer that sends no
+block gets ``LEGACY_CAPABILITIES`` on every stream.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from config import ApplicationConfig
+from network.protocol.compression import available_codecs
+
+CAPABILITIES_KEY = "capabilities"
+CAPABILITIES_VERSION = 1
+
+# Codec levels. Each level can decode everything below it.
+# 1: msgpack ProtocolMessage frames, ProtocolMessage chunking.
+# 2: adds CompactMouseFrame and StreamChunkFrame.
+# 3: adds FileDataFrame (file transfer, see network.data.transfer).
+CODEC_MSGPACK = 1
+CODEC_BINARY_FRAMES = 2
+CODEC_FILE_FRAMES = 3
+LATEST_CODEC = CODEC_FILE_FRAMES
+
+# Payload compression codecs this build can decode, in order of preference.
+SUPPORTED_COMPRESSION: tuple[str, ...] = available_codecs()
+
+
+@dataclass(frozen=True)
+class StreamCapabilities:
+    """
+    Wire features usable on one stream.
+
+    Frames are length-prefixed on a byte stream, so any reader copes with
+    several frames per write; ``batching`` defaults to True and only lets a
+    peer ask for one write per frame. ``clipboard_offers`` means the peer
+    syncs clipboard content by digest (OFFER/NEED/HAVE); without it the
+    full content is sent in a single event.
+    """
+
+    codec: int = CODEC_MSGPACK
+    max_chunk_size: int = ApplicationConfig.max_chunk_size
+    compression: tuple[str, ...] = ()
+    batching: bool = True
+    clipboard_offers: bool = False
+
+    @property
+    def compact_mouse(self) -> bool:
+        return self.codec >= CODEC_BINARY_FRAMES
+
+    @property
+    def stream_chunks(self) -> bool:
+        return self.codec >= CODEC_BINARY_FRAMES
+
+    @property
+    def file_frames(self) -> bool:
+        return self.codec >= CODEC_FILE_FRAMES
+
+    def to_dict(self) -> dict:
+        return {
+            "codec": self.codec,
+            "max_chunk_size": self.max_chunk_size,
+            "compression": list(self.compression),
+            "batching": self.batching,
+            "clipboard_offers": self.clipboard_offers,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StreamCapabilities":
+        compression = data.get("compression") or ()
+        return cls(
+            codec=int(data.get("codec", CODEC_MSGPACK)),
+            max_chunk_size=int(
+                data.get("max_chunk_size", ApplicationConfig.max_chunk_size)
+            ),
+            compression=tuple(str(c) for c in compression),
+            batching=bool(data.get("batching", True)),
+            clipboard_offers=bool(data.get("clipboard_offers", False)),
+        )
+
+    def negotiate(self, other: "StreamCapabilities") -> "StreamCapabilities":
+        """Features both sides support (symmetric)."""
+        return StreamCapabilities(
+            codec=min(self.codec, other.codec),
+            max_chunk_size=min(self.max_chunk_size, other.max_chunk_size),
+            compression=tuple(c for c in self.compression if c in other.compression),
+            batching=self.batching and other.batching,
+            clipboard_offers=self.clipboard_offers and other.clipboard_offers,
+        )
+
+
+LEGACY_CAPABILITIES = StreamCapabilities()
+
+
+def local_capabilities() -> Dict[int, StreamCapabilities]:
+    """This build's capability table, keyed by stream type."""
+    batching = ApplicationConfig.max_batch_bytes > 0
+    compressed = ApplicationConfig.compressed_streams
+    return {
+        stream_type: StreamCapabilities(
+            codec=LATEST_CODEC,
+            max_chunk_size=chunk_size,
+            compression=SUPPORTED_COMPRESSION if stream_type in compressed else (),
+            batching=batching,
+            clipboard_offers=True,
+        )
+        for stream_type, chunk_size in ApplicationConfig.stream_chunk_sizes
+    }
+
+
+def encode_capabilities(capabilities: Dict[int, StreamCapabilities]) -> dict:
+    """Handshake representation of a capability table."""
+    return {
+        "version": CAPABILITIES_VERSION,
+        "streams": {str(st): caps.to_dict() for st, caps in capabilities.items()},
+    }
+
+
+def decode_capabilities(raw: Optional[Any]) -> Dict[int, StreamCapabilities]:
+    """
+    Parse a peer's capability block. Malformed entries are skipped, so a
+    garbled or missing block degrades to legacy behaviour.
+    """
+    if not isinstance(raw, dict):
+        return {}
+    streams = raw.get("streams")
+    if not isinstance(streams, dict):
+        return {}
+    parsed: Dict[int, StreamCapabilities] = {}
+    for key, value in streams.items():
+        if not isinstance(value, dict):
+            continue
+        try:
+            parsed[int(key)] = StreamCapabilities.from_dict(value)
+        except (TypeError, ValueError):
+            continue
+    return parsed
+
+
+def negotiate_capabilities(
+    local: Dict[int, StreamCapabilities],
+    remote: Dict[int, StreamCapabilities],
+) -> Dict[int, StreamCapabilities]:
+    """Agreed capabilities for every local stream type."""
+    return {
+        stream_type: caps.negotiate(remote.get(stream_type, LEGACY_CAPABILITIES))
+        for stream_type, caps in local.items()
+    }
@@ -20,6 +20,7 @@ Structured message format for improved data handling and ordering.
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import bisect
 import struct
 import time
 import uuid
@@ -40,6 +41,31 @@ WireBytes = Union[bytes, bytearray, memoryview]
 _wire_encoder = msgspec.msgpack.Encoder()
 _wire_decoder_typed: "msgspec.msgpack.Decoder" = None  # type: ignore
 
+# Frame markers carried in the second byte after the length of the `!Icc`
+# prefix. ``Y`` frames carry a msgpack ProtocolMessage body; ``M`` frames
+# carry a fixed-layout relative mouse MOVE (see CompactMouseFrame); ``C``
+# frames carry one slice of a large msgpack body (see StreamChunkFrame);
+# ``F`` frames carry raw file content (see FileDataFrame); ``Z`` frames
+# carry a compressed msgpack body (see network.protocol.compression).
+FRAME_MARKER = b"P"
+MSGPACK_FRAME = b"Y"
+COMPACT_MOUSE_FRAME = b"M"
+STREAM_CHUNK_FRAME = b"C"
+FILE_DATA_FRAME = b"F"
+COMPRESSED_FRAME = b"Z"
+_KNOWN_FRAMES = frozenset(
+    {
+        MSGPACK_FRAME,
+        COMPACT_MOUSE_FRAME,
+        STREAM_CHUNK_FRAME,
+        FILE_DATA_FRAME,
+        COMPRESSED_FRAME,
+    }
+)
+
+# Hard cap on a single chunk's data, whatever a peer advertises.
+MAX_STREAM_CHUNK_SIZE = 1024 * 1024
+
 
 # Messages type
 class MessageType(StrEnum):
@@ -91,15 +117,26 @@ class ProtocolMessage(msgspec.Struct):
         """
         Serialize message to the binary wire format (msgpack + length prefix).
         """
-        body = _wire_encoder.encode(self)
+        return self.frame_body(self.encode_body())
+
+    def encode_body(self) -> bytes:
+        """Serialize message to its msgpack body, without framing."""
+        return _wire_encoder.encode(self)
 
-        # Add length prefix for proper framing
+    @classmethod
+    def frame_body(cls, body: bytes, marker: bytes = MSGPACK_FRAME) -> bytes:
+        """Prefix an encoded body (see ``encode_body``) with its frame header."""
         length = len(body)
-        buf = bytearray(self.prefix_lenght + length)
-        struct.pack_into(self._prefix_format, buf, 0, length, b"P", b"Y")
-        buf[self.prefix_lenght :] = body
+        buf = bytearray(cls.prefix_lenght + length)
+        struct.pack_into(cls._prefix_format, buf, 0, length, FRAME_MARKER, marker)
+        buf[cls.prefix_lenght :] = body
         return bytes(buf)
 
+    @classmethod
+    def from_body(cls, body: WireBytes) -> "ProtocolMessage":
+        """Deserialize a msgpack body produced by ``encode_body``."""
+        return _get_wire_decoder().decode(body)
+
     @classmethod
     def from_json(cls, json_str: str) -> "ProtocolMessage":
         """Deserialize message from JSON string (debug/external use, not wire)."""
@@ -126,6 +163,26 @@ class ProtocolMessage(msgspec.Struct):
             raise ValueError("Invalid binary data: not a protocol message")
         return length
 
+    @classmethod
+    def read_frame_prefix(cls, data: WireBytes) -> tuple[int, bytes]:
+        """
+        Read length prefix and frame marker from binary data.
+
+        Unlike ``read_lenght_prefix`` this accepts every known frame kind,
+        so the receive loop can branch on the marker instead of assuming
+        a msgpack body.
+
+        Returns:
+            ``(body_length, marker)``
+        """
+        if len(data) < cls.prefix_lenght:
+            raise ValueError("Invalid binary data: too short for length prefix")
+
+        length, p, marker = struct.unpack_from(cls._prefix_format, data)
+        if p != FRAME_MARKER or marker not in _KNOWN_FRAMES:
+            raise ValueError("Invalid binary data: not a protocol message")
+        return length, marker
+
     @classmethod
     def from_bytes(
         cls,
@@ -182,6 +239,303 @@ class ProtocolMessage(msgspec.Struct):
         return len(self.to_bytes())
 
 
+class CompactMouseFrame:
+    """
+    Fixed-layout wire frame for relative mouse MOVE deltas.
+
+    A msgpack ``ProtocolMessage`` for one delta is ~100 bytes and several
+    allocations (struct, payload dict, strings). This frame is 23 bytes
+    packed with a single precompiled ``struct``: the usual ``!Icc`` prefix
+    (marker ``M``) followed by ``button``, ``dx``, ``dy``, ``sequence`` and
+    the send time. It has no source or target: it is only sent on a unicast
+    mouse stream to peers that negotiated ``CODEC_BINARY_FRAMES`` (see
+    ``network.protocol.capabilities``).
+
+    The send time is the sender's wall clock in microseconds, truncated to
+    32 bits; the receiver unwraps it against its own clock
+    (:meth:`unwrap_timestamp`), which holds while the clocks and the
+    latency stay within ~35 minutes of each other.
+    """
+
+    _frame = struct.Struct("!IccBiiII")
+    _body = struct.Struct("!BiiII")
+
+    size: ClassVar[int] = _frame.size
+    body_size: ClassVar[int] = _body.size
+
+    # ``button`` is a uint8; this value stands for "no button".
+    NO_BUTTON: ClassVar[int] = 0xFF
+
+    _INT32_MIN: ClassVar[int] = -(2**31)
+    _INT32_MAX: ClassVar[int] = 2**31 - 1
+    _UINT32_SPAN: ClassVar[int] = 2**32
+
+    @classmethod
+    def can_encode(cls, dx: float, dy: float, button: Optional[int]) -> bool:
+        """True when the delta fits the layout without losing precision."""
+        # Range checks first: they also reject NaN/inf before int().
+        return (
+            cls._INT32_MIN <= dx <= cls._INT32_MAX
+            and cls._INT32_MIN <= dy <= cls._INT32_MAX
+            and dx == int(dx)
+            and dy == int(dy)
+            and (button is None or 0 <= button < cls.NO_BUTTON)
+        )
+
+    @classmethod
+    def encode(
+        cls,
+        dx: float,
+        dy: float,
+        button: Optional[int],
+        sequence_id: int,
+        timestamp: Optional[float] = None,
+    ) -> bytes:
+        """Pack a relative move, sent at ``timestamp`` (now), into a frame."""
+        if timestamp is None:
+            timestamp = time.time()
+        return cls._frame.pack(
+            cls.body_size,
+            FRAME_MARKER,
+            COMPACT_MOUSE_FRAME,
+            cls.NO_BUTTON if button is None else button,
+            int(dx),
+            int(dy),
+            sequence_id & 0xFFFFFFFF,
+            int(timestamp * 1_000_000) & 0xFFFFFFFF,
+        )
+
+    @classmethod
+    def decode(cls, body: WireBytes) -> tuple[Optional[int], int, int, int, int]:
+        """
+        Unpack a frame body (the bytes after the prefix).
+
+        Returns:
+            ``(button, dx, dy, sequence_id, timestamp_us)``, the latter
+            still truncated (see :meth:`unwrap_timestamp`)
+        """
+        if len(body) < cls.body_size:
+            raise ValueError("Invalid binary data: truncated compact mouse frame")
+        button, dx, dy, seq, stamp = cls._body.unpack_from(body)
+        return (None if button == cls.NO_BUTTON else button), dx, dy, seq, stamp
+
+    @classmethod
+    def unwrap_timestamp(cls, timestamp_us: int, now: float) -> float:
+        """
+        Wall-clock send time (seconds) of a truncated frame timestamp: the
+        instant closest to ``now`` with those low 32 bits.
+        """
+        now_us = int(now * 1_000_000)
+        delta = (now_us - timestamp_us - cls._INT32_MIN) % cls._UINT32_SPAN
+        return (now_us - delta - cls._INT32_MIN) / 1_000_000
+
+
+class StreamChunkFrame:
+    """
+    Wire frame carrying one slice of a large msgpack message body.
+
+    The sender encodes the ``ProtocolMessage`` once and cuts the body into
+    slices; each frame is the usual ``!Icc`` prefix (marker ``C``) followed
+    by a fixed header - ``message_id`` (uint32), ``offset`` and ``total``
+    (uint64) - and the raw slice. The receiver preallocates ``total`` bytes
+    on the first frame and copies every slice to its offset (see
+    ChunkReassembler), so there is no per-chunk msgpack, sort or join.
+    """
+
+    _frame = struct.Struct("!IccIQQ")
+    _header = struct.Struct("!IQQ")
+
+    size: ClassVar[int] = _frame.size
+    header_size: ClassVar[int] = _header.size
+
+    @classmethod
+    def encode(cls, message_id: int, offset: int, total: int, data: WireBytes) -> bytes:
+        """Build one complete chunk frame."""
+        buf = bytearray(cls.size + len(data))
+        cls._frame.pack_into(
+            buf,
+            0,
+            cls.header_size + len(data),
+            FRAME_MARKER,
+            STREAM_CHUNK_FRAME,
+            message_id,
+            offset,
+            total,
+        )
+        buf[cls.size :] = data
+        return bytes(buf)
+
+    @classmethod
+    def split(cls, body: bytes, message_id: int, chunk_size: int) -> List[bytes]:
+        """Cut an encoded body into chunk frames of at most ``chunk_size`` data bytes."""
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        total = len(body)
+        view = memoryview(body)
+        return [
+            cls.encode(message_id, offset, total, view[offset : offset + chunk_size])
+            for offset in range(0, total, chunk_size)
+        ]
+
+    @classmethod
+    def decode_header(cls, body: WireBytes) -> tuple[int, int, int]:
+        """
+        Unpack the header of a frame body (the bytes after the prefix).
+
+        Returns:
+            ``(message_id, offset, total)``; the slice is ``body[header_size:]``.
+        """
+        if len(body) < cls.header_size:
+            raise ValueError("Invalid binary data: truncated stream chunk frame")
+        return cls._header.unpack_from(body)
+
+
+class FileDataFrame:
+    """
+    Wire frame carrying one range of a file being transferred.
+
+    The usual ``!Icc`` prefix (marker ``F``) is followed by ``transfer_id``
+    (uint32) and the file ``offset`` (uint64), then the raw bytes. Only the
+    header is built in Python: the sender writes it and hands the range to
+    ``loop.sendfile``, so file content never passes through a msgpack body.
+    """
+
+    _frame = struct.Struct("!IccIQ")
+    _header = struct.Struct("!IQ")
+
+    size: ClassVar[int] = _frame.size
+    header_size: ClassVar[int] = _header.size
+
+    @classmethod
+    def encode_header(cls, transfer_id: int, offset: int, length: int) -> bytes:
+        """Prefix and header for a frame followed by ``length`` data bytes."""
+        return cls._frame.pack(
+            cls.header_size + length,
+            FRAME_MARKER,
+            FILE_DATA_FRAME,
+            transfer_id,
+            offset,
+        )
+
+    @classmethod
+    def decode_header(cls, body: WireBytes) -> tuple[int, int]:
+        """
+        Unpack the header of a frame body (the bytes after the prefix).
+
+        Returns:
+            ``(transfer_id, offset)``; the data is ``body[header_size:]``.
+        """
+        if len(body) < cls.header_size:
+            raise ValueError("Invalid binary data: truncated file data frame")
+        return cls._header.unpack_from(body)
+
+
+class ChunkReassembler:
+    """
+    Reassembles StreamChunkFrame bodies into ProtocolMessages.
+
+    Each in-flight message owns one ``bytearray`` sized to the announced
+    total; slices are copied in by offset through a memoryview. A message
+    completes once its slices cover the whole buffer: the covered ranges
+    are tracked, and a slice overlapping them (duplicate or otherwise)
+    drops the message. Messages larger than ``max_total`` are refused, at
+    most ``max_pending`` are reassembled at once (a new one evicts the least
+    recently progressed), and ``drop_stale`` evicts buffers whose sender
+    went away mid-stream.
+    """
+
+    def __init__(self, max_total: int, max_pending: int = 4):
+        self.max_total = max_total
+        self.max_pending = max_pending
+        # message_id -> [buffer, covered ranges, monotonic last progress]
+        self._pending: Dict[int, list] = {}
+
+    @staticmethod
+    def _cover(ranges: List[tuple], start: int, end: int) -> bool:
+        """
+        Add ``[start, end)`` to the sorted, disjoint ``ranges``, merging
+        adjacent ones. False if it overlaps a range already covered.
+        In-order slices keep a single range, so this stays O(1) for them.
+        """
+        i = bisect.bisect_left(ranges, (start, end))
+        if (i and ranges[i - 1][1] > start) or (i < len(ranges) and ranges[i][0] < end):
+            return False
+        if i and ranges[i - 1][1] == start:
+            i -= 1
+            start = ranges.pop(i)[0]
+        if i < len(ranges) and ranges[i][0] == end:
+            end = ranges.pop(i)[1]
+        ranges.insert(i, (start, end))
+        return True
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def feed(self, body: WireBytes) -> Optional[ProtocolMessage]:
+        """
+        Store one chunk frame body. Returns the message once complete.
+
+        Raises:
+            ValueError: malformed header, oversize total or out-of-range slice.
+        """
+        buffer = self.feed_body(body)
+        if buffer is None:
+            return None
+        try:
+            return ProtocolMessage.from_body(buffer)
+        except msgspec.DecodeError as e:
+            raise ValueError(f"Invalid chunked message body: {e}") from e
+
+    def feed_body(self, body: WireBytes) -> Optional[bytearray]:
+        """
+        Like ``feed`` but return the reassembled body undecoded, for bodies
+        that may be compressed envelopes.
+        """
+        message_id, offset, total = StreamChunkFrame.decode_header(body)
+        data = body[StreamChunkFrame.header_size :]
+        end = offset + len(data)
+
+        entry = self._pending.get(message_id)
+        if entry is None:
+            if total > self.max_total:
+                raise ValueError(
+                    f"Chunked message of {total} bytes exceeds {self.max_total}"
+                )
+            if len(self._pending) >= self.max_pending:
+                oldest = min(self._pending, key=lambda mid: self._pending[mid][2])
+                del self._pending[oldest]
+            entry = [bytearray(total), [], 0.0]
+            self._pending[message_id] = entry
+
+        buffer = entry[0]
+        if end > len(buffer) or total != len(buffer):
+            del self._pending[message_id]
+            raise ValueError("Stream chunk outside of announced message size")
+        ranges = entry[1]
+        if not self._cover(ranges, offset, end):
+            del self._pending[message_id]
+            raise ValueError("Stream chunk overlaps data already received")
+
+        memoryview(buffer)[offset:end] = data
+        entry[2] = time.monotonic()
+        if ranges[0] != (0, total):
+            return None
+
+        del self._pending[message_id]
+        return buffer
+
+    def drop_stale(self, max_age: float, now: Optional[float] = None) -> int:
+        """Forget messages with no progress for ``max_age`` seconds."""
+        now = time.monotonic() if now is None else now
+        stale = [mid for mid, e in self._pending.items() if now - e[2] > max_age]
+        for mid in stale:
+            del self._pending[mid]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._pending.clear()
+
+
 def _get_wire_decoder() -> "msgspec.msgpack.Decoder":
     """Lazily build the typed msgpack decoder for ProtocolMessage."""
     global _wire_decoder_typed
@@ -197,6 +551,7 @@ class MessageBuilder:
 
     def __init__(self):
         self._sequence_counter = 0
+        self._chunk_message_counter = 0
         # Use the same msgpack wire codec the rest of the protocol uses
         # so chunked payloads round-trip without a JSON-msgpack hop.
         self._encoder = msgspec.msgpack.Encoder()
@@ -211,6 +566,42 @@ class MessageBuilder:
         """Generate unique message ID for chunk tracking."""
         return str(uuid.uuid4())
 
+    def _next_chunk_message_id(self) -> int:
+        """Per-connection uint32 id for stream-chunked messages."""
+        self._chunk_message_counter = (self._chunk_message_counter + 1) & 0xFFFFFFFF
+        return self._chunk_message_counter
+
+    def create_stream_chunks(
+        self, message: ProtocolMessage, chunk_size: int
+    ) -> List[bytes]:
+        """
+        Encode a message once and return its wire frames.
+
+        A message whose body fits in ``chunk_size`` comes back as a single
+        regular frame; larger ones are cut into StreamChunkFrames. Only use
+        this towards peers that negotiated ``CODEC_BINARY_FRAMES``.
+
+        Args:
+            message: Message to send
+            chunk_size: Maximum data bytes per chunk frame
+
+        Returns:
+            Complete wire frames, in order
+        """
+        return self.frame_stream_body(message.encode_body(), chunk_size)
+
+    def frame_stream_body(
+        self, body: bytes, chunk_size: int, marker: bytes = MSGPACK_FRAME
+    ) -> List[bytes]:
+        """
+        Frame an encoded (or compressed, with ``COMPRESSED_FRAME``) body as
+        one ``marker`` frame, or as StreamChunkFrames when it exceeds
+        ``chunk_size``.
+        """
+        if len(body) <= chunk_size:
+            return [ProtocolMessage.frame_body(body, marker)]
+        return StreamChunkFrame.split(body, self._next_chunk_message_id(), chunk_size)
+
     def create_chunked_message(
         self, message: ProtocolMessage, max_chunk_size: int
     ) -> List[ProtocolMessage]:
@@ -442,36 +833,48 @@ class MessageBuilder:
             target=target,
         )
 
+    def create_compact_mouse_frame(
+        self, dx: float, dy: float, button: Optional[int] = None
+    ) -> bytes:
+        """Create a compact wire frame for a relative mouse move."""
+        return CompactMouseFrame.encode(dx, dy, button, self._next_sequence_id())
+
     def create_keyboard_message(
         self,
         key: str,
         event: str,
         source: Optional[str] = None,
         target: Optional[str] = None,
+        **kwargs,
     ) -> ProtocolMessage:
         """Create a keyboard event message with timestamp."""
         return ProtocolMessage(
             message_type=MessageType.KEYBOARD,
             timestamp=time.time(),
             sequence_id=self._next_sequence_id(),
-            payload={"key": key, "event": event},
+            payload={"key": key, "event": event, **kwargs},
             source=source,
             target=target,
         )
 
     def create_clipboard_message(
         self,
-        content: str,
+        content: Optional[str],
         content_type: str = "text",
         source: Optional[str] = None,
         target: Optional[str] = None,
+        **kwargs,
     ) -> ProtocolMessage:
-        """Create a clipboard message with timestamp."""
+        """Create a clipboard message with timestamp.
+
+        Extra keyword arguments (digest, size, phase of the content-addressed
+        sync) are added to the payload.
+        """
         return ProtocolMessage(
             message_type=MessageType.CLIPBOARD,
             timestamp=time.time(),
             sequence_id=self._next_sequence_id(),
-            payload={"content": content, "content_type": content_type},
+            payload={"content": content, "content_type": content_type, **kwargs},
             source=source,
             target=target,
         )
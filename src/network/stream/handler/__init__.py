@@ -16,7 +16,8 @@
 #
 
 import asyncio
-from typing import Any, Optional
+from time import monotonic
+from typing import Any, Callable, Optional
 
 from event import (
     BusEventType,
@@ -25,13 +26,94 @@ from event import (
     ClientDisconnectedEvent,
     ClientConnectedEvent,
     ClientActiveEvent,
+    MouseEvent,
 )
 from event.bus import EventBus
 from model.client import ClientsManager, ClientObj
 from network.data import MissingTransportError
-from network.data.exchange import MessageExchange, MessageExchangeConfig
+from network.data.exchange import (
+    MessageExchange,
+    MessageExchangeConfig,
+    reassembly_limit,
+)
+from network.protocol.capabilities import LEGACY_CAPABILITIES, StreamCapabilities
 from utils.logging import get_logger
-from utils.metrics import MetricsCollector
+from utils.metrics import ConnectionMetrics, MetricsCollector
+from utils.metrics.trace import TRACE_KEY, TRACER
+
+
+class MoveCoalescingQueue(asyncio.Queue):
+    """
+    Send queue that sums consecutive relative mouse moves.
+
+    A relative MOVE put while the previous queued item is also a relative
+    MOVE is added onto that item instead of taking a new slot, so a backlog
+    that builds up while the sender is busy collapses into one delta.
+    Anything else (clicks, scrolls, absolute positions) is queued as-is and
+    ends the run, so moves are never reordered across other events.
+
+    Only items still waiting in the queue are touched; once the sender has
+    taken an event it is never mutated again. The latency trace of a merged
+    move (utils.metrics.trace) moves onto the tail unless that one is
+    sampled too.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        metrics: Optional[Callable[[], Optional[ConnectionMetrics]]] = None,
+    ):
+        super().__init__(maxsize=maxsize)
+        self._metrics = metrics
+
+    @staticmethod
+    def _is_relative_move(item: Any) -> bool:
+        return (
+            type(item) is MouseEvent
+            and item.action == MouseEvent.MOVE_ACTION
+            and item.x == -1
+            and item.y == -1
+            and item.button is None
+            and not item.is_pressed
+        )
+
+    def _record(self, merged: bool):
+        if self._metrics is not None:
+            metrics = self._metrics()
+            if metrics is not None:
+                metrics.record_move(merged)
+
+    def _merge(self, item: Any) -> bool:
+        if not self._is_relative_move(item):
+            return False
+        # asyncio.Queue keeps its items in self._queue (see _init/_put).
+        pending = self._queue
+        if not pending:
+            return False
+        tail = pending[-1]
+        if not self._is_relative_move(tail):
+            return False
+        tail.dx += item.dx
+        tail.dy += item.dy
+        if tail.trace is None:
+            # A sampled move keeps its trace on the event actually sent
+            tail.trace = item.trace
+        self._record(merged=True)
+        return True
+
+    def _put(self, item: Any):
+        super()._put(item)
+        if self._is_relative_move(item):
+            self._record(merged=False)
+
+    def put_nowait(self, item: Any):
+        # Merging needs no free slot, so try it before the full() check.
+        if not self._merge(item):
+            super().put_nowait(item)
+
+    async def put(self, item: Any):
+        if not self._merge(item):
+            await super().put(item)
 
 
 class StreamHandler:
@@ -46,6 +128,7 @@ class StreamHandler:
         event_bus: EventBus,
         sender: bool = True,
         buffer_size: int = 1000,
+        coalesce_moves: bool = False,
     ):
         """
         Attributes:
@@ -53,11 +136,17 @@ class StreamHandler:
             clients (ClientsManager): Manager for connected clients.
             event_bus (EventBus): Event bus for handling events.
             sender (bool): If True, the stream sends data.
+            coalesce_moves (bool): If True, relative mouse moves waiting in the
+                send queue are summed (see MoveCoalescingQueue).
         """
         self.stream_type = stream_type
         self.clients = clients
         self.event_bus = event_bus
-        self._send_queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self._send_queue: asyncio.Queue = (
+            MoveCoalescingQueue(maxsize=buffer_size, metrics=self._exchange_metrics)
+            if coalesce_moves
+            else asyncio.Queue(maxsize=buffer_size)
+        )
         self._active = False
         self._sender_task = None
 
@@ -67,10 +156,15 @@ class StreamHandler:
 
         self._logger = get_logger(self.__class__.__name__)
 
-    def register_receive_callback(self, receive_callback, message_type: str):
+    def register_receive_callback(
+        self, receive_callback, message_type: str, with_origin: bool = False
+    ):
         """
         Register a callback function for receiving messages of a specific type.
         This is now handled by MessageExchange directly.
+
+        With ``with_origin`` the callback also receives the transport id the
+        message came from (see MessageExchange.register_handler).
         """
         raise NotImplementedError
 
@@ -126,6 +220,8 @@ class StreamHandler:
         """
         Queues data to be sent over the stream.
         """
+        if TRACER.enabled:
+            TRACER.begin(data)
         await self._send_queue.put(data)
 
     def send_nowait(self, data: Any) -> bool:
@@ -136,12 +232,37 @@ class StreamHandler:
         mouse deltas etc.). Returns False when the queue is saturated, so
         the caller can drop or coalesce instead of blocking.
         """
+        if TRACER.enabled:
+            TRACER.begin(data)
         try:
             self._send_queue.put_nowait(data)
             return True
         except asyncio.QueueFull:
             return False
 
+    def get_metrics(self) -> Optional[ConnectionMetrics]:
+        """
+        Connection metrics of this stream, if it has an exchange yet.
+        """
+        return self._exchange_metrics()
+
+    def peer_capabilities(self, tr_id: Optional[str] = None) -> StreamCapabilities:
+        """
+        Capabilities negotiated with a peer on this stream (legacy when the
+        handler has no exchange or never configured that transport).
+        """
+        exchange = getattr(self, "msg_exchange", None)
+        if exchange is None:
+            return LEGACY_CAPABILITIES
+        return exchange.peer_capabilities(tr_id)
+
+    def _exchange_metrics(self) -> Optional[ConnectionMetrics]:
+        """
+        Metrics of this handler's message exchange, if any.
+        """
+        exchange = getattr(self, "msg_exchange", None)
+        return exchange.metrics if exchange is not None else None
+
     def _clear_buffer(self):
         """
         Clears the send queue.
@@ -223,10 +344,20 @@ class StreamHandler:
             await msg_exchange.stop()
             return False
 
+        # Wire features negotiated in the handshake; legacy peers (no
+        # entry) keep receiving msgpack and ProtocolMessage chunks.
+        msg_exchange.apply_capabilities(
+            client.capabilities.get(stream_type), tr_id=transport_id
+        )
+        msg_exchange.set_peer_clock(
+            client.clock, peer_id=client.uid, tr_id=transport_id
+        )
+
         await msg_exchange.set_transport(
             send_callback=cl_stream.get_writer_call(),
             receive_callback=cl_stream.get_reader_call(),
             tr_id=transport_id,
+            sendfile_callback=cl_stream.get_sendfile_call(),
         )
         await msg_exchange.start()
         return True
@@ -247,6 +378,7 @@ class _ServerStreamHandler(StreamHandler):
         sender: bool = True,
         metrics_collector: Optional[MetricsCollector] = None,
         buffer_size: int = 1000,
+        coalesce_moves: bool = False,
     ):
         """
         Initializes and configures an instance responsible for managing the interaction between
@@ -265,6 +397,8 @@ class _ServerStreamHandler(StreamHandler):
             metrics_collector (Optional[MetricsCollector]): Optional metrics collector for
                 gathering performance data.
             buffer_size (int): Size of the internal buffer for managing outgoing messages.
+            coalesce_moves (bool): Sum relative mouse moves that queue up while the
+                sender is busy, default is False.
 
         Attributes:
             _active_client (Optional[ClientObj]): The currently active client being handled or
@@ -290,6 +424,7 @@ class _ServerStreamHandler(StreamHandler):
             event_bus=event_bus,
             sender=sender,
             buffer_size=buffer_size,
+            coalesce_moves=coalesce_moves,
         )
 
         self._active_client: Optional[ClientObj] = None
@@ -331,12 +466,16 @@ class _ServerStreamHandler(StreamHandler):
         #     callback=self._on_active_screen_change_guard,
         # )
 
-    def register_receive_callback(self, receive_callback, message_type: str):
+    def register_receive_callback(
+        self, receive_callback, message_type: str, with_origin: bool = False
+    ):
         """
         Register a callback function for receiving messages of a specific type.
         This is delegated to MessageExchange which handles async dispatch automatically.
         """
-        self.msg_exchange.register_handler(message_type, receive_callback)
+        self.msg_exchange.register_handler(
+            message_type, receive_callback, with_origin=with_origin
+        )
 
     def _build_exchange(
         self, metrics_collector: Optional[MetricsCollector]
@@ -345,7 +484,10 @@ class _ServerStreamHandler(StreamHandler):
         Create a MessageExchange instance for the stream handler.
         """
         return MessageExchange(
-            conf=MessageExchangeConfig(auto_dispatch=True),
+            conf=MessageExchangeConfig(
+                auto_dispatch=True,
+                max_reassembly_size=reassembly_limit(self.stream_type),
+            ),
             id=self.handler_id,
             metrics_collector=metrics_collector,
         )
@@ -407,15 +549,128 @@ class _ServerStreamHandler(StreamHandler):
             if self._active_client is not None
             else screen
         )
+        await self._send_batched(data, target=screen)
+
+    async def _send_item(self, data: Any, target: Optional[str]):
+        """
+        Serialize one queued item and hand it to the message exchange.
+
+        A ``None`` target leaves routing to the item itself (or, for
+        multicast exchanges, to every configured transport).
+        """
+        if TRACER.enabled and getattr(data, "trace", None) is not None:
+            await self._send_traced(data, target)
+            return
         if not isinstance(data, dict) and hasattr(data, "to_dict"):
             data = data.to_dict()
+        if target is None:
+            await self.msg_exchange.send_stream_type_message(
+                stream_type=self.stream_type, source=self.source, **data
+            )
+            return
         await self.msg_exchange.send_stream_type_message(
             stream_type=self.stream_type,
             source=self.source,
-            target=screen,
+            target=target,
             **data,
         )
 
+    async def _send_traced(self, data: Any, target: Optional[str]):
+        """
+        Send a sampled event with its trace block in the payload, timing
+        the send-queue wait and the hand-off to the exchange.
+        """
+        ctx = data.trace
+        data.trace = None
+        ctx.mark("send_queue")
+        payload = data.to_dict()
+        payload[TRACE_KEY] = ctx.to_wire()
+        await self._send_item(payload, target)
+        ctx.mark("serialize")
+        TRACER.finish(ctx)
+
+    async def _send_batched(self, data: Any, target: Optional[str]):
+        """
+        Send ``data`` together with everything already waiting in the queue.
+
+        With batching enabled the exchange buffers the encoded frames and
+        writes them with a single write+drain, bounded by the exchange's
+        ``max_batch_bytes``; ``max_batch_latency`` lets the batch wait a
+        little for stragglers. Otherwise this is a plain single send.
+        """
+        if not self.msg_exchange.batching_enabled():
+            await self._send_item(data, target)
+            return
+
+        while data is not None:
+            data, target = await self._send_batch(data, target)
+
+    async def _send_batch(
+        self, data: Any, target: Optional[str]
+    ) -> tuple[Any, Optional[str]]:
+        """
+        Write one batch starting with ``data``.
+
+        Draining stops when ``_send_clause`` no longer holds or the target
+        changed (see ``_batch_target``); an item already taken for another
+        target is returned with that target, to start the next batch.
+        An item that fails to encode is dropped alone; a transport error
+        still flushes what was buffered, then propagates.
+        """
+        exchange = self.msg_exchange
+        queue = self._send_queue
+        deadline = monotonic() + exchange.config.max_batch_latency
+        leftover: tuple[Any, Optional[str]] = (None, None)
+        error: Optional[BaseException] = None
+        exchange.begin_batch()
+        try:
+            while True:
+                try:
+                    await self._send_item(data, target)
+                except (OSError, RuntimeError, MissingTransportError) as e:
+                    error = e
+                    break
+                except Exception as e:
+                    self._logger.warning(
+                        "Dropping unsendable item",
+                        stream_type=self.stream_type,
+                        error=str(e),
+                    )
+                if exchange.batch_full() or not self._send_clause():
+                    break
+                try:
+                    data = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        data = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if not self._send_clause():
+                        # Dropped, as _clear_buffer would on deactivation
+                        break
+                next_target = self._batch_target(target)
+                if next_target != target:
+                    leftover = (data, next_target)
+                    break
+        except BaseException:
+            exchange.discard_batch()
+            raise
+        await exchange.flush_batch()
+        if error is not None:
+            raise error
+        return leftover
+
+    def _batch_target(self, target: Optional[str]) -> Optional[str]:
+        """
+        Target for an item drained into the batch right now: the active
+        client's screen, as ``_send_logic`` would pick it.
+        """
+        client = self._active_client
+        return client.get_screen_position() if client is not None else target
+
     def _send_clause(self) -> bool:
         """
         Determine if sending is allowed.
@@ -551,7 +806,10 @@ class _ClientStreamHandler(StreamHandler):
         Create a MessageExchange instance for the stream handler.
         """
         return MessageExchange(
-            conf=MessageExchangeConfig(auto_dispatch=True),
+            conf=MessageExchangeConfig(
+                auto_dispatch=True,
+                max_reassembly_size=reassembly_limit(self.stream_type),
+            ),
             id=self.handler_id,
             metrics_collector=metrics_collector,
         )
@@ -699,12 +957,16 @@ class _ClientStreamHandler(StreamHandler):
                 self._logger.error("Error in core loop", error=str(e))
                 await asyncio.sleep(self._waiting_time)
 
-    def register_receive_callback(self, receive_callback, message_type: str):
+    def register_receive_callback(
+        self, receive_callback, message_type: str, with_origin: bool = False
+    ):
         """
         Register a callback function for receiving messages of a specific type.
         This is delegated to MessageExchange which handles async dispatch automatically.
         """
-        self.msg_exchange.register_handler(message_type, receive_callback)
+        self.msg_exchange.register_handler(
+            message_type, receive_callback, with_origin=with_origin
+        )
 
     async def stop(self):
         self._send_ready.set()  # Unblock _core_sender so it can exit
@@ -18,7 +18,11 @@
 import asyncio
 from typing import Optional
 
-from network.data.exchange import MessageExchange, MessageExchangeConfig
+from network.data.exchange import (
+    MessageExchange,
+    MessageExchangeConfig,
+    reassembly_limit,
+)
 from model.client import ClientsManager
 
 from event.bus import EventBus
@@ -327,7 +331,11 @@ class MulticastStreamHandler(_ServerStreamHandler):
         self, metrics_collector: Optional[MetricsCollector]
     ) -> MessageExchange:
         return MessageExchange(
-            conf=MessageExchangeConfig(auto_dispatch=True, multicast=True),
+            conf=MessageExchangeConfig(
+                auto_dispatch=True,
+                multicast=True,
+                max_reassembly_size=reassembly_limit(self.stream_type),
+            ),
             id=self.handler_id,
             metrics_collector=metrics_collector,
         )
@@ -375,10 +383,17 @@ class MulticastStreamHandler(_ServerStreamHandler):
                         await asyncio.sleep(0)
                         return
 
+                    self.msg_exchange.apply_capabilities(
+                        client.capabilities.get(self.stream_type), tr_id=client_uid
+                    )
+                    self.msg_exchange.set_peer_clock(
+                        client.clock, peer_id=client_uid, tr_id=client_uid
+                    )
                     await self.msg_exchange.set_transport(
                         send_callback=cl_stream.get_writer_call(),
                         receive_callback=cl_stream.get_reader_call(),
                         tr_id=client_uid,
+                        sendfile_callback=cl_stream.get_sendfile_call(),
                     )
         except Exception as e:
             self._logger.error(
@@ -405,10 +420,18 @@ class MulticastStreamHandler(_ServerStreamHandler):
                     if cl_conn is not None:
                         cl_stream = cl_conn.get_stream(self.stream_type)
                         if cl_stream is not None:
+                            self.msg_exchange.apply_capabilities(
+                                client.capabilities.get(self.stream_type),
+                                tr_id=client_uid,
+                            )
+                            self.msg_exchange.set_peer_clock(
+                                client.clock, peer_id=client_uid, tr_id=client_uid
+                            )
                             await self.msg_exchange.set_transport(
                                 send_callback=cl_stream.get_writer_call(),
                                 receive_callback=cl_stream.get_reader_call(),
                                 tr_id=client_uid,
+                                sendfile_callback=cl_stream.get_sendfile_call(),
                             )
                             transport_configured = True
         finally:
@@ -430,6 +453,7 @@ class MulticastStreamHandler(_ServerStreamHandler):
 
         client_uid = data.client_uid
         try:
+            self.msg_exchange.set_peer_clock(None, peer_id=client_uid, tr_id=client_uid)
             await self.msg_exchange.set_transport(
                 send_callback=None, receive_callback=None, tr_id=client_uid
             )
@@ -469,16 +493,11 @@ class MulticastStreamHandler(_ServerStreamHandler):
     async def _send_logic(self):
         # Process sending queued data
         data = await self._send_queue.get()
-        # If data is not dict call .to_dict()
-        if not isinstance(data, dict) and hasattr(data, "to_dict"):
-            data = data.to_dict()
-
-        await self.msg_exchange.send_stream_type_message(
-            stream_type=self.stream_type,
-            source=self.source,
-            # target=client.screen_position, # Let the multicast message exchange handle all targets
-            **data,
-        )
+        # No target: let the multicast message exchange handle all targets
+        await self._send_batched(data, target=None)
+
+    def _batch_target(self, target: Optional[str]) -> Optional[str]:
+        return None
 
     async def start(self) -> bool:
         st = await super().start()
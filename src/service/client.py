@@ -51,6 +51,7 @@ from event import (
     ClientStreamReconnectedEvent,
 )
 from network.connection.client import ConnectionHandler
+from network.data.transfer import FileTransferManager
 from network.stream.handler.client import (
     UnidirectionalStreamHandler,
     BidirectionalStreamHandler,
@@ -691,6 +692,8 @@ class Client:
                 await self._enable_keyboard_stream()
             elif stream_type == StreamType.CLIPBOARD:
                 await self._enable_clipboard_stream()
+            elif stream_type == StreamType.FILE:
+                await self._enable_file_stream()
             else:
                 self._logger.error("Unknown stream type", stream_type=stream_type)
                 return False
@@ -728,6 +731,8 @@ class Client:
                 await self._disable_keyboard_stream()
             elif stream_type == StreamType.CLIPBOARD:
                 await self._disable_clipboard_stream()
+            elif stream_type == StreamType.FILE:
+                await self._disable_file_stream()
             else:
                 self._logger.error("Unknown stream type", stream_type=stream_type)
                 return False
@@ -1520,6 +1525,10 @@ class Client:
                             f"Error stopping stream handler {stream_type}({e})"
                         )
 
+                file_transfer = self._components.get("file_transfer")
+                if file_transfer is not None:
+                    await file_transfer.close()
+
                 # Disconnect from server
                 if self.connection_handler:
                     await self.connection_handler.stop()
@@ -1646,6 +1655,15 @@ class Client:
             active_only=False,  # Clipboard may be active even if client is inactive
         )
 
+        # File stream (bidirectional), carries files copied to the clipboard
+        self._stream_handlers[StreamType.FILE] = BidirectionalStreamHandler(
+            stream_type=StreamType.FILE,
+            clients=self.clients_manager,
+            event_bus=self.event_bus,
+            handler_id="ClientFileStreamHandler",
+            active_only=False,
+        )
+
     async def _initialize_components(self):
         """Initialize enabled components based on configuration"""
         # Initialize stream components based on enabled streams
@@ -1779,6 +1797,7 @@ class Client:
 
         is_enabled = self.is_stream_enabled(StreamType.CLIPBOARD)
         command_stream = self._stream_handlers[StreamType.COMMAND]
+        file_transfer = self._get_file_transfer()
 
         # Clipboard Listener - monitors clipboard changes and sends to server
         clipboard_listener = self._components.get("clipboard_listener")
@@ -1787,6 +1806,8 @@ class Client:
                 event_bus=self.event_bus,
                 stream_handler=clipboard_stream,
                 command_stream=command_stream,
+                max_image_size=self.app_config.max_clipboard_image_size,
+                file_transfer=file_transfer,
             )
             if is_enabled and self._connected:
                 await clipboard_listener.start()
@@ -1801,6 +1822,7 @@ class Client:
                 event_bus=self.event_bus,
                 clipboard=clipboard_listener.get_clipboard_context(),
                 stream_handler=clipboard_stream,
+                file_transfer=file_transfer,
             )
             self._components["clipboard_controller"] = clipboard_controller
 
@@ -1816,6 +1838,36 @@ class Client:
         if clipboard_stream:
             await clipboard_stream.stop()
 
+    def _get_file_transfer(self) -> Optional[FileTransferManager]:
+        """File transfers shared by the clipboard components"""
+        # Copied files travel on the FILE stream, once it is open
+        file_transfer = self._components.get("file_transfer")
+        file_stream = self._stream_handlers.get(StreamType.FILE)
+        if not file_transfer and file_stream:
+            file_transfer = FileTransferManager(
+                file_stream.msg_exchange,
+                download_dir=self.app_config.get_received_files_dir(),
+            )
+            self._components["file_transfer"] = file_transfer
+        return file_transfer
+
+    async def _enable_file_stream(self):
+        """Enable file stream at runtime"""
+        file_stream = self._stream_handlers.get(StreamType.FILE)
+        if not file_stream:
+            self._logger.error("File stream handler not initialized")
+            return
+
+        # Start stream if enabled and connected
+        if self._connected:
+            await self._ensure_stream_active(StreamType.FILE, file_stream)
+
+    async def _disable_file_stream(self):
+        """Disable file stream at runtime"""
+        file_stream = self._stream_handlers.get(StreamType.FILE)
+        if file_stream:
+            await file_stream.stop()
+
     # ==================== Event Callbacks ====================
 
     async def _on_connecting(self, client: Optional[ClientObj] = None):
@@ -2054,6 +2106,11 @@ class Client:
             st for st, handler in self._stream_handlers.items() if handler.is_active()
         ]
 
+    def get_peer_clock(self) -> Dict[str, object]:
+        """RTT, clock offset and jitter towards the server."""
+        client = self.clients_manager.get_client() or self.main_client
+        return client.clock.to_dict()
+
     async def start_metrics_collection(self):
         """Start metrics collection"""
         await self._performance_monitor.start()
@@ -52,6 +52,7 @@ from event import (
 )
 
 from network.connection.server import ConnectionHandler
+from network.data.transfer import FileTransferManager
 from network.stream.handler.server import (
     UnidirectionalStreamHandler,
     BidirectionalStreamHandler,
@@ -1095,6 +1096,8 @@ class Server:
                 await self._enable_keyboard_stream()
             elif stream_type == StreamType.CLIPBOARD:
                 await self._enable_clipboard_stream()
+            elif stream_type == StreamType.FILE:
+                await self._enable_file_stream()
             else:
                 self._logger.error("Unknown stream type", stream_type=stream_type)
                 return False
@@ -1126,6 +1129,8 @@ class Server:
                 await self._disable_keyboard_stream()
             elif stream_type == StreamType.CLIPBOARD:
                 await self._disable_clipboard_stream()
+            elif stream_type == StreamType.FILE:
+                await self._disable_file_stream()
             else:
                 self._logger.error("Unknown stream type", stream_type=stream_type)
                 return False
@@ -1519,6 +1524,10 @@ class Server:
                     error=str(e),
                 )
 
+        file_transfer = self._components.get("file_transfer")
+        if file_transfer is not None:
+            tasks.append(asyncio.create_task(file_transfer.close()))
+
         tasks.append(asyncio.create_task(self._performance_monitor.stop()))
         tasks.append(asyncio.create_task(self._mdns_service.unregister_service()))
 
@@ -1572,6 +1581,7 @@ class Server:
             sender=True,
             metrics_collector=self._metrics_collector,
             buffer_size=10000,
+            coalesce_moves=True,
         )
 
         self._stream_handlers[StreamType.KEYBOARD] = UnidirectionalStreamHandler(
@@ -1591,6 +1601,14 @@ class Server:
             metrics_collector=self._metrics_collector,
         )
 
+        self._stream_handlers[StreamType.FILE] = MulticastStreamHandler(
+            stream_type=StreamType.FILE,
+            clients=self.clients_manager,
+            event_bus=self.event_bus,
+            handler_id="ServerFileStreamHandler",
+            metrics_collector=self._metrics_collector,
+        )
+
         for stream_type, handler in self._stream_handlers.items():
             if self.is_stream_enabled(stream_type):
                 if not await handler.start():
@@ -1633,6 +1651,7 @@ class Server:
                 handler_id="ServerMouseStreamHandler",
                 sender=True,
                 buffer_size=10000,  # Higher needed for high polling rates
+                coalesce_moves=True,
             )
             self._stream_handlers[StreamType.MOUSE] = mouse_stream
 
@@ -1742,6 +1761,7 @@ class Server:
 
         is_enabled = self.is_stream_enabled(StreamType.CLIPBOARD)
         command_stream = self._stream_handlers[StreamType.COMMAND]
+        file_transfer = self._get_file_transfer()
 
         clipboard_listener = self._components.get("clipboard_listener")
         if not clipboard_listener:
@@ -1749,6 +1769,8 @@ class Server:
                 event_bus=self.event_bus,
                 stream_handler=clipboard_stream,
                 command_stream=command_stream,
+                max_image_size=self.app_config.max_clipboard_image_size,
+                file_transfer=file_transfer,
             )
             if is_enabled and not await clipboard_listener.start():
                 raise RuntimeError("Failed to start clipboard listener")
@@ -1765,6 +1787,7 @@ class Server:
                     "clipboard_listener"
                 ].get_clipboard_context(),
                 stream_handler=clipboard_stream,
+                file_transfer=file_transfer,
             )
 
             self._components["clipboard_controller"] = clipboard_controller
@@ -1778,6 +1801,31 @@ class Server:
         if clipboard_stream:
             await clipboard_stream.stop()
 
+    def _get_file_transfer(self) -> Optional[FileTransferManager]:
+        # Copied files travel on the FILE stream, only to clients that
+        # opened it
+        file_transfer = self._components.get("file_transfer")
+        file_stream = self._stream_handlers.get(StreamType.FILE)
+        if not file_transfer and file_stream:
+            file_transfer = FileTransferManager(
+                file_stream.msg_exchange,
+                download_dir=self.app_config.get_received_files_dir(),
+            )
+            self._components["file_transfer"] = file_transfer
+        return file_transfer
+
+    async def _enable_file_stream(self):
+        file_stream = self._stream_handlers.get(StreamType.FILE)
+        if not file_stream:
+            self._logger.error("File stream handler not initialized")
+            return
+        await self._ensure_stream_active(StreamType.FILE, file_stream)
+
+    async def _disable_file_stream(self):
+        file_stream = self._stream_handlers.get(StreamType.FILE)
+        if file_stream:
+            await file_stream.stop()
+
     async def _on_client_connected(self, client: ClientObj, streams: list[int]):
         # Same binding list drives forward routing (server listener) and
         # reverse routing (pushed via the CLIENT_TOPOLOGY command).
@@ -2019,6 +2067,14 @@ class Server:
     def get_active_streams(self) -> list[int]:
         return list(self._stream_handlers.keys())
 
+    def get_peer_clocks(self) -> Dict[str, dict]:
+        """RTT, clock offset and jitter towards each connected client."""
+        return {
+            client.uid: client.clock.to_dict()
+            for client in self.clients_manager.get_clients()
+            if client.is_connected and client.uid
+        }
+
     async def start_metrics_collection(self):
         await self._performance_monitor.start()
 
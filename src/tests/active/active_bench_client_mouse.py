@@ -0,0 +1,166 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+Client-side mouse injection benchmark.
+
+Drives relative moves (with a click every 250 moves) from the server
+mouse listener's stream to a ClientMouseController through the
+integration harness bridge, at 1 kHz and 8 kHz. The OS mouse controller
+is simulated with a fixed cost per call (a cursor position read is an
+X server round trip, an injection a uinput/XTest write). Reports how far
+the client lags the trace (per move p50/p99, and catch-up after the
+last move) and how many OS calls it took. Total motion and click count
+must match the trace.
+
+Run from ``src``: ``python -m tests.active.active_bench_client_mouse``
+"""
+
+import asyncio
+import statistics
+import time
+from bisect import bisect_left
+
+from event import BusEventType, ClientActiveEvent, MouseEvent
+from utils.logging import Logger, get_logger
+
+from tests.integration.harness import build_bridge
+
+RATES_HZ = (1000, 8000)
+TRACE_SECONDS = 2.0
+CLICK_EVERY = 250
+POSITION_READ_COST = 60e-6
+INJECT_COST = 20e-6
+
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SimulatedMouse:
+    """OS mouse controller stand-in. The reported cursor stays centred."""
+
+    def __init__(self):
+        self._position = (960, 540)
+        self.reads = 0
+        self.moves = 0
+        self.clicks = 0
+        self.dx = 0
+        # (time, cumulative dx) after every injection
+        self.timeline: list[tuple[float, int]] = []
+
+    @property
+    def position(self):
+        _spin(POSITION_READ_COST)
+        self.reads += 1
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        _spin(INJECT_COST)
+
+    def move(self, dx, dy):
+        _spin(INJECT_COST)
+        self.moves += 1
+        self.dx += dx
+        self.timeline.append((time.perf_counter(), self.dx))
+
+    def press(self, button):
+        _spin(INJECT_COST)
+        self.clicks += 1
+
+    def release(self, button):
+        _spin(INJECT_COST)
+
+
+async def run(rate: int) -> dict:
+    h = await build_bridge()
+    os_mouse = SimulatedMouse()
+    h.client.mouse._controller = os_mouse
+    await h.client_bus.dispatch(
+        event_type=BusEventType.CLIENT_ACTIVE,
+        data=ClientActiveEvent(client_uid=h.client_uid),
+    )
+    await h.settle()
+
+    stream = h.server.listener.stream
+    total = int(rate * TRACE_SECONDS)
+    expected_clicks = 0
+    sent_at = []
+    start = time.perf_counter()
+    for i in range(total):
+        if i and i % CLICK_EVERY == 0:
+            await stream.send(
+                MouseEvent(button=1, action=MouseEvent.CLICK_ACTION, is_pressed=True)
+            )
+            expected_clicks += 1
+        sent_at.append(time.perf_counter())
+        await stream.send(MouseEvent(dx=1, dy=0, action=MouseEvent.MOVE_ACTION))
+        # Pace against wall time: at 8 kHz the loop wakes about once per
+        # millisecond and hands the client a burst, as a network read does.
+        ahead = start + (i + 1) / rate - time.perf_counter()
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+    trace_end = time.perf_counter()
+
+    while os_mouse.dx < total or os_mouse.clicks < expected_clicks:
+        await asyncio.sleep(0.001)
+    await h.stop()
+
+    # Move i (1-based cumulative dx) is on screen at the first injection
+    # whose running total reaches it.
+    totals = [dx for _, dx in os_mouse.timeline]
+    lags = [
+        (os_mouse.timeline[bisect_left(totals, i + 1)][0] - sent) * 1000
+        for i, sent in enumerate(sent_at)
+    ]
+    lags.sort()
+    return {
+        "rate": rate,
+        "p50_ms": statistics.median(lags),
+        "p99_ms": lags[int(len(lags) * 0.99)],
+        "catchup_ms": (os_mouse.timeline[-1][0] - trace_end) * 1000,
+        "moves": os_mouse.moves,
+        "reads": os_mouse.reads,
+        "dx": os_mouse.dx,
+        "clicks": f"{os_mouse.clicks}/{expected_clicks}",
+    }
+
+
+async def __main():
+    get_logger("bench", level=Logger.INFO, is_root=True)
+    print(
+        f"trace: {TRACE_SECONDS:.0f}s, position read {POSITION_READ_COST * 1e6:.0f} us, "
+        f"inject {INJECT_COST * 1e6:.0f} us"
+    )
+    print(
+        f"{'Hz':>6} {'p50 ms':>8} {'p99 ms':>8} {'catch-up ms':>12} "
+        f"{'OS moves':>9} {'pos reads':>10} {'sum dx':>7} {'clicks':>8}"
+    )
+    for rate in RATES_HZ:
+        r = await run(rate)
+        print(
+            f"{r['rate']:>6} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['catchup_ms']:>12.1f} {r['moves']:>9} {r['reads']:>10} "
+            f"{r['dx']:>7} {r['clicks']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
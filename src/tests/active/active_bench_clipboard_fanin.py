@@ -0,0 +1,113 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+Clipboard fan-in benchmark for the multicast MessageExchange.
+
+N simulated clients share one multicast exchange (as the server clipboard
+stream does). Each client transport blocks until it has data, like a real
+StreamReader. A producer picks a random client per update and the handler
+records send -> dispatch latency, so an idle transport stalling a busy
+one shows up directly in the tail.
+
+Run from ``src``: ``python -m tests.active.active_bench_clipboard_fanin``
+"""
+
+import asyncio
+import random
+import time
+
+from network.data.exchange import MessageExchange, MessageExchangeConfig
+from network.protocol.message import MessageType
+
+CLIENT_COUNTS = (1, 4, 16)
+UPDATES = 2000
+PAYLOAD = "x" * 512
+
+
+class SimulatedClient:
+    """Queue-backed transport whose recv blocks until bytes arrive."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def feed(self, data: bytes):
+        self._queue.put_nowait(data)
+
+    async def recv(self, size: int) -> bytes:
+        return await self._queue.get()
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(n_clients: int) -> dict:
+    exchange = MessageExchange(
+        conf=MessageExchangeConfig(multicast=True, auto_dispatch=True),
+        id=f"fanin-{n_clients}",
+    )
+    latencies: list[float] = []
+    sent_at: dict[int, float] = {}
+    done = asyncio.Event()
+
+    async def on_clipboard(message):
+        seq = message.payload["seq"]
+        latencies.append(time.perf_counter() - sent_at.pop(seq))
+        if len(latencies) == UPDATES:
+            done.set()
+
+    exchange.register_handler(MessageType.CLIPBOARD, on_clipboard)
+    clients = [SimulatedClient() for _ in range(n_clients)]
+    await exchange.start()
+    for i, client in enumerate(clients):
+        await exchange.set_transport(receive_callback=client.recv, tr_id=f"c{i}")
+
+    rng = random.Random(0)
+    for seq in range(UPDATES):
+        message = exchange.builder.create_clipboard_message(PAYLOAD)
+        message.payload["seq"] = seq
+        data = message.to_bytes()
+        sent_at[seq] = time.perf_counter()
+        rng.choice(clients).feed(data)
+        # Sparse updates: most transports are idle most of the time.
+        await asyncio.sleep(0.0005)
+
+    await asyncio.wait_for(done.wait(), timeout=30)
+    await exchange.stop()
+
+    return {
+        "clients": n_clients,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def __main():
+    print(f"{'clients':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for n in CLIENT_COUNTS:
+        r = await run(n)
+        print(
+            f"{r['clients']:>8} {r['p50_ms']:>10.3f} "
+            f"{r['p99_ms']:>10.3f} {r['max_ms']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
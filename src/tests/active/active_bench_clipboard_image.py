@@ -0,0 +1,228 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+Image clipboard sync over loopback TLS.
+
+Copies synthetic 4K (3840x2160) PNG screenshots on a "server" clipboard
+and syncs them to a "client" through the real ClipboardListener and
+ClipboardController (digest offer, body request, binary body) on two
+CLIPBOARD stream exchanges over a TLS loopback connection. Reports the
+copy -> client clipboard latency and, in a separate traced pass, the peak
+of Python memory during a transfer; once for fresh images and once
+re-copying the latest one (answered from the client's content cache).
+
+Run from ``src``: ``python -m tests.active.active_bench_clipboard_image``
+"""
+
+import asyncio
+import os
+import ssl
+import statistics
+import struct
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+from config import ApplicationConfig
+from event.bus import AsyncEventBus
+from input.clipboard._base import (
+    ClipboardCache,
+    ClipboardController,
+    ClipboardImage,
+    ClipboardListener,
+    ClipboardType,
+)
+from model.connection import StreamWrapper
+from network.data.exchange import MessageExchange
+from network.protocol.capabilities import local_capabilities
+from network.stream import StreamType
+from utils.crypto import CertificateManager
+from utils.logging import Logger, get_logger
+
+WIDTH, HEIGHT = 3840, 2160
+IMAGES = 5
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack("!I", len(data))
+        + kind
+        + data
+        + struct.pack("!I", zlib.crc32(kind + data))
+    )
+
+
+def _screenshot(seed: int) -> bytes:
+    """RGB PNG mixing flat UI areas with noisy (photo-like) regions."""
+    flat = bytes((seed * 40 + x // 64) % 256 for x in range(WIDTH * 3))
+    rows = []
+    for y in range(HEIGHT):
+        if (y // 270 + seed) % 3 == 0:
+            rows.append(b"\x00" + os.urandom(WIDTH * 3))
+        else:
+            rows.append(b"\x00" + flat)
+    ihdr = struct.pack("!IIBBBBB", WIDTH, HEIGHT, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", ihdr)
+        + _png_chunk(b"IDAT", zlib.compress(b"".join(rows), 1))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+class BenchClipboard:
+    """OS clipboard stand-in: records writes and wakes the waiting copier."""
+
+    def __init__(self, on_change=None, content_types=None, **_kw):
+        self.on_change = on_change
+        self.max_image_size = ApplicationConfig.max_clipboard_image_size
+        self.content_cache = ClipboardCache()
+        self.written: asyncio.Queue = asyncio.Queue()
+
+    def is_listening(self) -> bool:
+        return True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def set_clipboard(self, content) -> bool:
+        self.written.put_nowait((time.perf_counter(), content))
+        return True
+
+
+class ExchangeStream:
+    """Minimal stream handler: sends and receives on one MessageExchange."""
+
+    def __init__(self, exchange: MessageExchange, source: str):
+        self.exchange = exchange
+        self.source = source
+
+    def register_receive_callback(self, callback, message_type, with_origin=False):
+        self.exchange.register_handler(message_type, callback, with_origin=with_origin)
+
+    async def send(self, data):
+        await self.exchange.send_stream_type_message(
+            stream_type=StreamType.CLIPBOARD, source=self.source, **data.to_dict()
+        )
+
+
+def _tls_contexts(cert_dir: str) -> tuple[ssl.SSLContext, ssl.SSLContext]:
+    certs = CertificateManager(cert_dir)
+    certs.generate_ca()
+    certs.generate_server_certificate("localhost", ["127.0.0.1"])
+    server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_ctx.load_cert_chain(certs.server_cert_path, certs.server_key_path)
+    client_ctx = ssl.create_default_context(cafile=str(certs.ca_cert_path))
+    return server_ctx, client_ctx
+
+
+async def _connect(server_ctx, client_ctx) -> tuple[StreamWrapper, StreamWrapper]:
+    accepted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def on_client(reader, writer):
+        accepted.set_result((reader, writer))
+
+    server = await asyncio.start_server(on_client, "127.0.0.1", 0, ssl=server_ctx)
+    port = server.sockets[0].getsockname()[1]
+    client = StreamWrapper(
+        *await asyncio.open_connection(
+            "127.0.0.1", port, ssl=client_ctx, server_hostname="localhost"
+        )
+    )
+    server_side = StreamWrapper(*await accepted)
+    server.close()
+    return server_side, client
+
+
+async def _side(stream: StreamWrapper, name: str):
+    exchange = MessageExchange(id=name)
+    exchange.apply_capabilities(local_capabilities()[StreamType.CLIPBOARD])
+    await exchange.set_transport(
+        send_callback=stream.get_writer_call(),
+        receive_callback=stream.get_reader_call(),
+    )
+    await exchange.start()
+    handler = ExchangeStream(exchange, name)
+    bus = AsyncEventBus()
+    listener = ClipboardListener(bus, handler, None, clipboard=BenchClipboard)
+    listener._listening = True
+    controller = ClipboardController(
+        bus, handler, clipboard=listener.get_clipboard_context()
+    )
+    return exchange, listener, controller
+
+
+async def _copy(listener, clipboard, image) -> float:
+    start = time.perf_counter()
+    await listener._on_clipboard_change(image, ClipboardType.IMAGE)
+    done, received = await clipboard.written.get()
+    assert received.digest == image.digest
+    return done - start
+
+
+async def _traced_copy(listener, clipboard, image) -> int:
+    # Tracing slows allocations down, so it gets its own pass
+    tracemalloc.start()
+    try:
+        await _copy(listener, clipboard, image)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def __main():
+    get_logger("bench", level=Logger.INFO, is_root=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        server_ctx, client_ctx = _tls_contexts(tmp)
+        server_stream, client_stream = await _connect(server_ctx, client_ctx)
+        srv_exchange, srv_listener, _ = await _side(server_stream, "server")
+        cli_exchange, _, cli_controller = await _side(client_stream, "client")
+        cli_clipboard = cli_controller.clipboard
+
+        images = [ClipboardImage.from_bytes(_screenshot(i)) for i in range(IMAGES)]
+        mean_size = statistics.mean(len(i) for i in images)
+        print(f"{IMAGES} x {WIDTH}x{HEIGHT} PNG, mean {mean_size / 1e6:.1f} MB")
+
+        fresh = [await _copy(srv_listener, cli_clipboard, i) for i in images[1:]]
+        fresh_peak = await _traced_copy(srv_listener, cli_clipboard, images[0])
+        latest = images[0]
+        cached = [await _copy(srv_listener, cli_clipboard, latest) for _ in images]
+        cached_peak = await _traced_copy(srv_listener, cli_clipboard, latest)
+
+        for label, latencies, peak in (
+            ("fresh", fresh, fresh_peak),
+            ("cached", cached, cached_peak),
+        ):
+            print(
+                f"{label:>7}: p50 {statistics.median(latencies) * 1000:8.1f} ms, "
+                f"max {max(latencies) * 1000:8.1f} ms, "
+                f"peak traced {peak / 1e6:6.1f} MB ({peak / mean_size:.1f}x image)"
+            )
+
+        for exchange in (srv_exchange, cli_exchange):
+            await exchange.stop()
+        await server_stream.close()
+        await client_stream.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
@@ -0,0 +1,129 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+Clipboard payload compression over loopback TCP.
+
+Sends log-like clipboard text of 10 KB, 1 MB and 20 MB between two
+CLIPBOARD stream exchanges, uncompressed and with each available codec,
+and reports bytes on the wire and send -> handler latency (median).
+
+Run from ``src``: ``python -m tests.active.active_bench_compression``
+"""
+
+import asyncio
+import statistics
+import time
+
+from model.connection import StreamWrapper
+from network.data.exchange import MessageExchange
+from network.protocol.capabilities import StreamCapabilities, local_capabilities
+from network.protocol.compression import available_codecs
+from network.protocol.message import MessageType
+from network.stream import StreamType
+from utils.logging import Logger, get_logger
+
+SIZES = ((10 * 1024, 30), (1024 * 1024, 10), (20 * 1024 * 1024, 3))
+
+
+def _payload(size: int) -> str:
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = (
+            f"2026-10-16 12:{i // 60 % 60:02d}:{i % 60:02d} INFO worker-{i % 8} "
+            f'{{"request_id": {i * 7919 % 100003}, "path": "/api/v1/items/{i % 1000}", '
+            f'"status": {200 if i % 13 else 404}, "took_ms": {i * 31 % 997}}}\n'
+        )
+        lines.append(line)
+        total += len(line)
+        i += 1
+    return "".join(lines)[:size]
+
+
+async def run(codec, content: str, repeat: int) -> dict:
+    accepted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def on_client(reader, writer):
+        accepted.set_result((reader, writer))
+
+    server = await asyncio.start_server(on_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    tx_stream = StreamWrapper(*await asyncio.open_connection("127.0.0.1", port))
+    rx_stream = StreamWrapper(*await accepted)
+
+    clipboard = local_capabilities()[StreamType.CLIPBOARD]
+    caps = StreamCapabilities(
+        codec=clipboard.codec,
+        max_chunk_size=clipboard.max_chunk_size,
+        compression=(codec,) if codec else (),
+    )
+    wire_bytes = 0
+    writer = tx_stream.get_writer_call()
+
+    async def send(data: bytes):
+        nonlocal wire_bytes
+        wire_bytes += len(data)
+        await writer(data)
+
+    sender = MessageExchange(id="tx")
+    sender.apply_capabilities(caps)
+    await sender.set_transport(send_callback=send)
+
+    receiver = MessageExchange(id="rx")
+    received: asyncio.Queue = asyncio.Queue()
+
+    async def on_clipboard(message):
+        received.put_nowait(time.perf_counter())
+
+    receiver.register_handler(MessageType.CLIPBOARD, on_clipboard)
+    await receiver.set_transport(receive_callback=rx_stream.get_reader_call())
+    await receiver.start()
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await sender.send_clipboard_data(content)
+        latencies.append(await received.get() - start)
+
+    await receiver.stop()
+    await tx_stream.close()
+    await rx_stream.close()
+    server.close()
+    await server.wait_closed()
+    return {
+        "wire": wire_bytes / repeat,
+        "latency_ms": statistics.median(latencies) * 1000,
+    }
+
+
+async def __main():
+    get_logger("bench", level=Logger.INFO, is_root=True)
+    print(f"{'payload':>10} {'codec':>6} {'wire bytes':>12} {'ratio':>7} {'p50 ms':>9}")
+    for size, repeat in SIZES:
+        content = _payload(size)
+        for codec in (None, *available_codecs()):
+            r = await run(codec, content, repeat)
+            print(
+                f"{size // 1024:>8}KB {codec or 'none':>6} {r['wire']:>12.0f} "
+                f"{size / r['wire']:>7.1f} {r['latency_ms']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
@@ -0,0 +1,104 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+Cursor delta transport benchmark: Pipe vs shared-memory DeltaRing.
+
+A child process plays the capture side, emitting deltas as fast as it can
+(the worst case for a high-rate mouse). The parent consumes them the way
+CursorHandlerWorker does - one event per pipe message, or one summed event
+per ring drain - and reports producer cost per delta and how many events
+the consumer had to forward.
+
+Run from ``src``: ``python -m tests.active.active_bench_cursor_ring``
+"""
+
+import asyncio
+import multiprocessing
+import time
+from multiprocessing import Pipe
+
+from input.cursor._ring import DeltaRing
+
+DELTAS = 200_000
+
+
+def _pipe_producer(conn, n: int, out):
+    start = time.perf_counter()
+    for _ in range(n):
+        conn.send((1, 1))
+    out.send(time.perf_counter() - start)
+    conn.send(None)
+
+
+def _ring_producer(ring: DeltaRing, n: int, out):
+    start = time.perf_counter()
+    for _ in range(n):
+        ring.push(1, 1)
+    while not ring.flush():
+        pass
+    out.send(time.perf_counter() - start)
+    ring.close()
+
+
+def bench_pipe() -> dict:
+    rec, send = Pipe(duplex=False)
+    out_rec, out_send = Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_pipe_producer, args=(send, DELTAS, out_send))
+    proc.start()
+    events = 0
+    total = 0
+    while (delta := rec.recv()) is not None:
+        events += 1
+        total += delta[0]
+    producer = out_rec.recv()
+    proc.join()
+    return {"name": "pipe", "producer_s": producer, "events": events, "dx": total}
+
+
+def bench_ring() -> dict:
+    ring = DeltaRing.create()
+    out_rec, out_send = Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_ring_producer, args=(ring, DELTAS, out_send))
+    proc.start()
+    events = 0
+    total = 0
+    producer = None
+    while producer is None or total < DELTAS:
+        dx, _dy, count = ring.drain()
+        if count:
+            events += 1
+            total += dx
+        elif producer is None and out_rec.poll():
+            producer = out_rec.recv()
+    proc.join()
+    ring.close()
+    return {"name": "ring", "producer_s": producer, "events": events, "dx": total}
+
+
+async def __main():
+    print(f"{'transport':>10} {'ns/delta':>10} {'events':>10} {'sum dx':>10}")
+    for bench in (bench_pipe, bench_ring):
+        r = await asyncio.to_thread(bench)
+        print(
+            f"{r['name']:>10} {r['producer_s'] / DELTAS * 1e9:>10.0f} "
+            f"{r['events']:>10} {r['dx']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
@@ -0,0 +1,114 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+"""
+AsyncEventBus dispatch cost benchmark.
+
+Measures the per-event cost of ``dispatch`` (awaited) and
+``dispatch_nowait`` (fire-and-forget, drained by the loop) for 0..N async
+listeners, and for a single sync listener subscribed as blocking (executor)
+and as non-blocking (inline). Reports microseconds per event and per
+listener.
+
+Run from ``src``: ``python -m tests.active.active_bench_event_bus``
+"""
+
+import asyncio
+import time
+
+from event import BusEventType
+from event.bus import AsyncEventBus
+
+EVENTS = 20000
+EXECUTOR_EVENTS = 2000
+LISTENER_COUNTS = (0, 1, 2, 4, 8)
+EVENT = BusEventType.CLIENT_ACTIVE
+
+
+def _async_listener():
+    async def listener(data):
+        pass
+
+    return listener
+
+
+async def bench_dispatch(bus: AsyncEventBus, events: int) -> float:
+    dispatch = bus.dispatch
+    start = time.perf_counter()
+    for _ in range(events):
+        await dispatch(EVENT, None)
+    return (time.perf_counter() - start) / events
+
+
+async def bench_nowait(bus: AsyncEventBus, events: int, counter: list) -> float:
+    start = time.perf_counter()
+    for _ in range(events):
+        bus.dispatch_nowait(EVENT, None)
+    while counter[0] < events:
+        await asyncio.sleep(0)
+    return (time.perf_counter() - start) / events
+
+
+async def __main():
+    print(
+        f"{'listeners':>18} {'dispatch us':>12} {'nowait us':>10} {'us/listener':>12}"
+    )
+    for count in LISTENER_COUNTS:
+        bus = AsyncEventBus()
+        counter = [0]
+        for _ in range(count):
+            bus.subscribe(EVENT, _async_listener())
+
+        async def tail(data):
+            counter[0] += 1
+
+        per_event = await bench_dispatch(bus, EVENTS)
+        # nowait needs a completion signal; it replaces one of the listeners.
+        if count:
+            bus.unsubscribe(EVENT, next(iter(bus._subscribers[EVENT]))[0])
+            bus.subscribe(EVENT, tail)
+            per_nowait = await bench_nowait(bus, EVENTS, counter)
+        else:
+            per_nowait = 0.0
+        per_listener = per_event / count if count else 0.0
+        print(
+            f"{f'{count} async':>18} {per_event * 1e6:>12.2f} "
+            f"{per_nowait * 1e6:>10.2f} {per_listener * 1e6:>12.2f}"
+        )
+
+    for blocking in (True, False):
+        bus = AsyncEventBus()
+        counter = [0]
+
+        def listener(data):
+            counter[0] += 1
+
+        bus.subscribe(EVENT, listener, blocking=blocking)
+        events = EXECUTOR_EVENTS if blocking else EVENTS
+        per_event = await bench_dispatch(bus, events)
+        counter[0] = 0
+        per_nowait = await bench_nowait(bus, events, counter)
+        label = "1 sync executor" if blocking else "1 sync inline"
+        print(
+            f"{label:>18} {per_event * 1e6:>12.2f} "
+            f"{per_nowait * 1e6:>10.2f} {per_event * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
@@ -0,0 +1,126 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+File transfer throughput over loopback TCP.
+
+Sends a 1 GB file between two FILE stream exchanges in this process with
+FileTransferManager, once with sendfile and once through the plain send
+callback (pread + write), and reports MB/s and the growth of peak RSS.
+The receiver's fsync is part of the measured time.
+
+Run from ``src``: ``python -m tests.active.active_bench_file_transfer``
+"""
+
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+from model.connection import StreamWrapper
+from network.data.exchange import MessageExchange
+from network.data.transfer import FileTransferManager
+from network.protocol.capabilities import local_capabilities
+from network.stream import StreamType
+from utils.logging import Logger, get_logger
+
+FILE_SIZE = 1024 * 1024 * 1024
+WRITE_BLOCK = 16 * 1024 * 1024
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _make_file(path: str) -> None:
+    block = os.urandom(WRITE_BLOCK)
+    with open(path, "wb") as f:
+        for _ in range(FILE_SIZE // WRITE_BLOCK):
+            f.write(block)
+
+
+async def run(src: str, download_dir: str, sendfile: bool) -> dict:
+    accepted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def on_client(reader, writer):
+        accepted.set_result((reader, writer))
+
+    server = await asyncio.start_server(on_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    streams = [StreamWrapper(*await asyncio.open_connection("127.0.0.1", port))]
+    streams.append(StreamWrapper(*await accepted))
+
+    exchanges = []
+    for stream in streams:
+        exchange = MessageExchange()
+        exchange.apply_capabilities(local_capabilities()[StreamType.FILE])
+        await exchange.set_transport(
+            send_callback=stream.get_writer_call(),
+            receive_callback=stream.get_reader_call(),
+            sendfile_callback=stream.get_sendfile_call() if sendfile else None,
+        )
+        await exchange.start()
+        exchanges.append(exchange)
+
+    received: list[str] = []
+
+    async def on_received(path: str):
+        received.append(path)
+
+    sender = FileTransferManager(exchanges[0], download_dir)
+    FileTransferManager(exchanges[1], download_dir, on_file_received=on_received)
+
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    await sender.send_file(src, name=f"out-{sendfile}.bin")
+    elapsed = time.perf_counter() - start
+
+    for exchange in exchanges:
+        await exchange.stop()
+    for stream in streams:
+        await stream.close()
+    server.close()
+    await server.wait_closed()
+    os.unlink(received[0])
+
+    return {
+        "mode": "sendfile" if sendfile else "send",
+        "mb_s": FILE_SIZE / elapsed / 1e6,
+        "seconds": elapsed,
+        "peak_rss_growth_mb": _peak_rss_mb() - rss_before,
+    }
+
+
+async def __main():
+    # Same root level as the daemon: per-read debug lines would dominate.
+    get_logger("bench", level=Logger.INFO, is_root=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src.bin")
+        _make_file(src)
+        print(f"file: {FILE_SIZE / 1e6:.0f} MB, base peak RSS {_peak_rss_mb():.1f} MB")
+        print(f"{'mode':>10} {'MB/s':>10} {'seconds':>10} {'+peak RSS MB':>14}")
+        for sendfile in (True, False):
+            r = await run(src, os.path.join(tmp, "rx"), sendfile)
+            print(
+                f"{r['mode']:>10} {r['mb_s']:>10.1f} {r['seconds']:>10.2f} "
+                f"{r['peak_rss_growth_mb']:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
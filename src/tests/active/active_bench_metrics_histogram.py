@@ -0,0 +1,86 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+"""
+Histogram record-cost benchmark.
+
+Records a log-normal latency trace into utils.metrics.Histogram and the
+ConnectionMetrics wrappers built on it, and checks that the mean cost per
+sample stays under RECORD_BUDGET_NS. Also reports the cost of a 10 s and a
+60 s snapshot and of exporting a connection's percentiles, which happen
+once per monitor interval rather than per sample.
+
+Run from ``src``: ``python -m tests.active.active_bench_metrics_histogram``
+"""
+
+import random
+import sys
+import time
+
+from utils.metrics import ConnectionMetrics
+from utils.metrics.histogram import Histogram
+
+SAMPLES = 500_000
+RECORD_BUDGET_NS = 2_000
+
+
+def bench_record(record, samples) -> float:
+    start = time.perf_counter()
+    for value in samples:
+        record(value)
+    return (time.perf_counter() - start) / len(samples) * 1e9
+
+
+def bench_call(call, repeat: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> int:
+    rng = random.Random(1)
+    micros = [int(rng.lognormvariate(7, 1)) for _ in range(SAMPLES)]
+    seconds = [value / 1_000_000 for value in micros]
+    sizes = [rng.randint(16, 64 * 1024) for _ in range(SAMPLES)]
+
+    hist = Histogram()
+    metrics = ConnectionMetrics("bench")
+    rows = [
+        ("Histogram.record", bench_record(hist.record, micros)),
+        ("record_latency", bench_record(metrics.record_latency, seconds)),
+        ("record_sent", bench_record(metrics.record_sent, sizes)),
+    ]
+
+    print(f"{'operation':>22} {'ns/sample':>10} {'budget':>8}")
+    failed = False
+    for name, cost in rows:
+        ok = cost <= RECORD_BUDGET_NS
+        failed |= not ok
+        print(f"{name:>22} {cost:>10.0f} {'ok' if ok else 'OVER':>8}")
+
+    print()
+    print(f"{'export':>22} {'us/call':>10}")
+    print(f"{'snapshot(10s)':>22} {bench_call(lambda: hist.snapshot(10.0)):>10.1f}")
+    print(f"{'snapshot(60s)':>22} {bench_call(lambda: hist.snapshot(60.0)):>10.1f}")
+    print(f"{'to_dict':>22} {bench_call(metrics.to_dict):>10.1f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
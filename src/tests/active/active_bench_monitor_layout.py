@@ -0,0 +1,146 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+MonitorLayout query microbenchmarks.
+
+Times the per-call cost of the MonitorLayout queries on the mouse hot
+path (point lookup, nearest monitor off-screen, neighbour test, and a
+full EdgeDetector.is_at_edge at a monitor edge) for layouts of 1, 3, 8
+and 32 monitors in rows of eight, against the previous linear scans.
+
+Run from ``src``: ``python -m tests.active.active_bench_monitor_layout``
+"""
+
+import timeit
+from collections import deque
+
+from input.utils import EdgeDetector
+from utils.screen import MonitorLayout
+
+MONITOR_COUNTS = (1, 3, 8, 32)
+CALLS = 100_000
+W, H = 1920, 1080
+
+
+class LinearLayout:
+    """The scanning implementation MonitorLayout used before its index."""
+
+    def __init__(self, layout: MonitorLayout):
+        self.monitors = layout.monitors
+
+    def find_monitor_at(self, x, y):
+        for m in self.monitors:
+            if m.contains(x, y):
+                return m
+        return None
+
+    def nearest_monitor(self, x, y):
+        hit = self.find_monitor_at(x, y)
+        if hit is not None or not self.monitors:
+            return hit
+        best = None
+        best_dist = None
+        for m in self.monitors:
+            cx = max(m.min_x, min(x, m.max_x - 1))
+            cy = max(m.min_y, min(y, m.max_y - 1))
+            d = (cx - x) ** 2 + (cy - y) ** 2
+            if best_dist is None or d < best_dist:
+                best, best_dist = m, d
+        return best
+
+    def has_neighbor_left(self, monitor, y):
+        for m in self.monitors:
+            if m.monitor_id == monitor.monitor_id:
+                continue
+            if m.max_x <= monitor.min_x and m.min_y <= y < m.max_y:
+                if monitor.min_x - m.max_x <= 2:
+                    return True
+        return False
+
+    def has_neighbor_right(self, monitor, y):
+        for m in self.monitors:
+            if m.monitor_id == monitor.monitor_id:
+                continue
+            if m.min_x >= monitor.max_x and m.min_y <= y < m.max_y:
+                if m.min_x - monitor.max_x <= 2:
+                    return True
+        return False
+
+    def has_neighbor_top(self, monitor, x):
+        for m in self.monitors:
+            if m.monitor_id == monitor.monitor_id:
+                continue
+            if m.max_y <= monitor.min_y and m.min_x <= x < m.max_x:
+                if monitor.min_y - m.max_y <= 2:
+                    return True
+        return False
+
+    def has_neighbor_bottom(self, monitor, x):
+        for m in self.monitors:
+            if m.monitor_id == monitor.monitor_id:
+                continue
+            if m.min_y >= monitor.max_y and m.min_x <= x < m.max_x:
+                if m.min_y - monitor.max_y <= 2:
+                    return True
+        return False
+
+
+def make_layout(count: int) -> MonitorLayout:
+    return MonitorLayout.from_bboxes(
+        ((i % 8) * W, (i // 8) * H, (i % 8 + 1) * W, (i // 8 + 1) * H)
+        for i in range(count)
+    )
+
+
+def per_call_ns(fn) -> float:
+    return min(timeit.repeat(fn, number=CALLS, repeat=3)) / CALLS * 1e9
+
+
+def measure(layout) -> dict:
+    last = layout.monitors[-1]
+    # Last monitor in the scan order, pushing into its right edge.
+    x, y = last.max_x - 1, (last.min_y + last.max_y) // 2
+    history = deque(((x - 10 + 2 * i, y) for i in range(6)), maxlen=8)
+    return {
+        "find_monitor_at": per_call_ns(lambda: layout.find_monitor_at(x, y)),
+        "nearest (off)": per_call_ns(lambda: layout.nearest_monitor(x + 500, y)),
+        "has_neighbor": per_call_ns(lambda: layout.has_neighbor_right(last, y)),
+        "is_at_edge": per_call_ns(
+            lambda: EdgeDetector.is_at_edge(history, x, y, layout, False)
+        ),
+    }
+
+
+def main():
+    print(f"per-call cost in ns ({CALLS} calls, best of 3)")
+    names = None
+    for count in MONITOR_COUNTS:
+        layout = make_layout(count)
+        for label, target in (("scan", LinearLayout(layout)), ("index", layout)):
+            r = measure(target)
+            if names is None:
+                names = list(r)
+                print(
+                    f"{'monitors':>8} {'impl':>6} "
+                    + " ".join(f"{n:>16}" for n in names)
+                )
+            print(f"{count:>8} {label:>6} " + " ".join(f"{r[n]:>16.0f}" for n in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""
+Server-side mouse move coalescing benchmark.
+
+Replays a 2 kHz relative-motion trace (with a click every 250 moves) into
+a server UnidirectionalStreamHandler whose transport is throttled to a
+fixed number of writes per second, as a slow client or link would be. The
+run is repeated with and without ``coalesce_moves`` and reports how far
+the receiver lags behind the trace, how many frames had to be written and
+the coalescing ratio. Total motion must match in both modes.
+
+Run from ``src``: ``python -m tests.active.active_bench_move_coalescing``
+"""
+
+import asyncio
+import time
+
+from event import MouseEvent
+from event.bus import AsyncEventBus
+from model.client import ClientObj, ClientsManager
+from network.protocol.message import ProtocolMessage
+from network.stream import StreamType
+from network.stream.handler.server import UnidirectionalStreamHandler
+from utils.metrics import MetricsCollector
+
+TRACE_HZ = 2000
+TRACE_SECONDS = 2.0
+CLICK_EVERY = 250
+TRANSPORT_WRITES_PER_SEC = 500
+
+
+class ThrottledTransport:
+    """Send callback that takes 1 / TRANSPORT_WRITES_PER_SEC per write."""
+
+    def __init__(self):
+        self.dx = 0
+        self.bytes = 0
+        self.frames = 0
+        self.clicks = 0
+        self.last_arrival = 0.0
+
+    async def send(self, data: bytes):
+        await asyncio.sleep(1 / TRANSPORT_WRITES_PER_SEC)
+        self.bytes += len(data)
+        offset = 0
+        while offset < len(data):
+            length, _ = ProtocolMessage.read_frame_prefix(data[offset:])
+            end = offset + ProtocolMessage.prefix_lenght + length
+            message = ProtocolMessage.from_bytes(data[offset:end])
+            offset = end
+            self.frames += 1
+            if message.payload.get("event") == MouseEvent.CLICK_ACTION:
+                self.clicks += 1
+            else:
+                self.dx += message.payload["dx"]
+        self.last_arrival = time.perf_counter()
+
+
+async def run(coalesce: bool) -> dict:
+    clients = ClientsManager()
+    client = ClientObj(uid="bench", is_connected=True)
+    clients.add_client(client)
+    handler = UnidirectionalStreamHandler(
+        stream_type=StreamType.MOUSE,
+        clients=clients,
+        event_bus=AsyncEventBus(),
+        metrics_collector=MetricsCollector(),
+        buffer_size=10000,
+        coalesce_moves=coalesce,
+    )
+    transport = ThrottledTransport()
+    await handler.msg_exchange.set_transport(send_callback=transport.send)
+    await handler.msg_exchange.start()
+    handler._active_client = client
+    await handler.start()
+    handler._notify_send_ready()
+
+    total = int(TRACE_HZ * TRACE_SECONDS)
+    expected_clicks = 0
+    start = time.perf_counter()
+    for i in range(total):
+        if i and i % CLICK_EVERY == 0:
+            handler.send_nowait(
+                MouseEvent(button=1, action=MouseEvent.CLICK_ACTION, is_pressed=True)
+            )
+            expected_clicks += 1
+        handler.send_nowait(MouseEvent(dx=1, dy=0, action=MouseEvent.MOVE_ACTION))
+        # Pace the trace against wall time rather than per-sleep precision.
+        ahead = start + (i + 1) / TRACE_HZ - time.perf_counter()
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+    trace_end = time.perf_counter()
+
+    while transport.dx < total or transport.clicks < expected_clicks:
+        await asyncio.sleep(0.005)
+
+    metrics = handler.msg_exchange.metrics
+    ratio = metrics.get_coalescing_ratio() if metrics else 0.0
+    await handler.stop()
+    return {
+        "mode": "coalesce" if coalesce else "plain",
+        "lag_ms": (transport.last_arrival - trace_end) * 1000,
+        "frames": transport.frames,
+        "kib": transport.bytes / 1024,
+        "ratio": ratio,
+        "dx": transport.dx,
+    }
+
+
+async def __main():
+    print(
+        f"trace: {TRACE_HZ} Hz for {TRACE_SECONDS:.0f}s, "
+        f"transport: {TRANSPORT_WRITES_PER_SEC} writes/s"
+    )
+    print(
+        f"{'mode':>10} {'lag ms':>10} {'frames':>8} {'KiB':>8} "
+        f"{'ratio':>8} {'sum dx':>8}"
+    )
+    for coalesce in (False, True):
+        r = await run(coalesce)
+        print(
+            f"{r['mode']:>10} {r['lag_ms']:>10.1f} {r['frames']:>8} "
+            f"{r['kib']:>8.1f} {r['ratio']:>8.2f} {r['dx']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(__main())
@@ -36,11 +36,13 @@ from tests.unit import _MOCK_PYNPUT
 
 import asyncio
 from contextlib import ExitStack, contextmanager
+from functools import partial
 from typing import Optional
 from unittest.mock import MagicMock, patch
 
 _MOCK_PYNPUT()
 
+from config import ApplicationConfig  # noqa: E402
 from event import (  # noqa: E402
     BusEvent,
     BusEventType,
@@ -50,6 +52,7 @@ from event.bus import AsyncEventBus  # noqa: E402
 from network.protocol.message import ProtocolMessage  # noqa: E402
 from network.stream import StreamType  # noqa: E402
 from network.data.exchange import MessageExchange, MessageExchangeConfig  # noqa: E402
+from network.protocol.capabilities import StreamCapabilities  # noqa: E402
 from model.client import ClientObj, ClientsManager  # noqa: E402
 from utils.screen import MonitorLayout  # noqa: E402
 
@@ -64,6 +67,7 @@ from input.keyboard._base import (  # noqa: E402
     ClientKeyboardController,
 )
 from input.clipboard._base import (  # noqa: E402
+    ClipboardCache,
     ClipboardListener,
     ClipboardController,
     ClipboardType,
@@ -157,26 +161,42 @@ class BridgeStreamHandler:
         self.stream_type = stream_type
         self._default_source = default_source
         self._default_target = default_target
+        # Frames are delivered whole, there's no reassembly to chunk for.
         self._exchange = MessageExchange(
-            conf=MessageExchangeConfig(auto_dispatch=True),
+            conf=MessageExchangeConfig(auto_dispatch=True, auto_chunk=False),
             id=name or f"bridge-{stream_type}",
         )
         self._peer: Optional["BridgeStreamHandler"] = None
         self._transport_ready = False
+        self.bytes_received = 0
 
-    async def connect_to(self, peer: "BridgeStreamHandler") -> None:
-        """Route this side's outbound sends to ``peer``'s inbound dispatch."""
+    async def connect_to(self, peer, origin: Optional[str] = None) -> None:
+        """Route this side's outbound sends to ``peer``'s inbound dispatch.
+
+        ``origin`` is the tr_id a multicast ``peer`` sees the frames come from.
+        """
         self._peer = peer
         await self._exchange.set_transport(
-            send_callback=peer.deliver_bytes,
+            send_callback=partial(peer.deliver_bytes, origin=origin),
             receive_callback=None,
             tr_id="default",
         )
         self._transport_ready = True
 
-    def register_receive_callback(self, receive_callback, message_type: str):
+    def register_receive_callback(
+        self, receive_callback, message_type: str, with_origin: bool = False
+    ):
         """Mirror ``StreamHandler.register_receive_callback`` semantics."""
-        self._exchange.register_handler(message_type, receive_callback)
+        self._exchange.register_handler(
+            message_type, receive_callback, with_origin=with_origin
+        )
+
+    def get_metrics(self):
+        return self._exchange.metrics
+
+    def peer_capabilities(self, tr_id: Optional[str] = None):
+        """Mirror ``StreamHandler.peer_capabilities``."""
+        return self._exchange.peer_capabilities(tr_id)
 
     async def send(self, data):
         if self._peer is None:
@@ -198,9 +218,44 @@ class BridgeStreamHandler:
         asyncio.ensure_future(self.send(data))
         return True
 
-    async def deliver_bytes(self, data: bytes) -> None:
+    async def deliver_bytes(self, data: bytes, origin: Optional[str] = None) -> None:
+        self.bytes_received += len(data)
         msg = ProtocolMessage.from_bytes(data)
-        await self._exchange.dispatch_message(msg)
+        await self._exchange.dispatch_message(msg, origin=origin)
+
+
+class MulticastBridgeStreamHandler(BridgeStreamHandler):
+    """Server side of a multicast stream, one transport per client UID.
+
+    Sends go through the *real* multicast ``MessageExchange`` routing: no
+    target broadcasts, a client UID target unicasts. Frames from a client
+    are dispatched with that client's UID as origin.
+    """
+
+    def __init__(self, stream_type: int, default_source: str, name: str = ""):
+        super().__init__(stream_type, default_source, "", name)
+        self._exchange = MessageExchange(
+            conf=MessageExchangeConfig(
+                auto_dispatch=True, auto_chunk=False, multicast=True
+            ),
+            id=name or f"multicast-bridge-{stream_type}",
+        )
+
+    async def connect_client(self, client_uid: str, peer: BridgeStreamHandler):
+        await self._exchange.set_transport(
+            send_callback=peer.deliver_bytes,
+            receive_callback=None,
+            tr_id=client_uid,
+        )
+        await peer.connect_to(self, origin=client_uid)
+        self._transport_ready = True
+
+    async def send(self, data):
+        if not isinstance(data, dict) and hasattr(data, "to_dict"):
+            data = data.to_dict()
+        await self._exchange.send_stream_type_message(
+            stream_type=self.stream_type, source=self._default_source, **data
+        )
 
 
 # ============================================================================
@@ -247,11 +302,21 @@ class FakeClipboard:
     ``ClipboardController`` (``set_clipboard`` records writes).
     """
 
-    def __init__(self, on_change=None, content_types=None, **_kw):
+    SUPPORTS_IMAGES = True
+
+    def __init__(
+        self,
+        on_change=None,
+        content_types=None,
+        max_image_size=ApplicationConfig.max_clipboard_image_size,
+        **_kw,
+    ):
         self.on_change = on_change
         self.content_types = content_types
+        self.max_image_size = max_image_size
         self._listening = False
         self.written: list[str] = []
+        self.content_cache = ClipboardCache()
 
     def is_listening(self) -> bool:
         return self._listening
@@ -262,13 +327,17 @@ class FakeClipboard:
     async def stop(self):
         self._listening = False
 
-    async def set_clipboard(self, content: str) -> bool:
+    async def set_clipboard(self, content) -> bool:
         self.written.append(content)
         return True
 
     def get_last_content(self) -> Optional[str]:
         return self.written[-1] if self.written else None
 
+    async def get_content(self):
+        content = self.get_last_content()
+        return content, ClipboardType.TEXT if content else ClipboardType.EMPTY
+
 
 def _mouse_controller_mock():
     m = MagicMock(name="MouseController")
@@ -389,7 +458,6 @@ class Harness:
         # -- server components, under the server geometry ------------------
         self.server.mouse_mock = _mouse_controller_mock()
         self.server.kbd_mock = _keyboard_controller_mock()
-        self.server.clipboard = FakeClipboard()
         with _Geometry(self._server_bboxes, self._server_primary):
             with (
                 patch(
@@ -422,6 +490,11 @@ class Harness:
                     self._s_cmd,
                     clipboard=FakeClipboard,
                 )
+                # Same wiring as the services: the controller writes into the
+                # listener's clipboard, sharing its content cache.
+                self.server.clipboard = (
+                    self.server.clip_listener.get_clipboard_context()
+                )
                 self.server.clip_controller = ClipboardController(
                     self.server_bus,
                     self._s_clip,
@@ -434,7 +507,6 @@ class Harness:
         # -- client components, under the client geometry ------------------
         self.client.mouse_mock = _mouse_controller_mock()
         self.client.kbd_mock = _keyboard_controller_mock()
-        self.client.clipboard = FakeClipboard()
         with _Geometry(self._client_bboxes, self._client_primary):
             with (
                 patch(
@@ -462,6 +534,9 @@ class Harness:
                     self._c_cmd,
                     clipboard=FakeClipboard,
                 )
+                self.client.clipboard = (
+                    self.client.clip_listener.get_clipboard_context()
+                )
                 self.client.clip_controller = ClipboardController(
                     self.client_bus,
                     self._c_clip,
@@ -550,9 +625,9 @@ class Harness:
     async def wait_until(self, predicate, tries: int = 400) -> bool:
         """Spin until ``predicate()`` is true.
 
-        Loop-yields first (deterministic loop-bound work); only executor-
+        Loop-yields first (deterministic loop-bound work); only thread-
         bound work - the client keyboard injection runs the OS ``press``
-        via ``run_in_executor`` - needs the tiny real-sleep fallback tail.
+        on its injector thread - needs the tiny real-sleep fallback tail.
         """
         for _ in range(tries):
             if predicate():
@@ -594,6 +669,75 @@ class Harness:
             pass
 
 
+class ClipboardFanout:
+    """Server clipboard multicast to several clients.
+
+    The server side owns a :class:`MulticastBridgeStreamHandler`; every
+    client gets its own bridge, listener, controller and fake clipboard.
+    Build via :func:`build_clipboard_fanout`; clients listed in
+    ``legacy_uids`` don't negotiate clipboard offers.
+    """
+
+    def __init__(self, client_uids, legacy_uids=()):
+        self.server_bus = AsyncEventBus()
+        self.server_stream = MulticastBridgeStreamHandler(
+            StreamType.CLIPBOARD, SERVER_UID, "srv-clip"
+        )
+        self.server_listener = ClipboardListener(
+            self.server_bus,
+            self.server_stream,
+            MagicMock(name="CommandStream"),
+            clipboard=FakeClipboard,
+        )
+        self.server_clipboard = self.server_listener.get_clipboard_context()
+        self.server_controller = ClipboardController(
+            self.server_bus, self.server_stream, clipboard=self.server_clipboard
+        )
+
+        self.client_uids = list(client_uids)
+        self.legacy_uids = set(legacy_uids)
+        self.streams: dict[str, BridgeStreamHandler] = {}
+        self.listeners: dict[str, ClipboardListener] = {}
+        self.controllers: dict[str, ClipboardController] = {}
+        self.clipboards: dict[str, FakeClipboard] = {}
+        for uid in self.client_uids:
+            stream = BridgeStreamHandler(
+                StreamType.CLIPBOARD, uid, SERVER_UID, f"cli-clip-{uid}"
+            )
+            bus = AsyncEventBus()
+            listener = ClipboardListener(
+                bus, stream, MagicMock(name="CommandStream"), clipboard=FakeClipboard
+            )
+            self.streams[uid] = stream
+            self.listeners[uid] = listener
+            self.clipboards[uid] = listener.get_clipboard_context()
+            self.controllers[uid] = ClipboardController(
+                bus, stream, clipboard=self.clipboards[uid]
+            )
+
+    async def build(self) -> "ClipboardFanout":
+        offers = StreamCapabilities(clipboard_offers=True)
+        for uid, stream in self.streams.items():
+            await self.server_stream.connect_client(uid, stream)
+            if uid not in self.legacy_uids:
+                self.server_stream._exchange.apply_capabilities(offers, tr_id=uid)
+                stream._exchange.apply_capabilities(offers)
+            self.server_listener._active_clients[uid] = True
+        self.server_listener._listening = True
+        for listener in self.listeners.values():
+            listener._listening = True
+        return self
+
+    def client_bytes(self) -> dict[str, int]:
+        return {uid: s.bytes_received for uid, s in self.streams.items()}
+
+
+async def build_clipboard_fanout(
+    client_uids=("c1", "c2", "c3"), legacy_uids=()
+) -> ClipboardFanout:
+    return await ClipboardFanout(client_uids, legacy_uids).build()
+
+
 async def build_bridge(
     *,
     server_bboxes=((0, 0, 1920, 1080),),
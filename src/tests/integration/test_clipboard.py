@@ -16,11 +16,15 @@
 #
 """Clipboard sync across the server<->client bridge, both directions."""
 
+import asyncio
+import os
+from time import perf_counter
+
 import pytest
 
-from input.clipboard._base import ClipboardType
+from input.clipboard._base import ClipboardImage, ClipboardType, PNG_SIGNATURE
 
-from tests.integration.harness import build_bridge
+from tests.integration.harness import build_bridge, build_clipboard_fanout
 
 
 @pytest.mark.anyio
@@ -97,3 +101,198 @@ async def test_clipboard_content_type_roundtrip():
         assert h.server.clipboard.get_last_content() == "/tmp/a.txt\n/tmp/b.txt"
     finally:
         await h.stop()
+
+
+# ============================================================================
+# Content-addressed sync (multi-client)
+# ============================================================================
+
+
+async def _wait_until(predicate, tries: int = 2000) -> bool:
+    for _ in range(tries):
+        if predicate():
+            return True
+        await asyncio.sleep(0)
+    return bool(predicate())
+
+
+@pytest.mark.anyio
+async def test_clipboard_body_only_sent_to_peers_missing_it():
+    """Re-announced content costs a digest round trip instead of a body."""
+    mesh = await build_clipboard_fanout(("c1", "c2", "c3"))
+    payload = "lorem ipsum " * 20000  # ~240 KB
+    server = mesh.server_listener
+
+    # First copy: every client needs the body.
+    start = perf_counter()
+    await server._on_clipboard_change(payload, ClipboardType.TEXT)
+    assert await _wait_until(
+        lambda: all(c.get_last_content() == payload for c in mesh.clipboards.values())
+    )
+    cold_latency = perf_counter() - start
+    assert mesh.server_controller.bodies_sent == 3
+    cold_bytes = mesh.client_bytes()
+    assert all(b > len(payload) for b in cold_bytes.values())
+
+    await server._on_clipboard_change("something else", ClipboardType.TEXT)
+    assert await _wait_until(
+        lambda: all(
+            c.get_last_content() == "something else" for c in mesh.clipboards.values()
+        )
+    )
+    before = mesh.client_bytes()
+    bodies_before = mesh.server_controller.bodies_sent
+
+    # Copy the first payload again: every client already holds it.
+    start = perf_counter()
+    await server._on_clipboard_change(payload, ClipboardType.TEXT)
+    assert await _wait_until(
+        lambda: all(c.get_last_content() == payload for c in mesh.clipboards.values())
+    )
+    await _wait_until(lambda: mesh.server_controller.bytes_saved >= 3 * len(payload))
+    warm_latency = perf_counter() - start
+
+    after = mesh.client_bytes()
+    assert mesh.server_controller.bodies_sent == bodies_before
+    assert mesh.server_controller.bytes_saved == 3 * len(payload)
+    assert all(after[uid] - before[uid] < 1024 for uid in after)
+    print(
+        f"cold {cold_latency * 1000:.2f} ms, warm {warm_latency * 1000:.2f} ms, "
+        f"saved {mesh.server_controller.bytes_saved} bytes"
+    )
+
+
+@pytest.mark.anyio
+async def test_clipboard_not_echoed_to_its_sender():
+    """A client that just sent content only gets its digest back."""
+    mesh = await build_clipboard_fanout(("c1", "c2"))
+    payload = "copied on c1 " * 1000
+
+    await mesh.listeners["c1"]._on_clipboard_change(payload, ClipboardType.TEXT)
+    assert await _wait_until(
+        lambda: mesh.server_clipboard.get_last_content() == payload
+    )
+    # Only the server asked c1 for the body.
+    assert mesh.controllers["c1"].bodies_sent == 1
+
+    before = mesh.client_bytes()
+    await mesh.server_listener._on_clipboard_change(payload, ClipboardType.TEXT)
+    assert await _wait_until(
+        lambda: mesh.clipboards["c2"].get_last_content() == payload
+    )
+    await _wait_until(lambda: mesh.server_controller.bytes_saved > 0)
+    after = mesh.client_bytes()
+
+    # Body unicast to c2 only, c1 answered from its cache.
+    assert mesh.server_controller.bodies_sent == 1
+    assert after["c1"] - before["c1"] < 1024
+    assert after["c2"] - before["c2"] > len(payload)
+
+
+@pytest.mark.anyio
+async def test_clipboard_image_streamed_as_binary():
+    """Images travel as raw bytes and are verified against their digest."""
+    mesh = await build_clipboard_fanout(("c1", "c2"))
+    image = ClipboardImage.from_bytes(PNG_SIGNATURE + os.urandom(3 * 1024 * 1024))
+
+    await mesh.server_listener._on_clipboard_change(image, ClipboardType.IMAGE)
+    assert await _wait_until(
+        lambda: all(
+            isinstance(c.get_last_content(), ClipboardImage)
+            for c in mesh.clipboards.values()
+        ),
+        tries=20000,
+    )
+
+    for clipboard in mesh.clipboards.values():
+        received = clipboard.get_last_content()
+        assert received.digest == image.digest
+        assert received.data == image.data
+    # Binary payload: no base64/str inflation on the wire.
+    assert all(b < len(image) * 1.01 for b in mesh.client_bytes().values())
+
+
+@pytest.mark.anyio
+async def test_clipboard_image_over_size_cap_not_requested():
+    """Receivers don't ask for images above their configured cap."""
+    mesh = await build_clipboard_fanout(("c1",))
+    mesh.clipboards["c1"].max_image_size = 1024 * 1024
+    image = ClipboardImage.from_bytes(PNG_SIGNATURE + os.urandom(2 * 1024 * 1024))
+
+    await mesh.server_listener._on_clipboard_change(image, ClipboardType.IMAGE)
+    for _ in range(200):
+        await asyncio.sleep(0)
+
+    assert mesh.server_controller.bodies_sent == 0
+    assert mesh.clipboards["c1"].get_last_content() is None
+
+
+@pytest.mark.anyio
+async def test_clipboard_image_not_requested_without_image_support():
+    """Receivers that cannot paste images don't ask for them."""
+    mesh = await build_clipboard_fanout(("c1",))
+    mesh.clipboards["c1"].SUPPORTS_IMAGES = False
+    image = ClipboardImage.from_bytes(PNG_SIGNATURE + os.urandom(64 * 1024))
+
+    await mesh.server_listener._on_clipboard_change(image, ClipboardType.IMAGE)
+    for _ in range(200):
+        await asyncio.sleep(0)
+
+    assert mesh.server_controller.bodies_sent == 0
+    assert mesh.clipboards["c1"].get_last_content() is None
+
+
+@pytest.mark.anyio
+async def test_legacy_peer_gets_full_content():
+    """Peers without clipboard offers get the body directly, the rest an OFFER."""
+    mesh = await build_clipboard_fanout(("c1", "c2"), legacy_uids=("c2",))
+    payload = "mixed peers " * 1000
+
+    await mesh.server_listener._on_clipboard_change(payload, ClipboardType.TEXT)
+    assert await _wait_until(
+        lambda: all(c.get_last_content() == payload for c in mesh.clipboards.values())
+    )
+    # Only c1 went through NEED/BODY.
+    assert mesh.server_controller.bodies_sent == 1
+
+    before = mesh.client_bytes()
+    await mesh.server_listener._on_clipboard_change(payload, ClipboardType.TEXT)
+    assert await _wait_until(lambda: mesh.server_controller.bytes_saved > 0)
+    await _wait_until(lambda: mesh.client_bytes()["c2"] - before["c2"] > len(payload))
+    after = mesh.client_bytes()
+
+    # c1 answered from its cache, c2 received the full content again.
+    assert after["c1"] - before["c1"] < 1024
+    assert after["c2"] - before["c2"] > len(payload)
+
+
+@pytest.mark.anyio
+async def test_legacy_peer_gets_no_image():
+    """Legacy peers can only paste text: images are offered to the rest."""
+    mesh = await build_clipboard_fanout(("c1", "c2"), legacy_uids=("c2",))
+    image = ClipboardImage.from_bytes(PNG_SIGNATURE + os.urandom(64 * 1024))
+
+    await mesh.server_listener._on_clipboard_change(image, ClipboardType.IMAGE)
+    assert await _wait_until(
+        lambda: isinstance(mesh.clipboards["c1"].get_last_content(), ClipboardImage)
+    )
+    for _ in range(200):
+        await asyncio.sleep(0)
+
+    assert mesh.clipboards["c2"].get_last_content() is None
+    assert mesh.client_bytes()["c2"] == 0
+
+
+@pytest.mark.anyio
+async def test_need_for_evicted_digest_gets_current_content():
+    """A NEED for content no longer cached is answered with the clipboard now."""
+    mesh = await build_clipboard_fanout(("c1",))
+    await mesh.server_clipboard.set_clipboard("current")
+    # Simulate the announced content being evicted before the NEED arrives.
+    mesh.server_clipboard.content_cache.put = lambda *args: None
+
+    await mesh.server_listener._on_clipboard_change("announced", ClipboardType.TEXT)
+    assert await _wait_until(
+        lambda: mesh.clipboards["c1"].get_last_content() == "current"
+    )
+    assert mesh.server_controller.bodies_sent == 1
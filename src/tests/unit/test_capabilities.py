@@ -0,0 +1,112 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from config import ApplicationConfig
+from network.data.exchange import MessageExchange, MessageExchangeConfig
+from network.protocol.capabilities import (
+    CAPABILITIES_KEY,
+    CODEC_BINARY_FRAMES,
+    CODEC_MSGPACK,
+    LEGACY_CAPABILITIES,
+    StreamCapabilities,
+    decode_capabilities,
+    encode_capabilities,
+    local_capabilities,
+    negotiate_capabilities,
+)
+from network.stream import StreamType
+
+
+class TestStreamCapabilities:
+    def test_negotiate_is_symmetric(self):
+        a = StreamCapabilities(
+            codec=2,
+            max_chunk_size=4096,
+            compression=("zstd", "zlib"),
+            batching=True,
+            clipboard_offers=True,
+        )
+        b = StreamCapabilities(
+            codec=1, max_chunk_size=1024, compression=("zlib",), batching=False
+        )
+        assert a.negotiate(b) == b.negotiate(a)
+        agreed = a.negotiate(b)
+        assert agreed.codec == CODEC_MSGPACK
+        assert agreed.max_chunk_size == 1024
+        assert agreed.compression == ("zlib",)
+        assert not agreed.batching
+        assert not agreed.clipboard_offers
+        assert not agreed.compact_mouse and not agreed.stream_chunks
+
+    def test_dict_round_trip(self):
+        caps = StreamCapabilities(
+            codec=CODEC_BINARY_FRAMES,
+            max_chunk_size=512,
+            compression=("zlib",),
+            clipboard_offers=True,
+        )
+        assert StreamCapabilities.from_dict(caps.to_dict()) == caps
+
+
+class TestHandshakeNegotiation:
+    def test_both_sides_agree(self):
+        local = local_capabilities()
+        remote = decode_capabilities(encode_capabilities(local))
+        agreed = negotiate_capabilities(local, remote)
+        assert agreed == negotiate_capabilities(remote, local)
+        sizes = dict(ApplicationConfig.stream_chunk_sizes)
+        assert agreed[StreamType.MOUSE].compact_mouse
+        assert agreed[StreamType.FILE].max_chunk_size == sizes[StreamType.FILE]
+        assert agreed[StreamType.CLIPBOARD].clipboard_offers
+
+    def test_legacy_peer(self):
+        agreed = negotiate_capabilities(local_capabilities(), decode_capabilities(None))
+        assert all(not caps.stream_chunks for caps in agreed.values())
+        assert all(caps.compression == () for caps in agreed.values())
+        assert all(not caps.clipboard_offers for caps in agreed.values())
+
+    def test_garbled_block_degrades(self):
+        raw = {
+            "version": 1,
+            "streams": {"12": "bogus", "x": {}, "1": {"codec": "nope"}, "16": {}},
+        }
+        remote = decode_capabilities(raw)
+        assert set(remote) == {StreamType.FILE}
+        assert decode_capabilities({"streams": []}) == {}
+        assert CAPABILITIES_KEY == "capabilities"
+
+
+class TestApplyCapabilities:
+    def test_single_transport(self):
+        exchange = MessageExchange()
+        caps = StreamCapabilities(codec=CODEC_BINARY_FRAMES, max_chunk_size=2048)
+        exchange.apply_capabilities(caps)
+        assert exchange.config.compact_mouse
+        assert exchange.peer_capabilities() == caps
+        assert exchange._stream_chunk_sizes[exchange.DEFAULT_TRANSPORT_ID] == 2048
+
+        exchange.apply_capabilities(None)
+        assert not exchange.config.compact_mouse
+        assert exchange.peer_capabilities() == LEGACY_CAPABILITIES
+        assert exchange.DEFAULT_TRANSPORT_ID not in exchange._stream_chunk_sizes
+
+    def test_multicast_batching_opt_out(self):
+        exchange = MessageExchange(conf=MessageExchangeConfig(multicast=True))
+        exchange.apply_capabilities(StreamCapabilities(batching=False), tr_id="a")
+        exchange.apply_capabilities(StreamCapabilities(), tr_id="b")
+        assert "a" in exchange._unbatched and "b" not in exchange._unbatched
+        assert not exchange.config.compact_mouse
@@ -22,12 +22,19 @@ Unit tests for async clipboard listener with polling mechanism.
 
 import asyncio
 from typing import List, Tuple
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from sys import platform
 
 import pytest
 
 from input.clipboard import Clipboard, ClipboardType
+from input.clipboard._base import (
+    PNG_SIGNATURE,
+    ClipboardCache,
+    ClipboardImage,
+    ClipboardWatcher,
+    content_digest,
+)
 
 INIT_CONTENT = "INITIAL_CONTENT"
 IS_LINUX = platform.startswith("linux")
@@ -1464,3 +1471,279 @@ class TestFileListDetection:
             assert len(text_changes) >= 1
             assert len(file_changes) >= 1
             assert file_changes[0][0] == "/home/user/doc.pdf"
+
+
+# ============================================================================
+# Test Push-based Watchers
+# ============================================================================
+
+
+class _ManualWatcher(ClipboardWatcher):
+    """Watcher driven by the test instead of a real clipboard backend."""
+
+    def __init__(self, available: bool = True):
+        super().__init__()
+        self.available = available
+        self.stopped = False
+
+    async def start(self) -> bool:
+        return self.available
+
+    async def stop(self):
+        self.stopped = True
+        await super().stop()
+
+
+def _watched_clipboard(watcher: ClipboardWatcher, **kwargs) -> Clipboard:
+    class _WatchedClipboard(Clipboard):
+        def _create_watcher(self):
+            return watcher
+
+    return _WatchedClipboard(**kwargs)
+
+
+@pytest.mark.anyio
+class TestClipboardWatcher:
+    """Test event-driven change detection and polling fallback."""
+
+    async def test_reads_only_on_notification(self, changes_tracker):
+        changes, on_change = changes_tracker
+        watcher = _ManualWatcher()
+        content = {"value": INIT_CONTENT}
+
+        with (
+            patch("input.clipboard._base.paste", side_effect=lambda: content["value"]),
+            patch("input.clipboard._base.paste_file_list", return_value=[]),
+        ):
+            listener = _watched_clipboard(
+                watcher, on_change=on_change, poll_interval=0.01
+            )
+            await listener.start()
+            await asyncio.sleep(0.1)
+
+            # No notification, no read even if the content changed
+            content["value"] = "pushed content"
+            await asyncio.sleep(0.1)
+            assert changes == []
+
+            watcher._notify()
+            await asyncio.sleep(0.05)
+            await listener.stop()
+
+        assert changes == [("pushed content", ClipboardType.TEXT)]
+        assert watcher.stopped
+
+    async def test_notification_burst_is_coalesced(self):
+        watcher = _ManualWatcher()
+        reads = 0
+
+        def counting_paste():
+            nonlocal reads
+            reads += 1
+            return INIT_CONTENT
+
+        with (
+            patch("input.clipboard._base.paste", side_effect=counting_paste),
+            patch("input.clipboard._base.paste_file_list", return_value=[]),
+        ):
+            listener = _watched_clipboard(watcher, poll_interval=10)
+            await listener.start()
+            await asyncio.sleep(0.05)
+            baseline = reads
+
+            for _ in range(10):
+                watcher._notify()
+            await asyncio.sleep(0.05)
+            await listener.stop()
+
+        assert reads == baseline + 1
+
+    async def test_falls_back_to_polling_when_watcher_closes(self, changes_tracker):
+        changes, on_change = changes_tracker
+        watcher = _ManualWatcher()
+        content = {"value": INIT_CONTENT}
+
+        with (
+            patch("input.clipboard._base.paste", side_effect=lambda: content["value"]),
+            patch("input.clipboard._base.paste_file_list", return_value=[]),
+        ):
+            listener = _watched_clipboard(
+                watcher, on_change=on_change, poll_interval=0.05
+            )
+            await listener.start()
+            await asyncio.sleep(0.05)
+
+            watcher._close()
+            await asyncio.sleep(0.05)
+            content["value"] = "polled content"
+            await asyncio.sleep(0.2)
+
+            assert listener.is_listening()
+            await listener.stop()
+
+        assert ("polled content", ClipboardType.TEXT) in changes
+
+    async def test_unavailable_watcher_keeps_polling(self, changes_tracker):
+        changes, on_change = changes_tracker
+        watcher = _ManualWatcher(available=False)
+        content = {"value": INIT_CONTENT}
+
+        with (
+            patch("input.clipboard._base.paste", side_effect=lambda: content["value"]),
+            patch("input.clipboard._base.paste_file_list", return_value=[]),
+        ):
+            listener = _watched_clipboard(
+                watcher, on_change=on_change, poll_interval=0.05
+            )
+            await listener.start()
+            await asyncio.sleep(0.05)
+            content["value"] = "polled content"
+            await asyncio.sleep(0.2)
+            await listener.stop()
+
+        assert watcher.stopped
+        assert ("polled content", ClipboardType.TEXT) in changes
+
+
+# ============================================================================
+# Test Content Cache
+# ============================================================================
+
+
+def _image_clipboard(image: ClipboardImage, watcher=None, **kwargs):
+    """Clipboard holding ``image``; counts reads and scripts owner changes."""
+
+    class _ImageClipboard(Clipboard):
+        reads = 0
+        owner_changed = False
+
+        def _create_watcher(self):
+            return watcher
+
+        async def _get_clipboard_image(self):
+            self.reads += 1
+            return image
+
+        async def _selection_changed(self):
+            changed, self.owner_changed = self.owner_changed, False
+            return changed
+
+    return _ImageClipboard(
+        content_types=[ClipboardType.IMAGE, ClipboardType.TEXT], **kwargs
+    )
+
+
+@pytest.mark.anyio
+class TestClipboardImageReads:
+    """The image is read again only when the selection may have changed."""
+
+    async def test_polling_rereads_only_on_owner_change(self):
+        image = ClipboardImage.from_bytes(PNG_SIGNATURE + b"pixels")
+        clipboard = _image_clipboard(image, poll_interval=0.01)
+        await clipboard.start()
+        await asyncio.sleep(0.1)
+        # Initial read only, polls with an unchanged owner reuse it
+        assert clipboard.reads == 1
+
+        clipboard.owner_changed = True
+        await asyncio.sleep(0.05)
+        await clipboard.stop()
+        assert clipboard.reads == 2
+
+    async def test_watcher_notification_rereads(self):
+        image = ClipboardImage.from_bytes(PNG_SIGNATURE + b"pixels")
+        watcher = _ManualWatcher()
+        clipboard = _image_clipboard(image, watcher=watcher, poll_interval=10)
+        await clipboard.start()
+        await asyncio.sleep(0.05)
+        assert clipboard.reads == 1
+
+        watcher._notify()
+        await asyncio.sleep(0.05)
+        await clipboard.stop()
+        assert clipboard.reads == 2
+
+    async def test_setting_text_drops_cached_image(self):
+        image = ClipboardImage.from_bytes(PNG_SIGNATURE + b"pixels")
+        clipboard = _image_clipboard(image)
+        assert (await clipboard.get_content())[0] is image
+
+        with patch("input.clipboard._base.copy"):
+            assert await clipboard.set_clipboard("text")
+        with (
+            patch("input.clipboard._base.paste", return_value="text"),
+            patch("input.clipboard._base.paste_file_list", return_value=[]),
+        ):
+            assert await clipboard.get_content() == ("text", ClipboardType.TEXT)
+        assert clipboard.reads == 1
+
+
+@pytest.mark.skipif(not IS_LINUX, reason="X11 clipboard backend")
+@pytest.mark.anyio
+class TestX11ClipboardImage:
+    """Linux backend choices between image and text, and owner tracking."""
+
+    async def test_text_target_wins_over_image(self):
+        clipboard = Clipboard(content_types=[ClipboardType.IMAGE, ClipboardType.TEXT])
+        targets = b"TARGETS\nimage/png\nUTF8_STRING\ntext/html\n"
+        with (
+            patch("input.clipboard._linux.is_wayland", return_value=False),
+            patch.object(
+                clipboard, "_read_tool_output", AsyncMock(return_value=targets)
+            ),
+            patch.object(clipboard, "_read_image", AsyncMock()) as read_image,
+        ):
+            assert await clipboard._get_clipboard_image() is None
+        read_image.assert_not_called()
+
+    async def test_new_copy_by_same_owner_is_a_change(self, monkeypatch):
+        monkeypatch.setenv("DISPLAY", ":0")
+        clipboard = Clipboard()
+        clipboard._x_display = MagicMock()
+        clipboard._x_display.get_selection_owner.return_value.id = 0x400001
+        timestamps = AsyncMock(side_effect=[100, 100, 250])
+        with (
+            patch("input.clipboard._linux.is_wayland", return_value=False),
+            patch.object(clipboard, "_selection_timestamp", timestamps),
+        ):
+            assert await clipboard._selection_changed()
+            assert not await clipboard._selection_changed()
+            # Same owner window, selection taken again
+            assert await clipboard._selection_changed()
+
+
+class TestClipboardCache:
+    """Test the digest-addressed LRU used by the clipboard sync."""
+
+    def test_get_refreshes_recency(self):
+        cache = ClipboardCache(max_entries=2)
+        cache.put("a", "A", "text", 1)
+        cache.put("b", "B", "text", 1)
+        assert cache.get("a") == ("A", "text", 1)
+
+        cache.put("c", "C", "text", 1)
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+
+    def test_evicts_over_byte_budget_keeping_newest(self):
+        cache = ClipboardCache(max_entries=8, max_bytes=10)
+        cache.put("a", "A", "text", 6)
+        cache.put("b", "B", "text", 6)
+        assert "a" not in cache
+        assert "b" in cache
+
+        cache.put("huge", "H", "text", 100)
+        assert len(cache) == 1
+        assert cache.get("huge") is not None
+
+    def test_empty_digest_is_ignored(self):
+        cache = ClipboardCache()
+        cache.put("", "", "text", 0)
+        assert len(cache) == 0
+        assert cache.get(None) is None
+
+    def test_content_digest_matches_hash(self):
+        digest, size = content_digest("héllo")
+        assert digest == Clipboard._hash_content("héllo")
+        assert size == len("héllo".encode("utf-8"))
@@ -0,0 +1,72 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+
+from network.protocol.compression import (
+    ZLIB,
+    ZSTD,
+    available_codecs,
+    choose_codec,
+    compress_body,
+    decode_body,
+    decompress_body,
+    is_compressed_body,
+)
+from network.protocol.message import MessageBuilder
+
+
+@pytest.fixture
+def body() -> bytes:
+    message = MessageBuilder().create_clipboard_message(content="abc " * 5000)
+    return message.encode_body()
+
+
+class TestCompression:
+    @pytest.mark.parametrize("codec", available_codecs())
+    def test_round_trip(self, body, codec):
+        envelope = compress_body(body, codec)
+        assert is_compressed_body(envelope)
+        assert not is_compressed_body(body)
+        assert len(envelope) < len(body) // 10
+        assert decompress_body(envelope, max_size=len(body)) == body
+        assert decode_body(envelope, max_size=len(body)).payload["content"] == (
+            "abc " * 5000
+        )
+
+    def test_plain_body_passes_through(self, body):
+        assert decode_body(body, max_size=0).payload["content"] == "abc " * 5000
+
+    def test_expansion_limit(self, body):
+        envelope = compress_body(body, ZLIB)
+        with pytest.raises(ValueError, match="expands"):
+            decompress_body(envelope, max_size=len(body) - 1)
+
+    def test_corrupt_data(self, body):
+        envelope = bytearray(compress_body(body, ZLIB))
+        envelope[10:20] = b"\xff" * 10
+        with pytest.raises(ValueError):
+            decompress_body(envelope, max_size=len(body))
+        with pytest.raises(ValueError, match="truncated"):
+            decompress_body(envelope[:3], max_size=len(body))
+
+    def test_choose_codec(self):
+        assert choose_codec((ZLIB,)) == ZLIB
+        assert choose_codec(("lz9",)) is None
+        assert choose_codec(()) is None
+        if ZSTD in available_codecs():
+            assert choose_codec((ZSTD, ZLIB)) == ZSTD
@@ -0,0 +1,191 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import gc
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from model.connection import (
+    BufferedStreamProtocol,
+    ClientConnection,
+    ProtocolStreamWrapper,
+)
+from network.data.exchange import MessageExchange
+from network.protocol.message import MessageBuilder, MessageType
+
+
+def _frames(n: int) -> list[bytes]:
+    builder = MessageBuilder()
+    return [
+        builder.create_keyboard_message(key=str(i), event="press").to_bytes()
+        for i in range(n)
+    ]
+
+
+@pytest.mark.anyio
+class TestBufferedStreamProtocol:
+    async def test_publishes_only_complete_frames(self):
+        proto = BufferedStreamProtocol(capacity=1024)
+        proto.connection_made(MagicMock())
+        a, b = _frames(2)
+
+        proto.feed(a + b[:5])
+        assert await proto.recv(65536) == a
+
+        proto.feed(b[5:])
+        assert await proto.recv(65536) == b
+
+    async def test_frames_are_coalesced_per_recv(self):
+        proto = BufferedStreamProtocol(capacity=1024)
+        proto.connection_made(MagicMock())
+        frames = _frames(3)
+        for f in frames:
+            proto.feed(f)
+
+        assert await proto.recv(65536) == b"".join(frames)
+
+    async def test_recv_hands_out_buffer_views(self):
+        proto = BufferedStreamProtocol(capacity=1024)
+        proto.connection_made(MagicMock())
+        a, b = _frames(2)
+
+        proto.feed(a)
+        first = await proto.recv(65536)
+        assert isinstance(first, memoryview)
+        # Still pinned: the next frame lands behind it, not over it.
+        proto.feed(b)
+        assert first == a
+        assert await proto.recv(65536) == b
+
+    async def test_pinned_data_survives_buffer_swap(self):
+        frames = _frames(20)
+        proto = BufferedStreamProtocol(capacity=4 * len(frames[0]))
+        proto.connection_made(MagicMock())
+
+        proto.feed(frames[0])
+        first = await proto.recv(65536)
+        for f in frames[1:]:
+            proto.feed(f)
+        assert first == frames[0]
+        assert await proto.recv(65536) == b"".join(frames[1:])
+
+    async def test_oversized_frame_passes_through(self):
+        proto = BufferedStreamProtocol(capacity=64)
+        proto.connection_made(MagicMock())
+        big = MessageBuilder().create_clipboard_message(content="x" * 200).to_bytes()
+
+        proto.feed(big)
+        proto.feed_eof()
+        received = b""
+        while chunk := await proto.recv(65536):
+            received += chunk
+        assert received == big
+
+    async def test_recv_returns_empty_at_eof(self):
+        proto = BufferedStreamProtocol()
+        proto.connection_made(MagicMock())
+        proto.connection_lost(None)
+        assert await proto.recv(1024) == b""
+        assert proto.at_eof()
+
+
+@pytest.mark.anyio
+class TestProtocolStreamWrapper:
+    async def test_loopback_with_exchange(self):
+        frames = _frames(50)
+        accepted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        async def on_client(reader, writer):
+            accepted.set_result((reader, writer))
+
+        server = await asyncio.start_server(on_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        c_reader, c_writer = await asyncio.open_connection("127.0.0.1", port)
+        s_reader, s_writer = await accepted
+
+        # Bytes already sitting in the StreamReader must survive the swap.
+        c_writer.write(frames[0])
+        await c_writer.drain()
+        await asyncio.sleep(0.05)
+
+        conn = ClientConnection(("127.0.0.1", port))
+        conn.add_stream(
+            1, stream=await ProtocolStreamWrapper.from_streams(s_reader, s_writer)
+        )
+        stream = conn.get_stream(1)
+        assert isinstance(stream, ProtocolStreamWrapper)
+
+        handler = AsyncMock()
+        exchange = MessageExchange()
+        exchange.register_handler(MessageType.KEYBOARD, handler)
+        await exchange.set_transport(
+            send_callback=stream.get_writer_call(),
+            receive_callback=stream.get_reader_call(),
+        )
+        await exchange.start()
+
+        c_writer.write(b"".join(frames[1:]))
+        await c_writer.drain()
+        for _ in range(100):
+            if handler.call_count == len(frames):
+                break
+            await asyncio.sleep(0.01)
+
+        keys = [c[0][0].payload["key"] for c in handler.call_args_list]
+        assert keys == [str(i) for i in range(len(frames))]
+
+        # Writer side goes back to the peer's StreamReader.
+        await exchange.send_keyboard_data(key="z", event="press")
+        echoed = await asyncio.wait_for(c_reader.read(65536), timeout=1.0)
+        assert b"z" in echoed
+
+        await exchange.stop()
+        await conn.wait_closed()
+        c_writer.close()
+        server.close()
+        await server.wait_closed()
+
+    async def test_dropped_stream_locals_keep_transport_open(self):
+        accepted: asyncio.Queue = asyncio.Queue()
+
+        async def on_client(reader, writer):
+            accepted.put_nowait((reader, writer))
+
+        server = await asyncio.start_server(on_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        c_reader, c_writer = await asyncio.open_connection("127.0.0.1", port)
+        s_reader, s_writer = await accepted.get()
+
+        conn = ClientConnection(("127.0.0.1", port))
+        conn.add_stream(
+            1, stream=await ProtocolStreamWrapper.from_streams(s_reader, s_writer)
+        )
+        # Callers drop their locals right after add_stream.
+        del s_reader, s_writer
+        # Let the loop drop its own references to the old protocol first.
+        await asyncio.sleep(0.05)
+        gc.collect()
+
+        await conn.get_stream(1).get_writer_call()(b"ping")
+        assert await asyncio.wait_for(c_reader.read(4), timeout=1.0) == b"ping"
+
+        await conn.get_stream(1).close()
+        c_writer.close()
+        server.close()
+        await server.wait_closed()
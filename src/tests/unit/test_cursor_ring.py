@@ -0,0 +1,180 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import multiprocessing
+import select
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from event import MouseEvent
+from input.cursor._ring import DeltaRing
+from input.cursor._worker import CursorHandlerWorker
+
+
+def _produce(ring: DeltaRing, n: int):
+    for _ in range(n):
+        ring.push(1, -2)
+    while not ring.flush():
+        pass
+    ring.close()
+
+
+@pytest.fixture
+def ring():
+    r = DeltaRing.create(capacity=8)
+    yield r
+    r.close()
+
+
+class TestDeltaRing:
+    def test_drain_sums_published_deltas(self, ring):
+        assert ring.drain() == (0, 0, 0)
+        ring.push(3, 4)
+        ring.push(-1, 2)
+        assert ring.drain() == (2, 6, 2)
+        assert ring.drain() == (0, 0, 0)
+
+    def test_wraps_around_capacity(self, ring):
+        for _ in range(5):
+            for _ in range(6):
+                ring.push(1, 1)
+            assert ring.drain() == (6, 6, 6)
+
+    def test_full_ring_carries_delta_forward(self, ring):
+        for _ in range(ring.capacity):
+            assert ring.push(1, 0)
+        assert not ring.push(5, 7)
+        assert not ring.push(1, 1)
+
+        assert ring.drain() == (ring.capacity, 0, ring.capacity)
+        assert ring.flush()
+        # Nothing dropped: the carried motion lands in the next slot.
+        assert ring.drain() == (6, 8, 1)
+
+    def test_doorbell_rings_only_when_parked(self, ring):
+        fd = ring.doorbell_fileno()
+        ring.push(1, 1)
+        assert select.select([fd], [], [], 0)[0] == []
+
+        ring.drain()
+        assert ring.park()
+        ring.push(2, 2)
+        assert select.select([fd], [], [], 0)[0] == [fd]
+
+        ring.clear_doorbell()
+        assert select.select([fd], [], [], 0)[0] == []
+        # Parked flag is consumed by the ring: no second wakeup.
+        ring.push(1, 1)
+        assert select.select([fd], [], [], 0)[0] == []
+        assert ring.drain() == (3, 3, 2)
+
+    def test_park_reports_pending_data(self, ring):
+        ring.push(1, 1)
+        assert not ring.park()
+
+    def test_cross_process_producer(self):
+        ring = DeltaRing.create(capacity=64)
+        n = 5000
+        proc = multiprocessing.Process(target=_produce, args=(ring, n))
+        proc.start()
+
+        total_dx = total_dy = 0
+        while proc.is_alive() or total_dx < n:
+            dx, dy, count = ring.drain()
+            total_dx += dx
+            total_dy += dy
+            if not count and not proc.is_alive():
+                break
+        proc.join(timeout=5)
+        dx, dy, _ = ring.drain()
+        total_dx += dx
+        total_dy += dy
+        ring.close()
+
+        assert proc.exitcode == 0
+        assert (total_dx, total_dy) == (n, -2 * n)
+
+
+@pytest.mark.anyio
+class TestRingListener:
+    async def test_coalesces_backlog_while_send_blocks(self):
+        release = asyncio.Event()
+        sent: list[MouseEvent] = []
+
+        async def send(event):
+            sent.append(event)
+            await release.wait()
+
+        stream = MagicMock()
+        stream.send = AsyncMock(side_effect=send)
+        worker = CursorHandlerWorker(MagicMock(), stream=stream)
+        worker._delta_ring = ring = DeltaRing.create(capacity=64)
+        worker._is_running = True
+        task = asyncio.create_task(worker._mouse_ring_listener())
+
+        ring.push(1, 1)
+        await asyncio.sleep(0.05)
+        assert [(e.dx, e.dy) for e in sent] == [(1, 1)]
+
+        # The stream is busy: the backlog is folded into one event.
+        for _ in range(10):
+            ring.push(2, -1)
+        release.set()
+        await asyncio.sleep(0.05)
+        assert [(e.dx, e.dy) for e in sent] == [(1, 1), (20, -10)]
+
+        worker._is_running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        ring.close()
+
+    async def test_idle_listener_blocks_on_doorbell(self):
+        stream = MagicMock()
+        stream.send = AsyncMock()
+        worker = CursorHandlerWorker(MagicMock(), stream=stream)
+        worker._delta_ring = ring = DeltaRing.create(capacity=64)
+        worker._is_running = True
+        drains = 0
+        drain = ring.drain
+
+        def counting_drain():
+            nonlocal drains
+            drains += 1
+            return drain()
+
+        ring.drain = counting_drain
+        task = asyncio.create_task(worker._mouse_ring_listener())
+
+        # Not capturing: no periodic rechecks.
+        await asyncio.sleep(0.1)
+        assert drains == 1
+
+        # The doorbell still wakes it.
+        ring.push(3, 4)
+        await asyncio.sleep(0.05)
+        stream.send.assert_awaited_once()
+        assert (
+            stream.send.await_args.args[0].dx,
+            stream.send.await_args.args[0].dy,
+        ) == (3, 4)
+
+        worker._is_running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        ring.close()
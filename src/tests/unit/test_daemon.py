@@ -1163,3 +1163,130 @@ class TestPermissionCommands:
         assert responses is not None
         assert responses[-1]["event_type"] == NotificationEventType.COMMAND_SUCCESS
         assert PermissionType.ACCESSIBILITY in _FakePermissionChecker.requested
+
+
+# ============================================================================
+# Test Diagnostics Commands
+# ============================================================================
+
+from utils.metrics.trace import TRACER  # noqa: E402
+
+
+class TestLatencyTraceCommands:
+    """Test SET_LATENCY_TRACE / GET_LATENCY_TRACE command handlers."""
+
+    @pytest.mark.anyio
+    async def test_enable_then_get_breakdown(self, daemon_client_connection):
+        reader, writer, _ = daemon_client_connection
+        try:
+            responses = await send_command(
+                reader,
+                writer,
+                DaemonCommand.SET_LATENCY_TRACE,
+                {"enabled": True, "sample_every": 4, "reset": True},
+            )
+            assert responses is not None
+            assert responses[-1]["event_type"] == NotificationEventType.COMMAND_SUCCESS
+            assert responses[-1]["data"]["result"] == {
+                "enabled": True,
+                "sample_every": 4,
+            }
+
+            responses = await send_command(
+                reader, writer, DaemonCommand.GET_LATENCY_TRACE, {"window": 10}
+            )
+            assert responses is not None
+            result = responses[-1]["data"]["result"]
+            assert result["enabled"] is True
+            assert result["hops"] == {}
+        finally:
+            TRACER.disable()
+
+    @pytest.mark.anyio
+    async def test_set_requires_enabled(self, daemon_client_connection):
+        reader, writer, _ = daemon_client_connection
+        responses = await send_command(
+            reader, writer, DaemonCommand.SET_LATENCY_TRACE, {}
+        )
+        assert responses is not None
+        assert responses[-1]["event_type"] == NotificationEventType.COMMAND_ERROR
+        assert TRACER.enabled is False
+
+
+class TestLoopMonitorCommands:
+    """Test SET_LOOP_MONITOR / GET_LOOP_STATS command handlers."""
+
+    @pytest.mark.anyio
+    async def test_enable_get_disable(self, daemon_client_connection):
+        reader, writer, _ = daemon_client_connection
+
+        responses = await send_command(
+            reader,
+            writer,
+            DaemonCommand.SET_LOOP_MONITOR,
+            {"enabled": True, "slow_threshold_ms": 40},
+        )
+        assert responses is not None
+        assert responses[-1]["event_type"] == NotificationEventType.COMMAND_SUCCESS
+        assert responses[-1]["data"]["result"] == {
+            "running": True,
+            "slow_threshold_ms": 40,
+        }
+
+        responses = await send_command(reader, writer, DaemonCommand.GET_LOOP_STATS)
+        assert responses is not None
+        result = responses[-1]["data"]["result"]
+        assert result["running"] is True
+        assert result["slow_threshold_ms"] == 40
+        assert "10s" in result["lag_ms"]
+
+        responses = await send_command(
+            reader, writer, DaemonCommand.SET_LOOP_MONITOR, {"enabled": False}
+        )
+        assert responses is not None
+        assert responses[-1]["data"]["result"]["running"] is False
+
+        responses = await send_command(reader, writer, DaemonCommand.GET_LOOP_STATS)
+        assert responses is not None
+        assert responses[-1]["data"]["result"] == {"running": False}
+
+
+class TestProfilerCommands:
+    """Test START_PROFILER / STOP_PROFILER command handlers."""
+
+    @pytest.mark.anyio
+    async def test_start_then_stop_writes_profile(
+        self, daemon_client_connection, monkeypatch, tmp_path
+    ):
+        monkeypatch.setattr(
+            "daemon.ApplicationConfig.get_state_path", lambda: str(tmp_path)
+        )
+        reader, writer, _ = daemon_client_connection
+
+        responses = await send_command(
+            reader,
+            writer,
+            DaemonCommand.START_PROFILER,
+            {"duration": 5, "interval_ms": 2},
+        )
+        assert responses is not None
+        assert responses[-1]["event_type"] == NotificationEventType.COMMAND_SUCCESS
+
+        await asyncio.sleep(0.1)
+        responses = await send_command(reader, writer, DaemonCommand.STOP_PROFILER)
+        assert responses is not None
+        assert responses[-1]["event_type"] == NotificationEventType.COMMAND_SUCCESS
+        result = responses[-1]["data"]["result"]
+        assert result["samples"] > 0
+        assert "event-loop" in result["threads"]
+        assert os.path.dirname(result["path"]) == str(tmp_path)
+        assert os.path.getsize(result["path"]) > 0
+
+    @pytest.mark.anyio
+    async def test_rejects_unbounded_duration(self, daemon_client_connection):
+        reader, writer, _ = daemon_client_connection
+        responses = await send_command(
+            reader, writer, DaemonCommand.START_PROFILER, {"duration": 86400}
+        )
+        assert responses is not None
+        assert responses[-1]["event_type"] == NotificationEventType.COMMAND_ERROR
@@ -0,0 +1,202 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import threading
+
+import pytest
+
+from event import BusEventType
+from event.bus import AsyncEventBus
+
+EVENT = BusEventType.CLIENT_ACTIVE
+
+
+@pytest.mark.anyio
+class TestDispatchPlan:
+    async def test_single_async_listener_is_awaited(self):
+        bus = AsyncEventBus()
+        seen = []
+
+        async def listener(data, **kwargs):
+            seen.append((data, kwargs))
+
+        bus.subscribe(EVENT, listener)
+        await bus.dispatch(EVENT, "payload", origin="test")
+        assert seen == [("payload", {"origin": "test"})]
+
+    async def test_nonblocking_sync_runs_on_loop_thread(self):
+        bus = AsyncEventBus()
+        threads = []
+        bus.subscribe(
+            EVENT, lambda data: threads.append(threading.get_ident()), blocking=False
+        )
+        await bus.dispatch(EVENT)
+        assert threads == [threading.get_ident()]
+
+    async def test_blocking_sync_runs_in_executor(self):
+        bus = AsyncEventBus()
+        threads = []
+        bus.subscribe(EVENT, lambda data: threads.append(threading.get_ident()))
+        await bus.dispatch(EVENT)
+        assert len(threads) == 1
+        assert threads[0] != threading.get_ident()
+
+    async def test_mixed_listeners_all_run(self):
+        bus = AsyncEventBus()
+        seen = []
+
+        async def first(data):
+            seen.append("first")
+
+        async def second(data):
+            seen.append("second")
+
+        bus.subscribe(EVENT, first)
+        bus.subscribe(EVENT, second)
+        bus.subscribe(EVENT, lambda data: seen.append("inline"), blocking=False)
+        bus.subscribe(EVENT, lambda data: seen.append("executor"))
+        await bus.dispatch(EVENT)
+        assert sorted(seen) == ["executor", "first", "inline", "second"]
+        # Inline listeners run before anything is awaited.
+        assert seen[0] == "inline"
+
+    async def test_inline_listener_runs_before_priority_async(self):
+        bus = AsyncEventBus()
+        seen = []
+
+        async def urgent(data):
+            seen.append("async")
+
+        bus.subscribe(EVENT, lambda data: seen.append("inline"), blocking=False)
+        bus.subscribe(EVENT, urgent, priority=True)
+        await bus.dispatch(EVENT)
+        assert seen == ["inline", "async"]
+
+    async def test_unsubscribe_recompiles_plan(self):
+        bus = AsyncEventBus()
+        seen = []
+
+        async def first(data):
+            seen.append("first")
+
+        async def second(data):
+            seen.append("second")
+
+        bus.subscribe(EVENT, first)
+        bus.subscribe(EVENT, second)
+        bus.unsubscribe(EVENT, first)
+        await bus.dispatch(EVENT)
+        bus.unsubscribe(EVENT, second)
+        await bus.dispatch(EVENT)
+        assert seen == ["second"]
+        assert EVENT not in bus._plans
+
+    async def test_failing_listener_is_disabled_on_fast_path(self):
+        bus = AsyncEventBus()
+
+        async def broken(data):
+            raise RuntimeError("boom")
+
+        bus.subscribe(EVENT, broken)
+        for _ in range(AsyncEventBus.MAX_CONSECUTIVE_FAILURES):
+            await bus.dispatch(EVENT)
+        assert EVENT not in bus._plans
+        assert not bus._failure_counts
+
+    async def test_success_resets_failure_streak(self):
+        bus = AsyncEventBus()
+        fail = [True]
+
+        def flaky(data):
+            if fail[0]:
+                raise RuntimeError("boom")
+
+        bus.subscribe(EVENT, flaky, blocking=False)
+        await bus.dispatch(EVENT)
+        assert bus._failure_counts
+        fail[0] = False
+        await bus.dispatch(EVENT)
+        assert not bus._failure_counts
+
+    async def test_unknown_event_type_is_ignored(self):
+        bus = AsyncEventBus()
+        seen = []
+        bus.subscribe(9999, lambda data: seen.append(data), blocking=False)
+        await bus.dispatch(9999, "x")
+        assert seen == []
+
+
+@pytest.mark.anyio
+class TestDispatchNowait:
+    async def test_nonblocking_sync_creates_no_task(self):
+        bus = AsyncEventBus()
+        seen = []
+        bus.subscribe(EVENT, seen.append, blocking=False)
+        before = len(asyncio.all_tasks())
+        bus.dispatch_nowait(EVENT, 1)
+        await asyncio.sleep(0)
+        assert seen == [1]
+        assert len(asyncio.all_tasks()) == before
+        assert len(bus._bg) == 0
+
+    async def test_single_async_listener_runs(self):
+        bus = AsyncEventBus()
+        done = asyncio.Event()
+        seen = []
+
+        async def listener(data, **kwargs):
+            seen.append((data, kwargs))
+            done.set()
+
+        bus.subscribe(EVENT, listener)
+        bus.dispatch_nowait(EVENT, "payload", origin="test")
+        await asyncio.wait_for(done.wait(), 1)
+        assert seen == [("payload", {"origin": "test"})]
+
+    async def test_failure_is_counted_once(self):
+        bus = AsyncEventBus()
+
+        async def broken(data):
+            raise RuntimeError("boom")
+
+        bus.subscribe(EVENT, broken)
+        bus.dispatch_nowait(EVENT)
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert list(bus._failure_counts.values()) == [1]
+        assert not bus._inflight
+
+    async def test_from_foreign_thread_preserves_order(self):
+        bus = AsyncEventBus()
+        seen = []
+        bus.subscribe(EVENT, seen.append, blocking=False)
+        # Capture the loop on the bus before the foreign thread calls in.
+        bus.dispatch_nowait(EVENT, -1)
+
+        def produce():
+            for i in range(100):
+                bus.dispatch_nowait(EVENT, i)
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        thread.join()
+        for _ in range(20):
+            if len(seen) == 101:
+                break
+            await asyncio.sleep(0.01)
+        assert seen == [-1, *range(100)]
@@ -16,13 +16,24 @@
 #
 
 import asyncio
+from time import time
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from network.data.exchange import MessageExchange, MessageExchangeConfig
-from network.protocol.message import MessageType, ProtocolMessage
-from utils.metrics import MetricsCollector
+from event import MouseEvent
+from network.data.exchange import (
+    MAX_CONTROL_REASSEMBLY_SIZE,
+    MAX_REASSEMBLY_SIZE,
+    MessageExchange,
+    MessageExchangeConfig,
+    reassembly_limit,
+)
+from network.protocol.capabilities import StreamCapabilities, local_capabilities
+from network.protocol.message import CompactMouseFrame, MessageType, ProtocolMessage
+from network.stream import StreamType
+from utils.metrics import ConnectionMetrics, MetricsCollector, PeerClock
+from utils.metrics.clock import HEARTBEAT_CLOCK_KEY
 
 
 @pytest.fixture
@@ -213,3 +224,409 @@ class TestMessageExchange:
 
         msg2 = ProtocolMessage.from_bytes(send_cb2.call_args[0][0])
         assert msg2.target == "client2"
+
+    async def test_compact_mouse_send(self, exchange):
+        send_cb = MagicMock()
+        await exchange.set_transport(send_callback=send_cb)
+        exchange.config.compact_mouse = True
+
+        await exchange.send_mouse_data(
+            x=-1, y=-1, event=MouseEvent.MOVE_ACTION, dx=4, dy=-2, button=None
+        )
+        frame = send_cb.call_args[0][0]
+        assert len(frame) == CompactMouseFrame.size
+        assert ProtocolMessage.read_frame_prefix(frame)[1] == b"M"
+
+        # Absolute / fractional / non-move events stay on msgpack.
+        send_cb.reset_mock()
+        await exchange.send_mouse_data(x=0.5, y=0.5, event="position", dx=0, dy=0)
+        await exchange.send_mouse_data(x=-1, y=-1, event="move", dx=0.5, dy=0)
+        for call in send_cb.call_args_list:
+            msg = ProtocolMessage.from_bytes(call[0][0])
+            assert msg.message_type == MessageType.MOUSE
+
+    async def test_compact_mouse_disabled_by_default(self, exchange):
+        send_cb = MagicMock()
+        await exchange.set_transport(send_callback=send_cb)
+
+        await exchange.send_mouse_data(x=-1, y=-1, event="move", dx=4, dy=-2)
+        msg = ProtocolMessage.from_bytes(send_cb.call_args[0][0])
+        assert msg.payload["dx"] == 4
+
+    async def test_compact_mouse_receive_dispatch(self, exchange):
+        handler_mock = AsyncMock()
+        exchange.register_handler(MessageType.MOUSE, handler_mock)
+
+        # A compact frame between two msgpack frames, split mid-frame.
+        legacy = exchange.builder.create_mouse_message(
+            -1, -1, 1, 1, event="move"
+        ).to_bytes()
+        data = legacy + CompactMouseFrame.encode(7, -9, None, 1) + legacy
+        pieces = [data[:25], data[25:]]
+
+        async def mock_recv(size_hint):
+            if pieces:
+                return pieces.pop(0)
+            await asyncio.sleep(0.01)
+            return None
+
+        await exchange.set_transport(receive_callback=mock_recv)
+
+        for _ in range(50):
+            if handler_mock.call_count >= 3:
+                break
+            await asyncio.sleep(0.01)
+
+        assert handler_mock.call_count == 3
+        event = handler_mock.call_args_list[1][0][0]
+        assert isinstance(event, MouseEvent)
+        assert (event.action, event.dx, event.dy) == (MouseEvent.MOVE_ACTION, 7, -9)
+        assert isinstance(handler_mock.call_args_list[2][0][0], ProtocolMessage)
+
+    async def test_compact_mouse_receive_queue(self, mock_metrics_collector):
+        config = MessageExchangeConfig(auto_dispatch=False)
+        ex = MessageExchange(conf=config, metrics_collector=mock_metrics_collector)
+        await ex.start()
+        pieces = [CompactMouseFrame.encode(3, 4, 1, 9)]
+
+        async def mock_recv(size_hint):
+            if pieces:
+                return pieces.pop(0)
+            await asyncio.sleep(0.01)
+            return None
+
+        await ex.set_transport(receive_callback=mock_recv)
+        msg = await asyncio.wait_for(ex.get_received_message(), timeout=1.0)
+        await ex.stop()
+
+        assert msg.message_type == MessageType.MOUSE
+        assert msg.sequence_id == 9
+        assert msg.payload["dx"] == 3 and msg.payload["dy"] == 4
+        assert msg.payload["button"] == 1
+
+    async def test_compact_mouse_records_latency(self, mock_metrics_collector):
+        metrics = ConnectionMetrics("compact")
+        mock_metrics_collector.register_connection = AsyncMock(return_value=metrics)
+        ex = MessageExchange(metrics_collector=mock_metrics_collector)
+        await ex.start()
+        pieces = [CompactMouseFrame.encode(3, 4, None, 9, timestamp=time() - 0.25)]
+
+        async def mock_recv(size_hint):
+            if pieces:
+                return pieces.pop(0)
+            await asyncio.sleep(0.01)
+            return None
+
+        handler = AsyncMock()
+        ex.register_handler(MessageType.MOUSE, handler)
+        await ex.set_transport(receive_callback=mock_recv)
+        for _ in range(50):
+            if handler.called:
+                break
+            await asyncio.sleep(0.01)
+        await ex.stop()
+
+        assert metrics.bytes_received == CompactMouseFrame.size
+        assert metrics.calculate_avg_latency() == pytest.approx(0.25, abs=0.05)
+
+    async def test_batched_send_single_write(self, mock_metrics_collector):
+        metrics = ConnectionMetrics("batch")
+        mock_metrics_collector.register_connection = AsyncMock(return_value=metrics)
+        ex = MessageExchange(metrics_collector=mock_metrics_collector)
+        await ex.start()
+        send_cb = AsyncMock()
+        await ex.set_transport(send_callback=send_cb)
+
+        ex.begin_batch()
+        for key in ("a", "b", "c"):
+            await ex.send_keyboard_data(key=key, event="press")
+        send_cb.assert_not_called()
+
+        await ex.flush_batch()
+        await ex.stop()
+
+        send_cb.assert_awaited_once()
+        data = send_cb.call_args[0][0]
+        keys = []
+        while data:
+            length = ProtocolMessage.read_lenght_prefix(data)
+            end = ProtocolMessage.prefix_lenght + length
+            keys.append(ProtocolMessage.from_bytes(data[:end]).payload["key"])
+            data = data[end:]
+        assert keys == ["a", "b", "c"]
+        assert metrics.messages_sent == 3
+        assert metrics.get_frames_per_write() == 3.0
+
+    async def test_batch_full_and_discard(self, exchange):
+        send_cb = MagicMock()
+        await exchange.set_transport(send_callback=send_cb)
+        exchange.config.max_batch_bytes = 64
+
+        exchange.begin_batch()
+        assert not exchange.batch_full()
+        await exchange.send_keyboard_data(key="a", event="press")
+        assert exchange.batch_full()
+
+        exchange.discard_batch()
+        await exchange.flush_batch()
+        send_cb.assert_not_called()
+
+    async def test_batching_disabled(self, exchange):
+        exchange.config.max_batch_bytes = 0
+        assert not exchange.batching_enabled()
+
+    async def test_multicast_idle_transport_does_not_block(self, exchange):
+        exchange.config.multicast = True
+        handler_mock = AsyncMock()
+        exchange.register_handler(MessageType.CLIPBOARD, handler_mock)
+        msg_bytes = exchange.builder.create_clipboard_message(content="x").to_bytes()
+        never = asyncio.Event()
+        pending = [msg_bytes]
+
+        async def idle_recv(size_hint):
+            await never.wait()
+
+        async def busy_recv(size_hint):
+            if pending:
+                return pending.pop()
+            await never.wait()
+
+        await exchange.set_transport(receive_callback=idle_recv, tr_id="idle")
+        await exchange.set_transport(receive_callback=busy_recv, tr_id="busy")
+        assert set(exchange._reader_tasks) == {"idle", "busy"}
+
+        for _ in range(5):
+            if handler_mock.call_count:
+                break
+            await asyncio.sleep(0.005)
+        handler_mock.assert_called_once()
+
+        # Clearing a transport stops its reader.
+        await exchange.set_transport(receive_callback=None, tr_id="idle")
+        assert "idle" not in exchange._reader_tasks
+
+    async def test_reader_ends_on_eof_and_restarts(self, exchange):
+        handler_mock = AsyncMock()
+        exchange.register_handler(MessageType.CLIPBOARD, handler_mock)
+        msg_bytes = exchange.builder.create_clipboard_message(content="x").to_bytes()
+        reads = []
+
+        async def recv(size_hint):
+            reads.append(size_hint)
+            return b""
+
+        await exchange.set_transport(receive_callback=recv)
+        for _ in range(5):
+            if exchange.DEFAULT_TRANSPORT_ID not in exchange._reader_tasks:
+                break
+            await asyncio.sleep(0.005)
+        # One empty read ends the task instead of polling.
+        assert exchange.DEFAULT_TRANSPORT_ID not in exchange._reader_tasks
+        assert len(reads) == 1
+
+        pending = [msg_bytes]
+
+        async def reconnected(size_hint):
+            return pending.pop() if pending else b""
+
+        await exchange.set_transport(receive_callback=reconnected)
+        for _ in range(5):
+            if handler_mock.call_count:
+                break
+            await asyncio.sleep(0.005)
+        handler_mock.assert_called_once()
+
+    async def test_stream_chunks_round_trip(self, mock_metrics_collector):
+        sender = MessageExchange(
+            conf=MessageExchangeConfig(multicast=True),
+            id="chunk_tx",
+            metrics_collector=mock_metrics_collector,
+        )
+        receiver = MessageExchange(id="chunk_rx")
+        handler_mock = AsyncMock()
+        receiver.register_handler(MessageType.CLIPBOARD, handler_mock)
+
+        wire: asyncio.Queue = asyncio.Queue()
+        frames: list[bytes] = []
+        legacy = MagicMock()
+
+        async def send(data: bytes):
+            frames.append(data)
+            wire.put_nowait(data)
+
+        await sender.set_transport(send_callback=send, tr_id="new")
+        await sender.set_transport(send_callback=legacy, tr_id="old")
+        sender.set_stream_chunk_size(65536, tr_id="new")
+        await sender.start()
+
+        async def recv(size_hint):
+            return await wire.get()
+
+        await receiver.set_transport(receive_callback=recv)
+        await receiver.start()
+
+        content = "y" * (1024 * 1024)
+        await sender.send_clipboard_data(content)
+
+        # ~1 MiB in 64 KiB chunks for the capable peer, 1 KiB legacy
+        # ProtocolMessage chunks for the other.
+        assert len(frames) == 17
+        assert legacy.call_count > 1000
+
+        for _ in range(100):
+            if handler_mock.call_count:
+                break
+            await asyncio.sleep(0.01)
+        handler_mock.assert_called_once()
+        assert handler_mock.call_args[0][0].payload["content"] == content
+
+        await sender.stop()
+        await receiver.stop()
+
+    async def test_oversize_stream_chunks_are_dropped(self):
+        sender = MessageExchange(id="big_tx")
+        receiver = MessageExchange(
+            conf=MessageExchangeConfig(max_reassembly_size=64 * 1024),
+            id="big_rx",
+        )
+        handler_mock = AsyncMock()
+        receiver.register_handler(MessageType.CLIPBOARD, handler_mock)
+        wire: asyncio.Queue = asyncio.Queue()
+
+        async def send(data: bytes):
+            wire.put_nowait(data)
+
+        async def recv(size_hint):
+            return await wire.get()
+
+        await sender.set_transport(send_callback=send)
+        sender.set_stream_chunk_size(16384)
+        await receiver.set_transport(receive_callback=recv)
+        await sender.start()
+        await receiver.start()
+
+        await sender.send_clipboard_data("z" * (128 * 1024))
+        await sender.send_clipboard_data("small")
+        for _ in range(100):
+            if handler_mock.call_count:
+                break
+            await asyncio.sleep(0.01)
+        handler_mock.assert_called_once()
+        assert handler_mock.call_args[0][0].payload["content"] == "small"
+
+        await sender.stop()
+        await receiver.stop()
+
+    def test_reassembly_limit_per_stream(self):
+        assert reassembly_limit(StreamType.CLIPBOARD) == MAX_REASSEMBLY_SIZE
+        assert reassembly_limit(StreamType.FILE) == MAX_REASSEMBLY_SIZE
+        assert reassembly_limit(StreamType.MOUSE) == MAX_CONTROL_REASSEMBLY_SIZE
+        assert reassembly_limit(StreamType.COMMAND) == MAX_CONTROL_REASSEMBLY_SIZE
+
+    @pytest.mark.parametrize(
+        "content", ["small", "log line\n" * 2000, "json," * 300_000]
+    )
+    async def test_compressed_round_trip(self, content):
+        sender = MessageExchange(id="z_tx")
+        receiver = MessageExchange(id="z_rx")
+        handler_mock = AsyncMock()
+        receiver.register_handler(MessageType.CLIPBOARD, handler_mock)
+
+        wire: asyncio.Queue = asyncio.Queue()
+        sent: list[bytes] = []
+
+        async def send(data: bytes):
+            sent.append(data)
+            wire.put_nowait(data)
+
+        async def recv(size_hint):
+            return await wire.get()
+
+        await sender.set_transport(send_callback=send)
+        sender.apply_capabilities(local_capabilities()[12])  # CLIPBOARD
+        await receiver.set_transport(receive_callback=recv)
+        await receiver.start()
+
+        await sender.send_clipboard_data(content)
+        for _ in range(200):
+            if handler_mock.call_count:
+                break
+            await asyncio.sleep(0.01)
+        handler_mock.assert_called_once()
+        assert handler_mock.call_args[0][0].payload["content"] == content
+
+        wire_bytes = sum(len(f) for f in sent)
+        if len(content) > 4096:
+            assert wire_bytes < len(content) // 5
+        else:
+            assert sent[0][5:6] == b"Y"
+        await receiver.stop()
+
+    async def test_uncompressed_streams_bypass(self):
+        exchange = MessageExchange()
+        exchange.apply_capabilities(local_capabilities()[1])  # MOUSE
+        assert exchange._compression_codecs == {}
+        exchange.apply_capabilities(StreamCapabilities(compression=("zlib",)))
+        assert exchange._compression_codecs == {"default": "zlib"}
+        exchange.apply_capabilities(StreamCapabilities(compression=("lz9",)))
+        assert exchange._compression_codecs == {}
+
+    async def test_stream_chunk_size_cleared(self, exchange):
+        exchange.set_stream_chunk_size(4096)
+        assert exchange._stream_chunk_sizes == {"default": 4096}
+        exchange.set_stream_chunk_size(None)
+        assert exchange._stream_chunk_sizes == {}
+
+    async def test_heartbeats_feed_peer_clock_and_correct_latency(self):
+        collector = MetricsCollector()
+        ex = MessageExchange(id="clock_test", metrics_collector=collector)
+        await ex.start()
+        clock = PeerClock()
+        ex.set_peer_clock(clock, peer_id="peer")
+        assert collector.get_peer_clock("peer") is clock
+
+        # Peer wall clock runs 5 s behind ours.
+        skew = -5.0
+        stamp = clock.stamp()
+        heartbeat = ProtocolMessage(
+            message_type=MessageType.HEARTBEAT,
+            source="peer",
+            payload={
+                HEARTBEAT_CLOCK_KEY: {
+                    "seq": 1,
+                    "echo": stamp["seq"],
+                    "rx": time() + skew,
+                    "hold": 0.0,
+                }
+            },
+            timestamp=time() + skew,
+            sequence_id=0,
+        )
+        message = ex.builder.create_clipboard_message(content="x")
+        message.timestamp = time() + skew
+        frames = [heartbeat.to_bytes(), message.to_bytes()]
+
+        async def recv(size_hint):
+            if frames:
+                return frames.pop(0)
+            await asyncio.sleep(0.01)
+            return None
+
+        await ex.set_transport(receive_callback=recv)
+        for _ in range(50):
+            if not frames and ex._message_queue.qsize():
+                break
+            await asyncio.sleep(0.01)
+
+        assert clock.synced
+        assert clock.offset == pytest.approx(skew, abs=0.05)
+        metrics = await collector.get_metrics("clock_test")
+        metrics.calculate_avg_latency()
+        # Uncorrected, both messages would read as 5 s.
+        snap = metrics.latency_snapshot(10.0)
+        assert snap.count == 2
+        assert abs(metrics.avg_latency) < 0.05
+
+        ex.set_peer_clock(None, peer_id="peer")
+        assert collector.get_peer_clock("peer") is None
+        await ex.stop()
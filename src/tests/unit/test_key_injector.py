@@ -0,0 +1,183 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+from tests.unit import _MOCK_PYNPUT
+
+import threading
+from time import time
+
+import pytest
+
+from event import KeyboardEvent
+from utils.metrics import ConnectionMetrics
+from utils.metrics.trace import TRACER, TraceContext
+
+_MOCK_PYNPUT()
+
+from input.keyboard._injector import KeyInjector  # noqa: E402
+
+
+class _Recorder:
+    def __init__(self, gate: threading.Event = None):
+        self.applied = []
+        self.gate = gate
+        self.done = threading.Event()
+        self.expected = 0
+
+    def __call__(self, event):
+        if self.gate is not None:
+            self.gate.wait(2)
+        self.applied.append(event)
+        if len(self.applied) >= self.expected:
+            self.done.set()
+
+
+@pytest.fixture
+def injectors():
+    started = []
+    yield started
+    for injector in started:
+        injector.stop()
+
+
+class TestKeyInjector:
+    def test_applies_events_in_order(self, injectors):
+        recorder = _Recorder()
+        recorder.expected = 200
+        injector = KeyInjector(recorder)
+        injectors.append(injector)
+        injector.start()
+
+        for i in range(200):
+            injector.submit(i)
+
+        assert recorder.done.wait(2)
+        assert recorder.applied == list(range(200))
+
+    def test_burst_drained_in_one_wake(self, injectors):
+        gate = threading.Event()
+        recorder = _Recorder(gate)
+        recorder.expected = 51
+        drains = []
+
+        class _Counting(KeyInjector):
+            def _drain(self):
+                drains.append(self.pending())
+                super()._drain()
+
+        injector = _Counting(recorder)
+        injectors.append(injector)
+        injector.start()
+
+        injector.submit("first")
+        # The first event holds the thread inside apply while the burst lands
+        while injector.pending():
+            pass
+        for i in range(50):
+            injector.submit(i)
+        gate.set()
+
+        assert recorder.done.wait(2)
+        assert recorder.applied == ["first", *range(50)]
+        # One wake for the first key, at most one more for the whole burst
+        assert len(drains) <= 2
+
+    def test_call_runs_after_queued_events(self, injectors):
+        gate = threading.Event()
+        recorder = _Recorder(gate)
+        injector = KeyInjector(recorder)
+        injectors.append(injector)
+        injector.start()
+
+        called = threading.Event()
+        order = []
+        injector.submit("press")
+        injector.call(lambda: (order.extend(recorder.applied), called.set()))
+        gate.set()
+
+        assert called.wait(2)
+        assert order == ["press"]
+
+    def test_records_injection_latency(self, injectors):
+        recorder = _Recorder()
+        recorder.expected = 3
+        metrics = ConnectionMetrics("kbd")
+        injector = KeyInjector(recorder, metrics=lambda: metrics)
+        injectors.append(injector)
+        injector.start()
+
+        for i in range(3):
+            injector.submit(i)
+
+        assert recorder.done.wait(2)
+        injector.stop()
+        assert metrics.key_injections == 3
+        assert metrics.max_injection_latency > 0
+        assert 0 < metrics.get_avg_injection_latency() <= metrics.max_injection_latency
+
+    def test_closes_sampled_event_trace(self, injectors):
+        recorder = _Recorder()
+        recorder.expected = 2
+        injector = KeyInjector(recorder)
+        injectors.append(injector)
+        injector.start()
+
+        TRACER.reset()
+        TRACER.enable()
+        try:
+            traced = KeyboardEvent("a", KeyboardEvent.PRESS_ACTION)
+            traced.trace = TraceContext(TRACER, 1, time(), offset=0.0)
+            injector.submit(traced)
+            injector.submit(KeyboardEvent("a", KeyboardEvent.RELEASE_ACTION))
+            assert recorder.done.wait(2)
+            injector.stop()
+
+            snap = TRACER.snapshot()
+            assert snap["completed"] == 1
+            assert list(snap["hops"]) == ["client_queue", "inject", "total"]
+        finally:
+            TRACER.disable()
+            TRACER.reset()
+
+    def test_failing_event_does_not_stop_thread(self, injectors):
+        applied = []
+
+        def apply(event):
+            if event == "bad":
+                raise RuntimeError("boom")
+            applied.append(event)
+
+        injector = KeyInjector(apply)
+        injectors.append(injector)
+        injector.start()
+
+        injector.submit("bad")
+        injector.submit("good")
+        injector.stop()
+
+        assert applied == ["good"]
+        assert not injector.is_alive()
+
+    def test_stop_applies_pending_then_exits(self):
+        recorder = _Recorder()
+        injector = KeyInjector(recorder)
+        for i in range(10):
+            injector.submit(i)
+        injector.start()
+        injector.stop()
+
+        assert recorder.applied == list(range(10))
+        assert not injector.is_alive()
@@ -19,7 +19,15 @@ import pytest
 import struct
 import time
 import msgspec
-from network.protocol.message import ProtocolMessage, MessageType, MessageBuilder
+from network.protocol.message import (
+    ChunkReassembler,
+    CompactMouseFrame,
+    FileDataFrame,
+    ProtocolMessage,
+    MessageType,
+    MessageBuilder,
+    StreamChunkFrame,
+)
 
 
 # Helper to create a basic message for testing
@@ -239,3 +247,175 @@ class TestMessageBuilder:
 
         with pytest.raises(ValueError, match="Chunks have different message IDs"):
             self.builder.reconstruct_from_chunks(mixed)
+
+
+class TestCompactMouseFrame:
+    def test_round_trip(self):
+        frame = CompactMouseFrame.encode(-12, 345, None, 7)
+        assert len(frame) == CompactMouseFrame.size
+
+        length, marker = ProtocolMessage.read_frame_prefix(frame)
+        assert marker == b"M"
+        assert length == CompactMouseFrame.body_size
+
+        body = frame[ProtocolMessage.prefix_lenght :]
+        assert CompactMouseFrame.decode(body)[:4] == (None, -12, 345, 7)
+
+    def test_button_and_sequence_wrap(self):
+        frame = CompactMouseFrame.encode(1, 1, 3, 2**32 + 5)
+        body = frame[ProtocolMessage.prefix_lenght :]
+        assert CompactMouseFrame.decode(body)[:4] == (3, 1, 1, 5)
+
+    @pytest.mark.parametrize("latency", [0.0004, 2.5, -1.0, 1500.0])
+    def test_timestamp_unwraps_around_receive_time(self, latency):
+        now = 1_700_000_000.123456
+        frame = CompactMouseFrame.encode(1, 1, None, 1, timestamp=now - latency)
+        stamp = CompactMouseFrame.decode(frame[ProtocolMessage.prefix_lenght :])[4]
+        sent = CompactMouseFrame.unwrap_timestamp(stamp, now)
+        assert sent == pytest.approx(now - latency, abs=2e-6)
+
+    def test_can_encode(self):
+        assert CompactMouseFrame.can_encode(5, -5, None)
+        assert CompactMouseFrame.can_encode(5.0, -5.0, 1)
+        assert not CompactMouseFrame.can_encode(0.5, 0, None)
+        assert not CompactMouseFrame.can_encode(2**31, 0, None)
+        assert not CompactMouseFrame.can_encode(float("nan"), 0, None)
+        assert not CompactMouseFrame.can_encode(1, 1, CompactMouseFrame.NO_BUTTON)
+
+    def test_frame_prefix_accepts_msgpack(self):
+        data = create_test_message().to_bytes()
+        length, marker = ProtocolMessage.read_frame_prefix(data)
+        assert marker == b"Y"
+        assert length == len(data) - ProtocolMessage.prefix_lenght
+
+    def test_frame_prefix_rejects_unknown_marker(self):
+        with pytest.raises(ValueError, match="not a protocol message"):
+            ProtocolMessage.read_frame_prefix(struct.pack("!Icc", 13, b"P", b"X"))
+
+    def test_legacy_prefix_reader_rejects_compact(self):
+        """Old peers must skip compact frames, not misparse them as msgpack."""
+        frame = CompactMouseFrame.encode(1, 2, None, 1)
+        with pytest.raises(ValueError, match="not a protocol message"):
+            ProtocolMessage.read_lenght_prefix(frame)
+
+
+class TestStreamChunkFrame:
+    def setup_method(self):
+        self.builder = MessageBuilder()
+
+    @staticmethod
+    def _bodies(frames):
+        bodies = []
+        for frame in frames:
+            length, marker = ProtocolMessage.read_frame_prefix(frame)
+            assert marker == b"C"
+            bodies.append(memoryview(frame)[ProtocolMessage.prefix_lenght :])
+        return bodies
+
+    def test_small_message_is_a_single_regular_frame(self):
+        msg = create_test_message(payload_size=10)
+        frames = self.builder.create_stream_chunks(msg, chunk_size=1024)
+        assert frames == [msg.to_bytes()]
+
+    def test_split_and_reassemble_binary_payload(self):
+        blob = bytes(range(256)) * 400
+        msg = self.builder.create_clipboard_message(content="", content_type="image")
+        msg.payload["data"] = blob
+        frames = self.builder.create_stream_chunks(msg, chunk_size=8192)
+        assert len(frames) == -(-len(msg.encode_body()) // 8192)
+        assert all(len(f) <= StreamChunkFrame.size + 8192 for f in frames)
+
+        reassembler = ChunkReassembler(max_total=1 << 20)
+        bodies = self._bodies(frames)
+        results = [reassembler.feed(b) for b in reversed(bodies)]
+        assert results[:-1] == [None] * (len(bodies) - 1)
+        assert results[-1].payload["data"] == blob
+        assert results[-1].sequence_id == msg.sequence_id
+        assert len(reassembler) == 0
+
+    def test_interleaved_messages(self):
+        a = create_test_message(payload_size=3000)
+        b = create_test_message(payload_size=5000)
+        fa = self._bodies(self.builder.create_stream_chunks(a, chunk_size=1000))
+        fb = self._bodies(self.builder.create_stream_chunks(b, chunk_size=1000))
+
+        reassembler = ChunkReassembler(max_total=1 << 20)
+        done = []
+        for pair in zip(fa, fb):
+            for body in pair:
+                if (msg := reassembler.feed(body)) is not None:
+                    done.append(msg)
+        for body in fb[len(fa) :]:
+            if (msg := reassembler.feed(body)) is not None:
+                done.append(msg)
+        assert [len(m.payload["data"]) for m in done] == [3000, 5000]
+
+    def test_rejects_oversize_and_out_of_range(self):
+        reassembler = ChunkReassembler(max_total=100)
+        with pytest.raises(ValueError, match="exceeds"):
+            reassembler.feed(StreamChunkFrame.encode(1, 0, 101, b"x")[6:])
+
+        reassembler.feed(StreamChunkFrame.encode(2, 0, 10, b"abc")[6:])
+        with pytest.raises(ValueError, match="outside"):
+            reassembler.feed(StreamChunkFrame.encode(2, 8, 10, b"abc")[6:])
+        assert len(reassembler) == 0
+
+    @pytest.mark.parametrize(
+        "offset, data", [(0, b"abc"), (2, b"cde"), (1, b"b")], ids=str
+    )
+    def test_rejects_duplicate_and_overlapping_chunks(self, offset, data):
+        reassembler = ChunkReassembler(max_total=100)
+        reassembler.feed_body(StreamChunkFrame.encode(1, 0, 6, b"abc")[6:])
+        # Same byte count as the missing tail, but leaves a hole.
+        with pytest.raises(ValueError, match="overlaps"):
+            reassembler.feed_body(StreamChunkFrame.encode(1, offset, 6, data)[6:])
+        assert len(reassembler) == 0
+
+    def test_completes_only_when_covered(self):
+        reassembler = ChunkReassembler(max_total=100)
+        for offset, data in ((4, b"ef"), (0, b"ab")):
+            assert (
+                reassembler.feed_body(StreamChunkFrame.encode(1, offset, 6, data)[6:])
+                is None
+            )
+        body = reassembler.feed_body(StreamChunkFrame.encode(1, 2, 6, b"cd")[6:])
+        assert body == b"abcdef"
+
+    def test_caps_pending_messages(self):
+        reassembler = ChunkReassembler(max_total=100, max_pending=2)
+        reassembler.feed(StreamChunkFrame.encode(1, 0, 10, b"abc")[6:])
+        reassembler.feed(StreamChunkFrame.encode(2, 0, 10, b"abc")[6:])
+        reassembler.feed(StreamChunkFrame.encode(2, 3, 10, b"def")[6:])
+        # A third message evicts the one that made progress least recently.
+        reassembler.feed(StreamChunkFrame.encode(3, 0, 10, b"abc")[6:])
+        assert len(reassembler) == 2
+        assert set(reassembler._pending) == {2, 3}
+
+    def test_drop_stale(self):
+        reassembler = ChunkReassembler(max_total=100)
+        reassembler.feed(StreamChunkFrame.encode(1, 0, 10, b"abc")[6:])
+        assert reassembler.drop_stale(60.0, now=time.monotonic()) == 0
+        assert reassembler.drop_stale(60.0, now=time.monotonic() + 61) == 1
+        assert len(reassembler) == 0
+
+    def test_legacy_prefix_reader_rejects_chunk(self):
+        frame = StreamChunkFrame.encode(1, 0, 3, b"abc")
+        with pytest.raises(ValueError, match="not a protocol message"):
+            ProtocolMessage.read_lenght_prefix(frame)
+
+
+class TestFileDataFrame:
+    def test_header_round_trip(self):
+        header = FileDataFrame.encode_header(7, 1 << 33, 5)
+        frame = header + b"hello"
+        length, marker = ProtocolMessage.read_frame_prefix(frame)
+        assert marker == b"F"
+        assert length == len(frame) - ProtocolMessage.prefix_lenght
+
+        body = memoryview(frame)[ProtocolMessage.prefix_lenght :]
+        assert FileDataFrame.decode_header(body) == (7, 1 << 33)
+        assert bytes(body[FileDataFrame.header_size :]) == b"hello"
+
+    def test_truncated_header(self):
+        with pytest.raises(ValueError, match="truncated"):
+            FileDataFrame.decode_header(b"\x00" * 4)
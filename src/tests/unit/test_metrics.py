@@ -16,10 +16,282 @@
 #
 
 # tests/unit/test_metrics.py
-from time import time
+import asyncio
+import random
+import threading
+from time import sleep, time
+from unittest.mock import patch
 
 import pytest
-from utils.metrics import ConnectionMetrics, MetricsCollector
+from event import ClipboardEvent, KeyboardEvent
+from utils.metrics import (
+    EXPORT_WINDOWS,
+    ConnectionMetrics,
+    MetricsCollector,
+    PerformanceMonitor,
+)
+from utils.metrics.clock import HEARTBEAT_CLOCK_KEY, PeerClock
+from utils.metrics.histogram import Histogram, HistogramSnapshot
+from utils.metrics.loop import LoopMonitor
+from utils.metrics.profiler import SamplingProfiler
+from utils.metrics.trace import TRACE_KEY, LatencyTracer, TraceContext
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = _Clock()
+    with patch("utils.metrics.histogram.monotonic", fake):
+        yield fake
+
+
+class TestHistogram:
+    def test_percentiles_within_bucket_error(self):
+        rng = random.Random(7)
+        samples = [int(rng.lognormvariate(7, 1)) for _ in range(50_000)]
+        hist = Histogram()
+        for value in samples:
+            hist.record(value)
+
+        snap = hist.snapshot()
+        samples.sort()
+        assert snap.count == len(samples)
+        assert snap.min == samples[0]
+        assert snap.max == samples[-1]
+        for q in (0.5, 0.9, 0.99, 0.999):
+            exact = samples[int(q * len(samples)) - 1]
+            assert snap.percentile(q) == pytest.approx(exact, rel=0.04)
+
+    def test_small_values_are_exact(self):
+        hist = Histogram()
+        for value in (0, 1, 2, 3, 31):
+            hist.record(value)
+        assert hist.snapshot().percentiles([0.2, 0.4, 0.6, 0.8, 1.0]) == [
+            0,
+            1,
+            2,
+            3,
+            31,
+        ]
+
+    def test_out_of_range_values_are_clamped(self):
+        hist = Histogram()
+        hist.record(-5)
+        hist.record(2**40)
+        snap = hist.snapshot()
+        assert snap.count == 2
+        assert snap.min == 0
+        assert snap.percentile(1.0) == 2**40
+
+    def test_old_samples_age_out_of_window(self, clock):
+        hist = Histogram(slot_seconds=5.0, slots=13)
+        hist.record(50_000)
+        clock.now += 20
+        hist.record(100)
+
+        assert hist.snapshot(10.0).max == 100
+        assert hist.snapshot(60.0).max == 50_000
+        clock.now += 70
+        assert hist.snapshot(60.0).count == 0
+
+    def test_snapshots_merge(self):
+        a, b = Histogram(), Histogram()
+        for value in range(100):
+            a.record(value)
+        for value in range(100, 200):
+            b.record(value)
+
+        merged = a.snapshot().merge(b.snapshot())
+        assert merged.count == 200
+        assert merged.min == 0
+        assert merged.max == 199
+        assert merged.percentile(0.5) == pytest.approx(99, rel=0.04)
+        assert b.snapshot(into=a.snapshot()).count == 200
+
+    def test_merge_rejects_other_layout(self):
+        with pytest.raises(ValueError):
+            HistogramSnapshot(5, 32).merge(HistogramSnapshot(7, 32))
+
+    def test_empty_snapshot_exports_zeros(self):
+        data = Histogram().snapshot().to_dict()
+        assert data["count"] == 0
+        assert data["p99"] == 0.0
+
+
+class _Host:
+    """One side of a simulated link: a PeerClock reading a skewed wall clock."""
+
+    def __init__(self, link, skew: float):
+        self.link = link
+        self.skew = skew
+        self.clock = PeerClock()
+
+    def call(self, fn, *args):
+        with (
+            patch("utils.metrics.clock.monotonic", lambda: self.link.now + 500),
+            patch("utils.metrics.clock.time", lambda: self.link.now + self.skew),
+        ):
+            return fn(*args)
+
+    def heartbeat(self) -> dict:
+        return {HEARTBEAT_CLOCK_KEY: self.call(self.clock.stamp)}
+
+    def receive(self, payload: dict) -> None:
+        self.call(self.clock.on_heartbeat, payload)
+
+
+class _Link:
+    def __init__(self, skew: float):
+        self.now = 0.0
+        self.a = _Host(self, 0.0)
+        self.b = _Host(self, skew)
+
+    def exchange(self, up: float, down: float, hold: float = 1.0):
+        """A sends to B (``up`` s), B answers after ``hold`` s (``down`` s)."""
+        payload = self.a.heartbeat()
+        self.now += up
+        self.b.receive(payload)
+        self.now += hold
+        payload = self.b.heartbeat()
+        self.now += down
+        self.a.receive(payload)
+
+
+class TestPeerClock:
+    def test_needs_an_echo_before_sampling(self):
+        link = _Link(skew=3.0)
+        link.b.receive(link.a.heartbeat())
+        assert not link.b.clock.synced
+        assert link.b.clock.to_dict()["age_s"] is None
+
+    def test_symmetric_link_recovers_skew(self):
+        link = _Link(skew=-7.25)
+        for _ in range(4):
+            link.exchange(up=0.004, down=0.004, hold=2.0)
+
+        clock = link.a.clock
+        assert clock.synced
+        assert clock.rtt == pytest.approx(0.008)
+        assert clock.offset == pytest.approx(-7.25)
+
+    def test_offset_comes_from_least_delayed_sample(self):
+        link = _Link(skew=2.0)
+        link.exchange(up=0.001, down=0.001)
+        # Heavy one-way queueing skews this sample's offset by 40 ms.
+        link.exchange(up=0.081, down=0.001)
+        assert link.a.clock.rtt_min == pytest.approx(0.002)
+        assert link.a.clock.offset == pytest.approx(2.0)
+        assert link.a.clock.jitter > 0
+
+    def test_ignores_legacy_and_unknown_echoes(self):
+        clock = PeerClock()
+        clock.on_heartbeat({})
+        clock.on_heartbeat({HEARTBEAT_CLOCK_KEY: "garbage"})
+        clock.on_heartbeat(
+            {HEARTBEAT_CLOCK_KEY: {"seq": 1, "echo": 99, "rx": 0.0, "hold": 0.0}}
+        )
+        assert not clock.synced
+
+
+class _Traced:
+    __slots__ = ("timestamp", "trace")
+
+    TRACEABLE = True
+
+    def __init__(self):
+        self.timestamp = time()
+        self.trace = None
+
+
+class TestLatencyTracer:
+    def test_samples_one_event_in_n(self):
+        tracer = LatencyTracer()
+        tracer.enable(sample_every=3)
+        events = [_Traced() for _ in range(9)]
+        for event in events:
+            tracer.begin(event)
+        assert [e.trace is not None for e in events] == [True, False, False] * 3
+        assert tracer.sampled == 3
+
+    def test_untraceable_items_are_skipped(self):
+        tracer = LatencyTracer()
+        tracer.enable(sample_every=1)
+        assert tracer.begin({"key": "a"}) is None
+        # Clipboard events have no __slots__, so a trace attribute would
+        # stick; they still must not be sampled.
+        clipboard = ClipboardEvent(content="x")
+        assert tracer.begin(clipboard) is None
+        assert not hasattr(clipboard, "trace")
+        assert tracer.sampled == 0
+        assert tracer.begin(KeyboardEvent(key="a", action="press")) is not None
+        with pytest.raises(ValueError):
+            tracer.enable(sample_every=0)
+
+    def test_sender_hops_and_wire_block(self):
+        tracer = LatencyTracer()
+        tracer.enable(sample_every=1)
+        event = _Traced()
+        event.timestamp -= 0.002
+        ctx = tracer.begin(event)
+        ctx.mark("send_queue")
+        trace_id, captured, sent = ctx.to_wire()
+        ctx.mark("serialize")
+        tracer.finish(ctx)
+
+        assert trace_id == ctx.trace_id
+        assert captured == event.timestamp
+        assert sent >= captured
+        snap = tracer.snapshot()
+        assert list(snap["hops"]) == ["capture", "send_queue", "serialize"]
+        assert snap["hops"]["capture"]["min"] == pytest.approx(2.0, rel=0.1)
+        assert snap["completed"] == 1
+        assert snap["recent"][0]["id"] == trace_id
+        # Only the receiver closes the end-to-end total.
+        assert "total" not in snap["hops"]
+
+    def test_receiver_corrects_wire_hop_by_clock_offset(self):
+        link = _Link(skew=-5.0)
+        for _ in range(2):
+            link.exchange(up=0.001, down=0.001)
+        tracer = LatencyTracer()
+        tracer.enable()
+        # Stamped by a peer whose wall clock runs 5 s behind ours.
+        peer_now = time() - 5.0
+        payload = {"dx": 1, TRACE_KEY: [7, peer_now - 0.01, peer_now - 0.004]}
+
+        ctx = tracer.receive(payload, link.a.clock)
+        assert isinstance(payload[TRACE_KEY], TraceContext)
+        assert LatencyTracer.context(type("M", (), {"payload": payload})) is ctx
+        ctx.mark("inject")
+        tracer.finish(ctx)
+
+        hops = tracer.snapshot()["hops"]
+        assert hops["wire"]["max"] == pytest.approx(4.0, abs=1.0)
+        assert hops["total"]["max"] == pytest.approx(10.0, abs=1.0)
+
+    def test_receive_ignores_untraced_and_malformed_payloads(self):
+        tracer = LatencyTracer()
+        assert tracer.receive({"dx": 1}) is None
+        payload = {TRACE_KEY: "garbage"}
+        assert tracer.receive(payload) is None
+        assert TRACE_KEY not in payload
+
+    def test_reset_clears_histograms(self):
+        tracer = LatencyTracer()
+        tracer.enable(sample_every=1)
+        tracer.finish(tracer.begin(_Traced()))
+        tracer.reset()
+        snap = tracer.snapshot()
+        assert snap["hops"] == {}
+        assert snap["recent"] == []
+        assert snap["sampled"] == snap["completed"] == 0
 
 
 class TestConnectionMetrics:
@@ -51,6 +323,63 @@ class TestConnectionMetrics:
         assert metrics.max_latency == 0.003
         assert metrics.avg_latency == pytest.approx(0.002)
 
+    def test_latency_outlier_ages_out(self, clock):
+        metrics = ConnectionMetrics("test")
+        metrics.record_latency(0.5)
+        clock.now += 120
+        metrics.record_latency(0.002)
+        metrics.calculate_avg_latency()
+        assert metrics.max_latency == pytest.approx(0.002)
+
+    def test_windowed_percentiles_exported(self):
+        metrics = ConnectionMetrics("test")
+        for ms in range(1, 101):
+            metrics.record_latency(ms / 1000)
+        metrics.record_sent(64)
+        metrics.record_received(4096)
+
+        data = metrics.to_dict()
+        assert set(data["latency_ms"]) == {"10s", "60s"}
+        window = data["latency_ms"]["10s"]
+        assert window["count"] == 100
+        assert window["p50"] == pytest.approx(50, rel=0.04)
+        assert window["p99"] == pytest.approx(99, rel=0.04)
+        assert window["max"] == pytest.approx(100)
+        sizes = data["message_bytes"]["60s"]
+        assert sizes["count"] == 2
+        assert sizes["min"] == 64
+        assert sizes["max"] == 4096
+
+    def test_frames_per_write(self):
+        metrics = ConnectionMetrics("test")
+        assert metrics.get_frames_per_write() == 0.0
+
+        metrics.record_write(1)
+        metrics.record_write(5)
+        assert metrics.writes == 2
+        assert metrics.to_dict()["frames_per_write"] == pytest.approx(3.0)
+
+    def test_coalescing_ratio(self):
+        metrics = ConnectionMetrics("test")
+        assert metrics.get_coalescing_ratio() == 0.0
+
+        metrics.record_move(merged=False)
+        for _ in range(3):
+            metrics.record_move(merged=True)
+        metrics.record_move(merged=False)
+        assert metrics.to_dict()["coalescing_ratio"] == pytest.approx(2.5)
+
+    def test_injection_latency(self):
+        metrics = ConnectionMetrics("test")
+        assert metrics.get_avg_injection_latency() == 0.0
+
+        metrics.record_injection(0.001)
+        metrics.record_injection(0.003)
+        data = metrics.to_dict()
+        assert data["key_injections"] == 2
+        assert data["injection_avg_ms"] == pytest.approx(2.0)
+        assert data["injection_max_ms"] == pytest.approx(3.0)
+
 
 @pytest.mark.anyio
 class TestMetricsCollector:
@@ -70,3 +399,157 @@ class TestMetricsCollector:
         assert len(all_metrics) == 2
         assert "conn1" in all_metrics
         assert "conn2" in all_metrics
+
+    async def test_peer_clocks_exported(self):
+        collector = MetricsCollector()
+        clock = PeerClock()
+        collector.track_peer_clock("client-1", clock)
+        assert collector.get_peer_clock("client-1") is clock
+        assert collector.get_peer_clocks()["client-1"]["synced"] is False
+        collector.untrack_peer_clock("client-1")
+        assert collector.get_peer_clocks() == {}
+
+    async def test_aggregate_merges_histograms(self):
+        collector = MetricsCollector()
+        fast = await collector.register_connection("fast")
+        slow = await collector.register_connection("slow")
+        for _ in range(90):
+            fast.record_latency(0.001)
+        for _ in range(10):
+            slow.record_latency(0.050)
+
+        all_metrics = await collector.get_all_metrics(aggregate=True)
+        merged = all_metrics[MetricsCollector.AGGREGATE_ID]
+        assert merged["connections"] == 2
+        assert merged["latency_ms"]["10s"]["count"] == 100
+        assert merged["latency_ms"]["10s"]["p50"] == pytest.approx(1, rel=0.04)
+        assert merged["latency_ms"]["10s"]["p99"] == pytest.approx(50, rel=0.04)
+        assert MetricsCollector.AGGREGATE_ID not in await collector.get_all_metrics()
+
+
+def _block_loop(seconds: float):
+    sleep(seconds)
+
+
+@pytest.mark.anyio
+class TestLoopMonitor:
+    async def test_records_lag_and_captures_stalling_callback(self):
+        monitor = LoopMonitor(interval=0.002, slow_threshold=0.03)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.02)
+            _block_loop(0.12)
+            await asyncio.sleep(0.02)
+        finally:
+            monitor.stop()
+
+        assert monitor.lag.snapshot().count > 2
+        assert monitor.slow_count == 1
+        (stall,) = monitor.slow_callbacks()
+        assert stall["lag_ms"] == pytest.approx(120, abs=60)
+        assert stall["task"] == asyncio.current_task().get_name()
+        assert any("_block_loop" in line for line in stall["stack"])
+
+        data = monitor.to_dict(EXPORT_WINDOWS)
+        assert data["running"] is False
+        assert data["lag_ms"]["10s"]["max"] >= 90
+        assert data["slow_callbacks"] == [stall]
+
+    async def test_slow_callbacks_since(self):
+        monitor = LoopMonitor(capacity=2)
+        for lag in (0.05, 0.06, 0.07):
+            monitor._on_stall(lag, beat=0.0)
+        assert monitor.slow_count == 3
+        assert [s["lag_ms"] for s in monitor.slow_callbacks()] == [60, 70]
+        assert [s["lag_ms"] for s in monitor.slow_callbacks(since=2)] == [70]
+        assert monitor.slow_callbacks(since=3) == []
+        # Never sampled by the watchdog: kept without a stack.
+        assert monitor.slow_callbacks()[0]["stack"] == []
+        monitor.clear()
+        assert monitor.slow_callbacks() == []
+
+    async def test_acquire_shares_one_monitor_per_loop(self):
+        first = LoopMonitor.acquire()
+        second = LoopMonitor.acquire()
+        assert first is second is LoopMonitor.current()
+        assert first.running
+        first.release()
+        assert LoopMonitor.current() is first
+        second.release()
+        assert LoopMonitor.current() is None
+        await asyncio.sleep(0)
+        assert not first.running
+
+    async def test_performance_monitor_exports_loop_metrics(self):
+        collector = MetricsCollector()
+        monitor = PerformanceMonitor(collector, interval=60)
+        assert collector.get_loop_metrics() is None
+        await monitor.start()
+        try:
+            await asyncio.sleep(0.02)
+            loop_metrics = collector.get_loop_metrics()
+            assert loop_metrics["running"] is True
+            assert set(loop_metrics["lag_ms"]) == set(EXPORT_WINDOWS)
+        finally:
+            await monitor.stop()
+        assert collector.get_loop_metrics() is None
+        assert LoopMonitor.current() is None
+
+
+def _spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    def test_writes_collapsed_stacks_per_thread(self, tmp_path):
+        stop = threading.Event()
+        worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+        worker.start()
+        profiler = SamplingProfiler(
+            str(tmp_path),
+            interval=0.002,
+            labels={threading.get_ident(): "event-loop"},
+        )
+        try:
+            profiler.start(duration=0.2)
+            with pytest.raises(RuntimeError):
+                profiler.start()
+            sleep(0.1)
+            result = profiler.stop()
+        finally:
+            stop.set()
+            worker.join()
+
+        assert not profiler.running
+        assert result["error"] is None
+        assert result["samples"] > 5
+        assert result["threads"]["spinner"] == result["samples"]
+        assert "event-loop" in result["threads"]
+        assert "SamplingProfiler" not in result["threads"]
+
+        with open(result["path"]) as f:
+            lines = f.read().splitlines()
+        total = 0
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            total += int(count)
+            if stack.startswith("spinner;"):
+                assert "_spin (test_metrics.py:" in stack
+        assert total == sum(result["threads"].values())
+
+    def test_stops_after_duration(self, tmp_path):
+        profiler = SamplingProfiler(str(tmp_path), interval=0.005)
+        profiler.start(duration=0.05)
+        sleep(0.3)
+        assert not profiler.running
+        assert profiler.result["duration_s"] < 0.2
+        assert profiler.stop() is profiler.result
+
+    def test_rejects_unbounded_duration(self, tmp_path):
+        profiler = SamplingProfiler(str(tmp_path))
+        with pytest.raises(ValueError):
+            profiler.start(duration=SamplingProfiler.MAX_DURATION + 1)
+        with pytest.raises(ValueError):
+            profiler.start(duration=0)
+        assert profiler.stop() is None
@@ -16,6 +16,8 @@
 
 """Unit tests for the monitor / layout model."""
 
+import random
+
 import pytest
 
 from utils.screen import (
@@ -78,6 +80,130 @@ class TestMonitorLayoutNeighbors:
         assert layout.has_neighbor_top(primary, x=1500) is False
 
 
+def _scan_monitor_at(monitors, x, y):
+    return next((m for m in monitors if m.contains(x, y)), None)
+
+
+def _scan_neighbor(monitors, monitor, coord, side):
+    for m in monitors:
+        if m.monitor_id == monitor.monitor_id:
+            continue
+        if side == "left":
+            hit = m.max_x <= monitor.min_x and m.min_y <= coord < m.max_y
+            gap = monitor.min_x - m.max_x
+        elif side == "right":
+            hit = m.min_x >= monitor.max_x and m.min_y <= coord < m.max_y
+            gap = m.min_x - monitor.max_x
+        elif side == "top":
+            hit = m.max_y <= monitor.min_y and m.min_x <= coord < m.max_x
+            gap = monitor.min_y - m.max_y
+        else:
+            hit = m.min_y >= monitor.max_y and m.min_x <= coord < m.max_x
+            gap = m.min_y - monitor.max_y
+        if hit and gap <= 2:
+            return True
+    return False
+
+
+def _random_layout(rng: random.Random, count: int) -> tuple[MonitorInfo, ...]:
+    # Snapped to a coarse grid so abutting and 1-2 px gapped edges occur.
+    monitors = []
+    for i in range(count):
+        x = rng.randrange(-4, 5) * 960 + rng.choice((0, 0, 1, 2, 3))
+        y = rng.randrange(-3, 4) * 540 + rng.choice((0, 0, 1, 2, 3))
+        monitors.append(
+            _mon(i, x, y, rng.choice((960, 1280, 1920)), rng.choice((540, 1080)))
+        )
+    return tuple(monitors)
+
+
+class TestMonitorLayoutIndex:
+    @pytest.mark.parametrize("count", [1, 3, 8, 32])
+    def test_index_matches_linear_scan(self, count):
+        rng = random.Random(count)
+        for _ in range(20):
+            monitors = _random_layout(rng, count)
+            layout = MonitorLayout(monitors=monitors)
+            min_x, min_y, max_x, max_y = layout.virtual_bbox
+            for _ in range(200):
+                x = rng.uniform(min_x - 50, max_x + 50)
+                y = rng.uniform(min_y - 50, max_y + 50)
+                assert layout.find_monitor_at(x, y) == _scan_monitor_at(monitors, x, y)
+            for m in monitors:
+                for coord in (
+                    *(rng.uniform(min_y - 50, max_y + 50) for _ in range(20)),
+                    m.min_y,
+                    m.max_y,
+                ):
+                    for side in ("left", "right"):
+                        expected = _scan_neighbor(monitors, m, coord, side)
+                        query = getattr(layout, f"has_neighbor_{side}")
+                        assert query(m, coord) is expected
+                for coord in (
+                    *(rng.uniform(min_x - 50, max_x + 50) for _ in range(20)),
+                    m.min_x,
+                    m.max_x,
+                ):
+                    for side in ("top", "bottom"):
+                        expected = _scan_neighbor(monitors, m, coord, side)
+                        query = getattr(layout, f"has_neighbor_{side}")
+                        assert query(m, coord) is expected
+
+    def test_overlapping_monitors_resolve_to_first(self):
+        mirror = _mon(monitor_id=0, x=0, y=0, w=1920, h=1080, primary=True)
+        clone = _mon(monitor_id=1, x=0, y=0, w=1280, h=720)
+        layout = MonitorLayout(monitors=(mirror, clone))
+
+        assert layout.find_monitor_at(100, 100) is mirror
+        assert layout.find_monitor_at(1500, 900) is mirror
+
+    def test_reassigned_monitors_are_reindexed(self):
+        left = _mon(monitor_id=0, x=0, y=0, w=1920, h=1080, primary=True)
+        right = _mon(monitor_id=1, x=1920, y=0, w=1920, h=1080)
+        layout = MonitorLayout(monitors=(left,))
+        assert layout.find_monitor_at(2000, 500) is None
+
+        layout.monitors = (left, right)
+        assert layout.find_monitor_at(2000, 500) is right
+        assert layout.has_neighbor_right(left, y=500) is True
+        assert layout.virtual_bbox == (0, 0, 3840, 1080)
+
+    def test_small_layouts_scan_and_large_ones_index(self):
+        row = tuple(
+            _mon(monitor_id=i, x=i * 1920, y=0, w=1920, h=1080, primary=i == 0)
+            for i in range(4)
+        )
+        layout = MonitorLayout(monitors=row[:2])
+        assert layout._index is None
+        assert layout.has_neighbor_right(row[0], y=500) is True
+
+        layout.monitors = row
+        assert layout.find_monitor_at(6000, 500) is row[3]
+        assert layout._index is not None
+
+        layout.monitors = row[:1]
+        assert layout.find_monitor_at(2000, 500) is None
+        assert layout._index is None
+
+    def test_foreign_monitor_uses_scan(self):
+        left = _mon(monitor_id=0, x=0, y=0, w=1920, h=1080, primary=True)
+        right = _mon(monitor_id=1, x=1920, y=0, w=1920, h=1080)
+        lower = tuple(
+            _mon(monitor_id=2 + i, x=i * 1920, y=1080, w=1920, h=1080) for i in range(2)
+        )
+        layout = MonitorLayout(monitors=(left, right, *lower))
+        # Same id as ``left`` but different geometry: not in the index.
+        moved = _mon(monitor_id=0, x=1, y=0, w=1918, h=1080)
+
+        assert layout.has_neighbor_right(moved, y=500) is True
+
+    def test_empty_layout(self):
+        layout = MonitorLayout()
+        assert layout.virtual_bbox == (0, 0, 0, 0)
+        assert layout.find_monitor_at(0, 0) is None
+        assert layout.nearest_monitor(0, 0) is None
+
+
 class TestLayoutSlot:
     def test_segment_validation_rejects_inverted_range(self):
         with pytest.raises(ValueError):
@@ -22,6 +22,8 @@ Tests EdgeDetector, ServerMouseListener, ServerMouseController, and ClientMouseC
 from tests.unit import _MOCK_PYNPUT
 
 import asyncio
+import math
+import random
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -43,12 +45,15 @@ from network.stream import StreamType
 _MOCK_PYNPUT()
 
 from input.mouse._base import (  # noqa: E402
+    CursorTracker,
     EdgeDetector,
+    MovementHistory,
     ScreenEdge,
     ServerMouseListener,
     ServerMouseController,
     ClientMouseController,
     ButtonMapping,
+    _compile_edge_routes,
 )
 from utils.screen import MonitorLayout  # noqa: E402
 
@@ -326,6 +331,208 @@ class TestEdgeDetector:
         assert y == 1079
 
 
+# ============================================================================
+# MovementHistory Tests
+# ============================================================================
+
+
+def _scan_agreements(points, axis, sign):
+    """Reference: the pairwise walk the detectors used to do per sample."""
+    return sum(
+        1
+        for i in range(len(points) - 1)
+        if (points[i + 1][axis] - points[i][axis]) * sign > 0
+    )
+
+
+class TestMovementHistory:
+    """Incremental direction counts against the full history walk."""
+
+    def test_behaves_like_bounded_deque(self):
+        history = MovementHistory(3)
+        for i in range(5):
+            history.append((i, -i))
+        assert len(history) == 3
+        assert list(history) == [(2, -2), (3, -3), (4, -4)]
+        assert history[0] == (2, -2) and history[-1] == (4, -4)
+        assert history.agreements(0, 1) == 2
+        assert history.agreements(1, -1) == 2
+        history.clear()
+        assert len(history) == 0
+        assert history.agreements(0, 1) == 0
+
+    def test_random_walk_matches_scan(self):
+        rng = random.Random(19)
+        monitor = MagicMock(min_x=0, min_y=0, max_x=200, max_y=100)
+        layout = MonitorLayout.from_bboxes([(0, 0, 200, 100), (200, 0, 300, 60)])
+        for maxlen in (1, 2, 5, 8):
+            history = MovementHistory(maxlen)
+            x, y = 100, 50
+            for _ in range(2000):
+                if rng.random() < 0.02:
+                    history.clear()
+                # Mostly drifting toward a corner, with jitter and stalls.
+                x = max(0, min(199, x + rng.choice((-3, -1, 0, 0, 1, 2, 4))))
+                y = max(0, min(99, y + rng.choice((-2, -1, 0, 1, 3))))
+                history.append((x, y))
+                points = list(history)
+                assert len(points) <= maxlen
+                for axis in (0, 1):
+                    for sign in (-1, 1):
+                        assert history.agreements(axis, sign) == _scan_agreements(
+                            points, axis, sign
+                        )
+                ratio = rng.choice((0.5, 0.85, 1.0))
+                assert EdgeDetector.is_at_edge(
+                    history, x, y, (200, 100), False, ratio
+                ) == EdgeDetector.is_at_edge(points, x, y, (200, 100), False, ratio)
+                assert EdgeDetector.is_at_edge(
+                    history, x, y, layout, False, ratio
+                ) == EdgeDetector.is_at_edge(points, x, y, layout, False, ratio)
+                assert ClientMouseController._detect_directed_edge(
+                    history, x, y, monitor, ratio
+                ) == ClientMouseController._detect_directed_edge(
+                    points, x, y, monitor, ratio
+                )
+
+
+# ============================================================================
+# CursorTracker Tests
+# ============================================================================
+
+
+class _SimulatedCursor:
+    """OS cursor stand-in: moves by ``gain`` x delta, stays on its monitor."""
+
+    def __init__(self, layout: MonitorLayout, gain: float = 1.0):
+        self.layout = layout
+        self.gain = gain
+        self.x, self.y = 960, 540
+        self.reads = 0
+
+    def move(self, dx, dy):
+        x = self.x + round(dx * self.gain)
+        y = self.y + round(dy * self.gain)
+        if self.layout.find_monitor_at(x, y) is None:
+            m = self.layout.find_monitor_at(self.x, self.y)
+            x = max(m.min_x, min(m.max_x - 1, x))
+            y = max(m.min_y, min(m.max_y - 1, y))
+        self.x, self.y = x, y
+
+    def query(self):
+        self.reads += 1
+        return self.x, self.y
+
+    def to_edge(self) -> int:
+        m = self.layout.find_monitor_at(self.x, self.y)
+        return min(
+            self.x - m.min_x,
+            m.max_x - 1 - self.x,
+            self.y - m.min_y,
+            m.max_y - 1 - self.y,
+        )
+
+
+def _replay_trace(layout: MonitorLayout, steps: int = 20000, seed: int = 7):
+    """1 kHz deltas of a user moving between targets on the monitors,
+    pausing, and now and then shoving the cursor into an edge."""
+    rng = random.Random(seed)
+    trace = []
+    x, y = 960.0, 540.0
+    while len(trace) < steps:
+        if rng.random() < 0.2:
+            trace.extend([(0, 0)] * rng.randint(50, 300))
+            continue
+        m = rng.choice(layout.monitors)
+        tx = rng.uniform(m.min_x, m.max_x - 1)
+        ty = rng.uniform(m.min_y, m.max_y - 1)
+        overshoot = rng.random() < 0.25
+        if overshoot:
+            tx = rng.choice((m.min_x - 300, m.max_x + 300))
+        speed = rng.uniform(0.3, 12)
+        dist = math.hypot(tx - x, ty - y)
+        n = max(1, int(dist / speed))
+        vx, vy = (tx - x) / n, (ty - y) / n
+        fx = fy = 0.0
+        for _ in range(n):
+            # Sub-pixel motion carries over, as the mouse reports it.
+            fx += vx
+            fy += vy
+            dx, dy = int(fx), int(fy)
+            fx -= dx
+            fy -= dy
+            trace.append((dx, dy))
+        x = max(m.min_x, min(m.max_x - 1, tx))
+        y = ty
+    return trace[:steps]
+
+
+class TestCursorTracker:
+    LAYOUT = MonitorLayout.from_bboxes([(0, 0, 1920, 1080), (1920, 0, 3200, 1024)])
+
+    def _tracker(self, cursor, clock):
+        return CursorTracker(cursor.query, self.LAYOUT, clock=lambda: clock[0])
+
+    def test_replayed_trace_stays_within_a_pixel(self):
+        cursor = _SimulatedCursor(self.LAYOUT)
+        clock = [0.0]
+        tracker = self._tracker(cursor, clock)
+
+        trace = _replay_trace(self.LAYOUT)
+        for dx, dy in trace:
+            cursor.move(dx, dy)
+            tracker.move(dx, dy)
+            clock[0] += 0.001  # 1 kHz
+            x, y = tracker.position()
+            assert abs(x - cursor.x) <= 1 and abs(y - cursor.y) <= 1
+
+        # Most moves were answered without asking the OS.
+        assert cursor.reads < len(trace) / 4
+
+    def test_accelerated_motion_resyncs_before_edges(self):
+        # The OS applies pointer acceleration the deltas don't show.
+        cursor = _SimulatedCursor(self.LAYOUT, gain=1.8)
+        clock = [0.0]
+        tracker = self._tracker(cursor, clock)
+
+        for dx, dy in _replay_trace(self.LAYOUT, seed=11):
+            cursor.move(dx, dy)
+            tracker.move(dx, dy)
+            clock[0] += 0.001
+            pos = tracker.position()
+            if cursor.to_edge() < CursorTracker.EDGE_MARGIN:
+                assert pos == (cursor.x, cursor.y)
+
+    def test_resyncs_after_interval_and_invalidate(self):
+        cursor = _SimulatedCursor(self.LAYOUT)
+        clock = [0.0]
+        tracker = self._tracker(cursor, clock)
+
+        assert tracker.position() == (960, 540)
+        assert tracker.position() == (960, 540)
+        assert cursor.reads == 1
+
+        # Moved by something the tracker didn't see.
+        cursor.x = 100
+        clock[0] += CursorTracker.RESYNC_INTERVAL
+        assert tracker.position() == (100, 540)
+        assert cursor.reads == 2
+
+        cursor.x = 200
+        tracker.invalidate()
+        assert tracker.position() == (200, 540)
+        assert cursor.reads == 3
+
+    def test_failed_query_returns_none(self):
+        def query():
+            raise RuntimeError("no display")
+
+        tracker = CursorTracker(query, self.LAYOUT)
+        assert tracker.position() is None
+        tracker.move(5, 5)
+        assert tracker.position() is None
+
+
 # ============================================================================
 # ServerMouseListener Tests
 # ============================================================================
@@ -612,6 +819,107 @@ class TestServerMouseListener:
         assert listener._movement_history[0] == (100, 200)
 
 
+def _scan_bindings(edge_snapshot, active, monitor_id, edge, axis_norm):
+    """Reference: first binding per active client, first client wins."""
+    first, uids = None, []
+    for client_uid, bindings in edge_snapshot:
+        if client_uid not in active:
+            continue
+        for b in bindings:
+            if b.get("server_monitor_id") != monitor_id:
+                continue
+            if b.get("server_edge") != edge:
+                continue
+            if b["server_axis_start"] <= axis_norm < b["server_axis_end"]:
+                uids.append(client_uid)
+                if first is None:
+                    first = (client_uid, b)
+                break
+    return first, tuple(uids)
+
+
+class TestCompiledEdgeRoutes:
+    """Compiled (monitor, edge) routes against the per-client binding scan."""
+
+    @staticmethod
+    def _binding(monitor_id, edge, s_start, s_end, c_start=0.0, c_end=1.0):
+        return {
+            "server_monitor_id": monitor_id,
+            "server_edge": edge,
+            "server_axis_start": s_start,
+            "server_axis_end": s_end,
+            "client_monitor_id": 1,
+            "client_axis_start": c_start,
+            "client_axis_end": c_end,
+        }
+
+    def test_random_bindings_match_scan(self):
+        rng = random.Random(18)
+        for _ in range(50):
+            snapshot = []
+            for c in range(rng.randint(1, 12)):
+                bindings = []
+                for _ in range(rng.randint(0, 4)):
+                    a, b = sorted(round(rng.random(), 2) for _ in range(2))
+                    bindings.append(
+                        self._binding(
+                            rng.randint(0, 1),
+                            rng.choice(("left", "right")),
+                            a,
+                            b,
+                            rng.random(),
+                            rng.random(),
+                        )
+                    )
+                snapshot.append((f"client{c}", tuple(bindings)))
+            snapshot = tuple(snapshot)
+            active = tuple(uid for uid, _ in snapshot if rng.random() < 0.8)
+            routes = _compile_edge_routes(snapshot, active)
+
+            for monitor_id in (0, 1):
+                for edge in ("left", "right"):
+                    route = routes.get((monitor_id, edge))
+                    for axis_norm in [i / 100 for i in range(101)]:
+                        expected, uids = _scan_bindings(
+                            snapshot, active, monitor_id, edge, axis_norm
+                        )
+                        match = route.lookup(axis_norm) if route else None
+                        if expected is None:
+                            assert match is None
+                            continue
+                        entry, matches = match
+                        assert (entry.client_uid, entry.binding) == expected
+                        assert matches == uids
+                        b = entry.binding
+                        local = (axis_norm - b["server_axis_start"]) / (
+                            b["server_axis_end"] - b["server_axis_start"]
+                        )
+                        assert entry.map_axis(axis_norm) == pytest.approx(
+                            b["client_axis_start"]
+                            + local * (b["client_axis_end"] - b["client_axis_start"])
+                        )
+
+    def test_overlap_reports_every_candidate_in_client_order(self):
+        snapshot = (
+            ("b", (self._binding(0, "right", 0.0, 1.0),)),
+            ("a", (self._binding(0, "right", 0.5, 1.0),)),
+        )
+        route = _compile_edge_routes(snapshot, ("b", "a"))[(0, "right")]
+
+        entry, matches = route.lookup(0.25)
+        assert entry.client_uid == "b" and matches == ("b",)
+        entry, matches = route.lookup(0.75)
+        assert entry.client_uid == "b" and matches == ("b", "a")
+        assert route.lookup(1.0) is None
+
+    def test_empty_spans_and_inactive_clients_are_dropped(self):
+        snapshot = (
+            ("gone", (self._binding(0, "left", 0.0, 1.0),)),
+            ("empty", (self._binding(0, "left", 0.4, 0.4),)),
+        )
+        assert _compile_edge_routes(snapshot, ("empty",)) == {}
+
+
 # ============================================================================
 # ServerMouseController Tests
 # ============================================================================
@@ -1335,6 +1643,51 @@ class TestClientMouseController:
 
             await controller.stop()
 
+    @pytest.mark.anyio
+    async def test_batch_coalesces_relative_moves_in_order(
+        self,
+        event_bus,
+        mock_stream_handler,
+        mock_mouse_controller,
+    ):
+        """A drained burst sums relative moves around clicks, edge check per run."""
+        with patch(
+            "input.mouse._base.MouseController", return_value=mock_mouse_controller
+        ):
+            controller = ClientMouseController(
+                event_bus,
+                mock_stream_handler,
+                mock_stream_handler,
+            )
+            controller._check_edge = AsyncMock()
+
+            def move(dx, dy):
+                return MouseEvent(dx=dx, dy=dy, action=MouseEvent.MOVE_ACTION)
+
+            await controller._apply_batch(
+                [
+                    move(1, 0),
+                    move(2, 1),
+                    move(3, -1),
+                    MouseEvent(
+                        button=1, action=MouseEvent.CLICK_ACTION, is_pressed=True
+                    ),
+                    move(-4, 2),
+                    move(-1, 0),
+                ]
+            )
+
+            calls = [
+                (name, kwargs)
+                for name, _, kwargs in mock_mouse_controller.mock_calls
+                if name in ("move", "press")
+            ]
+            assert [name for name, _ in calls] == ["move", "press", "move"]
+            assert calls[0][1] == {"dx": 6, "dy": 0}
+            assert calls[2][1] == {"dx": -5, "dy": 2}
+            assert controller._last_move_delta == (-5, 2)
+            assert controller._check_edge.await_count == 2
+
     @pytest.mark.anyio
     async def test_movement_history_max_length(
         self,
@@ -0,0 +1,287 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import asyncio
+
+import pytest
+
+from event import MouseEvent
+from event.bus import AsyncEventBus
+from model.client import ClientObj, ClientsManager
+from network.protocol.message import ProtocolMessage
+from network.stream import StreamType
+from network.stream.handler import MoveCoalescingQueue
+from network.stream.handler.server import UnidirectionalStreamHandler
+from utils.metrics import ConnectionMetrics, MetricsCollector
+from utils.metrics.trace import TRACE_KEY, TRACER
+
+
+def _move(dx, dy) -> MouseEvent:
+    return MouseEvent(dx=dx, dy=dy, action=MouseEvent.MOVE_ACTION)
+
+
+@pytest.fixture
+def tracer():
+    TRACER.reset()
+    yield TRACER
+    TRACER.disable()
+    TRACER.reset()
+
+
+def _drain(queue: asyncio.Queue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+class TestMoveCoalescingQueue:
+    def test_sums_consecutive_moves(self):
+        metrics = ConnectionMetrics("test")
+        queue = MoveCoalescingQueue(metrics=lambda: metrics)
+        for _ in range(4):
+            queue.put_nowait(_move(1, -2))
+
+        items = _drain(queue)
+        assert [(e.dx, e.dy) for e in items] == [(4, -8)]
+        assert metrics.get_coalescing_ratio() == pytest.approx(4.0)
+
+    def test_never_merges_across_other_events(self):
+        queue = MoveCoalescingQueue()
+        click = MouseEvent(button=1, action=MouseEvent.CLICK_ACTION, is_pressed=True)
+        scroll = MouseEvent(dx=0, dy=3, action=MouseEvent.SCROLL_ACTION)
+        position = MouseEvent(x=10, y=20, action=MouseEvent.MOVE_ACTION)
+        for item in (
+            _move(1, 1),
+            _move(1, 1),
+            click,
+            _move(2, 0),
+            scroll,
+            position,
+            _move(0, 5),
+            _move(0, 5),
+        ):
+            queue.put_nowait(item)
+
+        items = _drain(queue)
+        assert items[1] is click and items[3] is scroll and items[4] is position
+        assert [(e.dx, e.dy) for e in items] == [
+            (2, 2),
+            (0, 0),
+            (2, 0),
+            (0, 3),
+            (0, 0),
+            (0, 10),
+        ]
+
+    def test_taken_items_are_not_mutated(self):
+        queue = MoveCoalescingQueue()
+        queue.put_nowait(_move(1, 1))
+        first = queue.get_nowait()
+        queue.put_nowait(_move(5, 5))
+
+        assert (first.dx, first.dy) == (1, 1)
+        assert (queue.get_nowait().dx, first.dx) == (5, 1)
+
+    def test_merged_move_keeps_its_trace(self):
+        queue = MoveCoalescingQueue()
+        queue.put_nowait(_move(1, 0))
+        sampled = _move(1, 0)
+        sampled.trace = object()
+        queue.put_nowait(sampled)
+
+        assert queue.get_nowait().trace is sampled.trace
+
+    def test_merges_into_full_queue(self):
+        queue = MoveCoalescingQueue(maxsize=1)
+        queue.put_nowait(_move(1, 0))
+        queue.put_nowait(_move(1, 0))
+        with pytest.raises(asyncio.QueueFull):
+            queue.put_nowait(MouseEvent(button=1, action=MouseEvent.CLICK_ACTION))
+        assert queue.get_nowait().dx == 2
+
+
+@pytest.mark.anyio
+class TestCoalescingStreamHandler:
+    async def test_busy_sender_coalesces_moves(self):
+        release = asyncio.Event()
+        writes: list[bytes] = []
+
+        async def slow_send(data: bytes):
+            writes.append(data)
+            await release.wait()
+
+        clients = ClientsManager()
+        client = ClientObj(uid="c1", is_connected=True)
+        clients.add_client(client)
+        handler = UnidirectionalStreamHandler(
+            stream_type=StreamType.MOUSE,
+            clients=clients,
+            event_bus=AsyncEventBus(),
+            metrics_collector=MetricsCollector(),
+            coalesce_moves=True,
+        )
+        received: list[tuple[float, float]] = []
+
+        await handler.msg_exchange.set_transport(send_callback=slow_send)
+        await handler.msg_exchange.start()
+        handler._active_client = client
+        await handler.start()
+        handler._notify_send_ready()
+
+        await handler.send(_move(1, 1))
+        await asyncio.sleep(0.01)
+        assert len(writes) == 1  # sender is now blocked in the transport
+
+        for _ in range(50):
+            handler.send_nowait(_move(1, 2))
+        release.set()
+        await asyncio.sleep(0.05)
+
+        for data in writes:
+            message = ProtocolMessage.from_bytes(data)
+            received.append((message.payload["dx"], message.payload["dy"]))
+        assert received == [(1, 1), (50, 100)]
+        assert handler.msg_exchange.metrics.get_coalescing_ratio() == pytest.approx(
+            51 / 2
+        )
+
+        await handler.stop()
+
+    async def test_sampled_events_carry_trace_block(self, tracer):
+        writes: list[bytes] = []
+
+        async def send(data: bytes):
+            writes.append(data)
+
+        clients = ClientsManager()
+        client = ClientObj(uid="c1", is_connected=True)
+        clients.add_client(client)
+        handler = UnidirectionalStreamHandler(
+            stream_type=StreamType.MOUSE,
+            clients=clients,
+            event_bus=AsyncEventBus(),
+            metrics_collector=MetricsCollector(),
+        )
+        await handler.msg_exchange.set_transport(send_callback=send)
+        await handler.msg_exchange.start()
+        handler._active_client = client
+        await handler.start()
+        handler._notify_send_ready()
+
+        tracer.enable(sample_every=2)
+        for i in range(4):
+            handler.send_nowait(_move(i, 0))
+            await asyncio.sleep(0.01)
+
+        payloads = [ProtocolMessage.from_bytes(data).payload for data in writes]
+        assert [p["dx"] for p in payloads] == [0, 1, 2, 3]
+        assert [TRACE_KEY in p for p in payloads] == [True, False, True, False]
+        snap = tracer.snapshot()
+        assert snap["completed"] == 2
+        assert snap["hops"]["send_queue"]["count"] == 2
+        assert snap["hops"]["serialize"]["count"] == 2
+
+        await handler.stop()
+
+
+class _Unencodable:
+    def to_dict(self) -> dict:
+        return {"dx": object(), "dy": 0, "x": -1, "y": -1, "event": "move"}
+
+
+class _Switch:
+    """Item whose serialization makes ``client`` the active one."""
+
+    def __init__(self, handler, client):
+        self.handler = handler
+        self.client = client
+
+    def to_dict(self) -> dict:
+        self.handler._active_client = self.client
+        return _move(0, 0).to_dict()
+
+
+@pytest.mark.anyio
+class TestBatchedSend:
+    async def _handler(self, writes: list[bytes]):
+        async def send(data: bytes):
+            writes.append(data)
+
+        clients = ClientsManager()
+        client = ClientObj(uid="c1", is_connected=True, screen_position="left")
+        clients.add_client(client)
+        handler = UnidirectionalStreamHandler(
+            stream_type=StreamType.MOUSE,
+            clients=clients,
+            event_bus=AsyncEventBus(),
+            metrics_collector=MetricsCollector(),
+        )
+        handler.msg_exchange.config.max_batch_bytes = 1 << 16
+        handler.msg_exchange.config.max_batch_latency = 0
+        await handler.msg_exchange.set_transport(send_callback=send)
+        handler._active_client = client
+        return handler
+
+    @staticmethod
+    def _frames(writes: list[bytes]) -> list[list[ProtocolMessage]]:
+        batches = []
+        for data in writes:
+            messages = []
+            while data:
+                message = ProtocolMessage.from_bytes(data)
+                messages.append(message)
+                data = data[len(message.to_bytes()) :]
+            batches.append(messages)
+        return batches
+
+    async def test_unencodable_item_is_dropped_alone(self):
+        writes: list[bytes] = []
+        handler = await self._handler(writes)
+        handler._send_queue.put_nowait(_Unencodable())
+        handler._send_queue.put_nowait(_move(2, 0))
+
+        await handler._send_batched(_move(1, 0), target="left")
+
+        (batch,) = self._frames(writes)
+        assert [m.payload["dx"] for m in batch] == [1, 2]
+
+    async def test_target_change_starts_a_new_batch(self):
+        writes: list[bytes] = []
+        handler = await self._handler(writes)
+        other = ClientObj(uid="c2", is_connected=True, screen_position="right")
+        handler._send_queue.put_nowait(_Switch(handler, other))
+        handler._send_queue.put_nowait(_move(3, 0))
+
+        await handler._send_batched(_move(1, 0), target="left")
+
+        first, second = self._frames(writes)
+        assert [m.target for m in first] == ["left", "left"]
+        assert [m.target for m in second] == ["right"]
+        assert second[0].payload["dx"] == 3
+
+    async def test_stops_draining_when_client_goes_away(self):
+        writes: list[bytes] = []
+        handler = await self._handler(writes)
+        handler._send_queue.put_nowait(_Switch(handler, None))
+        handler._send_queue.put_nowait(_move(3, 0))
+
+        await handler._send_batched(_move(1, 0), target="left")
+
+        (batch,) = self._frames(writes)
+        assert len(batch) == 2
+        assert handler._send_queue.qsize() == 1
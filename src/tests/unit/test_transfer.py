@@ -0,0 +1,320 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import hashlib
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from input.clipboard._base import (
+    ClipboardCache,
+    ClipboardController,
+    ClipboardListener,
+    ClipboardType,
+)
+from model.connection import StreamWrapper
+from network.data import FileTransferError
+from network.data.exchange import MessageExchange
+from network.data import transfer
+from network.data.transfer import FileTransferManager, _part_name
+from network.protocol.capabilities import LEGACY_CAPABILITIES, local_capabilities
+from network.protocol.message import FileDataFrame
+from network.stream import StreamType
+
+
+async def _connected_exchanges(sendfile: bool = True):
+    accepted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def on_client(reader, writer):
+        accepted.set_result((reader, writer))
+
+    server = await asyncio.start_server(on_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client_streams = StreamWrapper(*await asyncio.open_connection("127.0.0.1", port))
+    server_streams = StreamWrapper(*await accepted)
+
+    exchanges = []
+    for stream in (client_streams, server_streams):
+        exchange = MessageExchange()
+        exchange.apply_capabilities(local_capabilities()[StreamType.FILE])
+        await exchange.set_transport(
+            send_callback=stream.get_writer_call(),
+            receive_callback=stream.get_reader_call(),
+            sendfile_callback=stream.get_sendfile_call() if sendfile else None,
+        )
+        await exchange.start()
+        exchanges.append(exchange)
+
+    async def close():
+        for exchange in exchanges:
+            await exchange.stop()
+        for stream in (client_streams, server_streams):
+            await stream.close()
+        server.close()
+        await server.wait_closed()
+
+    return exchanges[0], exchanges[1], close
+
+
+def _write_file(path, size: int) -> bytes:
+    data = os.urandom(size)
+    with open(path, "wb") as f:
+        f.write(data)
+    return data
+
+
+class _FileClipboard:
+    """Just enough clipboard backend for the listener and the controller."""
+
+    def __init__(self, on_change=None, content_types=None, max_image_size=0):
+        self.content_cache = ClipboardCache()
+        self.max_image_size = max_image_size
+        self.files: list[list[str]] = []
+
+    def is_listening(self) -> bool:
+        return True
+
+    async def set_clipboard_files(self, paths) -> bool:
+        self.files.append(paths)
+        return True
+
+
+def _clipboard_stream():
+    stream = MagicMock(name="ClipboardStream")
+    stream.send = AsyncMock()
+    stream.peer_capabilities.return_value = LEGACY_CAPABILITIES
+    return stream
+
+
+@pytest.mark.anyio
+class TestFileTransfer:
+    @pytest.mark.parametrize("sendfile", [True, False])
+    async def test_round_trip(self, tmp_path, sendfile):
+        src = tmp_path / "src.bin"
+        data = _write_file(src, 3 * 1024 * 1024 + 17)
+        received = []
+
+        async def on_received(path):
+            received.append(path)
+
+        tx_exchange, rx_exchange, close = await _connected_exchanges(sendfile)
+        sender = FileTransferManager(tx_exchange, str(tmp_path / "tx"))
+        FileTransferManager(
+            rx_exchange, str(tmp_path / "rx"), on_file_received=on_received
+        )
+
+        digest = await sender.send_file(str(src))
+        # Plain TCP keeps the zero-copy path on every event loop.
+        zero_copy = tx_exchange._sendfile_callbacks["default"] is not None
+        await close()
+
+        assert zero_copy == (sendfile and hasattr(os, "sendfile"))
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert received == [str(tmp_path / "rx" / "src.bin")]
+        with open(received[0], "rb") as f:
+            assert f.read() == data
+        assert os.listdir(tmp_path / "rx") == ["src.bin"]
+
+    async def test_resumes_from_partial_file(self, tmp_path):
+        src = tmp_path / "big.bin"
+        data = _write_file(src, 2 * 1024 * 1024)
+        stat = os.stat(src)
+        rx_dir = tmp_path / "rx"
+        rx_dir.mkdir()
+        with open(
+            rx_dir / _part_name("big.bin", len(data), stat.st_mtime_ns), "wb"
+        ) as f:
+            f.write(data[:1500000])
+
+        tx_exchange, rx_exchange, close = await _connected_exchanges()
+        sender = FileTransferManager(tx_exchange, str(tmp_path / "tx"))
+        receiver = FileTransferManager(rx_exchange, str(rx_dir))
+        offsets = []
+        on_file_data = receiver.on_file_data
+
+        async def record(tr_id, transfer_id, offset, chunk):
+            offsets.append(offset)
+            await on_file_data(tr_id, transfer_id, offset, chunk)
+
+        receiver.on_file_data = record
+
+        await sender.send_file(str(src))
+        await close()
+
+        assert offsets[0] == 1500000
+        with open(rx_dir / "big.bin", "rb") as f:
+            assert f.read() == data
+
+    async def test_resumes_without_pread(self, tmp_path, monkeypatch):
+        # Windows: no os.pread/os.pwrite, and no zero-copy path.
+        monkeypatch.delattr(os, "pread")
+        monkeypatch.setattr(transfer, "_pread", transfer._seek_pread)
+        monkeypatch.setattr(transfer, "_pwrite", transfer._seek_pwrite)
+        src = tmp_path / "big.bin"
+        data = _write_file(src, 2 * 1024 * 1024 + 5)
+        rx_dir = tmp_path / "rx"
+        rx_dir.mkdir()
+        part = rx_dir / _part_name("big.bin", len(data), os.stat(src).st_mtime_ns)
+        part.write_bytes(data[:700000])
+
+        tx_exchange, rx_exchange, close = await _connected_exchanges(sendfile=False)
+        sender = FileTransferManager(tx_exchange, str(tmp_path / "tx"))
+        FileTransferManager(rx_exchange, str(rx_dir))
+        await sender.send_file(str(src))
+        await close()
+
+        assert (rx_dir / "big.bin").read_bytes() == data
+
+    async def test_corrupt_partial_fails_verification(self, tmp_path):
+        src = tmp_path / "f.bin"
+        data = _write_file(src, 100000)
+        rx_dir = tmp_path / "rx"
+        rx_dir.mkdir()
+        part = rx_dir / _part_name("f.bin", len(data), os.stat(src).st_mtime_ns)
+        part.write_bytes(b"\0" * 5000)
+
+        tx_exchange, rx_exchange, close = await _connected_exchanges()
+        sender = FileTransferManager(tx_exchange, str(tmp_path / "tx"))
+        FileTransferManager(rx_exchange, str(rx_dir))
+
+        with pytest.raises(FileTransferError, match="Digest mismatch"):
+            await sender.send_file(str(src))
+        await close()
+        assert os.listdir(rx_dir) == []
+
+    async def test_existing_file_is_not_overwritten(self, tmp_path):
+        src = tmp_path / "a.txt"
+        data = _write_file(src, 10)
+        rx_dir = tmp_path / "rx"
+        rx_dir.mkdir()
+        (rx_dir / "a.txt").write_bytes(b"keep")
+
+        tx_exchange, rx_exchange, close = await _connected_exchanges()
+        sender = FileTransferManager(tx_exchange, str(tmp_path / "tx"))
+        FileTransferManager(rx_exchange, str(rx_dir))
+        await sender.send_file(str(src))
+        await close()
+
+        assert (rx_dir / "a.txt").read_bytes() == b"keep"
+        assert (rx_dir / "a (1).txt").read_bytes() == data
+
+    async def test_reserved_names_are_never_shared(self, tmp_path):
+        receiver = FileTransferManager(MessageExchange(), str(tmp_path))
+        first = receiver._reserve_path("a.txt")
+        # Claimed on disk right away, before any rename lands on it.
+        second = receiver._reserve_path("a.txt")
+        assert first == str(tmp_path / "a.txt")
+        assert second == str(tmp_path / "a (1).txt")
+        assert os.path.exists(first)
+
+    async def test_idle_transfer_is_closed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(transfer, "IDLE_TIMEOUT", 0.05)
+        sent = []
+
+        async def send(data: bytes):
+            sent.append(data)
+
+        exchange = MessageExchange()
+        await exchange.set_transport(send_callback=send)
+        receiver = FileTransferManager(exchange, str(tmp_path))
+        await receiver._on_offer(None, 1, {"name": "a.bin", "size": 10})
+        assert receiver._incoming
+
+        for _ in range(50):
+            if not receiver._incoming:
+                break
+            await asyncio.sleep(0.01)
+        assert not receiver._incoming
+        assert receiver._reaper is None
+        # The .part is kept so the sender can resume.
+        assert os.listdir(tmp_path) == [_part_name("a.bin", 10, 0)]
+
+    async def test_legacy_peer_is_refused(self, tmp_path):
+        src = tmp_path / "a.txt"
+        _write_file(src, 10)
+        exchange = MessageExchange()
+        exchange.apply_capabilities(LEGACY_CAPABILITIES)
+        sender = FileTransferManager(exchange, str(tmp_path))
+        with pytest.raises(FileTransferError, match="does not support"):
+            await sender.send_file(str(src))
+
+    async def test_range_falls_back_without_loop_sendfile(self, tmp_path):
+        src = tmp_path / "src.bin"
+        data = _write_file(src, 4096)
+        written: list[bytes] = []
+
+        async def send(chunk: bytes):
+            written.append(bytes(chunk))
+
+        async def sendfile(file, offset, count):
+            raise NotImplementedError
+
+        exchange = MessageExchange()
+        await exchange.set_transport(send_callback=send, sendfile_callback=sendfile)
+        with open(src, "rb") as f:
+            await exchange.send_file_range(7, f, 100, 1000)
+            # The transport no longer offers zero-copy after the failure.
+            await exchange.send_file_range(7, f, 1100, 1000)
+
+        frames = b"".join(written)
+        header_size = len(FileDataFrame.encode_header(7, 0, 0))
+        first = frames[: header_size + 1000]
+        second = frames[header_size + 1000 :]
+        assert first[header_size:] == data[100:1100]
+        assert second[header_size:] == data[1100:2100]
+        assert len(written) == 3
+
+    async def test_copied_files_reach_peer_clipboard(self, tmp_path):
+        src_dir = tmp_path / "src"
+        src_dir.mkdir()
+        data = {name: _write_file(src_dir / name, 5000) for name in ("a", "b")}
+        rx_dir = tmp_path / "rx"
+
+        tx_exchange, rx_exchange, close = await _connected_exchanges()
+        listener = ClipboardListener(
+            MagicMock(),
+            _clipboard_stream(),
+            MagicMock(),
+            clipboard=_FileClipboard,
+            file_transfer=FileTransferManager(tx_exchange, str(tmp_path / "tx")),
+        )
+        clipboard = _FileClipboard()
+        ClipboardController(
+            MagicMock(),
+            _clipboard_stream(),
+            clipboard,
+            file_transfer=FileTransferManager(rx_exchange, str(rx_dir)),
+        )
+
+        listener._listening = True
+        # Directories are not transferred.
+        paths = [str(src_dir / "a"), str(src_dir / "b"), str(src_dir)]
+        await listener._on_clipboard_change("\n".join(paths), ClipboardType.FILE)
+        await listener._file_send
+        # The receiver reports each file after confirming it to the sender.
+        for _ in range(100):
+            if len(clipboard.files) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await close()
+
+        assert clipboard.files[-1] == [str(rx_dir / "a"), str(rx_dir / "b")]
+        for name, content in data.items():
+            with open(rx_dir / name, "rb") as f:
+                assert f.read() == content
@@ -16,12 +16,17 @@
 #
 
 import asyncio
-from collections import deque
 from dataclasses import dataclass, field
 from time import time
 from typing import Dict, Optional
 
 from ..logging import get_logger
+from .clock import PeerClock
+from .histogram import Histogram, HistogramSnapshot
+from .loop import LoopMonitor
+
+# Trailing windows exported by ConnectionMetrics.to_dict, label -> seconds.
+EXPORT_WINDOWS: Dict[str, float] = {"10s": 10.0, "60s": 60.0}
 
 
 @dataclass
@@ -41,13 +46,21 @@ class ConnectionMetrics:
         bytes_received (int): The total number of bytes received over the connection.
         messages_sent (int): The total number of messages sent over the connection.
         messages_received (int): The total number of messages received over the connection.
-        avg_latency (float): The average latency of the connection, represented in seconds.
-        min_latency (float): The minimum observed latency over the connection's lifetime, in seconds.
-        max_latency (float): The maximum observed latency over the connection's lifetime, in seconds.
+        avg_latency (float): The average latency over the last 60 s, in seconds.
+        min_latency (float): The minimum latency over the last 60 s, in seconds.
+        max_latency (float): The maximum latency over the last 60 s, in seconds.
+        latency_histogram (Histogram): Windowed latency samples, in microseconds.
+        size_histogram (Histogram): Windowed sent and received message sizes, in bytes.
         connection_errors (int): The total number of connection errors recorded.
         reconnections (int): The total number of reconnection attempts for the connection.
         packet_loss (int): The number of packets lost during transmission.
         chunks_received (int): The total number of data chunks received.
+        writes (int): The number of transport writes issued (one drain each).
+        frames_written (int): The number of frames carried by those writes.
+        moves_queued (int): Relative mouse moves that reached the send queue.
+        moves_merged (int): Relative mouse moves summed into a move already queued.
+        key_injections (int): Key events applied by the client's injector thread.
+        max_injection_latency (float): Worst queue-to-inject delay of a key event, in seconds.
         tls_handshake_time (Optional[float]): The time taken for the most recent TLS handshake, in seconds.
         last_active (float): The timestamp of the connection's last observed activity.
     """
@@ -62,13 +75,12 @@ class ConnectionMetrics:
     messages_sent: int = 0
     messages_received: int = 0
 
-    # Latency
+    # Latency (refreshed from latency_histogram by calculate_avg_latency)
     avg_latency: float = 0.0
     min_latency: float = float("inf")
     max_latency: float = 0.0
-    _latency_samples: deque = field(default_factory=lambda: deque(maxlen=1000))
-    # Running sum so calculate_avg_latency is O(1) instead of O(N) on every export.
-    _latency_sum: float = 0.0
+    latency_histogram: Histogram = field(default_factory=Histogram, repr=False)
+    size_histogram: Histogram = field(default_factory=Histogram, repr=False)
 
     # Errors and QOL
     connection_errors: int = 0
@@ -76,6 +88,19 @@ class ConnectionMetrics:
     packet_loss: int = 0
     chunks_received: int = 0
 
+    # Send batching
+    writes: int = 0
+    frames_written: int = 0
+
+    # Mouse move coalescing
+    moves_queued: int = 0
+    moves_merged: int = 0
+
+    # Client key injection (queue-to-inject delay)
+    key_injections: int = 0
+    max_injection_latency: float = 0.0
+    _injection_latency_sum: float = 0.0
+
     # Performance TLS
     tls_handshake_time: Optional[float] = None
 
@@ -91,6 +116,7 @@ class ConnectionMetrics:
         """
         self.bytes_sent += size
         self.messages_sent += 1
+        self.size_histogram.record(size)
         self.last_active = time()
 
     def record_received(self, size: int):
@@ -102,35 +128,102 @@ class ConnectionMetrics:
         """
         self.bytes_received += size
         self.messages_received += 1
+        self.size_histogram.record(size)
         self.last_active = time()
 
+    def record_write(self, frames: int):
+        """
+        Records one transport write carrying ``frames`` coalesced frames.
+
+        Args:
+            frames: Number of frames in the write.
+        """
+        self.writes += 1
+        self.frames_written += frames
+
+    def get_frames_per_write(self) -> float:
+        """
+        Average number of frames coalesced into a single transport write.
+        """
+        if not self.writes:
+            return 0.0
+        return self.frames_written / self.writes
+
+    def record_move(self, merged: bool):
+        """
+        Records one relative mouse move handed to the send queue.
+
+        Args:
+            merged: True if it was summed into a move already waiting.
+        """
+        if merged:
+            self.moves_merged += 1
+        else:
+            self.moves_queued += 1
+
+    def get_coalescing_ratio(self) -> float:
+        """
+        Relative moves submitted per move actually queued for sending
+        (1.0 means nothing was coalesced).
+        """
+        if not self.moves_queued:
+            return 0.0
+        return (self.moves_queued + self.moves_merged) / self.moves_queued
+
+    def record_injection(self, latency: float):
+        """
+        Records one key event applied by the client's injector thread.
+
+        Args:
+            latency: Time from queueing to injection, in seconds.
+        """
+        self.key_injections += 1
+        self._injection_latency_sum += latency
+        if latency > self.max_injection_latency:
+            self.max_injection_latency = latency
+
+    def get_avg_injection_latency(self) -> float:
+        """
+        Average queue-to-inject delay of key events, in seconds.
+        """
+        if not self.key_injections:
+            return 0.0
+        return self._injection_latency_sum / self.key_injections
+
     def record_latency(self, latency: float):
         """
-        Register a new latency sample and update min, max, and average latency metrics.
+        Register a new latency sample. O(1); min, max and average are
+        derived from the histogram window by calculate_avg_latency.
         Args:
             latency: Latency sample in seconds.
         """
-        samples = self._latency_samples
-        # If the bounded deque is full, manually evict so we can keep the
-        # running sum in sync (deque.maxlen-eviction doesn't return the value).
-        if samples.maxlen is not None and len(samples) == samples.maxlen:
-            self._latency_sum -= samples.popleft()
-        samples.append(latency)
-        self._latency_sum += latency
-        if latency < self.min_latency:
-            self.min_latency = latency
-        if latency > self.max_latency:
-            self.max_latency = latency
+        self.latency_histogram.record(round(latency * 1_000_000))
 
     def calculate_avg_latency(self) -> float:
         """
-        Returns the running average latency in seconds. O(1).
+        Refresh avg/min/max latency from the last 60 s of samples and
+        return the average in seconds. Values are kept when the window is
+        empty.
         """
-        n = len(self._latency_samples)
-        if n:
-            self.avg_latency = self._latency_sum / n
+        snap = self.latency_histogram.snapshot(EXPORT_WINDOWS["60s"])
+        if snap.count:
+            self.avg_latency = snap.mean / 1_000_000
+            self.min_latency = snap.min / 1_000_000
+            self.max_latency = snap.max / 1_000_000
         return self.avg_latency
 
+    def latency_snapshot(self, window: float) -> HistogramSnapshot:
+        """
+        Latency samples (microseconds) of the last ``window`` seconds.
+        """
+        return self.latency_histogram.snapshot(window)
+
+    def size_snapshot(self, window: float) -> HistogramSnapshot:
+        """
+        Message sizes (bytes) of the last ``window`` seconds.
+        """
+        return self.size_histogram.snapshot(window)
+
     def get_throughput(self) -> Dict[str, float]:
         """
         Throughput calculated in bytes/sec and messages/sec.
@@ -165,9 +258,23 @@ class ConnectionMetrics:
             if self.min_latency != float("inf")
             else 0,
             "latency_max_ms": self.max_latency * 1000,
+            "latency_ms": {
+                label: self.latency_snapshot(window).to_dict(scale=1e-3)
+                for label, window in EXPORT_WINDOWS.items()
+            },
+            "message_bytes": {
+                label: self.size_snapshot(window).to_dict()
+                for label, window in EXPORT_WINDOWS.items()
+            },
             "errors": self.connection_errors,
             "reconnections": self.reconnections,
             "packet_loss": self.packet_loss,
+            "writes": self.writes,
+            "frames_per_write": self.get_frames_per_write(),
+            "coalescing_ratio": self.get_coalescing_ratio(),
+            "key_injections": self.key_injections,
+            "injection_avg_ms": self.get_avg_injection_latency() * 1000,
+            "injection_max_ms": self.max_injection_latency * 1000,
             "tls_handshake_ms": self.tls_handshake_time * 1000
             if self.tls_handshake_time
             else None,
@@ -184,8 +291,14 @@ class MetricsCollector:
     management of connection-specific metrics in an asynchronous context.
     """
 
+    # Key of the merged entry added by get_all_metrics(aggregate=True).
+    AGGREGATE_ID = "*"
+
     def __init__(self):
         self._connections: Dict[str, ConnectionMetrics] = {}
+        # Peer id -> RTT / clock-offset estimate (see PeerClock)
+        self._peer_clocks: Dict[str, PeerClock] = {}
+        self._loop_monitor: Optional[LoopMonitor] = None
         self._lock = asyncio.Lock()
         self._logger = get_logger(f"{self.__class__.__name__}")
 
@@ -227,17 +340,74 @@ class MetricsCollector:
             if connection_id in self._connections:
                 del self._connections[connection_id]
 
-    async def get_all_metrics(self) -> Dict[str, Dict]:
+    def track_peer_clock(self, peer_id: str, clock: PeerClock) -> None:
+        """
+        Export ``clock`` under ``peer_id``, replacing the previous estimate
+        (a reconnecting peer gets a fresh ClientObj, hence a fresh clock).
+        """
+        self._peer_clocks[peer_id] = clock
+
+    def untrack_peer_clock(self, peer_id: str) -> None:
+        self._peer_clocks.pop(peer_id, None)
+
+    def get_peer_clock(self, peer_id: str) -> Optional[PeerClock]:
+        return self._peer_clocks.get(peer_id)
+
+    def get_peer_clocks(self) -> Dict[str, Dict]:
+        """RTT, offset and jitter per peer."""
+        return {pid: clock.to_dict() for pid, clock in self._peer_clocks.items()}
+
+    def set_loop_monitor(self, monitor: Optional[LoopMonitor]) -> None:
+        """Export the event-loop lag of ``monitor`` (None to stop)."""
+        self._loop_monitor = monitor
+
+    def get_loop_metrics(self) -> Optional[Dict]:
+        """Event-loop lag percentiles and recent stalls, if monitored."""
+        if self._loop_monitor is None:
+            return None
+        return self._loop_monitor.to_dict(EXPORT_WINDOWS)
+
+    async def get_all_metrics(self, aggregate: bool = False) -> Dict[str, Dict]:
         """
         Retrieve metrics for all registered connections.
 
+        Args:
+            aggregate: Also add an AGGREGATE_ID entry with the latency and
+                message-size percentiles of every connection merged.
+
         Returns:
             A dictionary mapping connection IDs to their metrics dictionaries.
         """
         # Invoke calculate_avg_latency for all connections
         for m in self._connections.values():
             m.calculate_avg_latency()
-        return {cid: m.to_dict() for cid, m in self._connections.items()}
+        result = {cid: m.to_dict() for cid, m in self._connections.items()}
+        if aggregate:
+            result[self.AGGREGATE_ID] = self.get_aggregate_metrics()
+        return result
+
+    def get_aggregate_metrics(self) -> Dict:
+        """
+        Latency and message-size percentiles over all connections, computed
+        from merged histogram snapshots (averaging per-stream percentiles
+        would be meaningless).
+        """
+        connections = list(self._connections.values())
+        latency: Dict[str, Dict] = {}
+        sizes: Dict[str, Dict] = {}
+        for label, window in EXPORT_WINDOWS.items():
+            lat_snap: Optional[HistogramSnapshot] = None
+            size_snap: Optional[HistogramSnapshot] = None
+            for m in connections:
+                lat_snap = m.latency_histogram.snapshot(window, into=lat_snap)
+                size_snap = m.size_histogram.snapshot(window, into=size_snap)
+            latency[label] = lat_snap.to_dict(scale=1e-3) if lat_snap else {}
+            sizes[label] = size_snap.to_dict() if size_snap else {}
+        return {
+            "connections": len(connections),
+            "latency_ms": latency,
+            "message_bytes": sizes,
+        }
 
     async def log_summary(self):
         """
@@ -246,6 +416,11 @@ class MetricsCollector:
         all_metrics = await self.get_all_metrics()
         for conn_id, metrics in all_metrics.items():
             self._logger.info("Connection metrics", conn_id=conn_id, **metrics)
+        for peer_id, clock in self.get_peer_clocks().items():
+            self._logger.info("Peer clock", peer_id=peer_id, **clock)
+        loop_metrics = self.get_loop_metrics()
+        if loop_metrics is not None:
+            self._logger.info("Event loop", **loop_metrics)
 
 
 class PerformanceMonitor:
@@ -262,15 +437,24 @@ class PerformanceMonitor:
         collector (MetricsCollector): Instance of a metrics collector responsible
             for retrieving performance metrics.
         interval (float): Time interval in seconds between metric collection cycles.
+        monitor_loop (bool): Also watch event-loop lag and slow callbacks
+            (see LoopMonitor) while running.
     """
 
     def __init__(
-        self, collector: Optional[MetricsCollector] = None, interval: float = 10.0
+        self,
+        collector: Optional[MetricsCollector] = None,
+        interval: float = 10.0,
+        monitor_loop: bool = True,
     ):
         self.collector = collector
         self.interval = interval
+        self.monitor_loop = monitor_loop
         self._task: Optional[asyncio.Task] = None
         self._running = False
+        self._loop_monitor: Optional[LoopMonitor] = None
+        # LoopMonitor.slow_count already reported
+        self._slow_seen = 0
         self._logger = get_logger(f"{self.__class__.__name__}")
 
     async def start(self):
@@ -284,6 +468,10 @@ class PerformanceMonitor:
             return
 
         self._running = True
+        if self.monitor_loop:
+            self._loop_monitor = LoopMonitor.acquire()
+            self._slow_seen = self._loop_monitor.slow_count
+            self.collector.set_loop_monitor(self._loop_monitor)
         self._task = asyncio.create_task(self._monitor_loop())
 
     async def stop(self):
@@ -297,6 +485,30 @@ class PerformanceMonitor:
                 await self._task
             except asyncio.CancelledError:
                 pass
+        monitor, self._loop_monitor = self._loop_monitor, None
+        if monitor is not None:
+            if self.collector:
+                self.collector.set_loop_monitor(None)
+            monitor.release()
+
+    def _log_loop(self):
+        monitor = self._loop_monitor
+        if monitor is None:
+            return
+        lag = monitor.lag.snapshot(self.interval).to_dict(scale=1e-3)
+        self._logger.info(
+            "Event loop lag",
+            p99_lag_ms=f"{lag['p99']:.2f}",
+            max_lag_ms=f"{lag['max']:.2f}",
+        )
+        for stall in monitor.slow_callbacks(since=self._slow_seen):
+            self._logger.warning(
+                "Slow event loop callback",
+                lag_ms=f"{stall['lag_ms']:.1f}",
+                task=stall["task"],
+                stack=stall["stack"][-4:],
+            )
+        self._slow_seen = monitor.slow_count
 
     async def _monitor_loop(self):
         while self._running:
@@ -317,11 +529,14 @@ class PerformanceMonitor:
                             throughput_mbps=f"{m['throughput_bytes_sec'] / 1_000_000:.2f}",
                             msg_per_sec=f"{m['throughput_msg_sec']:.1f}",
                             avg_latency_ms=f"{m['latency_avg_ms']:.2f}",
+                            p99_latency_ms=f"{m['latency_ms']['10s']['p99']:.2f}",
                             errors=m["errors"],
                         )
 
                     await asyncio.sleep(0)
 
+                self._log_loop()
+
             except asyncio.CancelledError:
                 break
             except Exception as e:
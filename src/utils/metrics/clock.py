@@ -0,0 +1,149 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from collections import deque
+from time import monotonic, time
+from typing import Dict, Optional
+
+# Key of the clock block inside a HEARTBEAT payload. Peers that predate it
+# send an empty payload and simply never produce samples.
+HEARTBEAT_CLOCK_KEY = "ck"
+
+
+class PeerClock:
+    """
+    NTP-style RTT and clock-offset estimate towards one peer, fed by the
+    heartbeats both sides already exchange on every stream.
+
+    Each heartbeat carries our send time plus an echo of the last heartbeat
+    we received from the peer: its sequence number, our wall-clock receive
+    time and how long we held it before this send (monotonic). When the
+    peer echoes one of ours back:
+
+        rtt    = (now - sent) - hold          (both monotonic durations)
+        offset = peer_rx_wall - sent_wall - rtt / 2
+
+    ``offset`` is peer wall clock minus ours, so a peer wall-clock timestamp
+    ``ts`` maps to ``ts - offset`` locally. Only one wall-clock reading per
+    side enters a sample; everything else is monotonic, so a wall-clock
+    step between heartbeats corrupts at most one sample.
+
+    Filtering follows the NTP clock filter: the offset comes from the sample
+    with the lowest RTT among the last FILTER_SAMPLES (least queueing, so
+    least asymmetry). RTT is smoothed and its mean deviation reported as
+    jitter, as in TCP's SRTT/RTTVAR.
+    """
+
+    FILTER_SAMPLES = 8
+    # Our own heartbeats awaiting an echo; older ones are forgotten.
+    MAX_PENDING = 32
+    RTT_GAIN = 1 / 8
+    JITTER_GAIN = 1 / 4
+
+    def __init__(self):
+        self._seq = 0
+        self._pending: Dict[int, tuple[float, float]] = {}
+        # Last heartbeat received from the peer: (seq, rx_wall, rx_mono)
+        self._peer_seq: Optional[int] = None
+        self._peer_rx_wall = 0.0
+        self._peer_rx_mono = 0.0
+
+        self._samples: deque[tuple[float, float]] = deque(maxlen=self.FILTER_SAMPLES)
+        self.samples = 0
+        self.rtt = 0.0
+        self.rtt_min = 0.0
+        self.jitter = 0.0
+        self.offset = 0.0
+        self._last_sample = 0.0
+
+    @property
+    def synced(self) -> bool:
+        """True once at least one RTT/offset sample was taken."""
+        return self.samples > 0
+
+    def stamp(self) -> dict:
+        """
+        Clock block to put under HEARTBEAT_CLOCK_KEY in an outgoing
+        heartbeat payload.
+        """
+        now_mono = monotonic()
+        now_wall = time()
+        self._seq += 1
+        pending = self._pending
+        pending[self._seq] = (now_wall, now_mono)
+        if len(pending) > self.MAX_PENDING:
+            del pending[next(iter(pending))]
+        block = {"seq": self._seq}
+        if self._peer_seq is not None:
+            block["echo"] = self._peer_seq
+            block["rx"] = self._peer_rx_wall
+            block["hold"] = now_mono - self._peer_rx_mono
+        return block
+
+    def on_heartbeat(self, payload: Optional[dict]) -> None:
+        """
+        Consume the clock block of a received heartbeat payload, if any.
+        """
+        if not payload:
+            return
+        block = payload.get(HEARTBEAT_CLOCK_KEY)
+        if not isinstance(block, dict):
+            return
+        now_mono = monotonic()
+        try:
+            self._peer_seq = int(block["seq"])
+            self._peer_rx_wall = time()
+            self._peer_rx_mono = now_mono
+            echo = block.get("echo")
+            if echo is None:
+                return
+            sent = self._pending.pop(int(echo), None)
+            if sent is None:
+                return
+            sent_wall, sent_mono = sent
+            hold = float(block["hold"])
+            peer_rx = float(block["rx"])
+        except (KeyError, TypeError, ValueError):
+            return
+        rtt = max(0.0, (now_mono - sent_mono) - max(0.0, hold))
+        self._add_sample(rtt, peer_rx - sent_wall - rtt / 2, now_mono)
+
+    def _add_sample(self, rtt: float, offset: float, now_mono: float) -> None:
+        self._samples.append((rtt, offset))
+        if not self.samples:
+            self.rtt = rtt
+            self.jitter = rtt / 2
+        else:
+            self.jitter += self.JITTER_GAIN * (abs(rtt - self.rtt) - self.jitter)
+            self.rtt += self.RTT_GAIN * (rtt - self.rtt)
+        self.samples += 1
+        self._last_sample = now_mono
+        best = min(self._samples)
+        self.rtt_min = best[0]
+        self.offset = best[1]
+
+    def to_dict(self) -> dict:
+        return {
+            "synced": self.synced,
+            "samples": self.samples,
+            "rtt_ms": self.rtt * 1000,
+            "rtt_min_ms": self.rtt_min * 1000,
+            "jitter_ms": self.jitter * 1000,
+            "offset_ms": self.offset * 1000,
+            "age_s": monotonic() - self._last_sample if self.samples else None,
+        }
@@ -0,0 +1,300 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+from array import array
+from math import ceil
+from time import monotonic
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Quantiles exported by HistogramSnapshot.to_dict, keyed by their label.
+EXPORT_QUANTILES: Tuple[Tuple[str, float], ...] = (
+    ("p50", 0.50),
+    ("p90", 0.90),
+    ("p99", 0.99),
+    ("p99_9", 0.999),
+)
+
+_layouts: Dict[Tuple[int, int], Tuple[int, List[float]]] = {}
+
+
+def _layout(sub_bits: int, max_bits: int) -> Tuple[int, List[float]]:
+    """
+    Bucket count and per-bucket representative value (bucket midpoint) for
+    a (sub_bits, max_bits) geometry. Shared by every histogram with that
+    geometry, so snapshots only merge when the layouts match.
+    """
+    key = (sub_bits, max_bits)
+    cached = _layouts.get(key)
+    if cached is not None:
+        return cached
+    sub = 1 << sub_bits
+    half = sub >> 1
+    size = (max_bits - sub_bits + 2) * half
+    values: List[float] = []
+    for idx in range(size):
+        if idx < sub:
+            values.append(float(idx))
+            continue
+        shift = idx // half - 1
+        low = (idx - shift * half) << shift
+        values.append(low + ((1 << shift) - 1) / 2)
+    cached = (size, values)
+    _layouts[key] = cached
+    return cached
+
+
+class _Slot:
+    """Counts recorded during one ``slot_seconds`` interval."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self, size: int):
+        self.counts = array("I", bytes(4 * size))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def reset(self, zeros: array) -> None:
+        self.counts[:] = zeros
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+
+class HistogramSnapshot:
+    """
+    Point-in-time copy of a Histogram window. Snapshots with the same bucket
+    layout can be merged, e.g. to aggregate the latency of every stream.
+
+    Percentiles are resolved to the midpoint of their bucket (relative error
+    below ``2 ** -sub_bits``) and clamped to the exact recorded min/max;
+    the overflow bucket resolves to max.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max", "_layout_key")
+
+    def __init__(self, sub_bits: int, max_bits: int):
+        size, _ = _layout(sub_bits, max_bits)
+        self._layout_key = (sub_bits, max_bits)
+        self.counts = array("Q", bytes(8 * size))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _add(self, counts: Sequence[int], count: int, total: int, lo: int, hi: int):
+        if not count:
+            return
+        mine = self.counts
+        for idx, n in enumerate(counts):
+            if n:
+                mine[idx] += n
+        if not self.count or lo < self.min:
+            self.min = lo
+        if hi > self.max:
+            self.max = hi
+        self.count += count
+        self.total += total
+
+    def merge(self, other: "HistogramSnapshot") -> "HistogramSnapshot":
+        """
+        Add ``other`` into this snapshot in place and return self.
+
+        Raises:
+            ValueError: If the two snapshots use different bucket layouts.
+        """
+        if other._layout_key != self._layout_key:
+            raise ValueError(
+                f"Cannot merge histogram layouts {other._layout_key} "
+                f"into {self._layout_key}"
+            )
+        self._add(other.counts, other.count, other.total, other.min, other.max)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self, quantiles: Sequence[float]) -> List[float]:
+        """
+        Values at each of ``quantiles`` (ascending, in [0, 1]), in one pass.
+        Returns zeros for an empty snapshot.
+        """
+        if not self.count:
+            return [0.0] * len(quantiles)
+        size, values = _layout(*self._layout_key)
+        last = size - 1
+        ranks = [max(1, ceil(q * self.count)) for q in quantiles]
+        result: List[float] = []
+        seen = 0
+        wanted = 0
+        for idx, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while wanted < len(ranks) and seen >= ranks[wanted]:
+                # The last bucket also holds every out-of-range sample.
+                value = values[idx] if idx != last else self.max
+                result.append(min(max(value, self.min), self.max))
+                wanted += 1
+            if wanted == len(ranks):
+                break
+        while len(result) < len(ranks):
+            result.append(float(self.max))
+        return result
+
+    def percentile(self, quantile: float) -> float:
+        return self.percentiles((quantile,))[0]
+
+    def to_dict(self, scale: float = 1.0) -> Dict[str, float]:
+        """
+        Export count, mean, min, max and the EXPORT_QUANTILES, with every
+        value multiplied by ``scale`` (e.g. 1e-3 for microseconds -> ms).
+        """
+        data: Dict[str, float] = {"count": self.count}
+        data["mean"] = self.mean * scale
+        data["min"] = self.min * scale
+        values = self.percentiles([q for _, q in EXPORT_QUANTILES])
+        for (label, _), value in zip(EXPORT_QUANTILES, values):
+            data[label] = value * scale
+        data["max"] = self.max * scale
+        return data
+
+
+class Histogram:
+    """
+    Fixed-memory log-bucketed histogram of non-negative integers, HDR style.
+
+    Values below ``2 ** sub_bits`` get one bucket each; above that every
+    power-of-two range is split into ``2 ** (sub_bits - 1)`` buckets, so the
+    relative bucket width stays under ``2 ** -sub_bits`` up to
+    ``2 ** max_bits`` (larger values land in the last bucket). With the
+    defaults that is 464 buckets at ~3% resolution over 0 .. 4.29e9.
+
+    Counts live in a ring of ``slots`` intervals of ``slot_seconds`` each;
+    record() only touches the current slot, and snapshot() merges the slots
+    covering a trailing window, so old outliers age out instead of pinning
+    min/max forever. Windows round up to whole slots, plus the current
+    partial one.
+
+    Not thread-safe: record from one thread (the event loop).
+    """
+
+    __slots__ = (
+        "_sub_bits",
+        "_max_bits",
+        "_sub",
+        "_half_bits",
+        "_last",
+        "_slot_seconds",
+        "_slots",
+        "_zeros",
+        "_index",
+        "_current",
+        "_slot_end",
+    )
+
+    def __init__(
+        self,
+        slot_seconds: float = 5.0,
+        slots: int = 13,
+        sub_bits: int = 5,
+        max_bits: int = 32,
+    ):
+        size, _ = _layout(sub_bits, max_bits)
+        self._sub_bits = sub_bits
+        self._max_bits = max_bits
+        self._sub = 1 << sub_bits
+        self._half_bits = sub_bits - 1
+        self._last = size - 1
+        self._slot_seconds = slot_seconds
+        self._slots = [_Slot(size) for _ in range(slots)]
+        self._zeros = array("I", bytes(4 * size))
+        self._index = 0
+        self._current = self._slots[0]
+        self._slot_end = monotonic() + slot_seconds
+
+    @property
+    def window_seconds(self) -> float:
+        """Longest window snapshot() can cover in full."""
+        return self._slot_seconds * (len(self._slots) - 1)
+
+    def record(self, value: int) -> None:
+        """Record one sample. O(1); negative values count as 0."""
+        now = monotonic()
+        if now >= self._slot_end:
+            self._advance(now)
+        if value < self._sub:
+            if value < 0:
+                value = 0
+            idx = value
+        else:
+            shift = value.bit_length() - self._sub_bits
+            idx = (shift << self._half_bits) + (value >> shift)
+            if idx > self._last:
+                idx = self._last
+        slot = self._current
+        slot.counts[idx] += 1
+        if not slot.count or value < slot.min:
+            slot.min = value
+        if value > slot.max:
+            slot.max = value
+        slot.count += 1
+        slot.total += value
+
+    def _advance(self, now: float) -> None:
+        """Rotate to the slot containing ``now``, clearing skipped ones."""
+        steps = int((now - self._slot_end) // self._slot_seconds) + 1
+        self._slot_end += steps * self._slot_seconds
+        n = len(self._slots)
+        for _ in range(min(steps, n)):
+            self._index = (self._index + 1) % n
+            self._slots[self._index].reset(self._zeros)
+        self._current = self._slots[self._index]
+
+    def snapshot(
+        self,
+        window: Optional[float] = None,
+        into: Optional[HistogramSnapshot] = None,
+    ) -> HistogramSnapshot:
+        """
+        Merge the slots covering the last ``window`` seconds (all of them if
+        None) into a snapshot, or into ``into`` when aggregating several
+        histograms.
+        """
+        now = monotonic()
+        if now >= self._slot_end:
+            self._advance(now)
+        snap = into or HistogramSnapshot(self._sub_bits, self._max_bits)
+        if snap._layout_key != (self._sub_bits, self._max_bits):
+            raise ValueError("Cannot snapshot into a different histogram layout")
+        n = len(self._slots)
+        if window is None:
+            covered = n
+        else:
+            covered = min(n, ceil(window / self._slot_seconds) + 1)
+        for back in range(covered):
+            slot = self._slots[(self._index - back) % n]
+            snap._add(slot.counts, slot.count, slot.total, slot.min, slot.max)
+        return snap
+
+    def reset(self) -> None:
+        for slot in self._slots:
+            slot.reset(self._zeros)
@@ -0,0 +1,223 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import asyncio
+import sys
+import threading
+import traceback
+from collections import deque
+from time import perf_counter, time
+from typing import Any, Dict, List, Optional
+
+from .histogram import Histogram
+
+
+class LoopMonitor:
+    """
+    Scheduling lag and slow-callback monitor for one event loop.
+
+    A ticker task sleeps ``interval`` and records how late it woke up
+    (microseconds) into ``lag``: anything holding the loop (a big decode,
+    a blocking config save) delays it by that much. Timer granularity puts
+    a floor of about a millisecond under the readings, more on Windows.
+
+    A watchdog thread notices when the ticker is overdue by more than
+    ``slow_threshold`` and samples the loop thread's stack and current
+    task while the offending callback is still running; the sample is
+    completed with the measured lag once the loop resumes and kept in a
+    ring of the last ``capacity`` stalls. This needs nothing from the loop
+    itself, so it works under uvloop, which has no
+    ``slow_callback_duration`` debug mode.
+
+    One monitor per loop is shared through ``acquire``/``release``.
+    """
+
+    TICK_INTERVAL = 0.005
+    SLOW_THRESHOLD = 0.02
+    SLOW_CAPACITY = 32
+    STACK_LIMIT = 24
+
+    _monitors: Dict[asyncio.AbstractEventLoop, "LoopMonitor"] = {}
+
+    def __init__(
+        self,
+        interval: float = TICK_INTERVAL,
+        slow_threshold: float = SLOW_THRESHOLD,
+        capacity: int = SLOW_CAPACITY,
+    ):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lag = Histogram()
+        self.slow_count = 0
+        self._slow: deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        # Ticker wake time (perf_counter); read by the watchdog
+        self._beat = 0.0
+        self._captured_beat = 0.0
+        self._pending: Optional[Dict[str, Any]] = None
+        self._users = 0
+
+    @classmethod
+    def acquire(cls, **kwargs) -> "LoopMonitor":
+        """
+        Monitor of the running loop, started on first use. Each call must
+        be paired with ``release``; ``kwargs`` only apply on creation.
+        """
+        loop = asyncio.get_running_loop()
+        monitor = cls._monitors.get(loop)
+        if monitor is None:
+            monitor = cls(**kwargs)
+            monitor.start()
+            cls._monitors[loop] = monitor
+        monitor._users += 1
+        return monitor
+
+    @classmethod
+    def current(cls) -> Optional["LoopMonitor"]:
+        """Monitor of the running loop, if one was acquired."""
+        try:
+            return cls._monitors.get(asyncio.get_running_loop())
+        except RuntimeError:
+            return None
+
+    def release(self) -> None:
+        """Drop one ``acquire``; the last one stops the monitor."""
+        self._users -= 1
+        if self._users > 0:
+            return
+        self._users = 0
+        if self._monitors.get(self._loop) is self:
+            del self._monitors[self._loop]
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start ticking on the running loop; call from the loop thread."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._beat = perf_counter()
+        self._task = self._loop.create_task(self._tick(), name="LoopMonitor")
+        self._watchdog = threading.Thread(
+            target=self._watch, name="LoopMonitorWatchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None and watchdog is not threading.current_thread():
+            watchdog.join(1.0)
+
+    async def _tick(self):
+        interval = self.interval
+        expected = perf_counter() + interval
+        while True:
+            await asyncio.sleep(interval)
+            now = perf_counter()
+            previous, self._beat = self._beat, now
+            lag = now - expected
+            if lag < 0:
+                lag = 0.0
+            self.lag.record(int(lag * 1e6))
+            if lag >= self.slow_threshold:
+                self._on_stall(lag, previous)
+            expected = now + interval
+
+    def _on_stall(self, lag: float, beat: float) -> None:
+        """Close the stall that just ended, with the sample if one was taken."""
+        pending, self._pending = self._pending, None
+        if pending is None or pending.pop("beat") != beat:
+            # Shorter than the watchdog's poll, or a stale sample
+            pending = {"task": None, "stack": []}
+        pending["at"] = time()
+        pending["lag_ms"] = lag * 1e3
+        self._slow.append(pending)
+        self.slow_count += 1
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(max(0.001, self.slow_threshold / 2)):
+            beat = self._beat
+            if beat == self._captured_beat:
+                continue
+            if perf_counter() - beat < self.interval + self.slow_threshold:
+                continue
+            self._captured_beat = beat
+            sample = self._sample()
+            sample["beat"] = beat
+            self._pending = sample
+
+    def _sample(self) -> Dict[str, Any]:
+        """Stack and task of whatever the loop thread is running right now."""
+        stack: List[str] = []
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is not None:
+            stack = [
+                f"{entry.filename}:{entry.lineno} in {entry.name}"
+                for entry in traceback.extract_stack(frame, limit=self.STACK_LIMIT)
+            ]
+            del frame
+        task_name = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except Exception:
+            task = None
+        if task is not None:
+            task_name = task.get_name()
+        return {"task": task_name, "stack": stack}
+
+    def slow_callbacks(self, since: int = 0) -> List[Dict[str, Any]]:
+        """
+        Retained stalls, oldest first; ``since`` is a previous
+        ``slow_count`` to get only the ones recorded after it.
+        """
+        new = min(len(self._slow), self.slow_count - since)
+        if new <= 0:
+            return []
+        return list(self._slow)[-new:]
+
+    def clear(self) -> None:
+        self.lag.reset()
+        self._slow.clear()
+        self.slow_count = 0
+
+    def to_dict(self, windows: Dict[str, float]) -> Dict[str, Any]:
+        """Lag percentiles (ms) per labelled window plus the retained stalls."""
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1e3,
+            "slow_threshold_ms": self.slow_threshold * 1e3,
+            "lag_ms": {
+                label: self.lag.snapshot(window).to_dict(scale=1e-3)
+                for label, window in windows.items()
+            },
+            "slow_count": self.slow_count,
+            "slow_callbacks": self.slow_callbacks(),
+        }
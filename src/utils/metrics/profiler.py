@@ -0,0 +1,170 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import os
+import sys
+import threading
+from datetime import datetime
+from time import perf_counter
+from types import CodeType
+from typing import Any, Dict, Optional
+
+from ..fs import atomic_write_text
+
+
+class SamplingProfiler:
+    """
+    In-process sampling profiler writing collapsed stacks per thread.
+
+    While running, a daemon thread wakes every ``interval`` and walks
+    ``sys._current_frames()``, counting each thread's stack as one
+    ``thread;outer;...;inner`` line, the "collapsed" format read by
+    flamegraph.pl, speedscope and inferno. It installs no trace/profile
+    hooks and no signal handlers, so it is safe under Nuitka (compiled
+    functions still get frame objects) and with native listener threads,
+    and it costs nothing at all until ``start``.
+
+    Samples only land between bytecodes, so time spent inside one C call
+    (a blocking read, a msgpack decode) is attributed to its Python caller.
+    """
+
+    DEFAULT_INTERVAL = 0.01
+    DEFAULT_DURATION = 30.0
+    MAX_DURATION = 600.0
+    MAX_DEPTH = 128
+
+    def __init__(
+        self,
+        output_dir: str,
+        interval: float = DEFAULT_INTERVAL,
+        labels: Optional[Dict[int, str]] = None,
+    ):
+        """
+        Args:
+            output_dir: Directory the collapsed-stack file is written to.
+            interval: Seconds between samples.
+            labels: Root frame name per thread ident, e.g. the event loop
+                thread; other threads are named after ``Thread.name``.
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.labels = dict(labels or {})
+        # Summary of the last finished run, see _finish
+        self.result: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._frame_names: Dict[CodeType, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float = DEFAULT_DURATION) -> None:
+        """Sample for ``duration`` seconds (at most MAX_DURATION) or until stop."""
+        if self.running:
+            raise RuntimeError("Profiler already running")
+        if not 0 < duration <= self.MAX_DURATION:
+            raise ValueError(f"duration must be in (0, {self.MAX_DURATION:g}] seconds")
+        self.result = None
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration,), name="SamplingProfiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> Optional[Dict[str, Any]]:
+        """
+        End sampling early (blocks until the file is written) and return
+        the summary of the last run, if any.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        return self.result
+
+    def _run(self, duration: float) -> None:
+        own = threading.get_ident()
+        stacks: Dict[str, int] = {}
+        samples = 0
+        started = perf_counter()
+        deadline = started + duration
+        while not self._stop.wait(self.interval):
+            self._sample(stacks, own)
+            samples += 1
+            if perf_counter() >= deadline:
+                break
+        self._finish(stacks, samples, perf_counter() - started)
+
+    def _sample(self, stacks: Dict[str, int], own: int) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frame_name = self._frame_name
+        max_depth = self.MAX_DEPTH
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            parts = []
+            while frame is not None and len(parts) < max_depth:
+                parts.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            thread = self.labels.get(ident) or names.get(ident) or f"thread-{ident}"
+            parts.append(thread.replace(";", ":"))
+            parts.reverse()
+            key = ";".join(parts)
+            stacks[key] = stacks.get(key, 0) + 1
+
+    def _frame_name(self, code: CodeType) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            qualname = getattr(code, "co_qualname", code.co_name)
+            filename = os.path.basename(code.co_filename)
+            name = f"{qualname} ({filename}:{code.co_firstlineno})"
+            self._frame_names[code] = name
+        return name
+
+    def _finish(self, stacks: Dict[str, int], samples: int, elapsed: float) -> None:
+        """Write the collapsed stacks and publish the run summary."""
+        threads: Dict[str, int] = {}
+        for stack, count in stacks.items():
+            thread = stack.split(";", 1)[0]
+            threads[thread] = threads.get(thread, 0) + count
+        file_path = os.path.join(
+            self.output_dir,
+            f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.collapsed",
+        )
+        error = None
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            atomic_write_text(
+                file_path,
+                "".join(
+                    f"{stack} {count}\n" for stack, count in sorted(stacks.items())
+                ),
+                mode=0o600,
+            )
+        except OSError as e:
+            file_path = None
+            error = str(e)
+        self._frame_names.clear()
+        self.result = {
+            "path": file_path,
+            "error": error,
+            "samples": samples,
+            "duration_s": elapsed,
+            "threads": threads,
+        }
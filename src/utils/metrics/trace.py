@@ -0,0 +1,234 @@
+#  Perpetua - open-source and cross-platform KVM software.
+#  Copyright (c) 2026 Federico Izzi.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+import threading
+from collections import deque
+from itertools import count
+from time import perf_counter, time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .clock import PeerClock
+from .histogram import Histogram
+
+# Payload key carrying the trace block of a sampled message on the wire:
+# [trace_id, capture wall time, hand-off wall time]. Unsampled messages
+# never have it.
+TRACE_KEY = "_tr"
+
+# Hops in pipeline order. The first three are timed by the sender, the
+# rest by the receiver; "wire" spans encode + write + transit + parse,
+# "total" is capture on the sender to injection on the receiver.
+SENDER_HOPS: Tuple[str, ...] = ("capture", "send_queue", "serialize")
+RECEIVER_HOPS: Tuple[str, ...] = ("wire", "receive", "client_queue", "inject", "total")
+HOPS: Tuple[str, ...] = SENDER_HOPS + RECEIVER_HOPS
+
+
+class TraceContext:
+    """
+    Timing state of one sampled input event while it crosses the local
+    side of the pipeline. ``mark`` closes the hop that ended now.
+    """
+
+    __slots__ = ("tracer", "trace_id", "captured", "last", "offset", "hops")
+
+    def __init__(
+        self,
+        tracer: "LatencyTracer",
+        trace_id: int,
+        captured: float,
+        offset: Optional[float] = None,
+    ):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        # Sender wall time of the capture (the event's timestamp)
+        self.captured = captured
+        self.last = perf_counter()
+        # Peer clock offset; None on the sending side
+        self.offset = offset
+        self.hops: List[Tuple[str, float]] = []
+
+    def record(self, hop: str, seconds: float) -> None:
+        self.hops.append((hop, seconds))
+        self.tracer.record(hop, seconds)
+
+    def mark(self, hop: str) -> None:
+        """Record the time since the previous mark as ``hop``."""
+        now = perf_counter()
+        self.record(hop, now - self.last)
+        self.last = now
+
+    def to_wire(self) -> list:
+        """Trace block to put under TRACE_KEY in the outgoing payload."""
+        return [self.trace_id, self.captured, time()]
+
+
+class LatencyTracer:
+    """
+    Opt-in sampled tracing of input events from capture on the server to
+    injection on the client.
+
+    While disabled, every instrumented hop costs one ``enabled`` check.
+    Once enabled, one event in ``sample_every`` handed to a stream gets a
+    TraceContext; each hop it passes records its duration into that hop's
+    histogram (microseconds). The context rides in the event on the
+    sender and, for the sampled message only, as a small block under
+    TRACE_KEY in the payload, so sampled mouse moves leave the compact
+    frame path. The receiver turns the block back into a context, timing
+    the wire hop with the sender's wall clock corrected by the PeerClock
+    offset.
+
+    Both ends keep their own histograms, so tracing has to be enabled on
+    both daemons to get the full breakdown. Records may come from the key
+    injector thread, hence the lock (only taken for sampled events).
+    """
+
+    DEFAULT_SAMPLE_EVERY = 64
+    RECENT_TRACES = 32
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_every = self.DEFAULT_SAMPLE_EVERY
+        self._countdown = 0
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {hop: Histogram() for hop in HOPS}
+        self._recent: deque[Tuple[int, List[Tuple[str, float]]]] = deque(
+            maxlen=self.RECENT_TRACES
+        )
+        self.sampled = 0
+        self.completed = 0
+
+    def enable(self, sample_every: int = DEFAULT_SAMPLE_EVERY) -> None:
+        """Start sampling one event in ``sample_every``."""
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.sample_every = sample_every
+        self._countdown = 0
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            for histogram in self._histograms.values():
+                histogram.reset()
+            self._recent.clear()
+            self.sampled = 0
+            self.completed = 0
+
+    def record(self, hop: str, seconds: float) -> None:
+        with self._lock:
+            self._histograms[hop].record(int(seconds * 1e6))
+
+    def begin(self, event: Any) -> Optional[TraceContext]:
+        """
+        Sampling decision for an event entering a stream send queue; the
+        context is attached as ``event.trace``. Only classes that set
+        ``TRACEABLE`` (mouse and keyboard events) are traced, and they
+        don't use up sampling slots of anything else.
+        """
+        if not getattr(event, "TRACEABLE", False):
+            return None
+        self._countdown -= 1
+        if self._countdown > 0:
+            return None
+        self._countdown = self.sample_every
+        captured = getattr(event, "timestamp", None)
+        if captured is None:
+            return None
+        ctx = TraceContext(self, next(self._ids), captured)
+        event.trace = ctx
+        self.sampled += 1
+        ctx.record("capture", time() - captured)
+        return ctx
+
+    def receive(
+        self, payload: Optional[dict], clock: Optional[PeerClock] = None
+    ) -> Optional[TraceContext]:
+        """
+        Turn the trace block of a just parsed payload into a receiver-side
+        context, stored back under TRACE_KEY for the handlers downstream.
+        """
+        if not payload:
+            return None
+        block = payload.get(TRACE_KEY)
+        if block is None:
+            return None
+        try:
+            trace_id, captured, sent = int(block[0]), float(block[1]), float(block[2])
+        except (IndexError, TypeError, ValueError):
+            del payload[TRACE_KEY]
+            return None
+        offset = clock.offset if clock is not None and clock.synced else 0.0
+        ctx = TraceContext(self, trace_id, captured, offset)
+        ctx.record("wire", time() - sent + offset)
+        payload[TRACE_KEY] = ctx
+        self.sampled += 1
+        return ctx
+
+    @staticmethod
+    def context(message: Any) -> Optional[TraceContext]:
+        """Receiver-side context of a delivered ProtocolMessage, if sampled."""
+        payload = getattr(message, "payload", None)
+        if not payload:
+            return None
+        ctx = payload.get(TRACE_KEY)
+        return ctx if isinstance(ctx, TraceContext) else None
+
+    def finish(self, ctx: TraceContext) -> None:
+        """
+        Close a trace on this side; the receiver also records the
+        end-to-end total.
+        """
+        if ctx.offset is not None:
+            ctx.record("total", time() - ctx.captured + ctx.offset)
+        with self._lock:
+            self._recent.append((ctx.trace_id, ctx.hops))
+            self.completed += 1
+
+    def snapshot(self, window: Optional[float] = None) -> dict:
+        """
+        Per-hop breakdown over the trailing ``window`` seconds (everything
+        retained if None), in milliseconds, plus the last few traces.
+        """
+        with self._lock:
+            hops = {}
+            for hop in HOPS:
+                snap = self._histograms[hop].snapshot(window)
+                if snap.count:
+                    hops[hop] = snap.to_dict(scale=1e-3)
+            recent = [
+                {
+                    "id": trace_id,
+                    "hops_ms": {hop: seconds * 1e3 for hop, seconds in trace},
+                }
+                for trace_id, trace in self._recent
+            ]
+        return {
+            "enabled": self.enabled,
+            "sample_every": self.sample_every,
+            "sampled": self.sampled,
+            "completed": self.completed,
+            "hops": hops,
+            "recent": recent,
+        }
+
+
+# Process-wide tracer shared by every instrumented hop.
+TRACER = LatencyTracer()
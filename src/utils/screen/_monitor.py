@@ -18,6 +18,7 @@
 
 from __future__ import annotations
 
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from enum import StrEnum
 from typing import Iterable, Optional
@@ -28,15 +29,122 @@ from utils.logging import get_logger
 _logger = get_logger(__name__)
 
 
+# Largest gap between two monitors that still counts as abutting edges.
+_NEIGHBOR_SNAP = 2
+# Below this many monitors the plain scans beat the index lookups.
+_INDEX_MIN_MONITORS = 4
+
+
+def _merge_spans(intervals: Iterable[tuple[int, int]]) -> tuple[list, list]:
+    """Union of half-open intervals as sorted, disjoint (starts, ends)."""
+    starts: list[int] = []
+    ends: list[int] = []
+    for start, end in sorted(intervals):
+        if starts and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _in_spans(spans: tuple[list, list], value: float) -> bool:
+    starts, ends = spans
+    i = bisect_right(starts, value) - 1
+    return i >= 0 and value < ends[i]
+
+
+class _MonitorIndex:
+    """Lookup tables derived from a tuple of monitors.
+
+    Point lookup uses the grid formed by every monitor's x and y bounds:
+    each cell lies wholly inside or outside any monitor, so it maps to
+    the first monitor covering it (the one a linear scan would return).
+    Neighbour queries use, per monitor and side, the union of the spans
+    of the monitors abutting that side within the snap distance. Side
+    tables are keyed by ``id()`` (hashing a MonitorInfo hashes all its
+    fields); the index holds the monitors, so the ids stay unique.
+    """
+
+    __slots__ = ("xs", "ys", "cols", "cells", "left", "right", "top", "bottom")
+
+    def __init__(self, monitors: tuple[MonitorInfo, ...]):
+        self.xs = sorted({v for m in monitors for v in (m.min_x, m.max_x)})
+        self.ys = sorted({v for m in monitors for v in (m.min_y, m.max_y)})
+        self.cols = cols = max(len(self.xs) - 1, 0)
+        rows = max(len(self.ys) - 1, 0)
+        cells: list[Optional[MonitorInfo]] = [None] * (cols * rows)
+        x_at = {v: i for i, v in enumerate(self.xs)}
+        y_at = {v: i for i, v in enumerate(self.ys)}
+        # Reverse so the first monitor in list order wins on overlaps.
+        for m in reversed(monitors):
+            for row in range(y_at[m.min_y], y_at[m.max_y]):
+                base = row * cols
+                for col in range(x_at[m.min_x], x_at[m.max_x]):
+                    cells[base + col] = m
+        self.cells = cells
+
+        self.left: dict[int, tuple[list, list]] = {}
+        self.right: dict[int, tuple[list, list]] = {}
+        self.top: dict[int, tuple[list, list]] = {}
+        self.bottom: dict[int, tuple[list, list]] = {}
+        for monitor in monitors:
+            others = [m for m in monitors if m.monitor_id != monitor.monitor_id]
+            key = id(monitor)
+            self.left[key] = _merge_spans(
+                (m.min_y, m.max_y)
+                for m in others
+                if m.max_x <= monitor.min_x
+                and monitor.min_x - m.max_x <= _NEIGHBOR_SNAP
+            )
+            self.right[key] = _merge_spans(
+                (m.min_y, m.max_y)
+                for m in others
+                if m.min_x >= monitor.max_x
+                and m.min_x - monitor.max_x <= _NEIGHBOR_SNAP
+            )
+            self.top[key] = _merge_spans(
+                (m.min_x, m.max_x)
+                for m in others
+                if m.max_y <= monitor.min_y
+                and monitor.min_y - m.max_y <= _NEIGHBOR_SNAP
+            )
+            self.bottom[key] = _merge_spans(
+                (m.min_x, m.max_x)
+                for m in others
+                if m.min_y >= monitor.max_y
+                and m.min_y - monitor.max_y <= _NEIGHBOR_SNAP
+            )
+
+
 @dataclass
 class MonitorLayout:
     """Aggregate of the connected displays.
 
     Edge routing is driven by the EdgeBinding cache on the mouse
-    listener, not stored here.
+    listener, not stored here. From ``_INDEX_MIN_MONITORS`` monitors on,
+    point and neighbour queries go through an index built at
+    construction (rebuilt if ``monitors`` is reassigned), so they cost
+    O(log n) rather than a scan per mouse move; smaller layouts scan.
     """
 
     monitors: tuple[MonitorInfo, ...] = field(default_factory=tuple)
+    _index: Optional[_MonitorIndex] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _indexed: Optional[tuple[MonitorInfo, ...]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self._reindex()
+
+    def _reindex(self) -> None:
+        monitors = tuple(self.monitors)
+        self._index = (
+            _MonitorIndex(monitors) if len(monitors) >= _INDEX_MIN_MONITORS else None
+        )
+        self._indexed = self.monitors
 
     @classmethod
     def from_bboxes(
@@ -63,6 +171,11 @@ class MonitorLayout:
     @property
     def virtual_bbox(self) -> tuple[int, int, int, int]:
         """Union rect of every monitor, or ``(0, 0, 0, 0)`` if empty."""
+        if self._indexed is not self.monitors:
+            self._reindex()
+        index = self._index
+        if index is not None:
+            return index.xs[0], index.ys[0], index.xs[-1], index.ys[-1]
         if not self.monitors:
             return 0, 0, 0, 0
         min_x = min(m.min_x for m in self.monitors)
@@ -72,15 +185,27 @@ class MonitorLayout:
         return min_x, min_y, max_x, max_y
 
     def find_monitor_at(self, x: float, y: float) -> Optional[MonitorInfo]:
-        for m in self.monitors:
-            if m.contains(x, y):
-                return m
-        return None
+        if self._indexed is not self.monitors:
+            self._reindex()
+        index = self._index
+        if index is None:
+            for m in self.monitors:
+                if m.contains(x, y):
+                    return m
+            return None
+        col = bisect_right(index.xs, x) - 1
+        if col < 0 or col >= index.cols:
+            return None
+        row = bisect_right(index.ys, y) - 1
+        if row < 0 or row >= len(index.ys) - 1:
+            return None
+        return index.cells[row * index.cols + col]
 
     def nearest_monitor(self, x: float, y: float) -> Optional[MonitorInfo]:
         hit = self.find_monitor_at(x, y)
         if hit is not None or not self.monitors:
             return hit
+        # Off every monitor (dead zone or outside): rare, scan.
         best: Optional[MonitorInfo] = None
         best_dist: Optional[float] = None
         for m in self.monitors:
@@ -91,41 +216,71 @@ class MonitorLayout:
                 best, best_dist = m, d
         return best
 
+    # The has_neighbor_* scans serve small layouts and monitors that
+    # aren't part of this layout. 2px snap tolerance so abutting edges
+    # count as neighbours even with a rounding gap.
+
     def has_neighbor_left(self, monitor: MonitorInfo, y: float) -> bool:
+        if self._indexed is not self.monitors:
+            self._reindex()
+        index = self._index
+        if index is not None:
+            spans = index.left.get(id(monitor))
+            if spans is not None:
+                return _in_spans(spans, y)
         for m in self.monitors:
             if m.monitor_id == monitor.monitor_id:
                 continue
             if m.max_x <= monitor.min_x and m.min_y <= y < m.max_y:
-                # 2px snap tolerance so abutting edges count as
-                # neighbours even with a rounding gap.
-                if monitor.min_x - m.max_x <= 2:
+                if monitor.min_x - m.max_x <= _NEIGHBOR_SNAP:
                     return True
         return False
 
     def has_neighbor_right(self, monitor: MonitorInfo, y: float) -> bool:
+        if self._indexed is not self.monitors:
+            self._reindex()
+        index = self._index
+        if index is not None:
+            spans = index.right.get(id(monitor))
+            if spans is not None:
+                return _in_spans(spans, y)
         for m in self.monitors:
             if m.monitor_id == monitor.monitor_id:
                 continue
             if m.min_x >= monitor.max_x and m.min_y <= y < m.max_y:
-                if m.min_x - monitor.max_x <= 2:
+                if m.min_x - monitor.max_x <= _NEIGHBOR_SNAP:
                     return True
         return False
 
     def has_neighbor_top(self, monitor: MonitorInfo, x: float) -> bool:
+        if self._indexed is not self.monitors:
+            self._reindex()
+        index = self._index
+        if index is not None:
+            spans = index.top.get(id(monitor))
+            if spans is not None:
+                return _in_spans(spans, x)
         for m in self.monitors:
             if m.monitor_id == monitor.monitor_id:
                 continue
             if m.max_y <= monitor.min_y and m.min_x <= x < m.max_x:
-                if monitor.min_y - m.max_y <= 2:
+                if monitor.min_y - m.max_y <= _NEIGHBOR_SNAP:
                     return True
         return False
 
     def has_neighbor_bottom(self, monitor: MonitorInfo, x: float) -> bool:
+        if self._indexed is not self.monitors:
+            self._reindex()
+        index = self._index
+        if index is not None:
+            spans = index.bottom.get(id(monitor))
+            if spans is not None:
+                return _in_spans(spans, x)
         for m in self.monitors:
             if m.monitor_id == monitor.monitor_id:
                 continue
             if m.min_y >= monitor.max_y and m.min_x <= x < m.max_x:
-                if m.min_y - monitor.max_y <= 2:
+                if m.min_y - monitor.max_y <= _NEIGHBOR_SNAP:
                     return True
         return False
 